@@ -17,6 +17,8 @@ from app.models.creative import Creative  # noqa
 from app.models.placement import Placement  # noqa
 from app.models.lead import Lead  # noqa
 from app.models.conversion import Conversion  # noqa
+from app.models.mart import MartCampaignDaily  # noqa
+from app.models.sync_watermark import SyncWatermark  # noqa
 
 # Конфиг Alembic
 config = context.config
@@ -0,0 +1,47 @@
+"""Add composite indexes for keyset pagination
+
+Revision ID: 3c9d1f7a4b20
+Revises: 8e4f0c2a6d15
+Create Date: 2025-10-08 10:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3c9d1f7a4b20'
+down_revision = '8e4f0c2a6d15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Indexes for `(created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC` listings."""
+    op.create_index(
+        'ix_campaigns_created_at_id',
+        'campaigns',
+        ['created_at', 'id'],
+    )
+    op.create_index(
+        'ix_creatives_created_at_id',
+        'creatives',
+        ['created_at', 'id'],
+    )
+    op.create_index(
+        'ix_creatives_campaign_id_created_at_id',
+        'creatives',
+        ['campaign_id', 'created_at', 'id'],
+    )
+    op.create_index(
+        'ix_settings_category_key',
+        'settings',
+        ['category', 'key'],
+    )
+
+
+def downgrade() -> None:
+    """Drop keyset pagination indexes."""
+    op.drop_index('ix_settings_category_key', table_name='settings')
+    op.drop_index('ix_creatives_campaign_id_created_at_id', table_name='creatives')
+    op.drop_index('ix_creatives_created_at_id', table_name='creatives')
+    op.drop_index('ix_campaigns_created_at_id', table_name='campaigns')
@@ -0,0 +1,41 @@
+"""Add composite indexes for analytics date ranges
+
+Revision ID: 5b2d7e41c9a3
+Revises: 031f658c511a
+Create Date: 2025-10-06 11:20:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '5b2d7e41c9a3'
+down_revision = '031f658c511a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Composite indexes for `campaign_id = ? AND ts >= ? AND ts < ?` filters."""
+    op.create_index(
+        'ix_conversions_campaign_id_converted_at',
+        'conversions',
+        ['campaign_id', 'converted_at'],
+    )
+    op.create_index(
+        'ix_conversions_campaign_id_created_at',
+        'conversions',
+        ['campaign_id', 'created_at'],
+    )
+    op.create_index(
+        'ix_placements_campaign_id_published_at',
+        'placements',
+        ['campaign_id', 'published_at'],
+    )
+
+
+def downgrade() -> None:
+    """Drop analytics range indexes."""
+    op.drop_index('ix_placements_campaign_id_published_at', table_name='placements')
+    op.drop_index('ix_conversions_campaign_id_created_at', table_name='conversions')
+    op.drop_index('ix_conversions_campaign_id_converted_at', table_name='conversions')
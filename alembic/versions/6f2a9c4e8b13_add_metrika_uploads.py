@@ -0,0 +1,56 @@
+"""Add Metrika offline conversion upload tracking
+
+Revision ID: 6f2a9c4e8b13
+Revises: d4b8e2f61a07
+Create Date: 2025-10-11 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6f2a9c4e8b13'
+down_revision = 'd4b8e2f61a07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """metrika_uploads (one CSV file) + metrika_uploaded_conversions (dedupe key)."""
+    op.create_table(
+        'metrika_uploads',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('batch_key', sa.String(length=64), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('metrika_upload_id', sa.String(length=50), nullable=True),
+        sa.Column('rows', sa.Integer(), nullable=False),
+        sa.Column('error_message', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column('uploaded_at', sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('batch_key')
+    )
+    op.create_index(op.f('ix_metrika_uploads_status'), 'metrika_uploads', ['status'], unique=False)
+    op.create_table(
+        'metrika_uploaded_conversions',
+        sa.Column('conversion_id', sa.Integer(), nullable=False),
+        sa.Column('upload_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['conversion_id'], ['conversions.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['upload_id'], ['metrika_uploads.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('conversion_id')
+    )
+    op.create_index(
+        op.f('ix_metrika_uploaded_conversions_upload_id'),
+        'metrika_uploaded_conversions',
+        ['upload_id'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    """Drop Metrika upload tracking."""
+    op.drop_index(op.f('ix_metrika_uploaded_conversions_upload_id'), table_name='metrika_uploaded_conversions')
+    op.drop_table('metrika_uploaded_conversions')
+    op.drop_index(op.f('ix_metrika_uploads_status'), table_name='metrika_uploads')
+    op.drop_table('metrika_uploads')
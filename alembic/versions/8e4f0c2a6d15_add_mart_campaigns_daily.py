@@ -0,0 +1,61 @@
+"""Add mart_campaigns_daily and sync_watermarks
+
+Revision ID: 8e4f0c2a6d15
+Revises: 5b2d7e41c9a3
+Create Date: 2025-10-07 09:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e4f0c2a6d15'
+down_revision = '5b2d7e41c9a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Create daily campaign mart, watermark table and created_at indexes."""
+    op.create_table(
+        'mart_campaigns_daily',
+        sa.Column('campaign_id', sa.UUID(), nullable=False),
+        sa.Column('channel_code', sa.String(length=20), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('leads_count', sa.Integer(), nullable=False),
+        sa.Column('conversions_count', sa.Integer(), nullable=False),
+        sa.Column('revenue_rub', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column('spend_rub', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column('clicks', sa.Integer(), nullable=False),
+        sa.Column('impressions', sa.Integer(), nullable=False),
+        sa.Column('ttp_days_sum', sa.Integer(), nullable=False),
+        sa.Column('ttp_days_count', sa.Integer(), nullable=False),
+        sa.Column('ttp_days_max', sa.Integer(), nullable=True),
+        sa.Column('refreshed_at', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['campaign_id'], ['campaigns.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('campaign_id', 'channel_code', 'date')
+    )
+    op.create_index(op.f('ix_mart_campaigns_daily_date'), 'mart_campaigns_daily', ['date'], unique=False)
+
+    op.create_table(
+        'sync_watermarks',
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('watermark_at', sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column('last_id', sa.BigInteger(), nullable=True),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+    # Поиск строк, появившихся после водяного знака
+    op.create_index(op.f('ix_conversions_created_at'), 'conversions', ['created_at'], unique=False)
+    op.create_index(op.f('ix_leads_created_at'), 'leads', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Drop daily campaign mart and watermark table."""
+    op.drop_index(op.f('ix_leads_created_at'), table_name='leads')
+    op.drop_index(op.f('ix_conversions_created_at'), table_name='conversions')
+    op.drop_table('sync_watermarks')
+    op.drop_index(op.f('ix_mart_campaigns_daily_date'), table_name='mart_campaigns_daily')
+    op.drop_table('mart_campaigns_daily')
@@ -0,0 +1,52 @@
+"""Add spend_daily fact table
+
+Revision ID: a71e5c3d9f42
+Revises: 3c9d1f7a4b20
+Create Date: 2025-10-09 10:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a71e5c3d9f42'
+down_revision = '3c9d1f7a4b20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """spend_daily: channel × external campaign × day, upserted by sync_spend."""
+    op.create_table(
+        'spend_daily',
+        sa.Column('channel_code', sa.String(length=20), nullable=False),
+        sa.Column('external_campaign_id', sa.String(length=100), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('campaign_id', sa.UUID(), nullable=True),
+        sa.Column('campaign_name', sa.Text(), nullable=True),
+        sa.Column('impressions', sa.Integer(), nullable=False),
+        sa.Column('clicks', sa.Integer(), nullable=False),
+        sa.Column('spend_rub', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column('synced_at', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['campaign_id'], ['campaigns.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('channel_code', 'external_campaign_id', 'date')
+    )
+    op.create_index(op.f('ix_spend_daily_date'), 'spend_daily', ['date'], unique=False)
+    op.create_index(op.f('ix_spend_daily_campaign_id'), 'spend_daily', ['campaign_id'], unique=False)
+    op.create_index(op.f('ix_spend_daily_synced_at'), 'spend_daily', ['synced_at'], unique=False)
+    # Сопоставление строк отчёта с размещениями по внешнему ID
+    op.create_index(
+        'ix_placements_channel_code_external_campaign_id',
+        'placements',
+        ['channel_code', 'external_campaign_id'],
+    )
+
+
+def downgrade() -> None:
+    """Drop spend_daily."""
+    op.drop_index('ix_placements_channel_code_external_campaign_id', table_name='placements')
+    op.drop_index(op.f('ix_spend_daily_synced_at'), table_name='spend_daily')
+    op.drop_index(op.f('ix_spend_daily_campaign_id'), table_name='spend_daily')
+    op.drop_index(op.f('ix_spend_daily_date'), table_name='spend_daily')
+    op.drop_table('spend_daily')
@@ -0,0 +1,38 @@
+"""Add conversions.updated_at and mart_dirty_days
+
+Revision ID: b3e7d1c9f250
+Revises: 6f2a9c4e8b13
+Create Date: 2025-10-13 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e7d1c9f250'
+down_revision = '6f2a9c4e8b13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """conversions.updated_at (mart freshness) + mart_dirty_days (days left by deleted/moved rows)."""
+    op.add_column('conversions', sa.Column('updated_at', sa.TIMESTAMP(timezone=True), nullable=True))
+    op.execute("UPDATE conversions SET updated_at = created_at")
+    op.alter_column('conversions', 'updated_at', nullable=False)
+    op.create_index(op.f('ix_conversions_updated_at'), 'conversions', ['updated_at'], unique=False)
+
+    op.create_table(
+        'mart_dirty_days',
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('marked_at', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('date')
+    )
+
+
+def downgrade() -> None:
+    """Drop mart_dirty_days and conversions.updated_at."""
+    op.drop_table('mart_dirty_days')
+    op.drop_index(op.f('ix_conversions_updated_at'), table_name='conversions')
+    op.drop_column('conversions', 'updated_at')
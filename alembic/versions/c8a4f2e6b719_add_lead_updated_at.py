@@ -0,0 +1,30 @@
+"""Add leads.updated_at
+
+Revision ID: c8a4f2e6b719
+Revises: b3e7d1c9f250
+Create Date: 2025-10-14 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8a4f2e6b719'
+down_revision = 'b3e7d1c9f250'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """leads.updated_at: mart freshness for re-attributed leads (earlier first touch)."""
+    op.add_column('leads', sa.Column('updated_at', sa.TIMESTAMP(timezone=True), nullable=True))
+    op.execute("UPDATE leads SET updated_at = created_at")
+    op.alter_column('leads', 'updated_at', nullable=False)
+    op.create_index(op.f('ix_leads_updated_at'), 'leads', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Drop leads.updated_at."""
+    op.drop_index(op.f('ix_leads_updated_at'), table_name='leads')
+    op.drop_column('leads', 'updated_at')
@@ -0,0 +1,56 @@
+"""Add bookings table and unique conversion per booking
+
+Revision ID: d4b8e2f61a07
+Revises: a71e5c3d9f42
+Create Date: 2025-10-10 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4b8e2f61a07'
+down_revision = 'a71e5c3d9f42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """bookings from YCLIENTS (upsert by yclients_id) + one conversion per booking."""
+    op.create_table(
+        'bookings',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('yclients_id', sa.Integer(), nullable=False),
+        sa.Column('yclients_client_id', sa.Integer(), nullable=True),
+        sa.Column('lead_id', sa.UUID(), nullable=True),
+        sa.Column('phone', sa.String(length=20), nullable=True),
+        sa.Column('sku', sa.String(length=50), nullable=True),
+        sa.Column('starts_at', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('price_rub', sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column('paid_at', sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column('changed_at', sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['lead_id'], ['leads.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('yclients_id')
+    )
+    op.create_index(op.f('ix_bookings_lead_id'), 'bookings', ['lead_id'], unique=False)
+    op.create_index(op.f('ix_bookings_phone'), 'bookings', ['phone'], unique=False)
+    op.create_index(
+        'ux_conversions_booking_id',
+        'conversions',
+        ['booking_id'],
+        unique=True,
+        postgresql_where=sa.text('booking_id IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    """Drop bookings."""
+    op.drop_index('ux_conversions_booking_id', table_name='conversions')
+    op.drop_index(op.f('ix_bookings_phone'), table_name='bookings')
+    op.drop_index(op.f('ix_bookings_lead_id'), table_name='bookings')
+    op.drop_table('bookings')
@@ -0,0 +1,37 @@
+"""
+DeepCalm — Admin API
+
+Служебные endpoints (read-only режим).
+"""
+from fastapi import APIRouter, HTTPException, status
+import structlog
+
+from app.core.freeze import freeze_state
+from app.schemas.admin import FreezeStatusResponse, FreezeToggleRequest
+
+logger = structlog.get_logger(__name__)
+router = APIRouter()
+
+# Доступен и в read-only режиме — иначе его нельзя выключить
+FREEZE_PATH = "/admin/freeze"
+
+
+@router.get(FREEZE_PATH, response_model=FreezeStatusResponse)
+def get_freeze_status():
+    """Текущее состояние read-only режима"""
+    return freeze_state.snapshot()
+
+
+@router.put(FREEZE_PATH, response_model=FreezeStatusResponse)
+def set_freeze_status(request: FreezeToggleRequest):
+    """
+    Включает или выключает read-only режим
+
+    Создаёт/удаляет файл-флаг, остальные воркеры подхватывают изменение
+    в течение freeze_poll_interval_seconds. Если режим задан переменной
+    окружения DC_FREEZE, переключение недоступно (409).
+    """
+    try:
+        return freeze_state.set(request.enabled)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
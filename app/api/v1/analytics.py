@@ -5,14 +5,22 @@ from uuid import UUID
 
 import structlog
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.db import get_db
+from app.core.cache import response_cache
+from app.core.db import get_async_db
 from app.schemas.analytics import (
     CampaignAnalyticsResponse,
     DashboardSummary,
     DateRangeRequest,
 )
+from app.services.analytics_cache import (
+    campaign_metrics_cache_key,
+    campaign_metrics_cache_tags,
+    dashboard_cache_key,
+    dashboard_cache_tags,
+)
 from app.services.analytics_service import AnalyticsService
 
 logger = structlog.get_logger()
@@ -20,11 +28,11 @@ router = APIRouter(prefix="/analytics", tags=["analytics"])
 
 
 @router.get("/campaigns/{campaign_id}", response_model=CampaignAnalyticsResponse)
-def get_campaign_analytics(
+async def get_campaign_analytics(
     campaign_id: UUID,
     start_date: str = Query(None, description="Начальная дата (YYYY-MM-DD)"),
     end_date: str = Query(None, description="Конечная дата (YYYY-MM-DD)"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Получает аналитику по кампании
@@ -36,6 +44,8 @@ def get_campaign_analytics(
     Возвращает:
     - Метрики кампании (CAC, ROAS, конверсии, выручка)
     - Разбивку по каналам
+
+    Ответ кэшируется по кампании и периоду (сбрасывается при записи).
     """
     logger.info(
         "get_campaign_analytics_request",
@@ -44,8 +54,6 @@ def get_campaign_analytics(
         end_date=end_date
     )
 
-    service = AnalyticsService(db)
-
     try:
         # Парсим даты если есть
         start_date_obj = None
@@ -59,22 +67,28 @@ def get_campaign_analytics(
             from datetime import datetime
             end_date_obj = datetime.strptime(end_date, "%Y-%m-%d").date()
 
-        result = service.get_campaign_metrics(
-            campaign_id=campaign_id,
-            start_date=start_date_obj,
-            end_date=end_date_obj
-        )
-
-        response = CampaignAnalyticsResponse(
-            metrics=result["metrics"],
-            channels=result["channels"]
+        def compute(session: Session) -> dict:
+            result = AnalyticsService(session).get_campaign_metrics(
+                campaign_id=campaign_id,
+                start_date=start_date_obj,
+                end_date=end_date_obj
+            )
+            return CampaignAnalyticsResponse(
+                metrics=result["metrics"],
+                channels=result["channels"]
+            ).model_dump(mode="json")
+
+        response = await response_cache.aget_or_set(
+            campaign_metrics_cache_key(campaign_id, start_date_obj, end_date_obj),
+            tags=campaign_metrics_cache_tags(campaign_id),
+            compute=lambda: db.run_sync(compute)
         )
 
         logger.info(
             "get_campaign_analytics_success",
             campaign_id=str(campaign_id),
-            leads=result["metrics"].leads_count,
-            conversions=result["metrics"].conversions_count
+            leads=response["metrics"]["leads_count"],
+            conversions=response["metrics"]["conversions_count"]
         )
 
         return response
@@ -100,10 +114,10 @@ def get_campaign_analytics(
 
 
 @router.get("/dashboard", response_model=DashboardSummary)
-def get_dashboard_summary(
+async def get_dashboard_summary(
     start_date: str = Query(None, description="Начальная дата (YYYY-MM-DD)"),
     end_date: str = Query(None, description="Конечная дата (YYYY-MM-DD)"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Получает сводку для дашборда
@@ -117,6 +131,8 @@ def get_dashboard_summary(
     - Суммарные лиды, конверсии, выручка
     - Средние CAC и ROAS
     - Лучшая кампания по ROAS
+
+    Ответ кэшируется по периоду (сбрасывается при записи).
     """
     logger.info(
         "get_dashboard_summary_request",
@@ -124,8 +140,6 @@ def get_dashboard_summary(
         end_date=end_date
     )
 
-    service = AnalyticsService(db)
-
     try:
         # Парсим даты если есть
         start_date_obj = None
@@ -139,16 +153,23 @@ def get_dashboard_summary(
             from datetime import datetime
             end_date_obj = datetime.strptime(end_date, "%Y-%m-%d").date()
 
-        summary = service.get_dashboard_summary(
-            start_date=start_date_obj,
-            end_date=end_date_obj
+        def compute(session: Session) -> dict:
+            return AnalyticsService(session).get_dashboard_summary(
+                start_date=start_date_obj,
+                end_date=end_date_obj
+            ).model_dump(mode="json")
+
+        summary = await response_cache.aget_or_set(
+            dashboard_cache_key(start_date_obj, end_date_obj),
+            tags=dashboard_cache_tags(),
+            compute=lambda: db.run_sync(compute)
         )
 
         logger.info(
             "get_dashboard_summary_success",
-            total_campaigns=summary.total_campaigns,
-            total_leads=summary.total_leads,
-            total_conversions=summary.total_conversions
+            total_campaigns=summary["total_campaigns"],
+            total_leads=summary["total_leads"],
+            total_conversions=summary["total_conversions"]
         )
 
         return summary
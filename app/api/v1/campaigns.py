@@ -4,14 +4,18 @@ DeepCalm — Campaigns API
 CRUD endpoints для управления кампаниями.
 Следует DEEP-CALM-MVP-BLUEPRINT.md
 """
+from datetime import datetime
 from typing import List, Optional
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import select
 import structlog
 
-from app.core.db import get_db
+from app.core.db import get_async_db, get_db
+from app.core.pagination import TOTAL_MODE_PATTERN, InvalidCursorError, paginate
+from app.core.responses import json_response
 from app.models.campaign import Campaign
 from app.schemas.campaign import (
     CampaignCreate,
@@ -19,67 +23,98 @@ from app.schemas.campaign import (
     CampaignResponse,
     CampaignListResponse
 )
+from app.services.marts import mark_full_refresh
 
 logger = structlog.get_logger(__name__)
 router = APIRouter()
 
 
 @router.get("/campaigns", response_model=CampaignListResponse)
-def get_campaigns(
-    page: int = Query(1, ge=1, description="Номер страницы"),
+async def get_campaigns(
+    page: int = Query(1, ge=1, description="Номер страницы (если не передан cursor)"),
     page_size: int = Query(20, ge=1, le=100, description="Размер страницы"),
     status: Optional[str] = Query(None, description="Фильтр по статусу"),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="next_cursor предыдущей страницы"),
+    total_mode: Optional[str] = Query(
+        None,
+        pattern=TOTAL_MODE_PATTERN,
+        description="Подсчёт total: exact|approx|none"
+    ),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Получить список кампаний с пагинацией.
 
+    Курсорный режим выбирает страницу по `(created_at, id)` и не
+    замедляется на глубоких страницах; page/page_size работают как раньше.
+
     Args:
-        page: Номер страницы (начиная с 1)
+        page: Номер страницы (начиная с 1), игнорируется при cursor
         page_size: Количество элементов на странице (1-100)
         status: Фильтр по статусу (draft|active|paused|stopped)
-        db: Database session
+        cursor: Токен next_cursor из предыдущего ответа
+        total_mode: exact — COUNT(*), approx — оценка планировщика,
+            none — без total (по умолчанию при cursor)
+        db: Async database session
 
     Returns:
         CampaignListResponse с пагинацией
 
+    Raises:
+        HTTPException: 400 если курсор некорректен
+
     Examples:
         >>> GET /api/v1/campaigns?page=1&page_size=20&status=active
+        >>> GET /api/v1/campaigns?page_size=20&cursor=WyIyMDI1LTEw...
     """
     logger.info(
         "campaigns_list_requested",
         page=page,
         page_size=page_size,
-        status=status
+        status=status,
+        cursor=bool(cursor),
+        total_mode=total_mode
     )
 
     # Базовый запрос
-    query = db.query(Campaign)
+    query = select(Campaign)
 
     # Фильтр по статусу
     if status:
-        query = query.filter(Campaign.status == status)
-
-    # Подсчёт общего количества
-    total = query.count()
+        query = query.where(Campaign.status == status)
 
-    # Пагинация
-    offset = (page - 1) * page_size
-    campaigns = query.order_by(Campaign.created_at.desc()).offset(offset).limit(page_size).all()
+    try:
+        result = await paginate(
+            db,
+            query,
+            order_by=(Campaign.created_at, Campaign.id),
+            cursor_values=lambda campaign: (campaign.created_at.isoformat(), str(campaign.id)),
+            cursor_parsers=(datetime.fromisoformat, UUID),
+            page_size=page_size,
+            cursor=cursor,
+            page=page,
+            total_mode=total_mode
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     logger.info(
         "campaigns_list_returned",
-        total=total,
-        page=page,
-        returned=len(campaigns)
+        total=result.total,
+        page=result.page,
+        returned=len(result.items),
+        has_more=result.has_more
     )
 
-    return CampaignListResponse(
-        items=campaigns,
-        total=total,
-        page=page,
-        page_size=page_size
-    )
+    return json_response(CampaignListResponse(
+        items=result.items,
+        total=result.total,
+        total_approximate=result.total_approximate,
+        page=result.page,
+        page_size=page_size,
+        next_cursor=result.next_cursor,
+        has_more=result.has_more
+    ))
 
 
 @router.post("/campaigns", response_model=CampaignResponse, status_code=201)
@@ -275,6 +310,8 @@ def delete_campaign(
 
     try:
         db.delete(campaign)
+        # Лиды кампании уже учтены в витрине по названию
+        mark_full_refresh(db)
         db.commit()
 
         logger.info(
@@ -3,13 +3,18 @@ DeepCalm — Creatives API
 
 Управление креативами и генерация через LLM.
 """
+from datetime import datetime
 from typing import Optional
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import structlog
 
-from app.core.db import get_db
+from app.core.db import get_async_db, get_db
+from app.core.pagination import TOTAL_MODE_PATTERN, InvalidCursorError, paginate
+from app.core.responses import json_response
 from app.models.campaign import Campaign
 from app.models.creative import Creative
 from app.schemas.creative import (
@@ -25,33 +30,77 @@ router = APIRouter()
 
 
 @router.get("/creatives", response_model=CreativeListResponse)
-def get_creatives(
+async def get_creatives(
     campaign_id: Optional[UUID] = Query(None, description="Фильтр по кампании"),
-    db: Session = Depends(get_db)
+    page: int = Query(1, ge=1, description="Номер страницы (если не передан cursor)"),
+    page_size: int = Query(50, ge=1, le=100, description="Размер страницы"),
+    cursor: Optional[str] = Query(None, description="next_cursor предыдущей страницы"),
+    total_mode: Optional[str] = Query(
+        None,
+        pattern=TOTAL_MODE_PATTERN,
+        description="Подсчёт total: exact|approx|none"
+    ),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Получить список креативов.
 
+    Раньше список отдавался целиком; теперь страница ограничена
+    page_size (не больше 100), следующая — по next_cursor или page.
+
     Args:
         campaign_id: Фильтр по ID кампании (опционально)
-        db: Database session
+        page: Номер страницы (начиная с 1), игнорируется при cursor
+        page_size: Количество элементов на странице (1-100)
+        cursor: Токен next_cursor из предыдущего ответа
+        total_mode: exact|approx|none (по умолчанию none при cursor)
+        db: Async database session
 
     Returns:
         CreativeListResponse
+
+    Raises:
+        HTTPException: 400 если курсор некорректен
     """
-    logger.info("creatives_list_requested", campaign_id=str(campaign_id) if campaign_id else None)
+    logger.info(
+        "creatives_list_requested",
+        campaign_id=str(campaign_id) if campaign_id else None,
+        page=page,
+        page_size=page_size,
+        cursor=bool(cursor)
+    )
 
-    query = db.query(Creative)
+    query = select(Creative)
 
     if campaign_id:
-        query = query.filter(Creative.campaign_id == campaign_id)
-
-    creatives = query.order_by(Creative.created_at.desc()).all()
-    total = query.count()
-
-    logger.info("creatives_list_returned", total=total)
+        query = query.where(Creative.campaign_id == campaign_id)
 
-    return CreativeListResponse(items=creatives, total=total)
+    try:
+        result = await paginate(
+            db,
+            query,
+            order_by=(Creative.created_at, Creative.id),
+            cursor_values=lambda creative: (creative.created_at.isoformat(), str(creative.id)),
+            cursor_parsers=(datetime.fromisoformat, UUID),
+            page_size=page_size,
+            cursor=cursor,
+            page=page,
+            total_mode=total_mode
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    logger.info("creatives_list_returned", total=result.total, returned=len(result.items))
+
+    return json_response(CreativeListResponse(
+        items=result.items,
+        total=result.total,
+        total_approximate=result.total_approximate,
+        page=result.page,
+        page_size=page_size,
+        next_cursor=result.next_cursor,
+        has_more=result.has_more
+    ))
 
 
 @router.post("/creatives", response_model=CreativeResponse, status_code=201)
@@ -0,0 +1,35 @@
+"""
+DeepCalm — Leads API
+
+Приём лидов пакетами (Identity Map по телефону).
+"""
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+import structlog
+
+from app.core.db import get_db
+from app.core.responses import json_response
+from app.schemas.lead import LeadBatchRequest, LeadBatchResponse
+from app.services.lead_ingestion import LeadIngestionService
+
+logger = structlog.get_logger(__name__)
+router = APIRouter()
+
+
+@router.post("/leads/batch", response_model=LeadBatchResponse)
+def ingest_leads_batch(
+    batch: LeadBatchRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Пакетный upsert лидов по телефону.
+
+    Телефоны нормализуются в +7XXXXXXXXXX, дубли внутри пакета сворачиваются.
+    У существующего лида сохраняется самый ранний first touch с его UTM-метками.
+    lead_ids возвращаются в порядке элементов запроса (null — телефон не распознан).
+    """
+    logger.info("ingest_leads_batch", count=len(batch.leads))
+
+    result = LeadIngestionService(db).ingest(batch.leads)
+
+    return json_response(LeadBatchResponse(**result))
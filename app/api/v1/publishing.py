@@ -1,22 +1,28 @@
 """
 API endpoints для публикации креативов на рекламные платформы
 """
+from typing import Iterator
 from uuid import UUID
 
 import structlog
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.core.db import get_db
+from app.core.responses import json_response
 from app.schemas.publishing import (
     PauseResponse,
     PlacementInfo,
+    PublishCompletedEvent,
     PublishingStatusResponse,
+    PublishOutcomeEvent,
     PublishRequest,
     PublishResponse,
 )
 from app.core.config import settings
-from app.integrations.yandex_direct import YandexDirectClient
+from app.integrations.resilience import channel_resilience
+from app.integrations.yandex_direct import YandexDirectClient, get_yandex_direct_client
 from app.services.publishing_service import PublishingService
 
 logger = structlog.get_logger()
@@ -84,6 +90,66 @@ def publish_campaign(
         )
 
 
+@router.post("/publish/stream")
+def publish_campaign_stream(
+    request: PublishRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Публикует кампанию и стримит результат каждого размещения (NDJSON)
+
+    Строки `{"event": "placement", ...}` приходят по мере ответов площадок,
+    последняя — `{"event": "completed", ...}` со счётчиками.
+
+    - **campaign_id**: ID кампании для публикации
+    - **channels**: Список каналов (vk/direct/avito). Если не указано - публикуем во все каналы кампании
+    """
+    logger.info("publish_campaign_stream_request", campaign_id=str(request.campaign_id), channels=request.channels)
+
+    service = PublishingService(db)
+
+    try:
+        outcomes = service.iter_publish_campaign(
+            campaign_id=request.campaign_id,
+            channels=request.channels
+        )
+    except ValueError as e:
+        logger.error("publish_campaign_validation_error", campaign_id=str(request.campaign_id), error=str(e))
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    def stream() -> Iterator[bytes]:
+        success_count = 0
+        failed_count = 0
+        try:
+            for outcome in outcomes:
+                placement = outcome.pop("placement", None)
+                if placement is not None:
+                    success_count += 1
+                    outcome["placement"] = PlacementInfo(
+                        placement_id=placement.id,
+                        channel=placement.channel_code,
+                        creative_variant=outcome["creative_variant"],
+                        external_id=placement.external_campaign_id,
+                        status=placement.status,
+                        created_at=placement.published_at
+                    )
+                else:
+                    failed_count += 1
+                yield PublishOutcomeEvent(**outcome).model_dump_json().encode() + b"\n"
+
+            yield PublishCompletedEvent(
+                campaign_id=request.campaign_id,
+                success_count=success_count,
+                failed_count=failed_count
+            ).model_dump_json().encode() + b"\n"
+        finally:
+            # get_db закрывает сессию до начала стрима (FastAPI >= 0.106);
+            # соединение, взятое генератором для записи, возвращаем в пул
+            db.close()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
 @router.get("/status/{campaign_id}", response_model=PublishingStatusResponse)
 def get_publishing_status(
     campaign_id: UUID,
@@ -129,7 +195,7 @@ def get_publishing_status(
             total_placements=result["total_placements"]
         )
 
-        return response
+        return json_response(response)
 
     except ValueError as e:
         logger.error("get_publishing_status_validation_error", campaign_id=str(campaign_id), error=str(e))
@@ -187,22 +253,20 @@ def pause_campaign(
 
 
 @router.get("/health/yandex-direct")
-def check_yandex_direct_health():
+async def check_yandex_direct_health(
+    client: YandexDirectClient = Depends(get_yandex_direct_client)
+):
     """
     Проверяет подключение к API Яндекс.Директ
 
-    Возвращает статус подключения и количество доступных кампаний
+    Возвращает статус подключения, количество доступных кампаний
+    и последние известные баллы API (заголовок Units) по логинам
     """
     logger.info("yandex_direct_health_check_request")
 
     try:
-        client = YandexDirectClient(
-            token=settings.yandex_direct_token or None,
-            login=settings.yandex_direct_login or None,
-            sandbox=not settings.is_prod,
-        )
-
-        health_status = client.health_check()
+        health_status = await client.ahealth_check()
+        health_status["units"] = client.units_snapshot()
 
         logger.info(
             "yandex_direct_health_check_success",
@@ -221,8 +285,22 @@ def check_yandex_direct_health():
         }
 
 
+@router.get("/health/channels")
+def check_channels_health():
+    """
+    Состояние автоматов каналов (aegis: api_5xx_rate_5m > 0.02 → пауза публикации)
+
+    Для каждого канала: state (closed|open|half_open), вызовов и доля
+    временных ошибок в окне, paused_until — до какого времени публикация
+    в канал приостановлена
+    """
+    return {"channels": channel_resilience.snapshot()}
+
+
 @router.get("/campaigns/yandex-direct")
-def list_yandex_direct_campaigns():
+async def list_yandex_direct_campaigns(
+    client: YandexDirectClient = Depends(get_yandex_direct_client)
+):
     """
     Получает список кампаний из Яндекс.Директ
 
@@ -231,13 +309,7 @@ def list_yandex_direct_campaigns():
     logger.info("yandex_direct_campaigns_list_request")
 
     try:
-        client = YandexDirectClient(
-            token=settings.yandex_direct_token or None,
-            login=settings.yandex_direct_login or None,
-            sandbox=not settings.is_prod,
-        )
-
-        campaigns = client.get_campaigns()
+        campaigns = await client.aget_campaigns()
 
         logger.info(
             "yandex_direct_campaigns_listed",
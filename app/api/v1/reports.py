@@ -9,6 +9,7 @@ from sqlalchemy.orm import Session
 import structlog
 
 from app.core.db import get_db
+from app.core.responses import json_response
 from app.services.weekly_reports import WeeklyReportsService
 from app.services.scheduler import scheduler
 from app.schemas.reports import (
@@ -70,7 +71,7 @@ def preview_weekly_data(
 
     try:
         data = reports.get_weekly_data(weeks_back)
-        return data
+        return json_response(data)
 
     except Exception as e:
         logger.error("preview_data_failed", error=str(e))
@@ -4,14 +4,20 @@ DeepCalm — Settings API
 CRUD endpoints для управления настройками системы.
 Поддерживает конфигурацию AI Analyst и других компонентов.
 """
+from itertools import groupby
 from typing import List, Optional, Union, Dict, Any
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, or_, select
 import structlog
 
-from app.core.db import get_db
+from app.core.db import get_async_db, get_db
+from app.core.pagination import TOTAL_MODE_PATTERN, InvalidCursorError, paginate
+from app.core.responses import json_response
 from app.models.setting import Setting
+from app.services.settings_registry import convert_value, settings_registry
 from app.schemas.setting import (
     SettingCreate,
     SettingUpdate,
@@ -27,98 +33,123 @@ router = APIRouter()
 
 
 def _convert_value(value: str, value_type: str) -> Union[str, int, float, bool]:
-    """Конвертирует строковое значение в нужный тип"""
+    """Конвертирует строковое значение в нужный тип (422 при ошибке)"""
     try:
-        if value_type == 'int':
-            return int(value)
-        elif value_type == 'float':
-            return float(value)
-        elif value_type == 'bool':
-            return value.lower() in ('true', '1', 'yes', 'on')
-        else:  # string
-            return value
-    except (ValueError, AttributeError):
-        raise HTTPException(
-            status_code=422,
-            detail=f"Невозможно преобразовать '{value}' в тип {value_type}"
-        )
+        return convert_value(value, value_type)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
 
 @router.get("/settings", response_model=SettingListResponse)
-def get_settings(
-    page: int = Query(1, ge=1, description="Номер страницы"),
+async def get_settings(
+    page: int = Query(1, ge=1, description="Номер страницы (если не передан cursor)"),
     page_size: int = Query(50, ge=1, le=100, description="Размер страницы"),
     category: Optional[str] = Query(None, description="Фильтр по категории"),
     search: Optional[str] = Query(None, description="Поиск по ключу или описанию"),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="next_cursor предыдущей страницы"),
+    total_mode: Optional[str] = Query(
+        None,
+        pattern=TOTAL_MODE_PATTERN,
+        description="Подсчёт total: exact|approx|none"
+    ),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Получить список настроек с пагинацией и фильтрацией
+    Получить список настроек с пагинацией и фильтрацией.
+
+    Курсор выбирает страницу по `(category, key)`; page/page_size
+    работают как раньше.
     """
-    logger.info("get_settings", page=page, page_size=page_size, category=category, search=search)
+    logger.info(
+        "get_settings",
+        page=page,
+        page_size=page_size,
+        category=category,
+        search=search,
+        cursor=bool(cursor),
+        total_mode=total_mode
+    )
 
-    query = db.query(Setting)
+    query = select(Setting)
 
     # Фильтр по категории
     if category:
-        query = query.filter(Setting.category == category)
+        query = query.where(Setting.category == category)
 
     # Поиск по ключу или описанию
     if search:
         search_pattern = f"%{search}%"
-        query = query.filter(
-            Setting.key.ilike(search_pattern) |
+        query = query.where(or_(
+            Setting.key.ilike(search_pattern),
             Setting.description.ilike(search_pattern)
-        )
-
-    # Подсчет общего количества
-    total = query.count()
-
-    # Пагинация
-    offset = (page - 1) * page_size
-    settings = query.order_by(Setting.category, Setting.key).offset(offset).limit(page_size).all()
-
-    pages = (total + page_size - 1) // page_size
+        ))
 
-    return SettingListResponse(
-        settings=settings,
-        total=total,
-        page=page,
+    try:
+        result = await paginate(
+            db,
+            query,
+            order_by=(Setting.category, Setting.key),
+            cursor_values=lambda setting: (setting.category, setting.key),
+            cursor_parsers=(str, str),
+            page_size=page_size,
+            cursor=cursor,
+            page=page,
+            total_mode=total_mode,
+            descending=False
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    pages = None
+    if result.total is not None:
+        pages = (result.total + page_size - 1) // page_size
+
+    return json_response(SettingListResponse(
+        settings=result.items,
+        total=result.total,
+        total_approximate=result.total_approximate,
+        page=result.page,
         page_size=page_size,
-        pages=pages
-    )
+        pages=pages,
+        next_cursor=result.next_cursor,
+        has_more=result.has_more
+    ))
 
 
 @router.get("/settings/categories", response_model=List[SettingsByCategory])
-def get_settings_by_categories(db: Session = Depends(get_db)):
+async def get_settings_by_categories(db: AsyncSession = Depends(get_async_db)):
     """
     Получить настройки, сгруппированные по категориям
+
+    Один запрос, упорядоченный по (category, key) — индекс
+    ix_settings_category_key; группировка в памяти.
     """
     logger.info("get_settings_by_categories")
 
-    # Получаем все категории
-    categories = db.query(Setting.category).distinct().all()
-    result = []
+    rows = (await db.scalars(
+        select(Setting).order_by(Setting.category, Setting.key)
+    )).all()
 
-    for (category,) in categories:
-        settings = db.query(Setting).filter(Setting.category == category).order_by(Setting.key).all()
+    result = []
+    for category, group in groupby(rows, key=lambda setting: setting.category):
+        settings = list(group)
         result.append(SettingsByCategory(
             category=category,
             settings=settings,
             count=len(settings)
         ))
 
-    return result
+    return json_response(result)
 
 
 @router.get("/settings/{key}", response_model=SettingResponse)
-def get_setting(key: str, db: Session = Depends(get_db)):
+async def get_setting(key: str, db: AsyncSession = Depends(get_async_db)):
     """
     Получить настройку по ключу
     """
     logger.info("get_setting", key=key)
 
-    setting = db.query(Setting).filter(Setting.key == key).first()
+    setting = await db.scalar(select(Setting).where(Setting.key == key))
     if not setting:
         raise HTTPException(status_code=404, detail=f"Настройка '{key}' не найдена")
 
@@ -126,21 +157,24 @@ def get_setting(key: str, db: Session = Depends(get_db)):
 
 
 @router.get("/settings/{key}/value", response_model=SettingValueResponse)
-def get_setting_value(key: str, db: Session = Depends(get_db)):
+async def get_setting_value(key: str, db: AsyncSession = Depends(get_async_db)):
     """
     Получить типизированное значение настройки
     """
     logger.info("get_setting_value", key=key)
 
-    setting = db.query(Setting).filter(Setting.key == key).first()
+    # Значение уже приведено к типу в реестре; БД — только если реестр сброшен
+    values = settings_registry.cached()
+    if values is None:
+        values = await db.run_sync(settings_registry.values)
+
+    setting = values.get(key)
     if not setting:
         raise HTTPException(status_code=404, detail=f"Настройка '{key}' не найдена")
 
-    typed_value = _convert_value(setting.value, setting.value_type)
-
     return SettingValueResponse(
-        key=setting.key,
-        value=typed_value,
+        key=key,
+        value=setting.value,
         value_type=setting.value_type,
         category=setting.category
     )
@@ -223,11 +257,14 @@ def delete_setting(key: str, db: Session = Depends(get_db)):
 def bulk_update_settings(bulk_update: BulkSettingsUpdate, db: Session = Depends(get_db)):
     """
     Массовое создание/обновление настроек
+
+    Все значения проверяются до записи (422 — ничего не записано), затем
+    один INSERT ... ON CONFLICT (key) DO UPDATE ... RETURNING. Повтор
+    ключа в запросе — побеждает последнее значение.
     """
     logger.info("bulk_update_settings", count=len(bulk_update.settings))
 
-    updated_settings = []
-
+    rows: Dict[str, Dict[str, Any]] = {}
     for setting_data in bulk_update.settings:
         setting_dict = setting_data.dict()
         setting_dict['updated_by'] = bulk_update.updated_by
@@ -235,39 +272,46 @@ def bulk_update_settings(bulk_update: BulkSettingsUpdate, db: Session = Depends(
         # Валидируем значение
         _convert_value(setting_dict['value'], setting_dict['value_type'])
 
-        # Проверяем существование
-        existing = db.query(Setting).filter(Setting.key == setting_dict['key']).first()
-
-        if existing:
-            # Обновляем
-            for field, value in setting_dict.items():
-                if field != 'key':  # key не обновляем
-                    setattr(existing, field, value)
-            updated_settings.append(existing)
-        else:
-            # Создаем новую
-            new_setting = Setting(**setting_dict)
-            db.add(new_setting)
-            updated_settings.append(new_setting)
-
+        rows[setting_dict['key']] = setting_dict
+
+    if not rows:
+        return []
+
+    stmt = insert(Setting).values(list(rows.values()))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Setting.key],
+        set_={
+            "value": stmt.excluded.value,
+            "value_type": stmt.excluded.value_type,
+            "category": stmt.excluded.category,
+            "description": stmt.excluded.description,
+            "updated_by": stmt.excluded.updated_by,
+            "updated_at": func.now(),
+        }
+    ).returning(Setting)
+
+    # populate_existing — объекты, уже загруженные в сессию, получают новые значения.
+    # Ответ собирается до commit: после него атрибуты истекают и читались бы заново
+    updated = {
+        setting.key: SettingResponse.model_validate(setting)
+        for setting in db.scalars(stmt, execution_options={"populate_existing": True})
+    }
     db.commit()
 
-    # Обновляем объекты из БД
-    for setting in updated_settings:
-        db.refresh(setting)
-
-    logger.info("bulk_update_completed", count=len(updated_settings))
-    return updated_settings
+    logger.info("bulk_update_completed", count=len(updated))
+    return json_response([updated[key] for key in rows])
 
 
 @router.get("/settings/category/{category}", response_model=List[SettingResponse])
-def get_settings_by_category(category: str, db: Session = Depends(get_db)):
+async def get_settings_by_category(category: str, db: AsyncSession = Depends(get_async_db)):
     """
     Получить все настройки определенной категории
     """
     logger.info("get_settings_by_category", category=category)
 
-    settings = db.query(Setting).filter(Setting.category == category).order_by(Setting.key).all()
+    settings = (await db.scalars(
+        select(Setting).where(Setting.category == category).order_by(Setting.key)
+    )).all()
 
     if not settings:
         logger.warning("no_settings_found", category=category)
@@ -0,0 +1,524 @@
+"""
+DeepCalm — Response Cache
+
+Двухуровневый кэш ответов: in-process LRU перед Redis.
+
+- Инвалидация по тегам: в Redis хранится версия каждого тега, значение
+  сохраняется вместе с версиями своих тегов и считается устаревшим,
+  если хотя бы одна версия изменилась (INCR при инвалидации).
+- Single-flight: при промахе значение пересчитывает один поток процесса
+  (локальный lock) и один процесс кластера (SET NX lock в Redis),
+  остальные ждут готовый результат.
+- Если Redis недоступен, кэш работает только как локальный LRU.
+"""
+import asyncio
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import orjson
+import redis
+import redis.asyncio as aioredis
+import structlog
+
+from app.core.config import settings
+from app.core.metrics import cache_requests_total
+
+logger = structlog.get_logger(__name__)
+
+_MISS = object()
+
+# Повторная попытка подключения к Redis после ошибки
+REDIS_RETRY_SECONDS = 30.0
+# Интервал опроса Redis, пока значение считает другой процесс
+LOCK_POLL_SECONDS = 0.05
+
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class ResponseCache:
+    """
+    Кэш ответов с тегами и защитой от cache stampede.
+
+    Examples:
+        >>> cache.get_or_set(
+        ...     "analytics:dashboard:-:-",
+        ...     tags=["analytics", "dashboard"],
+        ...     compute=lambda: service.get_dashboard_summary().model_dump(mode="json")
+        ... )
+        >>> cache.invalidate("dashboard")
+    """
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        ttl_seconds: int = 60,
+        local_ttl_seconds: int = 5,
+        local_maxsize: int = 256,
+        lock_timeout_seconds: float = 10.0,
+        redis_timeout_seconds: float = 0.2,
+        prefix: str = "dc:cache",
+        enabled: bool = True,
+        name: str = "response"
+    ):
+        self.redis_url = redis_url
+        self.ttl_seconds = ttl_seconds
+        self.local_ttl_seconds = local_ttl_seconds
+        self.local_maxsize = local_maxsize
+        self.lock_timeout_seconds = lock_timeout_seconds
+        self.redis_timeout_seconds = redis_timeout_seconds
+        self.prefix = prefix
+        self.enabled = enabled
+
+        # Счётчики dc_cache_requests_total с уже связанными метками
+        self._local_hits = cache_requests_total.labels(name, "local_hit")
+        self._remote_hits = cache_requests_total.labels(name, "remote_hit")
+        self._misses = cache_requests_total.labels(name, "miss")
+
+        self._lock = threading.Lock()
+        # key -> (expires_at, tags, value)
+        self._local: "OrderedDict[str, Tuple[float, Tuple[str, ...], Any]]" = OrderedDict()
+        self._local_tags: Dict[str, set] = {}
+        # Растёт при каждой инвалидации: результат, посчитанный до неё,
+        # не попадает в локальный LRU
+        self._generation = 0
+        # key -> [lock, число ожидающих]
+        self._flights: Dict[str, list] = {}
+        self._async_flights: Dict[str, list] = {}
+
+        self._redis: Optional[redis.Redis] = None
+        self._async_redis: Optional[aioredis.Redis] = None
+        self._redis_retry_at = 0.0
+
+    @classmethod
+    def from_settings(cls) -> "ResponseCache":
+        """Кэш с параметрами из settings"""
+        return cls(
+            redis_url=settings.redis_url or None,
+            ttl_seconds=settings.cache_ttl_seconds,
+            local_ttl_seconds=settings.cache_local_ttl_seconds,
+            local_maxsize=settings.cache_local_maxsize,
+            lock_timeout_seconds=settings.cache_lock_timeout_seconds,
+            redis_timeout_seconds=settings.cache_redis_timeout_seconds,
+            enabled=settings.cache_enabled
+        )
+
+    # ------------------------------------------------------------------
+    # Публичный API
+    # ------------------------------------------------------------------
+    def get_or_set(self, key: str, tags: Sequence[str], compute: Callable[[], Any]) -> Any:
+        """
+        Возвращает значение из кэша или считает его (один раз на промах).
+
+        Args:
+            key: Ключ (эндпоинт + параметры)
+            tags: Теги для инвалидации
+            compute: Функция расчёта; результат должен сериализоваться в JSON
+
+        Returns:
+            Значение из кэша или результат compute()
+        """
+        if not self.enabled:
+            return compute()
+
+        tags = tuple(tags)
+
+        value = self._local_get(key)
+        if value is not _MISS:
+            self._local_hits.inc()
+            return value
+
+        with self._single_flight(key):
+            # Пока ждали, значение мог посчитать другой поток
+            value = self._local_get(key)
+            if value is not _MISS:
+                self._local_hits.inc()
+                return value
+
+            generation = self._generation
+            value, versions = self._remote_get(key, tags)
+            if value is _MISS:
+                self._misses.inc()
+                value = self._compute_once(key, tags, versions, compute)
+            else:
+                self._remote_hits.inc()
+
+            if generation == self._generation:
+                self._local_set(key, tags, value)
+            return value
+
+    async def aget_or_set(
+        self,
+        key: str,
+        tags: Sequence[str],
+        compute: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        Async-вариант get_or_set для async def эндпоинтов.
+
+        Обращения к Redis не блокируют event loop, single-flight
+        внутри процесса — через asyncio.Lock.
+        """
+        if not self.enabled:
+            return await compute()
+
+        tags = tuple(tags)
+
+        value = self._local_get(key)
+        if value is not _MISS:
+            self._local_hits.inc()
+            return value
+
+        async with self._async_single_flight(key):
+            value = self._local_get(key)
+            if value is not _MISS:
+                self._local_hits.inc()
+                return value
+
+            generation = self._generation
+            value, versions = await self._aremote_get(key, tags)
+            if value is _MISS:
+                self._misses.inc()
+                value = await self._acompute_once(key, tags, versions, compute)
+            else:
+                self._remote_hits.inc()
+
+            if generation == self._generation:
+                self._local_set(key, tags, value)
+            return value
+
+    def invalidate(self, *tags: str) -> None:
+        """Инвалидирует все значения с любым из тегов"""
+        if not tags:
+            return
+
+        with self._lock:
+            self._generation += 1
+            for tag in tags:
+                for key in self._local_tags.pop(tag, ()):
+                    self._local_pop(key)
+
+        client = self._client()
+        if client is not None:
+            try:
+                pipe = client.pipeline(transaction=False)
+                for tag in tags:
+                    pipe.incr(self._tag_key(tag))
+                pipe.execute()
+            except redis.RedisError as exc:
+                self._redis_failed(exc)
+
+        logger.debug("cache_invalidated", tags=list(tags))
+
+    def clear(self) -> None:
+        """Очищает локальный LRU (Redis не трогаем)"""
+        with self._lock:
+            self._generation += 1
+            self._local.clear()
+            self._local_tags.clear()
+
+    # ------------------------------------------------------------------
+    # Локальный LRU
+    # ------------------------------------------------------------------
+    def _local_get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return _MISS
+            expires_at, _, value = entry
+            if expires_at < time.monotonic():
+                self._local_pop(key)
+                return _MISS
+            self._local.move_to_end(key)
+            return value
+
+    def _local_set(self, key: str, tags: Tuple[str, ...], value: Any) -> None:
+        if self.local_maxsize <= 0 or self.local_ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._local_pop(key)
+            self._local[key] = (time.monotonic() + self.local_ttl_seconds, tags, value)
+            for tag in tags:
+                self._local_tags.setdefault(tag, set()).add(key)
+            while len(self._local) > self.local_maxsize:
+                self._local_pop(next(iter(self._local)))
+
+    def _local_pop(self, key: str) -> None:
+        """Удаляет ключ из LRU и индекса тегов (вызывается под self._lock)"""
+        entry = self._local.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[1]:
+            keys = self._local_tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._local_tags[tag]
+
+    @contextmanager
+    def _single_flight(self, key: str) -> Iterator[None]:
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = [threading.Lock(), 0]
+            flight[1] += 1
+        try:
+            with flight[0]:
+                yield
+        finally:
+            with self._lock:
+                flight[1] -= 1
+                if flight[1] == 0:
+                    self._flights.pop(key, None)
+
+    @asynccontextmanager
+    async def _async_single_flight(self, key: str) -> AsyncIterator[None]:
+        flight = self._async_flights.get(key)
+        if flight is None:
+            flight = self._async_flights[key] = [asyncio.Lock(), 0]
+        flight[1] += 1
+        try:
+            async with flight[0]:
+                yield
+        finally:
+            flight[1] -= 1
+            if flight[1] == 0:
+                self._async_flights.pop(key, None)
+
+    # ------------------------------------------------------------------
+    # Redis
+    # ------------------------------------------------------------------
+    def _client(self) -> Optional[redis.Redis]:
+        if not self.redis_url or time.monotonic() < self._redis_retry_at:
+            return None
+        if self._redis is None:
+            self._redis = redis.Redis.from_url(
+                self.redis_url,
+                socket_timeout=self.redis_timeout_seconds,
+                socket_connect_timeout=self.redis_timeout_seconds
+            )
+        return self._redis
+
+    def _async_client(self) -> Optional[aioredis.Redis]:
+        if not self.redis_url or time.monotonic() < self._redis_retry_at:
+            return None
+        if self._async_redis is None:
+            self._async_redis = aioredis.Redis.from_url(
+                self.redis_url,
+                socket_timeout=self.redis_timeout_seconds,
+                socket_connect_timeout=self.redis_timeout_seconds
+            )
+        return self._async_redis
+
+    def _redis_failed(self, exc: Exception) -> None:
+        """Переходим на локальный LRU до следующей попытки"""
+        self._redis_retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+        logger.warning("cache_redis_unavailable", error=str(exc), retry_in=REDIS_RETRY_SECONDS)
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.prefix}:tag:{tag}"
+
+    def _remote_get(self, key: str, tags: Tuple[str, ...]) -> Tuple[Any, Optional[List[int]]]:
+        """
+        Значение и текущие версии тегов одним round-trip.
+
+        Returns:
+            (значение или _MISS, версии тегов или None без Redis)
+        """
+        client = self._client()
+        if client is None:
+            return _MISS, None
+
+        try:
+            results = self._pipeline(client, key, tags).execute()
+        except redis.RedisError as exc:
+            self._redis_failed(exc)
+            return _MISS, None
+
+        return self._parse_remote(results, tags)
+
+    @staticmethod
+    def _parse_remote(results: list, tags: Tuple[str, ...]) -> Tuple[Any, List[int]]:
+        """Разбирает ответ pipeline (GET значения + MGET версий тегов)"""
+        raw = results[0]
+        versions = [int(v or 0) for v in results[1]] if tags else []
+        if raw is None:
+            return _MISS, versions
+
+        payload = orjson.loads(raw)
+        if payload["v"] != versions:
+            return _MISS, versions
+        return payload["d"], versions
+
+    def _pipeline(self, client, key: str, tags: Tuple[str, ...]):
+        pipe = client.pipeline(transaction=False)
+        pipe.get(self._key(key))
+        if tags:
+            pipe.mget([self._tag_key(tag) for tag in tags])
+        return pipe
+
+    def _encode(self, versions: List[int], value: Any) -> bytes:
+        return orjson.dumps({"v": versions, "d": value})
+
+    def _remote_set(self, key: str, versions: List[int], value: Any) -> None:
+        client = self._client()
+        if client is None:
+            return
+        try:
+            client.set(self._key(key), self._encode(versions, value), ex=self.ttl_seconds)
+        except redis.RedisError as exc:
+            self._redis_failed(exc)
+
+    def _compute_once(
+        self,
+        key: str,
+        tags: Tuple[str, ...],
+        versions: Optional[List[int]],
+        compute: Callable[[], Any]
+    ) -> Any:
+        """Считает значение, удерживая распределённый lock на ключ"""
+        client = self._client() if versions is not None else None
+        lock_key = self._key(f"lock:{key}")
+        token = uuid.uuid4().hex
+        acquired = False
+
+        if client is not None:
+            try:
+                acquired = bool(client.set(
+                    lock_key, token, nx=True, px=int(self.lock_timeout_seconds * 1000)
+                ))
+                if not acquired:
+                    value, versions = self._wait_for_remote(client, key, tags, lock_key)
+                    if value is not _MISS:
+                        return value
+            except redis.RedisError as exc:
+                self._redis_failed(exc)
+
+        try:
+            value = compute()
+            # Версии прочитаны до расчёта: если теги инвалидировали во время
+            # расчёта, записанное значение сразу будет считаться устаревшим
+            if versions is not None:
+                self._remote_set(key, versions, value)
+            return value
+        finally:
+            if acquired:
+                try:
+                    client.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+                except redis.RedisError as exc:
+                    self._redis_failed(exc)
+
+    def _wait_for_remote(
+        self,
+        client: redis.Redis,
+        key: str,
+        tags: Tuple[str, ...],
+        lock_key: str
+    ) -> Tuple[Any, Optional[List[int]]]:
+        """Ждёт, пока значение посчитает держатель lock"""
+        deadline = time.monotonic() + self.lock_timeout_seconds
+        versions = None
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_SECONDS)
+            value, versions = self._remote_get(key, tags)
+            if value is not _MISS or versions is None:
+                return value, versions
+            if not client.exists(lock_key):
+                break
+        logger.info("cache_lock_wait_expired", key=key)
+        return _MISS, versions
+
+    # ------------------------------------------------------------------
+    # Redis (async)
+    # ------------------------------------------------------------------
+    async def _aremote_get(self, key: str, tags: Tuple[str, ...]) -> Tuple[Any, Optional[List[int]]]:
+        client = self._async_client()
+        if client is None:
+            return _MISS, None
+
+        try:
+            results = await self._pipeline(client, key, tags).execute()
+        except redis.RedisError as exc:
+            self._redis_failed(exc)
+            return _MISS, None
+
+        return self._parse_remote(results, tags)
+
+    async def _aremote_set(self, key: str, versions: List[int], value: Any) -> None:
+        client = self._async_client()
+        if client is None:
+            return
+        try:
+            await client.set(self._key(key), self._encode(versions, value), ex=self.ttl_seconds)
+        except redis.RedisError as exc:
+            self._redis_failed(exc)
+
+    async def _acompute_once(
+        self,
+        key: str,
+        tags: Tuple[str, ...],
+        versions: Optional[List[int]],
+        compute: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        client = self._async_client() if versions is not None else None
+        lock_key = self._key(f"lock:{key}")
+        token = uuid.uuid4().hex
+        acquired = False
+
+        if client is not None:
+            try:
+                acquired = bool(await client.set(
+                    lock_key, token, nx=True, px=int(self.lock_timeout_seconds * 1000)
+                ))
+                if not acquired:
+                    value, versions = await self._await_for_remote(client, key, tags, lock_key)
+                    if value is not _MISS:
+                        return value
+            except redis.RedisError as exc:
+                self._redis_failed(exc)
+
+        try:
+            value = await compute()
+            if versions is not None:
+                await self._aremote_set(key, versions, value)
+            return value
+        finally:
+            if acquired:
+                try:
+                    await client.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+                except redis.RedisError as exc:
+                    self._redis_failed(exc)
+
+    async def _await_for_remote(
+        self,
+        client: aioredis.Redis,
+        key: str,
+        tags: Tuple[str, ...],
+        lock_key: str
+    ) -> Tuple[Any, Optional[List[int]]]:
+        deadline = time.monotonic() + self.lock_timeout_seconds
+        versions = None
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL_SECONDS)
+            value, versions = await self._aremote_get(key, tags)
+            if value is not _MISS or versions is None:
+                return value, versions
+            if not await client.exists(lock_key):
+                break
+        logger.info("cache_lock_wait_expired", key=key)
+        return _MISS, versions
+
+
+# Глобальный экземпляр кэша
+response_cache = ResponseCache.from_settings()
@@ -0,0 +1,83 @@
+"""
+DeepCalm — Date Ranges
+
+Перевод календарных дат в диапазоны timestamptz.
+Фильтры вида `column >= start AND column < end` используют индексы,
+в отличие от `func.date(column) BETWEEN ...`.
+"""
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import Date, cast, func
+
+from app.core.config import settings
+
+
+@lru_cache(maxsize=8)
+def get_business_tz(tz_name: Optional[str] = None) -> ZoneInfo:
+    """Часовой пояс бизнеса (по умолчанию settings.business_timezone)"""
+    return ZoneInfo(tz_name or settings.business_timezone)
+
+
+def start_of_day(day: date, tz_name: Optional[str] = None) -> datetime:
+    """
+    Начало календарного дня в бизнес-таймзоне.
+
+    Examples:
+        >>> start_of_day(date(2025, 10, 1))
+        datetime.datetime(2025, 10, 1, 0, 0, tzinfo=zoneinfo.ZoneInfo(key='Europe/Moscow'))
+    """
+    return datetime.combine(day, time.min, tzinfo=get_business_tz(tz_name))
+
+
+def day_range_bounds(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    tz_name: Optional[str] = None
+) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """
+    Полуоткрытый диапазон [start, end) для дат включительно.
+
+    Args:
+        start_date: Первый день периода (включительно)
+        end_date: Последний день периода (включительно)
+        tz_name: Таймзона (по умолчанию settings.business_timezone)
+
+    Returns:
+        (начало start_date, начало дня после end_date); None для открытых границ
+
+    Examples:
+        >>> lower, upper = day_range_bounds(date(2025, 10, 1), date(2025, 10, 7))
+        >>> query.filter(Conversion.created_at >= lower, Conversion.created_at < upper)
+    """
+    lower = start_of_day(start_date, tz_name) if start_date else None
+    upper = start_of_day(end_date + timedelta(days=1), tz_name) if end_date else None
+    return lower, upper
+
+
+def range_filters(column, start_date: Optional[date] = None, end_date: Optional[date] = None) -> list:
+    """
+    Условия SQLAlchemy для фильтрации timestamptz-колонки по датам.
+
+    Examples:
+        >>> query.filter(*range_filters(Conversion.created_at, start_date, end_date))
+    """
+    lower, upper = day_range_bounds(start_date, end_date)
+    filters = []
+    if lower is not None:
+        filters.append(column >= lower)
+    if upper is not None:
+        filters.append(column < upper)
+    return filters
+
+
+def business_day(column):
+    """
+    Календарный день timestamptz-колонки в бизнес-таймзоне (SQL-выражение).
+
+    Examples:
+        >>> select(business_day(Conversion.converted_at).label("day"))
+    """
+    return cast(func.timezone(settings.business_timezone, column), Date)
@@ -0,0 +1,81 @@
+"""
+DeepCalm — Domain Events
+
+Доменные события (cortex/EVENTS/*.schema.json).
+
+Событие проверяется по обязательным полям схемы, пишется в лог
+(`domain_event`) и передаётся подписчикам этого процесса. Внешней шины
+пока нет: подписчики — точка расширения (вебхуки, очередь).
+"""
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+EVENTS_SCHEMA_DIR = Path(__file__).resolve().parents[2] / "cortex" / "EVENTS"
+
+SPEND_REPORTED = "spend.reported"
+BOOKING_CREATED = "booking.created"
+
+EventHandler = Callable[[str, Dict[str, Any]], None]
+
+_subscribers: Dict[str, List[EventHandler]] = {}
+
+
+class EventValidationError(ValueError):
+    """Payload не соответствует схеме события"""
+
+
+@lru_cache(maxsize=None)
+def _required_fields(event_name: str) -> Tuple[str, ...]:
+    """Обязательные поля из cortex/EVENTS/<event>.schema.json (если схема есть)"""
+    schema_path = EVENTS_SCHEMA_DIR / f"{event_name}.schema.json"
+    if not schema_path.exists():
+        return ()
+    schema = json.loads(schema_path.read_text(encoding="utf-8"))
+    return tuple(schema.get("required", ()))
+
+
+def subscribe(event_name: str, handler: EventHandler) -> None:
+    """Подписывает handler(event_name, payload) на событие"""
+    _subscribers.setdefault(event_name, []).append(handler)
+
+
+def unsubscribe(event_name: str, handler: EventHandler) -> None:
+    """Отписывает handler от события"""
+    handlers = _subscribers.get(event_name, [])
+    if handler in handlers:
+        handlers.remove(handler)
+
+
+def emit(event_name: str, payload: Dict[str, Any]) -> None:
+    """
+    Публикует событие.
+
+    Args:
+        event_name: Имя события (spend.reported, booking.created, ...)
+        payload: Данные события по схеме cortex/EVENTS
+
+    Raises:
+        EventValidationError: Нет обязательных полей схемы
+
+    Examples:
+        >>> emit(SPEND_REPORTED, {"channel": "direct", "campaign": "123",
+        ...                       "date": "2025-10-01", "spend": 1520.5})
+    """
+    missing = [field for field in _required_fields(event_name) if field not in payload]
+    if missing:
+        raise EventValidationError(f"{event_name}: нет обязательных полей {missing}")
+
+    logger.info("domain_event", event_name=event_name, payload=payload)
+
+    for handler in list(_subscribers.get(event_name, ())):
+        try:
+            handler(event_name, payload)
+        except Exception as e:
+            # Сбой подписчика не должен ломать источник события
+            logger.error("event_handler_failed", event_name=event_name, error=str(e), exc_info=True)
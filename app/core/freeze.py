@@ -0,0 +1,145 @@
+"""
+DeepCalm — Freeze Mode
+
+Флаг read-only режима в памяти процесса.
+
+Источники (по приоритету): переменная окружения DC_FREEZE (1/true) и
+файл-флаг settings.freeze_toggle_file. Фоновый поток перечитывает их раз
+в settings.freeze_poll_interval_seconds, поэтому проверка в middleware —
+чтение атрибута, без os.getenv и stat в event loop. Переключение через
+admin API создаёт/удаляет файл-флаг — остальные воркеры подхватывают его
+при следующем опросе. Изменение состояния логируется один раз и
+отражается в метрике dc_freeze_mode.
+"""
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import structlog
+from prometheus_client import Gauge
+
+from app.core.config import settings
+
+logger = structlog.get_logger(__name__)
+
+FREEZE_ENV = "DC_FREEZE"
+
+freeze_mode_gauge = Gauge(
+    "dc_freeze_mode",
+    "Read-only режим API (1 — включён)",
+    multiprocess_mode="max"
+)
+
+
+class FreezeState:
+    """
+    Состояние read-only режима.
+
+    Args:
+        toggle_file: Путь к файлу-флагу
+        poll_interval: Интервал опроса источников, с
+    """
+
+    def __init__(self, toggle_file: str, poll_interval: float) -> None:
+        self.toggle_file = Path(toggle_file)
+        self.poll_interval = poll_interval
+        self.enabled = False
+        self.source: Optional[str] = None  # env | file | admin | None
+        self.changed_at: Optional[datetime] = None
+        # Переключение, которое не удалось сохранить в файл (действует в этом процессе)
+        self._override: Optional[bool] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_settings(cls) -> "FreezeState":
+        return cls(settings.freeze_toggle_file, settings.freeze_poll_interval_seconds)
+
+    def refresh(self) -> bool:
+        """Перечитывает DC_FREEZE и файл-флаг"""
+        env_value = os.getenv(FREEZE_ENV)
+        if env_value is not None:
+            enabled, source = env_value.strip().lower() in {"1", "true", "yes", "on"}, "env"
+        elif self._override is not None:
+            enabled, source = self._override, "admin"
+        else:
+            enabled = self.toggle_file.exists()
+            source = "file" if enabled else None
+        self._apply(enabled, source)
+        return enabled
+
+    def set(self, enabled: bool, actor: str = "admin") -> Dict[str, Any]:
+        """
+        Включает/выключает режим через файл-флаг.
+
+        Raises:
+            ValueError: Режим задан переменной окружения DC_FREEZE
+        """
+        if os.getenv(FREEZE_ENV) is not None:
+            raise ValueError(f"Режим задан переменной окружения {FREEZE_ENV}")
+
+        persisted = True
+        try:
+            if enabled:
+                self.toggle_file.parent.mkdir(parents=True, exist_ok=True)
+                self.toggle_file.touch()
+            else:
+                self.toggle_file.unlink(missing_ok=True)
+            self._override = None
+        except OSError as e:
+            # Нет прав на каталог флага — переключаем только этот процесс
+            logger.warning("freeze_toggle_file_unwritable", path=str(self.toggle_file), error=str(e))
+            self._override = enabled
+            persisted = False
+
+        logger.info("freeze_mode_toggled", enabled=enabled, actor=actor, persisted=persisted)
+        self.refresh()
+        return {**self.snapshot(), "persisted": persisted}
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "source": self.source,
+            "changed_at": self.changed_at.isoformat() if self.changed_at else None,
+        }
+
+    def start(self) -> None:
+        """Запускает фоновый опрос (идемпотентно)"""
+        self.refresh()
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._poll, name="freeze-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval + 1)
+            self._thread = None
+
+    def _poll(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error("freeze_refresh_failed", error=str(e))
+
+    def _apply(self, enabled: bool, source: Optional[str]) -> None:
+        with self._lock:
+            changed = enabled != self.enabled
+            self.enabled = enabled
+            self.source = source
+            if changed:
+                self.changed_at = datetime.now(timezone.utc)
+        freeze_mode_gauge.set(1 if enabled else 0)
+        if changed:
+            logger.warning("freeze_mode_changed", enabled=enabled, source=source)
+
+
+# Singleton instance (состояние на момент импорта, дальше — фоновый опрос)
+freeze_state = FreezeState.from_settings()
+freeze_state.refresh()
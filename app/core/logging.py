@@ -3,16 +3,89 @@ DeepCalm — Structured Logging
 
 structlog с JSON форматом и PII-маскированием.
 Соответствует cortex/DEEP-CALM-INFRASTRUCTURE.md и STANDARDS.yml
+
+Запись в stderr выполняет фоновый поток (QueueHandler → QueueListener):
+вызывающий код только кладёт готовую строку в ограниченную очередь и
+никогда не ждёт вывода. При переполнении записи отбрасываются и
+учитываются в счётчиках. Частые debug/info события можно семплировать
+и ограничивать по частоте (settings.log_sample_rates, log_rate_limits).
 """
+import atexit
 import logging
+import logging.handlers
+import queue
+import random
 import re
+import threading
+import time
 import structlog
 from structlog.processors import JSONRenderer
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Tuple
 
 from app.core.config import settings
 
 
+# Телефоны: +79991234567 → +7999***4567; email: vasya@example.com → v***a@example.com.
+# Один проход по строке вместо двух re.sub
+_PII_RE = re.compile(r'(\+7\d{3})\d{3}(\d{4})|(\w)\w+(\w)@')
+
+# Ограничения обхода вложенных значений (dict/list в событиях)
+MAX_DEPTH = 6
+MAX_ITEMS = 100
+MAX_STRING_LENGTH = 4096
+
+_Containers = (dict, list, tuple)
+
+
+def _mask_match(match: "re.Match[str]") -> str:
+    if match.group(1) is not None:
+        return f"{match.group(1)}***{match.group(2)}"
+    return f"{match.group(3)}***{match.group(4)}@"
+
+
+def _mask_string(value: str) -> str:
+    if len(value) > MAX_STRING_LENGTH:
+        value = f"{value[:MAX_STRING_LENGTH]}…(+{len(value) - MAX_STRING_LENGTH})"
+    # Быстрая проверка: телефон начинается с +7, email содержит @
+    if "+7" not in value and "@" not in value:
+        return value
+    return _PII_RE.sub(_mask_match, value)
+
+
+def _mask_value(value: Any, depth: int) -> Any:
+    """
+    Маскирует строку или вложенную структуру.
+
+    Контейнер копируется, только если в нём что-то изменилось: объекты
+    вызывающего кода (payload запроса, ответ API) не мутируются.
+    """
+    if isinstance(value, str):
+        return _mask_string(value)
+    if not isinstance(value, _Containers):
+        return value
+    if depth >= MAX_DEPTH:
+        return f"<{type(value).__name__} deeper than {MAX_DEPTH} levels>"
+
+    if isinstance(value, dict):
+        items = list(value.items())
+        masked = [(key, _mask_value(item, depth + 1)) for key, item in items[:MAX_ITEMS]]
+        truncated = len(items) > MAX_ITEMS
+        if not truncated and all(new is old for (_, new), (_, old) in zip(masked, items)):
+            return value
+        result = dict(masked)
+        if truncated:
+            result["…"] = f"+{len(items) - MAX_ITEMS} keys"
+        return result
+
+    masked = [_mask_value(item, depth + 1) for item in value[:MAX_ITEMS]]
+    truncated = len(value) > MAX_ITEMS
+    if not truncated and all(new is old for new, old in zip(masked, value)):
+        return value
+    if truncated:
+        masked.append(f"…+{len(value) - MAX_ITEMS} items")
+    return masked
+
+
 def mask_pii(logger: Any, method_name: str, event_dict: Dict) -> Dict:
     """
     Маскирует PII (Personally Identifiable Information) в логах.
@@ -21,6 +94,10 @@ def mask_pii(logger: Any, method_name: str, event_dict: Dict) -> Dict:
     - Телефоны: +79991234567 → +7999***4567
     - Email: vasya@example.com → v***a@example.com
 
+    Строки без "+7" и "@" пропускаются без регулярного выражения.
+    Вложенные dict/list обходятся до MAX_DEPTH уровней и MAX_ITEMS
+    элементов, строки длиннее MAX_STRING_LENGTH обрезаются.
+
     Args:
         logger: Logger instance
         method_name: Имя метода логирования
@@ -34,16 +111,134 @@ def mask_pii(logger: Any, method_name: str, event_dict: Dict) -> Dict:
         >>> # Вывод: {"phone": "+7999***4567", ...}
     """
     for key, value in event_dict.items():
-        if isinstance(value, str):
-            # Телефоны: +79991234567 → +7999***4567
-            value = re.sub(r'(\+7\d{3})\d{3}(\d{4})', r'\1***\2', value)
+        if isinstance(value, (str, dict, list, tuple)):
+            event_dict[key] = _mask_value(value, 0)
 
-            # Email: vasya@example.com → v***a@example.com
-            value = re.sub(r'(\w)\w+(\w)@', r'\1***\2@', value)
+    return event_dict
 
-            event_dict[key] = value
 
-    return event_dict
+# Уровни, к которым применяются семплирование и лимиты частоты
+_SAMPLED_LEVELS = frozenset({"debug", "info"})
+
+
+class EventSampler:
+    """
+    structlog-процессор: семплирование и лимит частоты по имени события.
+
+    Стоит сразу после filter_by_level, поэтому отброшенное событие не
+    проходит маскирование и сериализацию. warning и выше не трогаются.
+
+    Args:
+        sample_rates: Имя события → доля сохраняемых событий (0..1)
+        rate_limits: Имя события → максимум событий в секунду
+    """
+
+    def __init__(
+        self,
+        sample_rates: Dict[str, float],
+        rate_limits: Dict[str, float],
+        clock=time.monotonic
+    ) -> None:
+        self.sample_rates = sample_rates
+        self.rate_limits = rate_limits
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[float, float]] = {}  # событие -> (токены, время)
+        self.dropped: Dict[str, int] = {}
+
+    def __call__(self, logger: Any, method_name: str, event_dict: Dict) -> Dict:
+        if method_name not in _SAMPLED_LEVELS:
+            return event_dict
+        event = event_dict.get("event")
+        rate = self.sample_rates.get(event)
+        if rate is not None and random.random() >= rate:
+            self._drop(event)
+        limit = self.rate_limits.get(event)
+        if limit is not None and not self._take(event, limit):
+            self._drop(event)
+        return event_dict
+
+    def _take(self, event: str, limit: float) -> bool:
+        with self._lock:
+            now = self._clock()
+            tokens, updated = self._buckets.get(event, (limit, now))
+            tokens = min(limit, tokens + (now - updated) * limit)
+            allowed = tokens >= 1
+            self._buckets[event] = (tokens - 1 if allowed else tokens, now)
+            return allowed
+
+    def _drop(self, event: str) -> None:
+        with self._lock:
+            self.dropped[event] = self.dropped.get(event, 0) + 1
+        raise structlog.DropEvent
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler с ограниченной очередью: не блокирует, а отбрасывает.
+
+    О потерянных записях пишет отдельная строка log_records_dropped
+    при следующей успешной записи.
+    """
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]") -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._unreported = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            if self._unreported:
+                self._report_dropped()
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            self._unreported += 1
+
+    def _report_dropped(self) -> None:
+        record = logging.LogRecord(
+            name=__name__,
+            level=logging.WARNING,
+            pathname=__file__,
+            lineno=0,
+            msg=f'{{"event": "log_records_dropped", "count": {self._unreported}, "level": "warning"}}',
+            args=None,
+            exc_info=None,
+        )
+        self.queue.put_nowait(record)
+        self._unreported = 0
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[DroppingQueueHandler] = None
+_sampler: Optional[EventSampler] = None
+
+
+def _parse_event_map(value: str) -> Dict[str, float]:
+    """`event=0.1,other=20` → {"event": 0.1, "other": 20.0}"""
+    result = {}
+    for item in value.split(","):
+        if "=" in item:
+            event, number = item.split("=", 1)
+            result[event.strip()] = float(number)
+    return result
+
+
+def log_pipeline_stats() -> Dict[str, Any]:
+    """Счётчики отброшенных записей (переполнение очереди, семплирование)"""
+    return {
+        "queue_dropped": _queue_handler.dropped if _queue_handler else 0,
+        "queue_size": _queue_handler.queue.qsize() if _queue_handler else 0,
+        "sampled_out": dict(_sampler.dropped) if _sampler else {},
+    }
+
+
+def shutdown_logging() -> None:
+    """Дописывает очередь и останавливает фоновый поток записи"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
 
 
 def setup_logging() -> None:
@@ -53,25 +248,37 @@ def setup_logging() -> None:
     Процессоры:
     1. merge_contextvars — correlation_id из контекста
     2. filter_by_level — фильтрация по уровню
-    3. add_logger_name — имя логгера
-    4. add_log_level — уровень лога
-    5. TimeStamper — ISO timestamp
-    6. StackInfoRenderer — stack traces
-    7. format_exc_info — форматирование исключений
-    8. mask_pii — маскирование PII
-    9. JSONRenderer — JSON output
+    3. EventSampler — семплирование и лимиты частых событий
+    4. add_logger_name — имя логгера
+    5. add_log_level — уровень лога
+    6. TimeStamper — ISO timestamp
+    7. StackInfoRenderer — stack traces
+    8. format_exc_info — форматирование исключений
+    9. mask_pii — маскирование PII
+    10. JSONRenderer — JSON output
+
+    Готовые строки пишет в stderr фоновый поток (settings.log_async),
+    очередь ограничена settings.log_queue_size. Повторный вызов
+    перенастраивает логирование.
 
     Согласно STANDARDS.yml:
     - json: true
     - fields: [ts, level, app, svc, env, req_id, route, status, msg]
     - pii_mask: true
     """
+    global _listener, _queue_handler, _sampler
     log_level = logging.DEBUG if settings.app_debug else logging.INFO
 
+    _sampler = EventSampler(
+        sample_rates=_parse_event_map(settings.log_sample_rates),
+        rate_limits=_parse_event_map(settings.log_rate_limits),
+    )
+
     structlog.configure(
         processors=[
             structlog.contextvars.merge_contextvars,
             structlog.stdlib.filter_by_level,
+            _sampler,
             structlog.stdlib.add_logger_name,
             structlog.stdlib.add_log_level,
             structlog.processors.TimeStamper(fmt="iso"),
@@ -87,11 +294,30 @@ def setup_logging() -> None:
     )
 
     # Настройка stdlib logging
-    logging.basicConfig(
-        format="%(message)s",
-        level=log_level,
-        handlers=[logging.StreamHandler()]
-    )
+    shutdown_logging()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter("%(message)s"))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, (logging.StreamHandler, DroppingQueueHandler)) and handler.get_name() == "dc":
+            root.removeHandler(handler)
+
+    if settings.log_async:
+        _queue_handler = DroppingQueueHandler(queue.Queue(maxsize=settings.log_queue_size))
+        _listener = logging.handlers.QueueListener(_queue_handler.queue, stream_handler)
+        _listener.start()
+        handler = _queue_handler
+    else:
+        _queue_handler = None
+        handler = stream_handler
+
+    handler.set_name("dc")
+    root.addHandler(handler)
+    root.setLevel(log_level)
+
+
+atexit.register(shutdown_logging)
 
 
 # Инициализация при импорте
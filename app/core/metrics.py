@@ -0,0 +1,195 @@
+"""
+DeepCalm — Prometheus Metrics
+
+Метрики процесса для эндпоинта /metrics (раздел Aegis блюпринта):
+
+- HTTP: латентность по шаблону маршрута, число запросов, запросы в обработке;
+- пулы SQLAlchemy: занятые соединения, overflow, время получения соединения;
+- площадки (direct, vk, avito): латентность вызовов и ошибки по видам;
+- планировщик: длительность задач, время последнего успешного запуска, сбои;
+- кэш ответов: попадания по уровням и промахи (hit ratio — в PromQL).
+
+Запись — инкремент счётчика уже связанного набора меток, без I/O.
+При нескольких воркерах uvicorn задайте PROMETHEUS_MULTIPROC_DIR (общий
+пустой каталог, очищается перед стартом): prometheus_client пишет значения
+в mmap-файлы, а /metrics агрегирует их по всем процессам.
+"""
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+MULTIPROC_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+# Границы бакетов латентности, с
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+JOB_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+
+# HTTP
+http_requests_total = Counter(
+    "dc_http_requests_total",
+    "HTTP-запросы по маршруту и статусу",
+    ["method", "route", "status"]
+)
+http_request_duration_seconds = Histogram(
+    "dc_http_request_duration_seconds",
+    "Время обработки HTTP-запроса",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS
+)
+http_requests_in_flight = Gauge(
+    "dc_http_requests_in_flight",
+    "HTTP-запросы в обработке",
+    multiprocess_mode="livesum"
+)
+
+# Пулы соединений БД
+db_pool_checked_out = Gauge(
+    "dc_db_pool_checked_out",
+    "Соединения, выданные из пула",
+    ["engine"],
+    multiprocess_mode="livesum"
+)
+db_pool_overflow = Gauge(
+    "dc_db_pool_overflow",
+    "Выданные соединения сверх pool_size",
+    ["engine"],
+    multiprocess_mode="livesum"
+)
+db_pool_checkout_seconds = Histogram(
+    "dc_db_pool_checkout_seconds",
+    "Время получения соединения из пула (ожидание, создание, pre-ping)",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+)
+
+# Рекламные площадки
+integration_call_duration_seconds = Histogram(
+    "dc_integration_call_duration_seconds",
+    "Время одного вызова API площадки (попытки)",
+    ["channel"],
+    buckets=LATENCY_BUCKETS
+)
+integration_errors_total = Counter(
+    "dc_integration_errors_total",
+    "Ошибки вызовов площадок: retryable, fatal, circuit_open",
+    ["channel", "kind"]
+)
+
+# Планировщик
+scheduler_job_duration_seconds = Histogram(
+    "dc_scheduler_job_duration_seconds",
+    "Длительность задачи планировщика",
+    ["job"],
+    buckets=JOB_BUCKETS
+)
+scheduler_job_last_success_seconds = Gauge(
+    "dc_scheduler_job_last_success_timestamp_seconds",
+    "Unix-время последнего успешного завершения задачи",
+    ["job"],
+    multiprocess_mode="max"
+)
+scheduler_job_failures_total = Counter(
+    "dc_scheduler_job_failures_total",
+    "Задачи планировщика, завершившиеся исключением",
+    ["job"]
+)
+
+# Кэш
+cache_requests_total = Counter(
+    "dc_cache_requests_total",
+    "Обращения к кэшу: local_hit, remote_hit, miss",
+    ["cache", "result"]
+)
+
+
+@contextmanager
+def track_job(job_id: str) -> Iterator[None]:
+    """
+    Длительность и результат задачи планировщика.
+
+    Исключение внутри блока учитывается как сбой и пробрасывается дальше.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        scheduler_job_failures_total.labels(job_id).inc()
+        raise
+    else:
+        scheduler_job_last_success_seconds.labels(job_id).set(time.time())
+    finally:
+        scheduler_job_duration_seconds.labels(job_id).observe(time.perf_counter() - started)
+
+
+class _TimedCheckout:
+    """Примесь к пулу: время pool.connect() в dc_db_pool_checkout_seconds"""
+
+    metrics_label = "sync"
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            db_pool_checkout_seconds.labels(self.metrics_label).observe(time.perf_counter() - started)
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    """QueuePool sync engine с метрикой времени получения соединения"""
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    """Пул async engine с метрикой времени получения соединения"""
+
+    metrics_label = "async"
+
+
+def instrument_engine(engine: Engine, label: str) -> None:
+    """
+    Гейджи пула по событиям checkout/checkin.
+
+    Args:
+        engine: Sync engine (для async — async_engine.sync_engine)
+        label: Значение метки engine
+    """
+    checked_out = db_pool_checked_out.labels(label)
+    overflow = db_pool_overflow.labels(label)
+
+    def update(in_use: int) -> None:
+        checked_out.set(in_use)
+        overflow.set(max(in_use - engine.pool.size(), 0))
+
+    # engine.pool пересоздаётся при dispose(), слушатели переносятся в новый пул.
+    # checkin срабатывает до возврата соединения, поэтому оно ещё учтено в checkedout()
+    event.listen(engine.pool, "checkout", lambda *_: update(engine.pool.checkedout()))
+    event.listen(engine.pool, "checkin", lambda *_: update(engine.pool.checkedout() - 1))
+
+
+def render_latest() -> Tuple[bytes, str]:
+    """Текст экспозиции метрик (все воркеры в multiprocess-режиме)"""
+    if os.environ.get(MULTIPROC_ENV):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    """Убирает live-гейджи завершившегося воркера (multiprocess-режим)"""
+    if os.environ.get(MULTIPROC_ENV):
+        multiprocess.mark_process_dead(os.getpid())
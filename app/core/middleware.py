@@ -0,0 +1,143 @@
+"""
+DeepCalm — ASGI Middleware
+
+Один pure-ASGI middleware вместо двух @app.middleware("http"):
+correlation ID, read-only режим, время обработки запроса, HTTP-метрики
+и учёт SQL-запросов (app.core.query_stats).
+
+BaseHTTPMiddleware оборачивает каждый запрос в отдельную задачу и поток
+памяти для тела ответа; здесь сообщения ASGI проходят напрямую, поэтому
+стриминговые ответы (NDJSON публикации) отдаются без буферизации.
+"""
+import time
+import uuid
+from typing import Iterable
+
+import structlog
+from starlette.datastructures import MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import query_stats
+from app.core.freeze import freeze_state
+from app.core.metrics import (
+    http_request_duration_seconds,
+    http_requests_in_flight,
+    http_requests_total,
+)
+
+logger = structlog.get_logger(__name__)
+
+MUTATING_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+CORRELATION_HEADER = "X-Correlation-ID"
+# Метка маршрута для 404 и путей вне роутера
+UNMATCHED_ROUTE = "unmatched"
+_CORRELATION_HEADER_KEY = CORRELATION_HEADER.lower().encode("latin-1")
+
+
+class RequestContextMiddleware:
+    """
+    Контекст запроса для логов, read-only режим и тайминг.
+
+    - correlation_id (из X-Correlation-ID или новый UUID), route и method
+      привязываются к structlog contextvars на время запроса;
+    - в read-only режиме мутационные запросы получают 503, кроме freeze_exempt_paths;
+    - ответ получает X-Correlation-ID и X-Response-Time-Ms (до начала ответа),
+      после отправки тела пишется debug-событие request_completed;
+    - латентность и счётчик запросов — по шаблону маршрута (/campaigns/{campaign_id}),
+      а не по пути, чтобы число серий не росло с числом ID;
+    - число SQL-запросов и время БД попадают в request_completed, при
+      server_timing — ещё и в заголовок Server-Timing.
+
+    Args:
+        app: Следующее ASGI-приложение
+        freeze_exempt_paths: Пути, доступные в read-only режиме
+        server_timing: Отдавать Server-Timing (только dev)
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        freeze_exempt_paths: Iterable[str] = (),
+        server_timing: bool = False
+    ) -> None:
+        self.app = app
+        self.freeze_exempt_paths = frozenset(freeze_exempt_paths)
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        method = scope["method"]
+        path = scope["path"]
+        correlation_id = _header(scope, _CORRELATION_HEADER_KEY) or str(uuid.uuid4())
+
+        # Контекст задачи запроса; не сбрасывается в конце, чтобы
+        # глобальный обработчик исключений (снаружи) писал correlation_id
+        structlog.contextvars.clear_contextvars()
+        structlog.contextvars.bind_contextvars(
+            correlation_id=correlation_id,
+            route=path,
+            method=method
+        )
+        status_code = 500
+        http_requests_in_flight.inc()
+        stats_token = query_stats.start_request()
+        request_stats = query_stats.current()
+
+        async def send_with_headers(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append(CORRELATION_HEADER, correlation_id)
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                headers.append("X-Response-Time-Ms", f"{elapsed_ms:.1f}")
+                if self.server_timing:
+                    headers.append(
+                        "Server-Timing",
+                        f'db;dur={request_stats.duration_ms};desc="{request_stats.count} queries", '
+                        f'app;dur={elapsed_ms:.1f}'
+                    )
+            await send(message)
+
+        try:
+            if method in MUTATING_METHODS and freeze_state.enabled and path not in self.freeze_exempt_paths:
+                logger.warning("request_blocked_read_only_mode", method=method, path=path)
+                response = JSONResponse(
+                    status_code=503,
+                    content={
+                        "error": "read_only_mode",
+                        "message": "API временно работает в режиме только для чтения"
+                    }
+                )
+                await response(scope, receive, send_with_headers)
+                return
+
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            duration = time.perf_counter() - started
+            http_requests_in_flight.dec()
+            query_stats.finish_request(stats_token)
+            # Роутер FastAPI кладёт найденный маршрут в scope
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            http_request_duration_seconds.labels(method, route).observe(duration)
+            http_requests_total.labels(method, route, str(status_code)).inc()
+            logger.debug(
+                "request_completed",
+                status=status_code,
+                duration_ms=round(duration * 1000, 1),
+                db_queries=request_stats.count,
+                db_time_ms=request_stats.duration_ms
+            )
+
+
+def _header(scope: Scope, key: bytes) -> str:
+    for name, value in scope["headers"]:
+        if name == key:
+            return value.decode("latin-1")
+    return ""
@@ -0,0 +1,165 @@
+"""
+DeepCalm — Pagination
+
+Keyset (cursor) пагинация для списков.
+
+Курсор — непрозрачный base64-токен с ключом сортировки последней
+строки страницы. Следующая страница выбирается условием
+`(created_at, id) < (:created_at, :id)` по составному индексу, поэтому
+глубокие страницы не замедляются, в отличие от OFFSET.
+
+Старый режим page/page_size поддерживается для обратной совместимости.
+"""
+import base64
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Sequence
+
+import orjson
+from sqlalchemy import Select, func, select, text, tuple_
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Режимы подсчёта total
+TOTAL_EXACT = "exact"
+TOTAL_APPROX = "approx"
+TOTAL_NONE = "none"
+TOTAL_MODES = (TOTAL_EXACT, TOTAL_APPROX, TOTAL_NONE)
+TOTAL_MODE_PATTERN = f"^({'|'.join(TOTAL_MODES)})$"
+
+
+class InvalidCursorError(ValueError):
+    """Курсор не удалось разобрать"""
+
+
+@dataclass
+class Page:
+    """Страница результатов"""
+    items: List[Any]
+    page_size: int
+    total: Optional[int] = None
+    total_approximate: bool = False
+    next_cursor: Optional[str] = None
+    has_more: bool = False
+    page: Optional[int] = None
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Кодирует ключ сортировки в непрозрачный токен.
+
+    Examples:
+        >>> encode_cursor(["ai", "ai_model"])
+        'WyJhaSIsImFpX21vZGVsIl0'
+    """
+    return base64.urlsafe_b64encode(orjson.dumps(list(values))).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(token: str, parsers: Sequence[Callable[[Any], Any]]) -> tuple:
+    """
+    Разбирает токен курсора.
+
+    Args:
+        token: Токен из encode_cursor
+        parsers: Функции разбора каждого значения (например, datetime.fromisoformat, UUID)
+
+    Raises:
+        InvalidCursorError: Токен повреждён или не подходит к сортировке
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = orjson.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, list) or len(values) != len(parsers):
+            raise ValueError("cursor arity mismatch")
+        # encode_cursor получает только строки; иное — подделанный токен
+        if not all(isinstance(value, str) for value in values):
+            raise ValueError("cursor value is not a string")
+        return tuple(parse(value) for parse, value in zip(parsers, values))
+    except (ValueError, TypeError, UnicodeEncodeError) as exc:
+        raise InvalidCursorError("Некорректный курсор") from exc
+
+
+async def estimate_total(db: AsyncSession, stmt: Select) -> int:
+    """
+    Приблизительное число строк запроса по статистике планировщика.
+
+    EXPLAIN не выполняет запрос, поэтому стоимость не зависит от размера
+    таблицы. Точность — как у ANALYZE/autovacuum.
+    """
+    compiled = stmt.compile(
+        dialect=postgresql.dialect(),
+        compile_kwargs={"literal_binds": True}
+    )
+    result = await db.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}"))
+    plan = result.scalar()
+    if isinstance(plan, (str, bytes)):
+        plan = orjson.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def paginate(
+    db: AsyncSession,
+    stmt: Select,
+    order_by: Sequence[Any],
+    cursor_values: Callable[[Any], Sequence[Any]],
+    cursor_parsers: Sequence[Callable[[Any], Any]],
+    page_size: int,
+    cursor: Optional[str] = None,
+    page: int = 1,
+    total_mode: Optional[str] = None,
+    descending: bool = True
+) -> Page:
+    """
+    Выбирает страницу по курсору (или по page/page_size без курсора).
+
+    Args:
+        db: Async сессия
+        stmt: SELECT с фильтрами (без ORDER BY/LIMIT)
+        order_by: Колонки ключа сортировки, последняя — уникальная (id)
+        cursor_values: Ключ сортировки из строки результата
+        cursor_parsers: Разбор значений ключа из курсора
+        page_size: Размер страницы
+        cursor: Токен next_cursor предыдущей страницы
+        page: Номер страницы для режима OFFSET (если курсор не передан)
+        total_mode: exact | approx | none (по умолчанию exact без курсора
+            и none с курсором)
+        descending: Направление сортировки по всему ключу
+
+    Returns:
+        Page
+
+    Raises:
+        InvalidCursorError: Некорректный курсор
+    """
+    if total_mode is None:
+        total_mode = TOTAL_NONE if cursor else TOTAL_EXACT
+
+    total = None
+    if total_mode == TOTAL_EXACT:
+        total = await db.scalar(select(func.count()).select_from(stmt.order_by(None).subquery()))
+    elif total_mode == TOTAL_APPROX:
+        total = await estimate_total(db, stmt)
+
+    ordering = [column.desc() if descending else column.asc() for column in order_by]
+    query = stmt.order_by(*ordering)
+
+    if cursor:
+        key = tuple_(*order_by)
+        values = tuple_(*decode_cursor(cursor, cursor_parsers))
+        query = query.where(key < values if descending else key > values)
+    elif page > 1:
+        query = query.offset((page - 1) * page_size)
+
+    # Лишняя строка показывает, есть ли следующая страница
+    rows = (await db.scalars(query.limit(page_size + 1))).all()
+    has_more = len(rows) > page_size
+    items = list(rows[:page_size])
+
+    return Page(
+        items=items,
+        page_size=page_size,
+        total=total,
+        total_approximate=total_mode == TOTAL_APPROX,
+        next_cursor=encode_cursor(cursor_values(items[-1])) if has_more else None,
+        has_more=has_more,
+        page=None if cursor else page
+    )
@@ -0,0 +1,44 @@
+"""
+DeepCalm — Phones
+
+Нормализация телефонов для Identity Map (leads.phone).
+
+Лиды хранят телефон в виде +7XXXXXXXXXX; YCLIENTS и формы сайта
+присылают его в произвольном формате (8 999 ..., 7(999)..., 999-...).
+"""
+import re
+from typing import Optional
+
+_NON_DIGITS = re.compile(r"\D+")
+
+
+def normalize_phone(raw: Optional[str]) -> Optional[str]:
+    """
+    Приводит российский номер к формату +7XXXXXXXXXX.
+
+    Args:
+        raw: Телефон в любом формате
+
+    Returns:
+        Нормализованный номер или None, если это не номер РФ
+
+    Examples:
+        >>> normalize_phone("8 (999) 123-45-67")
+        '+79991234567'
+        >>> normalize_phone("9991234567")
+        '+79991234567'
+        >>> normalize_phone("123") is None
+        True
+    """
+    if not raw:
+        return None
+
+    digits = _NON_DIGITS.sub("", raw)
+    if len(digits) == 10:
+        digits = "7" + digits
+    elif len(digits) == 11 and digits[0] == "8":
+        digits = "7" + digits[1:]
+
+    if len(digits) != 11 or digits[0] != "7":
+        return None
+    return "+" + digits
@@ -0,0 +1,146 @@
+"""
+DeepCalm — SQL Query Stats
+
+Учёт SQL-запросов в рамках HTTP-запроса через события SQLAlchemy.
+
+- before/after_cursor_execute на классе Engine (sync, async через
+  sync_engine и тестовый движок) считают число запросов и суммарное время БД;
+- запрос дольше settings.sql_slow_query_ms пишется в лог sql_slow_query
+  вместе с параметрами (маскирование PII — процессор mask_pii);
+- одинаковый текст запроса, повторённый в одном HTTP-запросе не меньше
+  settings.sql_n_plus_one_threshold раз, — предупреждение sql_n_plus_one_suspected.
+
+Статистика живёт в ContextVar: anyio и asyncio.to_thread копируют контекст,
+поэтому запросы из threadpool sync-эндпоинтов попадают в тот же объект.
+correlation_id в логах — из structlog contextvars запроса.
+"""
+import time
+from collections import Counter
+from contextvars import ContextVar, Token
+from typing import Any, Optional
+
+import structlog
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = structlog.get_logger(__name__)
+
+# Длина текста запроса в логах
+MAX_STATEMENT_LENGTH = 2000
+# Наборы параметров executemany в логе медленного запроса
+MAX_LOGGED_PARAM_SETS = 3
+
+_START_TIMES_KEY = "dc_query_start_times"
+
+_current: ContextVar[Optional["QueryStats"]] = ContextVar("dc_query_stats", default=None)
+
+
+class QueryStats:
+    """Запросы одного HTTP-запроса"""
+
+    __slots__ = ("count", "duration", "shapes")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration = 0.0
+        self.shapes: Counter = Counter()
+
+    @property
+    def duration_ms(self) -> float:
+        return round(self.duration * 1000, 1)
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        self.shapes[statement] += 1
+
+    def repeated(self, threshold: int) -> list:
+        """Тексты запросов, выполненные не меньше threshold раз"""
+        return [(statement, count) for statement, count in self.shapes.most_common() if count >= threshold]
+
+
+def start_request() -> Token:
+    """Начинает учёт для текущего контекста (middleware запроса)"""
+    return _current.set(QueryStats())
+
+
+def finish_request(token: Token) -> QueryStats:
+    """
+    Завершает учёт: предупреждения о подозрении на N+1 и сброс контекста.
+
+    Returns:
+        QueryStats запроса
+    """
+    stats = _current.get()
+    _current.reset(token)
+    for statement, count in stats.repeated(settings.sql_n_plus_one_threshold):
+        logger.warning(
+            "sql_n_plus_one_suspected",
+            statement=_shorten(statement),
+            executions=count,
+            db_queries=stats.count
+        )
+    return stats
+
+
+def current() -> Optional[QueryStats]:
+    """Статистика текущего HTTP-запроса (None вне запроса)"""
+    return _current.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault(_START_TIMES_KEY, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    starts = conn.info.get(_START_TIMES_KEY)
+    if not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, duration)
+
+    if duration * 1000 >= settings.sql_slow_query_ms:
+        logger.warning(
+            "sql_slow_query",
+            duration_ms=round(duration * 1000, 1),
+            statement=_shorten(statement),
+            parameters=_loggable_params(parameters, executemany)
+        )
+
+
+def _handle_error(exception_context) -> None:
+    # after_cursor_execute при ошибке не вызывается — снимаем время старта
+    conn = exception_context.connection
+    if conn is not None and conn.info.get(_START_TIMES_KEY):
+        conn.info[_START_TIMES_KEY].pop()
+
+
+def _shorten(statement: str) -> str:
+    statement = " ".join(statement.split())
+    if len(statement) > MAX_STATEMENT_LENGTH:
+        return statement[:MAX_STATEMENT_LENGTH] + "…"
+    return statement
+
+
+def _loggable_params(parameters: Any, executemany: bool) -> Any:
+    """Параметры для лога (executemany — первые наборы и их число)"""
+    if executemany and isinstance(parameters, (list, tuple)):
+        return {
+            "sets": len(parameters),
+            "first": list(parameters[:MAX_LOGGED_PARAM_SETS]),
+        }
+    return parameters
+
+
+def install() -> None:
+    """Подключает слушатели ко всем Engine процесса (идемпотентно)"""
+    if event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
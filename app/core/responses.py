@@ -0,0 +1,54 @@
+"""
+DeepCalm — JSON Responses
+
+Класс ответа на orjson для всего приложения (default_response_class).
+
+UUID, datetime и date orjson сериализует сам; Decimal (суммы из Numeric
+колонок) — как jsonable_encoder FastAPI: целые в int, остальные в float.
+Pydantic-модели сериализуются pydantic-core с by_alias, как в response_model.
+
+Маршрут с response_model, возвращающий модель, проходит валидацию дважды:
+модель создаётся в хендлере, затем FastAPI валидирует её снова и переводит
+в dict перед рендером. json_response() возвращает готовый Response —
+FastAPI отдаёт его как есть, а response_model остаётся только для схемы OpenAPI.
+"""
+from decimal import Decimal
+from typing import Any, Optional
+
+import orjson
+from fastapi.encoders import decimal_encoder
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+
+def _default(value: Any) -> Any:
+    """Типы, которые orjson не сериализует сам"""
+    if isinstance(value, Decimal):
+        return decimal_encoder(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json", by_alias=True)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class FastJSONResponse(ORJSONResponse):
+    """JSON-ответ на orjson (pydantic-модели — через pydantic-core)"""
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content, by_alias=True)
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def json_response(content: Any, status_code: int = 200, headers: Optional[dict] = None) -> FastJSONResponse:
+    """
+    Готовый ответ без повторной валидации FastAPI.
+
+    Args:
+        content: Уже провалидированная модель, dict или list
+        status_code: HTTP статус
+        headers: Дополнительные заголовки
+
+    Returns:
+        FastJSONResponse
+    """
+    return FastJSONResponse(content, status_code=status_code, headers=headers)
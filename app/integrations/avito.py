@@ -4,12 +4,17 @@ DeepCalm — Avito Integration (Mock)
 Mock коннектор для Avito XML автозагрузки.
 Реальная интеграция — Phase 1+ (когда будут токены).
 """
+import time
 import uuid
 import structlog
-from typing import Dict
+from typing import Dict, Optional
+
+from app.integrations.resilience import ChannelResilience, channel_resilience
 
 logger = structlog.get_logger(__name__)
 
+CHANNEL = "avito"
+
 
 class AvitoClient:
     """
@@ -19,15 +24,25 @@ class AvitoClient:
     Phase 1+: Реальная интеграция через https://api.avito.ru/v2/items/upload
     """
 
-    def __init__(self, client_id: str = "", client_secret: str = ""):
+    def __init__(
+        self,
+        client_id: str = "",
+        client_secret: str = "",
+        latency_seconds: float = 0.0,
+        resilience: Optional[ChannelResilience] = None
+    ):
         """
         Инициализация клиента.
 
         Args:
             client_id: Avito Client ID
             client_secret: Avito Client Secret
+            latency_seconds: Искусственная задержка ответа mock (для бенчмарков)
+            resilience: Повторы и автомат канала (по умолчанию — общие на процесс)
         """
         self.client_id = client_id
+        self.latency_seconds = latency_seconds
+        self.resilience = resilience or channel_resilience
         logger.info("avito_client_initialized", client_id=client_id)
 
     def create_ad(
@@ -47,11 +62,16 @@ class AvitoClient:
         Returns:
             external_ad_id (str)
         """
+        return self.resilience.call(CHANNEL, self._create_ad, title)
+
+    def _create_ad(self, title: str) -> str:
         logger.info(
             "avito_ad_create_mock",
             title=title
         )
 
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
         external_ad_id = f"avito_ad_{uuid.uuid4().hex[:8]}"
 
         logger.info(
@@ -63,5 +83,9 @@ class AvitoClient:
 
     def pause_ad(self, external_ad_id: str) -> Dict:
         """Снять объявление с публикации (mock)"""
+        return self.resilience.call(CHANNEL, self._pause_ad, external_ad_id)
+
+    @staticmethod
+    def _pause_ad(external_ad_id: str) -> Dict:
         logger.info("avito_ad_pause_mock", ad_id=external_ad_id)
         return {"status": "paused"}
@@ -0,0 +1,291 @@
+"""
+DeepCalm — баллы API Яндекс.Директа
+
+Каждый ответ API v5 содержит заголовок `Units: <списано>/<остаток>/<суточный лимит>`
+(и `Units-Used-Login` — чьи баллы списаны). UnitsTracker запоминает последние
+значения по логину, AdaptiveRateLimiter пропускает исходящие вызовы через
+token bucket:
+
+- пока остаток выше direct_units_slowdown_fraction суточного лимита,
+  запросы идут с базовой частотой; ниже — частота падает пропорционально остатку;
+- фоновые вызовы (см. background_calls) ждут, пока есть ожидающие интерактивные,
+  и не трогают последние direct_units_background_reserve баллов;
+- при нулевом остатке вызов сразу завершается ошибкой, а не тратит запрос.
+
+Баллы восстанавливаются в течение суток, а обновить остаток может только
+ответ API. Поэтому значения старше direct_units_ttl_seconds считаются
+неизвестными: следующий вызов проходит как пробный и приносит свежий Units.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+import structlog
+
+from app.core.config import settings
+
+logger = structlog.get_logger(__name__)
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+# Нижняя граница частоты при почти исчерпанном бюджете (доля базовой)
+MIN_RATE_FACTOR = 0.05
+
+_priority: ContextVar[str] = ContextVar("direct_call_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def background_calls() -> Iterator[None]:
+    """Вызовы Директа внутри блока — фоновые (синхронизации, отчёты)"""
+    token = _priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+class DirectUnitsExhausted(RuntimeError):
+    """Баллов не осталось (или остался только резерв интерактивных вызовов)"""
+
+
+@dataclass(frozen=True)
+class DirectUnits:
+    """Значения заголовка Units."""
+
+    spent: int
+    remaining: int
+    daily_limit: int
+
+    @property
+    def remaining_fraction(self) -> float:
+        if self.daily_limit <= 0:
+            return 1.0
+        return self.remaining / self.daily_limit
+
+
+def parse_units_header(value: Optional[str]) -> Optional[DirectUnits]:
+    """`10/20828/64000` → DirectUnits (None — заголовка нет или он некорректен)"""
+    if not value:
+        return None
+    try:
+        spent, remaining, daily_limit = (int(part) for part in value.split("/"))
+    except ValueError:
+        logger.warning("yandex_direct_units_header_invalid", value=value)
+        return None
+    return DirectUnits(spent=spent, remaining=remaining, daily_limit=daily_limit)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class UnitsTracker:
+    """
+    Последние известные баллы по логинам (потокобезопасно).
+
+    Args:
+        ttl_seconds: Возраст значения, после которого остаток неизвестен
+            (None — settings.direct_units_ttl_seconds)
+        clock: Текущее время UTC (подменяется в тестах)
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: Optional[float] = None,
+        clock: Callable[[], datetime] = _utcnow
+    ) -> None:
+        if ttl_seconds is None:
+            ttl_seconds = settings.direct_units_ttl_seconds
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._by_login: Dict[str, Tuple[DirectUnits, datetime]] = {}
+
+    def record(self, login: str, units: DirectUnits) -> None:
+        with self._lock:
+            self._by_login[login] = (units, self._clock())
+        logger.debug("yandex_direct_units", login=login, spent=units.spent, remaining=units.remaining)
+
+    def get(self, login: str) -> Optional[DirectUnits]:
+        """Актуальные баллы логина (None — неизвестны или устарели)"""
+        with self._lock:
+            entry = self._by_login.get(login)
+        if entry is None or self._is_stale(entry[1]):
+            return None
+        return entry[0]
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Баллы по логинам для health-эндпоинта"""
+        with self._lock:
+            items = list(self._by_login.items())
+        return {
+            login: {
+                "spent": units.spent,
+                "remaining": units.remaining,
+                "daily_limit": units.daily_limit,
+                "updated_at": updated_at.isoformat(),
+                "stale": self._is_stale(updated_at),
+            }
+            for login, (units, updated_at) in items
+        }
+
+    def _is_stale(self, updated_at: datetime) -> bool:
+        return self._clock() - updated_at > self.ttl
+
+    def reset(self) -> None:
+        with self._lock:
+            self._by_login.clear()
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket по логину с частотой, зависящей от остатка баллов.
+
+    Args:
+        tracker: Источник остатка баллов
+        rate_per_second: Базовая частота запросов
+        burst: Ёмкость корзины
+        slowdown_fraction: Доля суточного лимита, ниже которой частота снижается
+        background_reserve: Доля суточного лимита, недоступная фоновым вызовам
+        clock: Монотонные часы (подменяются в тестах)
+    """
+
+    def __init__(
+        self,
+        tracker: UnitsTracker,
+        rate_per_second: float,
+        burst: int,
+        slowdown_fraction: float,
+        background_reserve: float,
+        clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.tracker = tracker
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.slowdown_fraction = slowdown_fraction
+        self.background_reserve = background_reserve
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[float, float]] = {}  # login -> (токены, время)
+        self._interactive_waiting: Dict[str, int] = {}
+
+    @classmethod
+    def from_settings(cls, tracker: UnitsTracker) -> "AdaptiveRateLimiter":
+        return cls(
+            tracker,
+            rate_per_second=settings.direct_rate_limit_per_second,
+            burst=settings.direct_rate_limit_burst,
+            slowdown_fraction=settings.direct_units_slowdown_fraction,
+            background_reserve=settings.direct_units_background_reserve,
+        )
+
+    def rate(self, login: str) -> float:
+        """Текущая частота запросов для логина"""
+        units = self.tracker.get(login)
+        if units is None or self.slowdown_fraction <= 0:
+            return self.rate_per_second
+        fraction = units.remaining_fraction
+        if fraction >= self.slowdown_fraction:
+            return self.rate_per_second
+        return self.rate_per_second * max(fraction / self.slowdown_fraction, MIN_RATE_FACTOR)
+
+    def acquire(self, login: str, priority: Optional[str] = None) -> float:
+        """
+        Ждёт разрешения на вызов (блокирующе).
+
+        Returns:
+            Время ожидания, с
+
+        Raises:
+            DirectUnitsExhausted: Баллов для вызова с таким приоритетом нет
+        """
+        priority = priority or current_priority()
+        waited = 0.0
+        waiting = False
+        try:
+            while True:
+                delay = self._reserve(login, priority)
+                if delay == 0:
+                    return waited
+                if priority == INTERACTIVE and not waiting:
+                    self._set_waiting(login, +1)
+                    waiting = True
+                time.sleep(delay)
+                waited += delay
+        finally:
+            if waiting:
+                self._set_waiting(login, -1)
+
+    async def aacquire(self, login: str, priority: Optional[str] = None) -> float:
+        """Async-вариант acquire."""
+        priority = priority or current_priority()
+        waited = 0.0
+        waiting = False
+        try:
+            while True:
+                delay = self._reserve(login, priority)
+                if delay == 0:
+                    return waited
+                if priority == INTERACTIVE and not waiting:
+                    self._set_waiting(login, +1)
+                    waiting = True
+                await asyncio.sleep(delay)
+                waited += delay
+        finally:
+            if waiting:
+                self._set_waiting(login, -1)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+            self._interactive_waiting.clear()
+
+    def _reserve(self, login: str, priority: str) -> float:
+        """Берёт токен (0) или возвращает, сколько ждать до следующей попытки"""
+        units = self.tracker.get(login)
+        if units is not None and units.remaining <= 0:
+            raise DirectUnitsExhausted(f"Баллы API Директа исчерпаны (логин {login})")
+        if (
+            priority == BACKGROUND
+            and units is not None
+            and units.remaining_fraction < self.background_reserve
+        ):
+            raise DirectUnitsExhausted(
+                f"Остаток баллов {units.remaining} зарезервирован для интерактивных вызовов (логин {login})"
+            )
+
+        rate = self.rate(login)
+        with self._lock:
+            now = self._clock()
+            tokens, updated = self._buckets.get(login, (float(self.burst), now))
+            tokens = min(float(self.burst), tokens + (now - updated) * rate)
+
+            if priority == BACKGROUND and self._interactive_waiting.get(login):
+                self._buckets[login] = (tokens, now)
+                return 1.0 / rate
+            if tokens >= 1.0:
+                self._buckets[login] = (tokens - 1.0, now)
+                return 0.0
+            self._buckets[login] = (tokens, now)
+            return (1.0 - tokens) / rate
+
+    def _set_waiting(self, login: str, delta: int) -> None:
+        with self._lock:
+            self._interactive_waiting[login] = self._interactive_waiting.get(login, 0) + delta
+
+
+# Singleton instances
+direct_units = UnitsTracker()
+direct_limiter = AdaptiveRateLimiter.from_settings(direct_units)
@@ -0,0 +1,104 @@
+"""
+DeepCalm — HTTP Transport
+
+Общие httpx-клиенты интеграций на процесс.
+
+Клиенты создаются лениво при первом запросе и живут до shutdown
+приложения (lifespan), поэтому соединения с площадками переиспользуются:
+keep-alive, пул соединений и HTTP/2 (если установлен h2) вместо нового
+TCP/TLS-рукопожатия на каждый вызов API.
+"""
+import importlib.util
+import threading
+from typing import Optional
+
+import httpx
+import structlog
+
+from app.core.config import settings
+
+logger = structlog.get_logger(__name__)
+
+USER_AGENT = "DeepCalm/1.0"
+
+
+def _http2_enabled() -> bool:
+    """HTTP/2 включён в настройках и доступен пакет h2"""
+    if not settings.http_http2:
+        return False
+    if importlib.util.find_spec("h2") is None:
+        logger.warning("http2_unavailable", reason="h2 package is not installed")
+        return False
+    return True
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive_connections,
+        keepalive_expiry=settings.http_keepalive_expiry_seconds,
+    )
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(settings.http_timeout_seconds, connect=settings.http_connect_timeout_seconds)
+
+
+class HttpClients:
+    """
+    Пара общих клиентов (sync для сервисов и потоков, async для async-эндпоинтов).
+
+    httpx.Client потокобезопасен, поэтому один экземпляр используется и
+    из пула потоков публикации. AsyncClient привязан к event loop, в
+    котором создан, — в приложении это loop uvicorn.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._sync: Optional[httpx.Client] = None
+        self._async: Optional[httpx.AsyncClient] = None
+
+    def sync_client(self) -> httpx.Client:
+        """Общий httpx.Client (создаётся при первом вызове)"""
+        if self._sync is None:
+            with self._lock:
+                if self._sync is None:
+                    http2 = _http2_enabled()
+                    self._sync = httpx.Client(
+                        limits=_limits(),
+                        timeout=_timeout(),
+                        http2=http2,
+                        headers={"User-Agent": USER_AGENT},
+                    )
+                    logger.info("http_client_created", kind="sync", http2=http2)
+        return self._sync
+
+    def async_client(self) -> httpx.AsyncClient:
+        """Общий httpx.AsyncClient (создаётся при первом вызове)"""
+        if self._async is None:
+            with self._lock:
+                if self._async is None:
+                    http2 = _http2_enabled()
+                    self._async = httpx.AsyncClient(
+                        limits=_limits(),
+                        timeout=_timeout(),
+                        http2=http2,
+                        headers={"User-Agent": USER_AGENT},
+                    )
+                    logger.info("http_client_created", kind="async", http2=http2)
+        return self._async
+
+    async def aclose(self) -> None:
+        """Закрывает оба клиента (shutdown приложения)"""
+        with self._lock:
+            sync_client, self._sync = self._sync, None
+            async_client, self._async = self._async, None
+        if sync_client is not None:
+            sync_client.close()
+        if async_client is not None:
+            await async_client.aclose()
+        logger.info("http_clients_closed")
+
+
+# Singleton instance
+http_clients = HttpClients()
@@ -0,0 +1,357 @@
+"""
+DeepCalm — устойчивость вызовов рекламных площадок
+
+Общий слой для клиентов Директа, VK Ads и Avito:
+
+- временные ошибки (5xx, 429, сетевые сбои и таймауты — исключения с
+  retryable=True) повторяются с экспоненциальной задержкой и полным джиттером;
+  для неидемпотентных вызовов клиент сужает повторы через retry_if
+  (например, только ошибки соединения, когда запрос не дошёл до площадки);
+- на каждый канал — автомат (circuit breaker) по скользящей доле таких ошибок.
+  Правило aegis `api_5xx_rate_5m > 0.02 → pause publishing 30m`
+  (cortex/policies/aegis.yml): когда доля за circuit_window_seconds превышает
+  порог, вызовы канала сразу завершаются CircuitOpenError, а публикация в
+  канал приостанавливается на circuit_pause_minutes. После паузы пропускается
+  один пробный вызов: успех закрывает автомат, ошибка открывает его снова.
+
+Состояние хранится в процессе (как и общие HTTP-клиенты). Латентность
+каждой попытки и ошибки по видам пишутся в метрики dc_integration_*.
+"""
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+import structlog
+
+from app.core.config import settings
+from app.core.metrics import integration_call_duration_seconds, integration_errors_total
+
+logger = structlog.get_logger(__name__)
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Временная ошибка площадки (атрибут retryable исключения)"""
+    return bool(getattr(exc, "retryable", False))
+
+
+class CircuitOpenError(RuntimeError):
+    """Автомат канала открыт: вызов не выполнялся"""
+
+    retryable = False
+
+    def __init__(self, channel: str, paused_until: Optional[datetime]) -> None:
+        until = paused_until.isoformat() if paused_until else "пробного вызова"
+        super().__init__(f"Канал {channel} приостановлен до {until}: доля ошибок API выше порога")
+        self.channel = channel
+        self.paused_until = paused_until
+
+
+class CircuitBreaker:
+    """
+    Автомат одного канала.
+
+    Args:
+        channel: Код канала (direct, vk, avito)
+        window_seconds: Окно скользящей доли ошибок
+        error_rate_threshold: Порог доли ошибок
+        min_calls: Минимум вызовов в окне для срабатывания
+        open_seconds: Пауза после срабатывания
+        clock: Монотонные часы (подменяются в тестах)
+    """
+
+    def __init__(
+        self,
+        channel: str,
+        window_seconds: float,
+        error_rate_threshold: float,
+        min_calls: int,
+        open_seconds: float,
+        clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.channel = channel
+        self.window_seconds = window_seconds
+        self.error_rate_threshold = error_rate_threshold
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._calls: Deque[Tuple[float, bool]] = deque()  # (время, ошибка)
+        self._failures = 0
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._paused_until: Optional[datetime] = None
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._refresh(self._clock())
+            return self._state
+
+    @property
+    def paused_until(self) -> Optional[datetime]:
+        with self._lock:
+            self._refresh(self._clock())
+            return self._paused_until if self._state == OPEN else None
+
+    def before_call(self) -> None:
+        """Пропускает вызов или выбрасывает CircuitOpenError"""
+        with self._lock:
+            self._refresh(self._clock())
+            if self._state == OPEN:
+                raise CircuitOpenError(self.channel, self._paused_until)
+            if self._state == HALF_OPEN:
+                if self._probe_in_flight:
+                    raise CircuitOpenError(self.channel, None)
+                self._probe_in_flight = True
+
+    def record(self, failed: bool) -> None:
+        """Учитывает результат вызова (failed — временная ошибка площадки)"""
+        with self._lock:
+            now = self._clock()
+            if self._state == HALF_OPEN:
+                self._probe_in_flight = False
+                if failed:
+                    self._open(now, error_rate=1.0)
+                else:
+                    self._close()
+                return
+
+            self._calls.append((now, failed))
+            self._failures += failed
+            self._trim(now)
+
+            rate = self._error_rate()
+            if self._state == CLOSED and len(self._calls) >= self.min_calls and rate > self.error_rate_threshold:
+                self._open(now, error_rate=rate)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            now = self._clock()
+            self._refresh(now)
+            self._trim(now)
+            return {
+                "state": self._state,
+                "calls": len(self._calls),
+                "error_rate": round(self._error_rate(), 4),
+                "paused_until": self._paused_until.isoformat() if self._state == OPEN else None,
+            }
+
+    def _refresh(self, now: float) -> None:
+        if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+            logger.info("channel_circuit_half_open", channel=self.channel)
+
+    def _trim(self, now: float) -> None:
+        while self._calls and now - self._calls[0][0] > self.window_seconds:
+            _, failed = self._calls.popleft()
+            self._failures -= failed
+
+    def _error_rate(self) -> float:
+        return self._failures / len(self._calls) if self._calls else 0.0
+
+    def _open(self, now: float, error_rate: float) -> None:
+        self._state = OPEN
+        self._opened_at = now
+        self._paused_until = datetime.now(timezone.utc) + timedelta(seconds=self.open_seconds)
+        logger.warning(
+            "channel_circuit_opened",
+            channel=self.channel,
+            error_rate=round(error_rate, 4),
+            paused_until=self._paused_until.isoformat()
+        )
+
+    def _close(self) -> None:
+        self._state = CLOSED
+        self._calls.clear()
+        self._failures = 0
+        self._paused_until = None
+        logger.info("channel_circuit_closed", channel=self.channel)
+
+
+class RetryPolicy:
+    """Экспоненциальная задержка с полным джиттером"""
+
+    def __init__(self, attempts: int, base_delay: float, max_delay: float) -> None:
+        self.attempts = max(attempts, 1)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int) -> float:
+        """Задержка перед повтором после попытки attempt (с нуля)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+class ChannelResilience:
+    """Повторы и автоматы по каналам (один экземпляр на процесс)"""
+
+    def __init__(
+        self,
+        retry: RetryPolicy,
+        window_seconds: float,
+        error_rate_threshold: float,
+        min_calls: int,
+        open_seconds: float,
+        clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.retry = retry
+        self._breaker_params = dict(
+            window_seconds=window_seconds,
+            error_rate_threshold=error_rate_threshold,
+            min_calls=min_calls,
+            open_seconds=open_seconds,
+            clock=clock,
+        )
+        self._lock = threading.Lock()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    @classmethod
+    def from_settings(cls) -> "ChannelResilience":
+        return cls(
+            RetryPolicy(
+                attempts=settings.resilience_retry_attempts,
+                base_delay=settings.resilience_retry_base_delay_seconds,
+                max_delay=settings.resilience_retry_max_delay_seconds,
+            ),
+            window_seconds=settings.circuit_window_seconds,
+            error_rate_threshold=settings.circuit_error_rate_threshold,
+            min_calls=settings.circuit_min_calls,
+            open_seconds=settings.circuit_pause_minutes * 60,
+        )
+
+    def breaker(self, channel: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(channel)
+            if breaker is None:
+                breaker = self._breakers[channel] = CircuitBreaker(channel, **self._breaker_params)
+            return breaker
+
+    def call(
+        self,
+        channel: str,
+        func: Callable[..., T],
+        *args: Any,
+        retry_if: Optional[Callable[[Exception], bool]] = None,
+        **kwargs: Any
+    ) -> T:
+        """
+        Вызов площадки с повторами и автоматом канала.
+
+        Args:
+            channel: Код канала
+            func: Вызов площадки
+            retry_if: Дополнительное условие повтора временной ошибки
+                (None — повторять все временные); автомат учитывает
+                временную ошибку в любом случае
+
+        Raises:
+            CircuitOpenError: Канал приостановлен
+            Exception: Ошибка func (после исчерпания повторов для временных)
+        """
+        breaker = self.breaker(channel)
+        for attempt in range(self.retry.attempts):
+            self._before_call(breaker)
+            started = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as exc:
+                delay = self._on_error(breaker, attempt, exc, started, retry_if)
+                time.sleep(delay)
+                continue
+            self._on_success(breaker, started)
+            return result
+        raise AssertionError("unreachable")
+
+    async def acall(
+        self,
+        channel: str,
+        func: Callable[..., Awaitable[T]],
+        *args: Any,
+        retry_if: Optional[Callable[[Exception], bool]] = None,
+        **kwargs: Any
+    ) -> T:
+        """Async-вариант call (func — корутинная функция)."""
+        breaker = self.breaker(channel)
+        for attempt in range(self.retry.attempts):
+            self._before_call(breaker)
+            started = time.perf_counter()
+            try:
+                result = await func(*args, **kwargs)
+            except Exception as exc:
+                delay = self._on_error(breaker, attempt, exc, started, retry_if)
+                await asyncio.sleep(delay)
+                continue
+            self._on_success(breaker, started)
+            return result
+        raise AssertionError("unreachable")
+
+    def paused_until(self, channel: str) -> Optional[datetime]:
+        """До какого времени приостановлен канал (None — не приостановлен)"""
+        return self.breaker(channel).paused_until
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            breakers = list(self._breakers.items())
+        return {channel: breaker.snapshot() for channel, breaker in breakers}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._breakers.clear()
+
+    @staticmethod
+    def _before_call(breaker: CircuitBreaker) -> None:
+        try:
+            breaker.before_call()
+        except CircuitOpenError:
+            integration_errors_total.labels(breaker.channel, "circuit_open").inc()
+            raise
+
+    @staticmethod
+    def _on_success(breaker: CircuitBreaker, started: float) -> None:
+        integration_call_duration_seconds.labels(breaker.channel).observe(time.perf_counter() - started)
+        breaker.record(failed=False)
+
+    def _on_error(
+        self,
+        breaker: CircuitBreaker,
+        attempt: int,
+        exc: Exception,
+        started: float,
+        retry_if: Optional[Callable[[Exception], bool]] = None
+    ) -> float:
+        """Учитывает ошибку: пробрасывает её или возвращает задержку перед повтором"""
+        integration_call_duration_seconds.labels(breaker.channel).observe(time.perf_counter() - started)
+        retryable = is_retryable(exc)
+        integration_errors_total.labels(breaker.channel, "retryable" if retryable else "fatal").inc()
+        breaker.record(failed=retryable)
+        if not retryable or attempt + 1 >= self.retry.attempts:
+            raise exc
+        if retry_if is not None and not retry_if(exc):
+            raise exc
+
+        delay = self.retry.delay(attempt)
+        logger.warning(
+            "channel_call_retry",
+            channel=breaker.channel,
+            attempt=attempt + 1,
+            delay_seconds=round(delay, 3),
+            error=str(exc)
+        )
+        return delay
+
+
+# Singleton instance
+channel_resilience = ChannelResilience.from_settings()
@@ -5,12 +5,17 @@ Mock коннектор для VK Ads.
 Согласно DEEP-CALM-MVP-BLUEPRINT.md: для MVP используем mock,
 т.к. официального VK Ads API для создания кампаний нет в открытом доступе.
 """
+import time
 import uuid
 import structlog
-from typing import Dict
+from typing import Dict, Optional
+
+from app.integrations.resilience import ChannelResilience, channel_resilience
 
 logger = structlog.get_logger(__name__)
 
+CHANNEL = "vk"
+
 
 class VKAdsClient:
     """
@@ -20,7 +25,14 @@ class VKAdsClient:
     Phase 2+: Реальная интеграция через myTarget или VK Ads API (если появится)
     """
 
-    def __init__(self, app_id: str = "", app_secret: str = "", access_token: str = ""):
+    def __init__(
+        self,
+        app_id: str = "",
+        app_secret: str = "",
+        access_token: str = "",
+        latency_seconds: float = 0.0,
+        resilience: Optional[ChannelResilience] = None
+    ):
         """
         Инициализация клиента.
 
@@ -28,9 +40,13 @@ class VKAdsClient:
             app_id: VK App ID
             app_secret: VK App Secret
             access_token: VK Access Token
+            latency_seconds: Искусственная задержка ответа mock (для бенчмарков)
+            resilience: Повторы и автомат канала (по умолчанию — общие на процесс)
         """
         self.app_id = app_id
         self.access_token = access_token
+        self.latency_seconds = latency_seconds
+        self.resilience = resilience or channel_resilience
         logger.info("vk_ads_client_initialized", app_id=app_id)
 
     def create_campaign(
@@ -58,6 +74,9 @@ class VKAdsClient:
             >>> result.startswith("vk_camp_")
             True
         """
+        return self.resilience.call(CHANNEL, self._create_campaign, title, budget_rub)
+
+    def _create_campaign(self, title: str, budget_rub: float) -> str:
         logger.info(
             "vk_campaign_create_mock",
             title=title,
@@ -65,6 +84,8 @@ class VKAdsClient:
         )
 
         # Mock response
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
         external_campaign_id = f"vk_camp_{uuid.uuid4().hex[:8]}"
 
         logger.info(
@@ -76,10 +97,18 @@ class VKAdsClient:
 
     def pause_campaign(self, external_campaign_id: str) -> Dict:
         """Приостановить кампанию (mock)"""
-        logger.info("vk_campaign_pause_mock", campaign_id=external_campaign_id)
-        return {"status": "paused"}
+        return self.resilience.call(CHANNEL, self._pause_campaign, external_campaign_id)
 
     def resume_campaign(self, external_campaign_id: str) -> Dict:
         """Возобновить кампанию (mock)"""
+        return self.resilience.call(CHANNEL, self._resume_campaign, external_campaign_id)
+
+    @staticmethod
+    def _pause_campaign(external_campaign_id: str) -> Dict:
+        logger.info("vk_campaign_pause_mock", campaign_id=external_campaign_id)
+        return {"status": "paused"}
+
+    @staticmethod
+    def _resume_campaign(external_campaign_id: str) -> Dict:
         logger.info("vk_campaign_resume_mock", campaign_id=external_campaign_id)
         return {"status": "active"}
@@ -1,28 +1,99 @@
 """DeepCalm — интеграция с Яндекс.Директ API v5."""
 from __future__ import annotations
 
+import asyncio
 import json
+import time
 import uuid
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import date
-from typing import Any, Dict, List
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 
 import httpx
 import structlog
 
+from app.core.config import settings
+from app.integrations.direct_units import (
+    AdaptiveRateLimiter,
+    DirectUnitsExhausted,
+    direct_limiter,
+    parse_units_header,
+)
+from app.integrations.http import USER_AGENT, http_clients
+from app.integrations.resilience import ChannelResilience, CircuitOpenError, channel_resilience
+
 logger = structlog.get_logger(__name__)
 
 
 YANDEX_API_URL = "https://api.direct.yandex.com/json/v5/"
 YANDEX_SANDBOX_URL = "https://api-sandbox.direct.yandex.com/json/v5/"
 
+# Лимиты API v5 на один вызов
+# https://yandex.ru/dev/direct/doc/ref-v5/campaigns/add.html
+CAMPAIGNS_ADD_LIMIT = 10
+# https://yandex.ru/dev/direct/doc/ref-v5/campaigns/suspend.html
+CAMPAIGN_IDS_LIMIT = 1000
+
+# Коды ошибок API v5, означающие сбой на стороне Директа
+# https://yandex.ru/dev/direct/doc/dg/concepts/errors.html
+SERVER_ERROR_CODES = frozenset({52, 1000, 1001, 1002})
+
+CHANNEL = "direct"
+
+# Методы, повтор которых не меняет результат. campaigns/add после таймаута
+# мог уже создать кампанию — его повторяем, только если запрос не ушёл
+IDEMPOTENT_METHODS = frozenset({"get", "suspend", "resume"})
+
+# Mock данные для разработки
+_MOCK_CAMPAIGNS: List[Dict[str, Any]] = [
+    {
+        "Id": 700005747,
+        "Name": "Test API Sandbox campaign 1",
+        "Status": "ACCEPTED",
+        "State": "ON",
+        "Type": "TEXT_CAMPAIGN"
+    }
+]
+
 
 class YandexDirectError(RuntimeError):
-    """Исключение для ошибок Яндекс.Директа."""
+    """Исключение для ошибок Яндекс.Директа.
 
-    def __init__(self, message: str, *, payload: Dict[str, Any] | None = None) -> None:
+    retryable — временная ошибка (5xx, 429, сбой сети, серверные коды API):
+    такой вызов повторяется и учитывается автоматом канала.
+    """
+
+    def __init__(
+        self,
+        message: str,
+        *,
+        payload: Dict[str, Any] | None = None,
+        status_code: int | None = None,
+        retryable: bool = False
+    ) -> None:
         super().__init__(message)
         self.payload = payload or {}
+        self.status_code = status_code
+        self.retryable = retryable
+
+
+@dataclass
+class DirectItemResult:
+    """Результат одного элемента пакетной операции (в порядке запроса)."""
+
+    id: Optional[str] = None
+    error: Optional[str] = None
+    warnings: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _chunks(items: Sequence[Any], size: int) -> Iterator[Sequence[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
 
 
 @dataclass
@@ -31,6 +102,15 @@ class YandexDirectClient:
 
     Если токен или логин не переданы, клиент работает в mock-режиме
     (используется в dev/test окружениях без реальных ключей).
+
+    Запросы идут через общие httpx-клиенты процесса (app.integrations.http)
+    с keep-alive и пулом соединений; у каждого метода есть async-вариант
+    с префиксом `a` (acreate_campaign, aget_campaigns, ...).
+
+    Каждый вызов проходит через ограничитель баллов API
+    (app.integrations.direct_units), заголовок Units ответа сохраняется
+    по логину. Временные ошибки повторяются, автомат канала direct
+    (app.integrations.resilience) останавливает вызовы при высокой доле 5xx.
     """
 
     token: str | None = None
@@ -38,9 +118,22 @@ class YandexDirectClient:
     sandbox: bool = True
     language: str = "ru"
     timeout: float = 15.0
+    # Искусственная задержка ответа в mock-режиме (для бенчмарков)
+    mock_latency_seconds: float = 0.0
+    # Явные транспорты (тесты/скрипты); по умолчанию — общие клиенты процесса
+    http_client: httpx.Client | None = field(default=None, repr=False)
+    async_http_client: httpx.AsyncClient | None = field(default=None, repr=False)
+    # Ограничитель запросов; по умолчанию — общий на процесс
+    limiter: AdaptiveRateLimiter | None = field(default=None, repr=False)
+    # Повторы и автомат канала; по умолчанию — общие на процесс
+    resilience: ChannelResilience | None = field(default=None, repr=False)
 
     def __post_init__(self) -> None:
         self._enabled = bool(self.token)
+        if self.limiter is None:
+            self.limiter = direct_limiter
+        if self.resilience is None:
+            self.resilience = channel_resilience
         self._base_url = YANDEX_SANDBOX_URL if self.sandbox else YANDEX_API_URL
 
         # Убираем login если пустой (роль "Клиент")
@@ -66,34 +159,33 @@ class YandexDirectClient:
         В реальном режиме отправляет запрос `campaigns/add` и возвращает ID кампании.
         В mock-режиме создаёт псевдо-ID (для локальной разработки).
         """
-        logger.info(
-            "yandex_direct_create_campaign_started",
-            title=title,
-            budget_rub=budget_rub,
-            enabled=self._enabled,
-            sandbox=self.sandbox
-        )
+        self._log_create_started(title=title, budget_rub=budget_rub)
 
         if not self._enabled:
-            campaign_id = f"direct_camp_{uuid.uuid4().hex[:8]}"
-            logger.info("yandex_direct_mock_create", campaign_id=campaign_id)
-            return campaign_id
+            if self.mock_latency_seconds:
+                time.sleep(self.mock_latency_seconds)
+            return self._mock_campaign_id()
 
         params = self._build_text_campaign_payload(title=title, budget_rub=budget_rub)
         logger.info("yandex_direct_payload_built", params=params)
 
         result = self._request("campaigns", "add", params)
+        return self._campaign_id_from_add_result(result)
 
-        add_results = result.get("AddResults", [])
-        if not add_results:
-            raise YandexDirectError("Пустой ответ при создании кампании", payload=result)
+    async def acreate_campaign(self, *, title: str, body: str, image_url: str, budget_rub: float) -> str:
+        """Async-вариант create_campaign."""
+        self._log_create_started(title=title, budget_rub=budget_rub)
 
-        campaign_id = add_results[0].get("Id")
-        if campaign_id is None:
-            raise YandexDirectError("Не удалось получить Id кампании", payload=add_results[0])
+        if not self._enabled:
+            if self.mock_latency_seconds:
+                await asyncio.sleep(self.mock_latency_seconds)
+            return self._mock_campaign_id()
 
-        logger.info("yandex_direct_campaign_created", campaign_id=campaign_id)
-        return str(campaign_id)
+        params = self._build_text_campaign_payload(title=title, budget_rub=budget_rub)
+        logger.info("yandex_direct_payload_built", params=params)
+
+        result = await self._arequest("campaigns", "add", params)
+        return self._campaign_id_from_add_result(result)
 
     def pause_campaign(self, campaign_id: str) -> Dict[str, Any]:
         if not self._enabled:
@@ -104,6 +196,16 @@ class YandexDirectClient:
         logger.info("yandex_direct_campaign_paused", campaign_id=campaign_id)
         return {"status": "paused"}
 
+    async def apause_campaign(self, campaign_id: str) -> Dict[str, Any]:
+        """Async-вариант pause_campaign."""
+        if not self._enabled:
+            logger.info("yandex_direct_mock_pause", campaign_id=campaign_id)
+            return {"status": "paused"}
+
+        await self._arequest("campaigns", "suspend", {"CampaignIds": [int(campaign_id)]})
+        logger.info("yandex_direct_campaign_paused", campaign_id=campaign_id)
+        return {"status": "paused"}
+
     def resume_campaign(self, campaign_id: str) -> Dict[str, Any]:
         if not self._enabled:
             logger.info("yandex_direct_mock_resume", campaign_id=campaign_id)
@@ -113,6 +215,16 @@ class YandexDirectClient:
         logger.info("yandex_direct_campaign_resumed", campaign_id=campaign_id)
         return {"status": "active"}
 
+    async def aresume_campaign(self, campaign_id: str) -> Dict[str, Any]:
+        """Async-вариант resume_campaign."""
+        if not self._enabled:
+            logger.info("yandex_direct_mock_resume", campaign_id=campaign_id)
+            return {"status": "active"}
+
+        await self._arequest("campaigns", "resume", {"CampaignIds": [int(campaign_id)]})
+        logger.info("yandex_direct_campaign_resumed", campaign_id=campaign_id)
+        return {"status": "active"}
+
     def get_campaigns(self) -> List[Dict[str, Any]]:
         """Получает список кампаний из Яндекс.Директ.
 
@@ -120,29 +232,18 @@ class YandexDirectClient:
             Список кампаний с полями Id, Name, Status, State
         """
         if not self._enabled:
-            # Mock данные для разработки
-            mock_campaigns = [
-                {
-                    "Id": 700005747,
-                    "Name": "Test API Sandbox campaign 1",
-                    "Status": "ACCEPTED",
-                    "State": "ON",
-                    "Type": "TEXT_CAMPAIGN"
-                }
-            ]
-            logger.info("yandex_direct_mock_get_campaigns", count=len(mock_campaigns))
-            return mock_campaigns
+            return self._mock_campaigns()
 
-        params = {
-            "SelectionCriteria": {},
-            "FieldNames": ["Id", "Name", "Status", "State", "Type"]
-        }
+        result = self._request("campaigns", "get", self._get_campaigns_params())
+        return self._campaigns_from_result(result)
 
-        result = self._request("campaigns", "get", params)
-        campaigns = result.get("Campaigns", [])
+    async def aget_campaigns(self) -> List[Dict[str, Any]]:
+        """Async-вариант get_campaigns."""
+        if not self._enabled:
+            return self._mock_campaigns()
 
-        logger.info("yandex_direct_campaigns_retrieved", count=len(campaigns))
-        return campaigns
+        result = await self._arequest("campaigns", "get", self._get_campaigns_params())
+        return self._campaigns_from_result(result)
 
     def health_check(self) -> Dict[str, Any]:
         """Проверяет подключение к API Яндекс.Директ.
@@ -151,33 +252,216 @@ class YandexDirectClient:
             Статус подключения и информация о аккаунте
         """
         if not self._enabled:
-            return {
-                "status": "mock_mode",
-                "message": "Работает в режиме mock (токен не настроен)",
-                "role": "mock"
-            }
+            return self._mock_health()
 
         try:
             campaigns = self.get_campaigns()
-            return {
-                "status": "ok",
-                "message": f"Подключение работает. Найдено кампаний: {len(campaigns)}",
-                "role": "agency" if self.login else "client",
-                "campaigns_count": len(campaigns),
-                "sandbox": self.sandbox
-            }
         except Exception as e:
-            logger.error("yandex_direct_health_check_failed", error=str(e))
-            return {
-                "status": "error",
-                "message": f"Ошибка подключения: {str(e)}",
-                "role": "agency" if self.login else "client"
-            }
+            return self._health_error(e)
+        return self._health_ok(campaigns)
+
+    async def ahealth_check(self) -> Dict[str, Any]:
+        """Async-вариант health_check."""
+        if not self._enabled:
+            return self._mock_health()
+
+        try:
+            campaigns = await self.aget_campaigns()
+        except Exception as e:
+            return self._health_error(e)
+        return self._health_ok(campaigns)
+
+    # ------------------------------------------------------------------
+    # Пакетные операции
+    # ------------------------------------------------------------------
+    def create_campaigns(self, campaigns: Sequence[Dict[str, Any]]) -> List[DirectItemResult]:
+        """Создаёт несколько текстовых кампаний (по CAMPAIGNS_ADD_LIMIT за вызов).
+
+        Args:
+            campaigns: Словари с ключами title и budget_rub
+
+        Returns:
+            Результат на каждую кампанию в порядке запроса. Ошибки элемента
+            или всего вызова не выбрасываются, а попадают в DirectItemResult.error.
+        """
+        logger.info("yandex_direct_create_campaigns_started", count=len(campaigns), enabled=self._enabled)
+
+        if not self._enabled:
+            if self.mock_latency_seconds:
+                time.sleep(self.mock_latency_seconds)
+            return [DirectItemResult(id=self._mock_campaign_id()) for _ in campaigns]
+
+        results: List[DirectItemResult] = []
+        for chunk in _chunks(campaigns, CAMPAIGNS_ADD_LIMIT):
+            params = self._build_text_campaigns_payload(chunk)
+            try:
+                result = self._request("campaigns", "add", params)
+            except YandexDirectError as exc:
+                results.extend(self._chunk_failed("add", chunk, exc))
+                continue
+            results.extend(self._item_results(result, "AddResults", len(chunk)))
+        return results
+
+    async def acreate_campaigns(self, campaigns: Sequence[Dict[str, Any]]) -> List[DirectItemResult]:
+        """Async-вариант create_campaigns."""
+        logger.info("yandex_direct_create_campaigns_started", count=len(campaigns), enabled=self._enabled)
+
+        if not self._enabled:
+            if self.mock_latency_seconds:
+                await asyncio.sleep(self.mock_latency_seconds)
+            return [DirectItemResult(id=self._mock_campaign_id()) for _ in campaigns]
+
+        results: List[DirectItemResult] = []
+        for chunk in _chunks(campaigns, CAMPAIGNS_ADD_LIMIT):
+            params = self._build_text_campaigns_payload(chunk)
+            try:
+                result = await self._arequest("campaigns", "add", params)
+            except YandexDirectError as exc:
+                results.extend(self._chunk_failed("add", chunk, exc))
+                continue
+            results.extend(self._item_results(result, "AddResults", len(chunk)))
+        return results
+
+    def suspend_campaigns(self, campaign_ids: Sequence[str]) -> List[DirectItemResult]:
+        """Останавливает кампании (по CAMPAIGN_IDS_LIMIT за вызов)."""
+        return self._change_state("suspend", "SuspendResults", campaign_ids)
+
+    async def asuspend_campaigns(self, campaign_ids: Sequence[str]) -> List[DirectItemResult]:
+        """Async-вариант suspend_campaigns."""
+        return await self._achange_state("suspend", "SuspendResults", campaign_ids)
+
+    def resume_campaigns(self, campaign_ids: Sequence[str]) -> List[DirectItemResult]:
+        """Возобновляет кампании (по CAMPAIGN_IDS_LIMIT за вызов)."""
+        return self._change_state("resume", "ResumeResults", campaign_ids)
+
+    async def aresume_campaigns(self, campaign_ids: Sequence[str]) -> List[DirectItemResult]:
+        """Async-вариант resume_campaigns."""
+        return await self._achange_state("resume", "ResumeResults", campaign_ids)
+
+    def _change_state(self, method: str, results_key: str, campaign_ids: Sequence[str]) -> List[DirectItemResult]:
+        logger.info("yandex_direct_change_state_started", method=method, count=len(campaign_ids))
+        if not self._enabled:
+            return [DirectItemResult(id=str(campaign_id)) for campaign_id in campaign_ids]
+
+        results, valid = self._parse_campaign_ids(campaign_ids)
+        for chunk in _chunks(valid, CAMPAIGN_IDS_LIMIT):
+            params = {"CampaignIds": [numeric_id for _, numeric_id in chunk]}
+            try:
+                result = self._request("campaigns", method, params)
+            except YandexDirectError as exc:
+                chunk_results = self._chunk_failed(method, chunk, exc)
+            else:
+                chunk_results = self._item_results(result, results_key, len(chunk))
+            for (index, numeric_id), item in zip(chunk, chunk_results):
+                item.id = item.id or str(numeric_id)
+                results[index] = item
+        return results
+
+    async def _achange_state(
+        self,
+        method: str,
+        results_key: str,
+        campaign_ids: Sequence[str]
+    ) -> List[DirectItemResult]:
+        logger.info("yandex_direct_change_state_started", method=method, count=len(campaign_ids))
+        if not self._enabled:
+            return [DirectItemResult(id=str(campaign_id)) for campaign_id in campaign_ids]
+
+        results, valid = self._parse_campaign_ids(campaign_ids)
+        for chunk in _chunks(valid, CAMPAIGN_IDS_LIMIT):
+            params = {"CampaignIds": [numeric_id for _, numeric_id in chunk]}
+            try:
+                result = await self._arequest("campaigns", method, params)
+            except YandexDirectError as exc:
+                chunk_results = self._chunk_failed(method, chunk, exc)
+            else:
+                chunk_results = self._item_results(result, results_key, len(chunk))
+            for (index, numeric_id), item in zip(chunk, chunk_results):
+                item.id = item.id or str(numeric_id)
+                results[index] = item
+        return results
 
     # ------------------------------------------------------------------
     # Вспомогательные методы
     # ------------------------------------------------------------------
     def _request(self, service: str, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        url, headers, payload = self._prepare_request(service, method, params)
+        client = self.http_client or http_clients.sync_client()
+
+        def send() -> Dict[str, Any]:
+            try:
+                self.limiter.acquire(self._units_login)
+            except DirectUnitsExhausted as exc:
+                raise YandexDirectError(str(exc)) from exc
+
+            try:
+                response = client.post(url, headers=headers, json=payload, timeout=self.timeout)
+                self._record_units(response)
+                response.raise_for_status()
+            except httpx.HTTPError as exc:
+                raise self._http_error(service, method, exc) from exc
+
+            return self._parse_response(service, method, url, response)
+
+        try:
+            return self.resilience.call(CHANNEL, send, retry_if=_retry_condition(method))
+        except CircuitOpenError as exc:
+            raise YandexDirectError(str(exc)) from exc
+
+    async def _arequest(self, service: str, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        url, headers, payload = self._prepare_request(service, method, params)
+        client = self.async_http_client or http_clients.async_client()
+
+        async def send() -> Dict[str, Any]:
+            try:
+                await self.limiter.aacquire(self._units_login)
+            except DirectUnitsExhausted as exc:
+                raise YandexDirectError(str(exc)) from exc
+
+            try:
+                response = await client.post(url, headers=headers, json=payload, timeout=self.timeout)
+                self._record_units(response)
+                response.raise_for_status()
+            except httpx.HTTPError as exc:
+                raise self._http_error(service, method, exc) from exc
+
+            return self._parse_response(service, method, url, response)
+
+        try:
+            return await self.resilience.acall(CHANNEL, send, retry_if=_retry_condition(method))
+        except CircuitOpenError as exc:
+            raise YandexDirectError(str(exc)) from exc
+
+    @staticmethod
+    def _http_error(service: str, method: str, exc: httpx.HTTPError) -> YandexDirectError:
+        """Ошибка транспорта или HTTP-статуса; 5xx, 429 и сбои сети — временные"""
+        status_code = exc.response.status_code if isinstance(exc, httpx.HTTPStatusError) else None
+        return YandexDirectError(
+            f"Ошибка HTTP при обращении к {service}/{method}: {exc}",
+            status_code=status_code,
+            retryable=status_code is None or status_code >= 500 or status_code == 429,
+        )
+
+    @property
+    def _units_login(self) -> str:
+        """Ключ баллов: логин клиента (агентство) или владелец токена"""
+        return self.login or "default"
+
+    def _record_units(self, response: httpx.Response) -> None:
+        units = parse_units_header(response.headers.get("Units"))
+        if units is not None:
+            self.limiter.tracker.record(self._units_login, units)
+
+    def units_snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Последние известные баллы API по логинам"""
+        return self.limiter.tracker.snapshot()
+
+    def _prepare_request(
+        self,
+        service: str,
+        method: str,
+        params: Dict[str, Any]
+    ) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
         url = f"{self._base_url}{service}"
         payload = {"method": method, "params": params}
 
@@ -185,7 +469,7 @@ class YandexDirectClient:
             "Authorization": f"Bearer {self.token}",
             "Accept-Language": self.language,
             "Content-Type": "application/json; charset=utf-8",
-            "User-Agent": "DeepCalm/1.0",
+            "User-Agent": USER_AGENT,
         }
         if self.login:
             headers["Client-Login"] = self.login
@@ -196,13 +480,10 @@ class YandexDirectClient:
             method=method,
             payload=payload,
         )
+        return url, headers, payload
 
-        try:
-            response = httpx.post(url, headers=headers, json=payload, timeout=self.timeout)
-            response.raise_for_status()
-        except httpx.HTTPError as exc:
-            raise YandexDirectError(f"Ошибка HTTP при обращении к {service}/{method}: {exc}") from exc
-
+    @staticmethod
+    def _parse_response(service: str, method: str, url: str, response: httpx.Response) -> Dict[str, Any]:
         data = response.json()
 
         logger.info(
@@ -227,6 +508,7 @@ class YandexDirectClient:
             raise YandexDirectError(
                 f"Яндекс.Директ API ошибка: {error_details.get('error_string', 'Unknown')}",
                 payload=error_details,
+                retryable=_error_code(error_details) in SERVER_ERROR_CODES,
             )
 
         result = data.get("result")
@@ -235,9 +517,141 @@ class YandexDirectClient:
 
         return result
 
+    def _log_create_started(self, *, title: str, budget_rub: float) -> None:
+        logger.info(
+            "yandex_direct_create_campaign_started",
+            title=title,
+            budget_rub=budget_rub,
+            enabled=self._enabled,
+            sandbox=self.sandbox
+        )
+
     @staticmethod
-    def _build_text_campaign_payload(*, title: str, budget_rub: float) -> Dict[str, Any]:
-        """Создает payload для создания текстовой кампании в API v5.
+    def _mock_campaign_id() -> str:
+        campaign_id = f"direct_camp_{uuid.uuid4().hex[:8]}"
+        logger.info("yandex_direct_mock_create", campaign_id=campaign_id)
+        return campaign_id
+
+    @staticmethod
+    def _campaign_id_from_add_result(result: Dict[str, Any]) -> str:
+        add_results = result.get("AddResults", [])
+        if not add_results:
+            raise YandexDirectError("Пустой ответ при создании кампании", payload=result)
+
+        campaign_id = add_results[0].get("Id")
+        if campaign_id is None:
+            raise YandexDirectError("Не удалось получить Id кампании", payload=add_results[0])
+
+        logger.info("yandex_direct_campaign_created", campaign_id=campaign_id)
+        return str(campaign_id)
+
+    @staticmethod
+    def _mock_campaigns() -> List[Dict[str, Any]]:
+        campaigns = [dict(campaign) for campaign in _MOCK_CAMPAIGNS]
+        logger.info("yandex_direct_mock_get_campaigns", count=len(campaigns))
+        return campaigns
+
+    @staticmethod
+    def _get_campaigns_params() -> Dict[str, Any]:
+        return {
+            "SelectionCriteria": {},
+            "FieldNames": ["Id", "Name", "Status", "State", "Type"]
+        }
+
+    @staticmethod
+    def _campaigns_from_result(result: Dict[str, Any]) -> List[Dict[str, Any]]:
+        campaigns = result.get("Campaigns", [])
+        logger.info("yandex_direct_campaigns_retrieved", count=len(campaigns))
+        return campaigns
+
+    @staticmethod
+    def _mock_health() -> Dict[str, Any]:
+        return {
+            "status": "mock_mode",
+            "message": "Работает в режиме mock (токен не настроен)",
+            "role": "mock"
+        }
+
+    def _health_ok(self, campaigns: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            "status": "ok",
+            "message": f"Подключение работает. Найдено кампаний: {len(campaigns)}",
+            "role": "agency" if self.login else "client",
+            "campaigns_count": len(campaigns),
+            "sandbox": self.sandbox
+        }
+
+    def _health_error(self, error: Exception) -> Dict[str, Any]:
+        logger.error("yandex_direct_health_check_failed", error=str(error))
+        return {
+            "status": "error",
+            "message": f"Ошибка подключения: {str(error)}",
+            "role": "agency" if self.login else "client"
+        }
+
+    @staticmethod
+    def _parse_campaign_ids(
+        campaign_ids: Sequence[str]
+    ) -> Tuple[List[Optional[DirectItemResult]], List[Tuple[int, int]]]:
+        """Результаты с ошибками для нечисловых ID и (позиция, ID) для запроса."""
+        results: List[Optional[DirectItemResult]] = [None] * len(campaign_ids)
+        valid: List[Tuple[int, int]] = []
+        for index, campaign_id in enumerate(campaign_ids):
+            try:
+                valid.append((index, int(campaign_id)))
+            except (TypeError, ValueError):
+                results[index] = DirectItemResult(
+                    id=str(campaign_id),
+                    error=f"Некорректный Id кампании: {campaign_id}"
+                )
+        return results, valid
+
+    @staticmethod
+    def _chunk_failed(method: str, chunk: Sequence[Any], exc: Exception) -> List[DirectItemResult]:
+        """Ошибка всего вызова — ошибка каждого элемента пачки."""
+        logger.error("yandex_direct_batch_failed", method=method, count=len(chunk), error=str(exc))
+        return [DirectItemResult(error=str(exc)) for _ in chunk]
+
+    @staticmethod
+    def _item_results(result: Dict[str, Any], results_key: str, expected: int) -> List[DirectItemResult]:
+        """Разбирает ActionResults: Id, Errors и Warnings каждого элемента."""
+        items = result.get(results_key, [])
+        if len(items) != expected:
+            error = f"Ожидалось {expected} результатов в {results_key}, получено {len(items)}"
+            logger.error("yandex_direct_batch_result_mismatch", results_key=results_key, error=error)
+            return [DirectItemResult(error=error) for _ in range(expected)]
+
+        results = []
+        for item in items:
+            errors = [_format_notice(notice) for notice in item.get("Errors") or []]
+            item_id = item.get("Id")
+            if not errors and item_id is None:
+                errors = ["Не удалось получить Id кампании"]
+            results.append(DirectItemResult(
+                id=str(item_id) if item_id is not None else None,
+                error="; ".join(errors) or None,
+                warnings=[_format_notice(notice) for notice in item.get("Warnings") or []],
+            ))
+        return results
+
+    @classmethod
+    def _build_text_campaigns_payload(cls, campaigns: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+        """Payload `campaigns/add` с несколькими текстовыми кампаниями."""
+        return {
+            "Campaigns": [
+                cls._build_text_campaign(title=campaign["title"], budget_rub=campaign["budget_rub"])
+                for campaign in campaigns
+            ]
+        }
+
+    @classmethod
+    def _build_text_campaign_payload(cls, *, title: str, budget_rub: float) -> Dict[str, Any]:
+        """Payload `campaigns/add` с одной текстовой кампанией."""
+        return {"Campaigns": [cls._build_text_campaign(title=title, budget_rub=budget_rub)]}
+
+    @staticmethod
+    def _build_text_campaign(*, title: str, budget_rub: float) -> Dict[str, Any]:
+        """Создает текстовую кампанию для `campaigns/add` в API v5.
 
         Структура соответствует документации:
         https://yandex.ru/dev/direct/doc/ref-v5/campaigns/add.html
@@ -257,38 +671,71 @@ class YandexDirectClient:
         # Updated budget calculation logic - fixed 5 billion issue
 
         return {
-            "Campaigns": [
-                {
-                    "Name": normalized_title,
-                    "StartDate": date.today().strftime("%Y-%m-%d"),  # Начинаем сегодня
-                    "DailyBudget": {
-                        "Amount": amount_micros,
-                        "Mode": "STANDARD"
+            "Name": normalized_title,
+            "StartDate": date.today().strftime("%Y-%m-%d"),  # Начинаем сегодня
+            "DailyBudget": {
+                "Amount": amount_micros,
+                "Mode": "STANDARD"
+            },
+            "TextCampaign": {
+                "BiddingStrategy": {
+                    "Search": {
+                        "BiddingStrategyType": "HIGHEST_POSITION"
                     },
-                    "TextCampaign": {
-                        "BiddingStrategy": {
-                            "Search": {
-                                "BiddingStrategyType": "HIGHEST_POSITION"
-                            },
-                            "Network": {
-                                "BiddingStrategyType": "SERVING_OFF"
-                            }
-                        },
-                        "Settings": [
-                            {
-                                "Option": "ADD_TO_FAVORITES",
-                                "Value": "YES"
-                            },
-                            {
-                                "Option": "ENABLE_COMPANY_INFO",
-                                "Value": "YES"
-                            },
-                            {
-                                "Option": "ENABLE_SITE_MONITORING",
-                                "Value": "YES"
-                            }
-                        ]
+                    "Network": {
+                        "BiddingStrategyType": "SERVING_OFF"
                     }
-                }
-            ]
+                },
+                "Settings": [
+                    {
+                        "Option": "ADD_TO_FAVORITES",
+                        "Value": "YES"
+                    },
+                    {
+                        "Option": "ENABLE_COMPANY_INFO",
+                        "Value": "YES"
+                    },
+                    {
+                        "Option": "ENABLE_SITE_MONITORING",
+                        "Value": "YES"
+                    }
+                ]
+            }
         }
+
+
+def _retry_condition(method: str) -> Optional[Callable[[Exception], bool]]:
+    """Условие повтора временной ошибки для метода API (None — любые временные)"""
+    if method in IDEMPOTENT_METHODS:
+        return None
+    return _request_not_sent
+
+
+def _request_not_sent(exc: Exception) -> bool:
+    """Соединение не установлено — Директ запрос не получал"""
+    return isinstance(exc.__cause__, (httpx.ConnectError, httpx.ConnectTimeout))
+
+
+def _error_code(error: Dict[str, Any]) -> Optional[int]:
+    try:
+        return int(error.get("error_code"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _format_notice(notice: Dict[str, Any]) -> str:
+    """ExceptionNotification API v5 в строку: `8800: Объект не найден (детали)`."""
+    text = f"{notice.get('Code')}: {notice.get('Message', '')}"
+    if notice.get("Details"):
+        text += f" ({notice['Details']})"
+    return text
+
+
+@lru_cache(maxsize=1)
+def get_yandex_direct_client() -> YandexDirectClient:
+    """Клиент Директа из настроек (один на процесс, транспорт общий)"""
+    return YandexDirectClient(
+        token=settings.yandex_direct_token or None,
+        login=settings.yandex_direct_login or None,
+        sandbox=not settings.is_prod,
+    )
@@ -0,0 +1,211 @@
+"""DeepCalm — Reports API Яндекс.Директа (статистика расхода)."""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Iterable, Iterator
+
+import httpx
+import structlog
+
+from app.core.config import settings
+from app.integrations.http import USER_AGENT, http_clients
+from app.integrations.yandex_direct import YandexDirectError
+
+logger = structlog.get_logger(__name__)
+
+
+REPORTS_API_URL = "https://api.direct.yandex.com/json/v5/reports"
+REPORTS_SANDBOX_URL = "https://api-sandbox.direct.yandex.com/json/v5/reports"
+
+SPEND_REPORT_FIELDS = ("Date", "CampaignId", "CampaignName", "Impressions", "Clicks", "Cost")
+
+# Пустое значение в TSV Reports API
+_EMPTY = "--"
+
+
+@dataclass
+class SpendReportRow:
+    """Строка отчёта CAMPAIGN_PERFORMANCE_REPORT."""
+
+    date: date
+    external_campaign_id: str
+    campaign_name: str
+    impressions: int
+    clicks: int
+    spend_rub: Decimal
+
+
+def _int(value: str) -> int:
+    return 0 if value in ("", _EMPTY) else int(value)
+
+
+def _money(value: str) -> Decimal:
+    if value in ("", _EMPTY):
+        return Decimal("0")
+    try:
+        return Decimal(value)
+    except InvalidOperation as exc:
+        raise YandexDirectError(f"Некорректная сумма в отчёте: {value!r}") from exc
+
+
+def parse_spend_report(lines: Iterable[str]) -> Iterator[SpendReportRow]:
+    """Построчно разбирает TSV отчёта (первая строка — названия колонок).
+
+    Строки читаются по одной, поэтому отчёт любого размера не
+    загружается в память целиком.
+    """
+    columns: Dict[str, int] | None = None
+    for line in lines:
+        if not line:
+            continue
+        cells = line.rstrip("\r").split("\t")
+
+        if columns is None:
+            columns = {name: index for index, name in enumerate(cells)}
+            missing = [name for name in SPEND_REPORT_FIELDS if name not in columns]
+            if missing:
+                raise YandexDirectError(f"В отчёте нет колонок {missing}", payload={"header": cells})
+            continue
+
+        # Итоговая строка (если skipReportSummary не сработал)
+        if cells[0] == "Total":
+            continue
+
+        yield SpendReportRow(
+            date=date.fromisoformat(cells[columns["Date"]]),
+            external_campaign_id=cells[columns["CampaignId"]],
+            campaign_name=cells[columns["CampaignName"]],
+            impressions=_int(cells[columns["Impressions"]]),
+            clicks=_int(cells[columns["Clicks"]]),
+            spend_rub=_money(cells[columns["Cost"]]),
+        )
+
+
+@dataclass
+class YandexDirectReportsClient:
+    """Клиент Reports API: потоковая выгрузка расхода по кампаниям и дням.
+
+    Отчёт формируется в режиме processingMode=auto: пока Директ готовит
+    его офлайн (HTTP 201/202), запрос повторяется через retryIn секунд.
+    Без токена клиент работает в mock-режиме и возвращает пустой отчёт.
+    """
+
+    token: str | None = None
+    login: str | None = None
+    sandbox: bool = True
+    url: str | None = None
+    language: str = "ru"
+    timeout: float = 60.0
+    max_wait_seconds: float = 300.0
+    http_client: httpx.Client | None = field(default=None, repr=False)
+
+    def __post_init__(self) -> None:
+        self._enabled = bool(self.token)
+        if not self.url:
+            self.url = REPORTS_SANDBOX_URL if self.sandbox else REPORTS_API_URL
+        if self.login is not None and not self.login.strip():
+            self.login = None
+
+    @classmethod
+    def from_settings(cls) -> "YandexDirectReportsClient":
+        return cls(
+            token=settings.yandex_direct_token or None,
+            login=settings.yandex_direct_login or None,
+            sandbox=not settings.is_prod,
+            url=settings.yandex_direct_reports_url or None,
+            max_wait_seconds=settings.spend_report_max_wait_seconds,
+        )
+
+    def iter_campaign_spend(self, date_from: date, date_to: date) -> Iterator[SpendReportRow]:
+        """Расход по кампаниям и дням за период (включительно), по мере чтения ответа."""
+        logger.info(
+            "yandex_direct_spend_report_started",
+            date_from=date_from.isoformat(),
+            date_to=date_to.isoformat(),
+            enabled=self._enabled
+        )
+
+        if not self._enabled:
+            logger.info("yandex_direct_spend_report_mock")
+            return
+
+        client = self.http_client or http_clients.sync_client()
+        body = self._build_report_body(date_from, date_to)
+        headers = self._headers()
+        deadline = time.monotonic() + self.max_wait_seconds
+
+        while True:
+            try:
+                with client.stream("POST", self.url, headers=headers, json=body, timeout=self.timeout) as response:
+                    if response.status_code == 200:
+                        rows = 0
+                        for row in parse_spend_report(response.iter_lines()):
+                            rows += 1
+                            yield row
+                        logger.info("yandex_direct_spend_report_completed", rows=rows)
+                        return
+
+                    if response.status_code not in (201, 202):
+                        response.read()
+                        raise YandexDirectError(
+                            f"Reports API вернул HTTP {response.status_code}",
+                            payload=self._error_payload(response),
+                        )
+
+                    retry_in = float(response.headers.get("retryIn", 5))
+            except httpx.HTTPError as exc:
+                raise YandexDirectError(f"Ошибка HTTP при запросе отчёта: {exc}") from exc
+
+            if time.monotonic() + retry_in > deadline:
+                raise YandexDirectError(f"Отчёт не готов за {self.max_wait_seconds:.0f} с")
+
+            logger.info("yandex_direct_spend_report_pending", retry_in=retry_in)
+            time.sleep(retry_in)
+
+    def _headers(self) -> Dict[str, str]:
+        headers = {
+            "Authorization": f"Bearer {self.token}",
+            "Accept-Language": self.language,
+            "Content-Type": "application/json; charset=utf-8",
+            "User-Agent": USER_AGENT,
+            "processingMode": "auto",
+            "returnMoneyInMicros": "false",
+            "skipReportHeader": "true",
+            "skipReportSummary": "true",
+        }
+        if self.login:
+            headers["Client-Login"] = self.login
+        return headers
+
+    @staticmethod
+    def _build_report_body(date_from: date, date_to: date) -> Dict[str, Any]:
+        """Тело запроса CAMPAIGN_PERFORMANCE_REPORT.
+
+        Имя отчёта уникально для набора параметров: Директ кэширует
+        отчёты по ReportName.
+        https://yandex.ru/dev/direct/doc/reports/spec.html
+        """
+        return {
+            "params": {
+                "SelectionCriteria": {
+                    "DateFrom": date_from.isoformat(),
+                    "DateTo": date_to.isoformat(),
+                },
+                "FieldNames": list(SPEND_REPORT_FIELDS),
+                "ReportName": f"dc_spend_{date_from.isoformat()}_{date_to.isoformat()}",
+                "ReportType": "CAMPAIGN_PERFORMANCE_REPORT",
+                "DateRangeType": "CUSTOM_DATE",
+                "Format": "TSV",
+                "IncludeVAT": "YES",
+            }
+        }
+
+    @staticmethod
+    def _error_payload(response: httpx.Response) -> Dict[str, Any]:
+        try:
+            return response.json().get("error", {})
+        except ValueError:
+            return {"body": response.text[:500]}
@@ -0,0 +1,120 @@
+"""DeepCalm — Яндекс.Метрика (загрузка офлайн-конверсий)."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+import httpx
+import structlog
+
+from app.core.config import settings
+from app.integrations.http import USER_AGENT, http_clients
+
+logger = structlog.get_logger(__name__)
+
+OFFLINE_CONVERSIONS_HEADER = "ClientId,Target,DateTime,Price,Currency\n"
+
+
+class YandexMetrikaError(RuntimeError):
+    """Исключение для ошибок Метрики."""
+
+    def __init__(self, message: str, *, payload: Dict[str, Any] | None = None, status_code: int | None = None) -> None:
+        super().__init__(message)
+        self.payload = payload or {}
+        self.status_code = status_code
+
+    @property
+    def retryable(self) -> bool:
+        """Сбой сети или 5xx/429: загрузка могла дойти или пройдёт позже"""
+        return self.status_code is None or self.status_code >= 500 or self.status_code == 429
+
+
+@dataclass
+class YandexMetrikaClient:
+    """
+    Клиент Management API Метрики для офлайн-конверсий.
+
+    Каждая загрузка помечается comment — по нему после сбоя можно найти
+    в списке загрузок счётчика, дошёл ли файл.
+    Без токена или счётчика клиент работает в mock-режиме.
+    """
+
+    token: str | None = None
+    counter_id: int = 0
+    base_url: str = "https://api-metrika.yandex.net"
+    timeout: float = 60.0
+    http_client: httpx.Client | None = field(default=None, repr=False)
+
+    def __post_init__(self) -> None:
+        self._enabled = bool(self.token and self.counter_id)
+        self.base_url = self.base_url.rstrip("/")
+
+    @classmethod
+    def from_settings(cls) -> "YandexMetrikaClient":
+        return cls(
+            token=settings.yandex_metrika_token or None,
+            counter_id=settings.yandex_metrika_counter_id,
+            base_url=settings.yandex_metrika_api_url,
+        )
+
+    @property
+    def _counter_url(self) -> str:
+        return f"{self.base_url}/management/v1/counter/{self.counter_id}/offline_conversions"
+
+    def upload_offline_conversions(self, csv_data: bytes, comment: str) -> str:
+        """
+        Загружает CSV офлайн-конверсий (ClientId, Target, DateTime, Price, Currency).
+
+        Returns:
+            ID загрузки в Метрике
+        """
+        logger.info("metrika_upload_started", comment=comment, size=len(csv_data), enabled=self._enabled)
+
+        if not self._enabled:
+            return f"mock_{comment}"
+
+        payload = self._request(
+            "POST",
+            f"{self._counter_url}/upload",
+            params={"client_id_type": "CLIENT_ID", "comment": comment},
+            files={"file": ("conversions.csv", csv_data, "text/csv")},
+        )
+        uploading = payload.get("uploading") or {}
+        if "id" not in uploading:
+            raise YandexMetrikaError("Ответ Метрики без ID загрузки", payload=payload)
+
+        logger.info("metrika_upload_completed", comment=comment, upload_id=uploading["id"])
+        return str(uploading["id"])
+
+    def find_upload(self, comment: str) -> Optional[str]:
+        """ID загрузки с данным comment (None — загрузка не дошла)"""
+        if not self._enabled:
+            return None
+
+        payload = self._request("GET", f"{self._counter_url}/uploadings")
+        for uploading in payload.get("uploadings") or []:
+            if uploading.get("comment") == comment:
+                return str(uploading["id"])
+        return None
+
+    def _request(self, method: str, url: str, **kwargs: Any) -> Dict[str, Any]:
+        client = self.http_client or http_clients.sync_client()
+        headers = {"Authorization": f"OAuth {self.token}", "User-Agent": USER_AGENT}
+
+        try:
+            response = client.request(method, url, headers=headers, timeout=self.timeout, **kwargs)
+        except httpx.HTTPError as exc:
+            raise YandexMetrikaError(f"Ошибка HTTP при запросе к Метрике: {exc}") from exc
+
+        try:
+            payload = response.json()
+        except ValueError:
+            payload = {"body": response.text[:500]}
+
+        if response.status_code >= 400:
+            raise YandexMetrikaError(
+                f"Метрика вернула HTTP {response.status_code}",
+                payload=payload,
+                status_code=response.status_code
+            )
+        return payload
@@ -0,0 +1,212 @@
+"""DeepCalm — YCLIENTS API (записи клиентов)."""
+from __future__ import annotations
+
+import asyncio
+import math
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+import httpx
+import structlog
+
+from app.core.config import settings
+from app.core.phones import normalize_phone
+from app.integrations.http import USER_AGENT, http_clients
+
+logger = structlog.get_logger(__name__)
+
+ACCEPT_V2 = "application/vnd.yclients.v2+json"
+
+# attendance записи YCLIENTS → статус брони
+ATTENDANCE_STATUSES = {
+    -1: "no_show",
+    0: "pending",
+    1: "completed",
+    2: "confirmed",
+}
+CANCELLED = "cancelled"
+
+
+class YClientsError(RuntimeError):
+    """Исключение для ошибок YCLIENTS."""
+
+    def __init__(self, message: str, *, payload: Dict[str, Any] | None = None) -> None:
+        super().__init__(message)
+        self.payload = payload or {}
+
+
+@dataclass
+class YClientsRecord:
+    """Запись YCLIENTS в виде, нужном для bookings."""
+
+    yclients_id: int
+    client_id: Optional[int]
+    phone: Optional[str]
+    sku: Optional[str]
+    starts_at: datetime
+    status: str
+    price_rub: Decimal
+    paid: bool
+    changed_at: Optional[datetime]
+
+
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def parse_record(data: Dict[str, Any]) -> YClientsRecord:
+    """
+    Разбирает запись из ответа GET /records/{company_id}.
+
+    Examples:
+        >>> parse_record({"id": 1, "datetime": "2025-10-01T10:00:00+03:00",
+        ...               "client": {"phone": "8 999 123-45-67"}, "services": []}).phone
+        '+79991234567'
+    """
+    client = data.get("client") or {}
+    services = data.get("services") or []
+
+    title = (services[0].get("title") or "") if services else ""
+
+    if data.get("deleted"):
+        status = CANCELLED
+    else:
+        status = ATTENDANCE_STATUSES.get(data.get("attendance", 0), "pending")
+
+    return YClientsRecord(
+        yclients_id=int(data["id"]),
+        client_id=client.get("id"),
+        phone=normalize_phone(client.get("phone")),
+        sku=title[:50] or None,
+        starts_at=_parse_datetime(data["datetime"]),
+        status=status,
+        price_rub=sum((Decimal(str(service.get("cost") or 0)) for service in services), Decimal("0")),
+        paid=bool(data.get("paid_full")),
+        changed_at=_parse_datetime(data.get("last_change_date")),
+    )
+
+
+@dataclass
+class YClientsClient:
+    """
+    Async-клиент записей YCLIENTS.
+
+    Страницы запрашиваются параллельно (не больше concurrency одновременно)
+    и отдаются по порядку по мере готовности: в памяти одновременно не
+    больше concurrency страниц, поэтому выгрузка за год не растёт по памяти.
+    Без токена или company_id клиент работает в mock-режиме (пустой ответ).
+    """
+
+    token: str | None = None
+    user_token: str | None = None
+    company_id: int = 0
+    base_url: str = "https://api.yclients.com/api/v1"
+    page_size: int = 200
+    concurrency: int = 4
+    timeout: float = 30.0
+    http_client: httpx.AsyncClient | None = field(default=None, repr=False)
+
+    def __post_init__(self) -> None:
+        self._enabled = bool(self.token and self.company_id)
+        self.base_url = self.base_url.rstrip("/")
+
+    @classmethod
+    def from_settings(cls) -> "YClientsClient":
+        return cls(
+            token=settings.yclients_token or None,
+            user_token=settings.yclients_user_token or None,
+            company_id=settings.yclients_company_id,
+            base_url=settings.yclients_api_url,
+            page_size=settings.yclients_page_size,
+            concurrency=settings.yclients_concurrency,
+        )
+
+    async def iter_record_pages(
+        self,
+        changed_after: Optional[datetime] = None,
+        start_date: Optional[date] = None
+    ) -> AsyncIterator[List[YClientsRecord]]:
+        """
+        Страницы записей, изменённых после changed_after (и/или с визитом не раньше start_date).
+
+        Первая страница даёт total_count, остальные запрашиваются окном
+        из concurrency запросов.
+        """
+        logger.info(
+            "yclients_records_started",
+            changed_after=changed_after.isoformat() if changed_after else None,
+            start_date=start_date.isoformat() if start_date else None,
+            enabled=self._enabled
+        )
+
+        if not self._enabled:
+            logger.info("yclients_records_mock")
+            return
+
+        params: Dict[str, Any] = {"count": self.page_size}
+        if changed_after is not None:
+            params["changed_after"] = changed_after.isoformat()
+        if start_date is not None:
+            params["start_date"] = start_date.isoformat()
+
+        records, total = await self._fetch_page(1, params)
+        pages = max(1, math.ceil(total / self.page_size))
+        yield records
+
+        in_flight: Deque[asyncio.Task] = deque()
+        next_page = 2
+        try:
+            while next_page <= pages or in_flight:
+                while next_page <= pages and len(in_flight) < self.concurrency:
+                    in_flight.append(asyncio.create_task(self._fetch_page(next_page, params)))
+                    next_page += 1
+                records, _ = await in_flight.popleft()
+                yield records
+        finally:
+            for task in in_flight:
+                task.cancel()
+
+        logger.info("yclients_records_completed", pages=pages, total=total)
+
+    async def _fetch_page(self, page: int, params: Dict[str, Any]) -> Tuple[List[YClientsRecord], int]:
+        client = self.http_client or http_clients.async_client()
+        url = f"{self.base_url}/records/{self.company_id}"
+
+        try:
+            response = await client.get(
+                url,
+                params={**params, "page": page},
+                headers=self._headers(),
+                timeout=self.timeout
+            )
+        except httpx.HTTPError as exc:
+            raise YClientsError(f"Ошибка HTTP при запросе записей: {exc}") from exc
+
+        try:
+            payload = response.json()
+        except ValueError as exc:
+            raise YClientsError(f"Некорректный ответ YCLIENTS (HTTP {response.status_code})") from exc
+
+        if response.status_code >= 400 or not payload.get("success", False):
+            raise YClientsError(
+                f"YCLIENTS вернул ошибку (HTTP {response.status_code})",
+                payload=payload.get("meta") or {}
+            )
+
+        records = [parse_record(item) for item in payload.get("data") or []]
+        total = int((payload.get("meta") or {}).get("total_count", len(records)))
+        return records, total
+
+    def _headers(self) -> Dict[str, str]:
+        authorization = f"Bearer {self.token}"
+        if self.user_token:
+            authorization += f", User {self.user_token}"
+        return {
+            "Authorization": authorization,
+            "Accept": ACCEPT_V2,
+            "Content-Type": "application/json",
+            "User-Agent": USER_AGENT,
+        }
@@ -4,22 +4,37 @@ DeepCalm — FastAPI Application
 Main application entry point.
 Следует DEEP-CALM-MVP-BLUEPRINT.md и STANDARDS.yml
 """
-import uuid
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 import structlog
 
+from app.api.v1.admin import FREEZE_PATH
 from app.core.config import settings
+from app.core.db import async_engine
+from app.core.freeze import freeze_state
 from app.core.logging import setup_logging
+from app.core.metrics import mark_process_dead, render_latest
+from app.core.middleware import RequestContextMiddleware
+from app.core.responses import FastJSONResponse
+from app.integrations.http import http_clients
+from app.services.analytics_cache import setup_cache_invalidation
 from app.services.scheduler import scheduler
+from app.services.settings_registry import settings_registry, setup_settings_invalidation
 
 
 # Настройка логирования
 setup_logging()
 logger = structlog.get_logger(__name__)
 
+# Сброс кэша аналитики и реестра настроек при записи в БД
+setup_cache_invalidation()
+setup_settings_invalidation()
+
+# Переключатель read-only режима не блокируется самим режимом
+FREEZE_TOGGLE_PATH = f"/api/v1{FREEZE_PATH}"
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -31,6 +46,8 @@ async def lifespan(app: FastAPI):
     - Экспорт OpenAPI схемы в cortex/APIs/
 
     Shutdown:
+    - Закрытие пула async engine и HTTP-клиентов интеграций
+    - Удаление live-гейджей воркера (Prometheus multiprocess)
     - Логирование остановки
     """
     # Startup
@@ -42,13 +59,20 @@ async def lifespan(app: FastAPI):
         svc="dc-api"
     )
 
-    # Запускаем планировщик задач
+    # Запускаем планировщик задач, опрос read-only режима и LISTEN настроек
     scheduler.start()
+    freeze_state.start()
+    settings_registry.start()
 
     yield
 
     # Shutdown
+    settings_registry.stop()
+    freeze_state.stop()
     scheduler.stop()
+    await async_engine.dispose()
+    await http_clients.aclose()
+    mark_process_dead()
     logger.info("application_shutdown")
 
 
@@ -60,10 +84,18 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
+    default_response_class=FastJSONResponse,
     lifespan=lifespan
 )
 
 
+# Correlation ID, read-only режим, тайминг и метрики (pure ASGI, внутри CORS)
+app.add_middleware(
+    RequestContextMiddleware,
+    freeze_exempt_paths=[FREEZE_TOGGLE_PATH],
+    server_timing=settings.is_dev
+)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -74,56 +106,6 @@ app.add_middleware(
 )
 
 
-@app.middleware("http")
-async def add_correlation_id(request: Request, call_next):
-    """
-    Добавляет correlation_id в контекст каждого запроса.
-
-    Correlation ID используется для трейсинга запросов через все слои системы.
-    Если клиент передаёт X-Correlation-ID, используем его, иначе генерируем новый.
-
-    Args:
-        request: FastAPI Request
-        call_next: Следующий middleware
-
-    Returns:
-        Response с заголовком X-Correlation-ID
-    """
-    correlation_id = request.headers.get("X-Correlation-ID") or str(uuid.uuid4())
-
-    # Добавляем в structlog context
-    structlog.contextvars.bind_contextvars(
-        correlation_id=correlation_id,
-        route=request.url.path,
-        method=request.method
-    )
-
-    response = await call_next(request)
-    response.headers["X-Correlation-ID"] = correlation_id
-
-    return response
-
-
-@app.middleware("http")
-async def enforce_read_only_mode(request: Request, call_next):
-    """Блокирует мутационные запросы, если включён режим DC_FREEZE."""
-    if request.method in {"POST", "PUT", "PATCH", "DELETE"} and settings.is_freeze_mode():
-        logger.warning(
-            "request_blocked_read_only_mode",
-            method=request.method,
-            path=str(request.url)
-        )
-        return JSONResponse(
-            status_code=503,
-            content={
-                "error": "read_only_mode",
-                "message": "API временно работает в режиме только для чтения"
-            }
-        )
-
-    return await call_next(request)
-
-
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     """
@@ -173,6 +155,18 @@ async def health_check():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """
+    Метрики Prometheus (при PROMETHEUS_MULTIPROC_DIR — по всем воркерам).
+
+    Examples:
+        >>> curl http://localhost:8000/metrics
+    """
+    data, content_type = render_latest()
+    return Response(content=data, media_type=content_type)
+
+
 @app.get("/")
 async def root():
     """
@@ -189,13 +183,15 @@ async def root():
 
 
 # API v1 routers
-from app.api.v1 import analytics, campaigns, creatives, publishing, analyst, reports
+from app.api.v1 import admin, analytics, campaigns, creatives, leads, publishing, analyst, reports
 from app.api.v1 import settings as settings_api
 
 app.include_router(campaigns.router, prefix="/api/v1", tags=["campaigns"])
 app.include_router(creatives.router, prefix="/api/v1", tags=["creatives"])
+app.include_router(leads.router, prefix="/api/v1", tags=["leads"])
 app.include_router(publishing.router, prefix="/api/v1", tags=["publishing"])
 app.include_router(analytics.router, prefix="/api/v1", tags=["analytics"])
 app.include_router(settings_api.router, prefix="/api/v1", tags=["settings"])
 app.include_router(analyst.router, prefix="/api/v1", tags=["analyst"])
 app.include_router(reports.router, prefix="/api/v1", tags=["reports"])
+app.include_router(admin.router, prefix="/api/v1", tags=["admin"])
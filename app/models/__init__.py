@@ -10,7 +10,12 @@ from app.models.creative import Creative
 from app.models.placement import Placement
 from app.models.lead import Lead
 from app.models.conversion import Conversion
+from app.models.booking import Booking
 from app.models.setting import Setting
+from app.models.mart import MartCampaignDaily, MartDirtyDay
+from app.models.sync_watermark import SyncWatermark
+from app.models.spend import SpendDaily
+from app.models.metrika_upload import MetrikaUpload, MetrikaUploadedConversion
 
 __all__ = [
     "Base",
@@ -20,5 +25,12 @@ __all__ = [
     "Placement",
     "Lead",
     "Conversion",
+    "Booking",
     "Setting",
+    "MartCampaignDaily",
+    "MartDirtyDay",
+    "SyncWatermark",
+    "SpendDaily",
+    "MetrikaUpload",
+    "MetrikaUploadedConversion",
 ]
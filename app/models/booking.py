@@ -0,0 +1,62 @@
+"""
+DeepCalm — Booking Model
+
+Запись клиента из YCLIENTS.
+Схема из cortex/DEEP-CALM-MVP-BLUEPRINT.md
+"""
+from datetime import datetime
+from sqlalchemy import Column, ForeignKey, Integer, Numeric, String, TIMESTAMP
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.core.db import Base
+
+
+class Booking(Base):
+    """
+    Запись (визит) из YCLIENTS.
+
+    Заполняется задачей sync_bookings: upsert по yclients_id, связь с лидом
+    по нормализованному телефону.
+
+    Attributes:
+        id: ID записи (serial)
+        yclients_id: ID записи в YCLIENTS (уникальный)
+        yclients_client_id: ID клиента в YCLIENTS
+        lead_id: ID лида (по телефону), если найден
+        phone: Телефон клиента +79991234567
+        sku: Услуга
+        starts_at: Время визита
+        status: Статус (pending|confirmed|completed|no_show|cancelled)
+        price_rub: Стоимость услуг
+        paid_at: Когда запись впервые оказалась оплаченной
+        changed_at: Время последнего изменения в YCLIENTS
+        created_at: Дата создания
+        updated_at: Дата последнего изменения строки
+
+    Examples:
+        >>> booking = db.query(Booking).filter(Booking.yclients_id == 123456).one()
+        >>> booking.lead_id
+    """
+    __tablename__ = "bookings"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    yclients_id = Column(Integer, unique=True, nullable=False)
+    yclients_client_id = Column(Integer)
+    lead_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("leads.id", ondelete="SET NULL"),
+        index=True
+    )
+    phone = Column(String(20), index=True)
+    sku = Column(String(50))
+    starts_at = Column(TIMESTAMP(timezone=True), nullable=False)
+    status = Column(String(20))  # pending|confirmed|completed|no_show|cancelled
+    price_rub = Column(Numeric(10, 2))
+    paid_at = Column(TIMESTAMP(timezone=True))
+    changed_at = Column(TIMESTAMP(timezone=True))
+
+    created_at = Column(TIMESTAMP(timezone=True), default=datetime.utcnow, nullable=False)
+    updated_at = Column(TIMESTAMP(timezone=True), default=datetime.utcnow, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<Booking id={self.id} yclients_id={self.yclients_id} status={self.status}>"
@@ -5,7 +5,7 @@ DeepCalm — Campaign Model
 Схема из cortex/DEEP-CALM-MVP-BLUEPRINT.md
 """
 from datetime import datetime
-from sqlalchemy import Column, String, Numeric, Boolean, ARRAY, TIMESTAMP
+from sqlalchemy import Column, String, Numeric, Boolean, ARRAY, TIMESTAMP, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -41,6 +41,10 @@ class Campaign(Base):
         >>> db.commit()
     """
     __tablename__ = "campaigns"
+    __table_args__ = (
+        # Keyset пагинация списка: ORDER BY created_at DESC, id DESC
+        Index("ix_campaigns_created_at_id", "created_at", "id"),
+    )
 
     id = Column(
         UUID(as_uuid=True),
@@ -5,7 +5,7 @@ DeepCalm — Conversion Model
 Схема из cortex/DEEP-CALM-MVP-BLUEPRINT.md
 """
 from datetime import datetime
-from sqlalchemy import Column, String, Integer, Numeric, ForeignKey, TIMESTAMP
+from sqlalchemy import Column, String, Integer, Numeric, ForeignKey, Index, TIMESTAMP, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -19,13 +19,14 @@ class Conversion(Base):
     Attributes:
         id: ID конверсии (serial)
         lead_id: ID лида
-        booking_id: ID записи (из YCLIENTS)
+        booking_id: ID брони (bookings.id)
         campaign_id: ID кампании (nullable для organic)
         channel_code: Код площадки (vk, direct, avito)
         ttp_days: Time To Purchase (дни от клика до оплаты)
         revenue_rub: Выручка в рублях
         converted_at: Дата конверсии
         created_at: Дата создания записи
+        updated_at: Время последнего изменения (вставка или upsert sync_bookings)
 
     Examples:
         >>> conversion = Conversion(
@@ -38,6 +39,18 @@ class Conversion(Base):
         ... )
     """
     __tablename__ = "conversions"
+    __table_args__ = (
+        # Фильтры аналитики: campaign_id = ? AND <ts> >= ? AND <ts> < ?
+        Index("ix_conversions_campaign_id_converted_at", "campaign_id", "converted_at"),
+        Index("ix_conversions_campaign_id_created_at", "campaign_id", "created_at"),
+        # Одна конверсия на бронь (upsert sync_bookings)
+        Index(
+            "ux_conversions_booking_id",
+            "booking_id",
+            unique=True,
+            postgresql_where=text("booking_id IS NOT NULL")
+        ),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     lead_id = Column(
@@ -46,7 +59,7 @@ class Conversion(Base):
         nullable=False,
         index=True
     )
-    booking_id = Column(Integer, index=True)  # из YCLIENTS
+    booking_id = Column(Integer, index=True)  # bookings.id
     campaign_id = Column(
         UUID(as_uuid=True),
         ForeignKey("campaigns.id", ondelete="SET NULL"),
@@ -57,7 +70,15 @@ class Conversion(Base):
     revenue_rub = Column(Numeric(10, 2), nullable=False)
 
     converted_at = Column(TIMESTAMP(timezone=True), nullable=False, index=True)
-    created_at = Column(TIMESTAMP(timezone=True), default=datetime.utcnow, nullable=False)
+    created_at = Column(TIMESTAMP(timezone=True), default=datetime.utcnow, nullable=False, index=True)
+    # Витрина пересчитывает дни по изменённым, а не только по новым конверсиям
+    updated_at = Column(
+        TIMESTAMP(timezone=True),
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        nullable=False,
+        index=True
+    )
 
     # Relationships
     lead = relationship("Lead", back_populates="conversions")
@@ -5,7 +5,7 @@ DeepCalm — Creative Model
 Схема из cortex/DEEP-CALM-MVP-BLUEPRINT.md
 """
 from datetime import datetime
-from sqlalchemy import Column, String, Text, ForeignKey, TIMESTAMP
+from sqlalchemy import Column, String, Text, ForeignKey, TIMESTAMP, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -39,6 +39,11 @@ class Creative(Base):
         ... )
     """
     __tablename__ = "creatives"
+    __table_args__ = (
+        # Keyset пагинация списка (общего и по кампании)
+        Index("ix_creatives_created_at_id", "created_at", "id"),
+        Index("ix_creatives_campaign_id_created_at_id", "campaign_id", "created_at", "id"),
+    )
 
     id = Column(
         UUID(as_uuid=True),
@@ -32,6 +32,7 @@ class Lead(Base):
         yclients_id: ID из YCLIENTS
         first_touch_at: Время первого клика
         created_at: Дата создания
+        updated_at: Время последнего изменения (витрина пересчитывает день first touch)
 
     Examples:
         >>> lead = Lead(
@@ -67,7 +68,14 @@ class Lead(Base):
 
     # Timestamps
     first_touch_at = Column(TIMESTAMP(timezone=True), index=True)
-    created_at = Column(TIMESTAMP(timezone=True), default=datetime.utcnow, nullable=False)
+    created_at = Column(TIMESTAMP(timezone=True), default=datetime.utcnow, nullable=False, index=True)
+    updated_at = Column(
+        TIMESTAMP(timezone=True),
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        nullable=False,
+        index=True
+    )
 
     # Relationships
     conversions = relationship("Conversion", back_populates="lead", cascade="all, delete-orphan")
@@ -0,0 +1,88 @@
+"""
+DeepCalm — Mart Models
+
+Витрина mart_campaigns_daily (кампания × канал × день).
+Схема из cortex/DEEP-CALM-MVP-BLUEPRINT.md; вместо MATERIALIZED VIEW —
+обычная таблица, которая пересчитывается инкрементально по дням.
+"""
+from datetime import datetime
+from sqlalchemy import Column, Date, Integer, Numeric, String, ForeignKey, TIMESTAMP
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.core.db import Base
+
+
+class MartCampaignDaily(Base):
+    """
+    Дневная статистика кампании по каналу.
+
+    Attributes:
+        campaign_id: ID кампании
+        channel_code: Код площадки (vk, direct, avito, unknown)
+        date: День (в бизнес-таймзоне)
+        leads_count: Новые лиды (utm_campaign кампании, по first_touch_at)
+        conversions_count: Конверсии (по converted_at)
+        revenue_rub: Выручка
+        spend_rub: Расход
+        clicks: Клики
+        impressions: Показы
+        ttp_days_sum: Сумма TTP (для среднего по любому периоду)
+        ttp_days_count: Количество конверсий с известным TTP
+        ttp_days_max: Максимальный TTP
+        refreshed_at: Время пересчёта строки
+
+    Examples:
+        >>> rows = db.query(MartCampaignDaily).filter(
+        ...     MartCampaignDaily.campaign_id == campaign.id,
+        ...     MartCampaignDaily.date >= date(2025, 10, 1)
+        ... ).all()
+    """
+    __tablename__ = "mart_campaigns_daily"
+
+    campaign_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("campaigns.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    channel_code = Column(String(20), primary_key=True)
+    date = Column(Date, primary_key=True, index=True)
+
+    leads_count = Column(Integer, nullable=False, default=0)
+    conversions_count = Column(Integer, nullable=False, default=0)
+    revenue_rub = Column(Numeric(12, 2), nullable=False, default=0)
+    spend_rub = Column(Numeric(12, 2), nullable=False, default=0)
+    clicks = Column(Integer, nullable=False, default=0)
+    impressions = Column(Integer, nullable=False, default=0)
+
+    ttp_days_sum = Column(Integer, nullable=False, default=0)
+    ttp_days_count = Column(Integer, nullable=False, default=0)
+    ttp_days_max = Column(Integer)
+
+    refreshed_at = Column(TIMESTAMP(timezone=True), default=datetime.utcnow, nullable=False)
+
+    def __repr__(self) -> str:
+        return (
+            f"<MartCampaignDaily campaign_id={self.campaign_id} "
+            f"channel={self.channel_code} date={self.date}>"
+        )
+
+
+class MartDirtyDay(Base):
+    """
+    День витрины, который нужно пересчитать вне водяного знака.
+
+    Строка, удалённая или переехавшая в другой день, по updated_at в свой
+    прежний день уже не попадает — такие дни записывает сервис, который
+    её изменил. Пересчёт витрины забирает и удаляет их.
+
+    Attributes:
+        date: День (в бизнес-таймзоне)
+        marked_at: Время пометки
+    """
+    __tablename__ = "mart_dirty_days"
+
+    date = Column(Date, primary_key=True)
+    marked_at = Column(TIMESTAMP(timezone=True), default=datetime.utcnow, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<MartDirtyDay date={self.date}>"
@@ -0,0 +1,70 @@
+"""
+DeepCalm — Metrika Upload Models
+
+Учёт загрузок офлайн-конверсий в Яндекс.Метрику (задача upload_conversions).
+Конверсия попадает в metrika_uploaded_conversions до отправки файла,
+поэтому одна и та же конверсия не уходит в Метрику дважды.
+"""
+from datetime import datetime
+from sqlalchemy import Column, ForeignKey, Integer, String, Text, TIMESTAMP
+
+from app.core.db import Base
+
+
+class MetrikaUpload(Base):
+    """
+    Один CSV-файл офлайн-конверсий.
+
+    Attributes:
+        id: ID загрузки (serial)
+        batch_key: Уникальный ключ файла (comment загрузки в Метрике)
+        status: pending (файл отправляется) | uploaded | failed
+        metrika_upload_id: ID загрузки в Метрике
+        rows: Строк в файле
+        error_message: Ошибка Метрики (если failed)
+        created_at: Дата создания
+        uploaded_at: Когда Метрика приняла файл
+
+    Examples:
+        >>> db.query(MetrikaUpload).filter(MetrikaUpload.status == "failed").all()
+    """
+    __tablename__ = "metrika_uploads"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    batch_key = Column(String(64), unique=True, nullable=False)
+    status = Column(String(20), nullable=False, default="pending", index=True)  # pending|uploaded|failed
+    metrika_upload_id = Column(String(50))
+    rows = Column(Integer, nullable=False, default=0)
+    error_message = Column(Text)
+
+    created_at = Column(TIMESTAMP(timezone=True), default=datetime.utcnow, nullable=False)
+    uploaded_at = Column(TIMESTAMP(timezone=True))
+
+    def __repr__(self) -> str:
+        return f"<MetrikaUpload id={self.id} status={self.status} rows={self.rows}>"
+
+
+class MetrikaUploadedConversion(Base):
+    """
+    Конверсия, включённая в загрузку (ключ дедупликации).
+
+    Attributes:
+        conversion_id: ID конверсии
+        upload_id: ID загрузки
+    """
+    __tablename__ = "metrika_uploaded_conversions"
+
+    conversion_id = Column(
+        Integer,
+        ForeignKey("conversions.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    upload_id = Column(
+        Integer,
+        ForeignKey("metrika_uploads.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
+
+    def __repr__(self) -> str:
+        return f"<MetrikaUploadedConversion conversion_id={self.conversion_id} upload_id={self.upload_id}>"
@@ -5,7 +5,7 @@ DeepCalm — Placement Model
 Схема из cortex/DEEP-CALM-MVP-BLUEPRINT.md
 """
 from datetime import datetime
-from sqlalchemy import Column, String, Text, ForeignKey, TIMESTAMP
+from sqlalchemy import Column, String, Text, ForeignKey, Index, TIMESTAMP
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -38,6 +38,11 @@ class Placement(Base):
         ... )
     """
     __tablename__ = "placements"
+    __table_args__ = (
+        Index("ix_placements_campaign_id_published_at", "campaign_id", "published_at"),
+        # Сопоставление расхода площадок (spend_daily) с размещениями
+        Index("ix_placements_channel_code_external_campaign_id", "channel_code", "external_campaign_id"),
+    )
 
     id = Column(
         UUID(as_uuid=True),
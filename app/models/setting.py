@@ -1,7 +1,7 @@
 """
 DeepCalm — SQLAlchemy Model for Settings
 """
-from sqlalchemy import Column, String, Text, DateTime, func
+from sqlalchemy import Column, String, Text, DateTime, Index, func
 from app.core.db import Base
 
 class Setting(Base):
@@ -11,6 +11,10 @@ class Setting(Base):
     Схема соответствует cortex/DEEP-CALM-MVP-BLUEPRINT.md
     """
     __tablename__ = "settings"
+    __table_args__ = (
+        # Keyset пагинация списка: ORDER BY category, key
+        Index("ix_settings_category_key", "category", "key"),
+    )
 
     key = Column(String(100), primary_key=True, comment="Ключ настройки")
     value = Column(Text, nullable=False, comment="Значение настройки")
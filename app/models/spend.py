@@ -0,0 +1,57 @@
+"""
+DeepCalm — Spend Model
+
+Факт расхода по площадкам: канал × внешняя кампания × день.
+Заполняется задачей sync_spend из отчётов площадок (Reports API Директа).
+"""
+from datetime import datetime
+from sqlalchemy import Column, Date, ForeignKey, Integer, Numeric, String, Text, TIMESTAMP
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.core.db import Base
+
+
+class SpendDaily(Base):
+    """
+    Дневной расход внешней кампании на площадке.
+
+    Attributes:
+        channel_code: Код площадки (direct, vk, avito)
+        external_campaign_id: ID кампании на площадке
+        date: День статистики (в таймзоне аккаунта площадки)
+        campaign_id: Кампания DeepCalm (по placements.external_campaign_id), если найдена
+        campaign_name: Название кампании на площадке
+        impressions: Показы
+        clicks: Клики
+        spend_rub: Расход в рублях
+        synced_at: Время последней загрузки строки
+
+    Examples:
+        >>> rows = db.query(SpendDaily).filter(
+        ...     SpendDaily.campaign_id == campaign.id,
+        ...     SpendDaily.date >= date(2025, 10, 1)
+        ... ).all()
+    """
+    __tablename__ = "spend_daily"
+
+    channel_code = Column(String(20), primary_key=True)
+    external_campaign_id = Column(String(100), primary_key=True)
+    date = Column(Date, primary_key=True, index=True)
+
+    campaign_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("campaigns.id", ondelete="SET NULL"),
+        index=True
+    )
+    campaign_name = Column(Text)
+    impressions = Column(Integer, nullable=False, default=0)
+    clicks = Column(Integer, nullable=False, default=0)
+    spend_rub = Column(Numeric(12, 2), nullable=False, default=0)
+
+    synced_at = Column(TIMESTAMP(timezone=True), default=datetime.utcnow, nullable=False, index=True)
+
+    def __repr__(self) -> str:
+        return (
+            f"<SpendDaily channel={self.channel_code} "
+            f"external_campaign_id={self.external_campaign_id} date={self.date}>"
+        )
@@ -0,0 +1,39 @@
+"""
+DeepCalm — Sync Watermark Model
+
+Водяные знаки инкрементальных задач (витрины, синхронизации, выгрузки).
+"""
+from datetime import datetime
+from sqlalchemy import BigInteger, Column, String, TIMESTAMP
+
+from app.core.db import Base
+
+
+class SyncWatermark(Base):
+    """
+    Позиция, до которой задача уже обработала данные.
+
+    Attributes:
+        name: Имя задачи (mart_campaigns_daily, sync_bookings, ...)
+        watermark_at: Момент времени, до которого данные обработаны
+        last_id: Последний обработанный ID (для задач по serial-ключу)
+        updated_at: Время последнего обновления
+
+    Examples:
+        >>> wm = db.get(SyncWatermark, "mart_campaigns_daily")
+        >>> wm.watermark_at
+    """
+    __tablename__ = "sync_watermarks"
+
+    name = Column(String(100), primary_key=True)
+    watermark_at = Column(TIMESTAMP(timezone=True))
+    last_id = Column(BigInteger)
+    updated_at = Column(
+        TIMESTAMP(timezone=True),
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        nullable=False
+    )
+
+    def __repr__(self) -> str:
+        return f"<SyncWatermark name={self.name} watermark_at={self.watermark_at} last_id={self.last_id}>"
@@ -0,0 +1,21 @@
+"""
+DeepCalm — Admin Schemas
+
+Pydantic схемы для Admin API.
+"""
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel, Field
+
+
+class FreezeToggleRequest(BaseModel):
+    """Переключение read-only режима"""
+    enabled: bool = Field(..., description="Включить read-only режим")
+
+
+class FreezeStatusResponse(BaseModel):
+    """Состояние read-only режима"""
+    enabled: bool = Field(..., description="Read-only режим включён")
+    source: Optional[str] = Field(None, description="Источник: env | file | admin")
+    changed_at: Optional[datetime] = Field(None, description="Когда состояние изменилось")
+    persisted: Optional[bool] = Field(None, description="Переключение сохранено в файл-флаг (видно всем воркерам)")
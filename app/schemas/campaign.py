@@ -97,18 +97,24 @@ class CampaignResponse(CampaignBase):
 
 
 class CampaignListResponse(BaseModel):
-    """Список кампаний с пагинацией"""
+    """Список кампаний с пагинацией (page/page_size или курсор)"""
     items: List[CampaignResponse]
-    total: int
-    page: int
+    total: Optional[int] = Field(None, description="Всего (None при total_mode=none)")
+    total_approximate: bool = Field(False, description="total — оценка планировщика")
+    page: Optional[int] = Field(None, description="Номер страницы (None в режиме курсора)")
     page_size: int
+    next_cursor: Optional[str] = Field(None, description="Курсор следующей страницы")
+    has_more: bool = False
 
     class Config:
         json_schema_extra = {
             "example": {
                 "items": [],
                 "total": 0,
+                "total_approximate": False,
                 "page": 1,
-                "page_size": 20
+                "page_size": 20,
+                "next_cursor": None,
+                "has_more": False
             }
         }
@@ -63,6 +63,11 @@ class CreativeResponse(CreativeBase):
 
 
 class CreativeListResponse(BaseModel):
-    """Список креативов"""
+    """Список креативов с пагинацией (page/page_size или курсор)"""
     items: list[CreativeResponse]
-    total: int
+    total: Optional[int] = Field(None, description="Всего (None при total_mode=none)")
+    total_approximate: bool = Field(False, description="total — оценка планировщика")
+    page: Optional[int] = Field(None, description="Номер страницы (None в режиме курсора)")
+    page_size: int
+    next_cursor: Optional[str] = Field(None, description="Курсор следующей страницы")
+    has_more: bool = False
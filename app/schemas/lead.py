@@ -0,0 +1,43 @@
+"""
+DeepCalm — Leads Schemas
+
+Pydantic схемы для Leads API (пакетный приём лидов).
+"""
+from datetime import datetime
+from typing import List, Optional
+from uuid import UUID
+from pydantic import BaseModel, Field
+
+# Лидов в одном запросе
+MAX_BATCH_SIZE = 5000
+
+
+class LeadIn(BaseModel):
+    """Лид из формы сайта, вебхука или импорта"""
+    phone: str = Field(..., max_length=50, description="Телефон в любом формате (нормализуется в +7XXXXXXXXXX)")
+    utm_source: Optional[str] = Field(None, max_length=50, description="Источник (vk, direct, avito)")
+    utm_campaign: Optional[str] = Field(None, max_length=100, description="Название кампании")
+    utm_content: Optional[str] = Field(None, max_length=100, description="ID креатива")
+    utm_medium: Optional[str] = Field(None, max_length=50, description="Модель оплаты (cpc, cpm)")
+    utm_term: Optional[str] = Field(None, max_length=100, description="Ключевая фраза")
+    web_id: Optional[str] = Field(None, description="localStorage UUID")
+    client_id: Optional[str] = Field(None, description="Метрика ClientId")
+    first_touch_at: Optional[datetime] = Field(None, description="Время первого клика (по умолчанию — время приёма)")
+
+
+class LeadBatchRequest(BaseModel):
+    """Пакет лидов"""
+    leads: List[LeadIn] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE, description="Лиды")
+
+
+class LeadBatchResponse(BaseModel):
+    """Результат приёма пакета"""
+    lead_ids: List[Optional[UUID]] = Field(
+        ...,
+        description="ID лида для каждого элемента запроса (в том же порядке); null — телефон не распознан"
+    )
+    received: int = Field(..., description="Элементов в запросе")
+    unique_phones: int = Field(..., description="Уникальных телефонов после нормализации")
+    inserted: int = Field(..., description="Создано новых лидов")
+    updated: int = Field(..., description="Существующих лидов обновлено (более ранний first touch или новые web_id/client_id)")
+    rejected: int = Field(..., description="Элементов с нераспознанным телефоном")
@@ -2,7 +2,7 @@
 Pydantic schemas для Publishing API
 """
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Literal, Optional
 from uuid import UUID
 
 from pydantic import BaseModel, Field
@@ -36,6 +36,26 @@ class PublishResponse(BaseModel):
     message: str
 
 
+class PublishOutcomeEvent(BaseModel):
+    """Строка NDJSON-потока публикации: результат одного размещения"""
+    event: Literal["placement"] = "placement"
+    status: Literal["published", "failed"]
+    channel: str
+    creative_id: UUID
+    creative_variant: str
+    placement: Optional[PlacementInfo] = None
+    error: Optional[str] = None
+    elapsed_ms: Optional[int] = None
+
+
+class PublishCompletedEvent(BaseModel):
+    """Последняя строка NDJSON-потока публикации"""
+    event: Literal["completed"] = "completed"
+    campaign_id: UUID
+    success_count: int
+    failed_count: int
+
+
 class PublishingStatusResponse(BaseModel):
     """Статус публикации кампании"""
     campaign_id: UUID
@@ -58,10 +58,13 @@ class SettingResponse(SettingBase):
 class SettingListResponse(BaseModel):
     """Схема ответа для списка настроек"""
     settings: List[SettingResponse]
-    total: int = Field(..., description="Общее количество настроек")
-    page: int = Field(..., description="Номер страницы")
+    total: Optional[int] = Field(None, description="Общее количество настроек (None при total_mode=none)")
+    total_approximate: bool = Field(False, description="total — оценка планировщика")
+    page: Optional[int] = Field(None, description="Номер страницы (None в режиме курсора)")
     page_size: int = Field(..., description="Размер страницы")
-    pages: int = Field(..., description="Общее количество страниц")
+    pages: Optional[int] = Field(None, description="Общее количество страниц")
+    next_cursor: Optional[str] = Field(None, description="Курсор следующей страницы")
+    has_more: bool = Field(False, description="Есть ли следующая страница")
 
 
 class SettingValueResponse(BaseModel):
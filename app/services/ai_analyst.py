@@ -9,14 +9,16 @@ from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 import structlog
 import openai
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from app.core.db import get_db
-from app.models.setting import Setting
 from app.models.campaign import Campaign
 from app.models.creative import Creative
 from app.models.lead import Lead
 from app.models.conversion import Conversion
+from app.models.spend import SpendDaily
+from app.services.settings_registry import settings_registry
 
 logger = structlog.get_logger(__name__)
 
@@ -31,23 +33,8 @@ class AIAnalystService:
         self._load_settings()
 
     def _load_settings(self):
-        """Загружает настройки AI из Settings API"""
-        ai_settings = self.db.query(Setting).filter(Setting.category == "ai").all()
-
-        for setting in ai_settings:
-            # Конвертируем в правильный тип
-            if setting.value_type == "int":
-                value = int(setting.value)
-            elif setting.value_type == "float":
-                value = float(setting.value)
-            elif setting.value_type == "bool":
-                value = setting.value.lower() in ('true', '1', 'yes', 'on')
-            else:
-                value = setting.value
-
-            self._settings[setting.key] = value
-
-        logger.info("ai_settings_loaded", count=len(self._settings))
+        """Настройки AI из реестра настроек процесса (без запроса к БД)"""
+        self._settings = settings_registry.category(self.db, "ai")
 
     @property
     def openai_client(self):
@@ -87,7 +74,11 @@ class AIAnalystService:
         total_conversions = len(conversions)
         conversion_rate = (total_conversions / total_leads * 100) if total_leads > 0 else 0
         total_revenue = sum(c.revenue_rub for c in conversions)
-        total_spend = campaign.spent_rub or 0
+        # Фактический расход площадок за тот же период (spend_daily)
+        total_spend = self.db.query(func.coalesce(func.sum(SpendDaily.spend_rub), 0)).filter(
+            SpendDaily.campaign_id == campaign_id,
+            SpendDaily.date >= thirty_days_ago.date()
+        ).scalar()
         roas = (total_revenue / total_spend) if total_spend > 0 else 0
         cac = (total_spend / total_conversions) if total_conversions > 0 else 0
 
@@ -132,20 +123,7 @@ class AIAnalystService:
 
     def _get_financial_setting(self, key: str, default: Any) -> Any:
         """Получает финансовую настройку"""
-        setting = self.db.query(Setting).filter(
-            Setting.key == key,
-            Setting.category == "financial"
-        ).first()
-
-        if not setting:
-            return default
-
-        if setting.value_type == "float":
-            return float(setting.value)
-        elif setting.value_type == "int":
-            return int(setting.value)
-        else:
-            return setting.value
+        return settings_registry.category(self.db, "financial").get(key, default)
 
     def analyze_campaign(self, campaign_id: int, user_question: Optional[str] = None) -> Dict[str, Any]:
         """Анализирует кампанию через GPT-4"""
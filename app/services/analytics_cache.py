@@ -0,0 +1,148 @@
+"""
+DeepCalm — Analytics Cache
+
+Ключи и теги кэша аналитики и инвалидация при записи в БД.
+
+Изменения кампаний, конверсий, лидов, размещений и расхода отслеживаются
+событиями SQLAlchemy Session (flush и массовые INSERT/UPDATE/DELETE через
+session.execute), поэтому кэш сбрасывается после любого commit — и из API,
+и из сервисов/синхронизаций.
+"""
+from datetime import date
+from itertools import chain
+from typing import Iterable, List, Optional
+from uuid import UUID
+
+import structlog
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.core.cache import response_cache
+from app.models.campaign import Campaign
+from app.models.conversion import Conversion
+from app.models.lead import Lead
+from app.models.placement import Placement
+from app.models.spend import SpendDaily
+
+logger = structlog.get_logger(__name__)
+
+# Все значения аналитики
+ANALYTICS_TAG = "analytics"
+# Сводка дашборда (зависит от всех кампаний)
+DASHBOARD_TAG = "dashboard"
+
+_PENDING_KEY = "analytics_cache_pending"
+_TRACKED_MODELS = (Campaign, Conversion, Lead, Placement, SpendDaily)
+
+
+def campaign_tag(campaign_id) -> str:
+    """Тег значений, зависящих от кампании"""
+    return f"campaign:{campaign_id}"
+
+
+def _date_part(value: Optional[date]) -> str:
+    return value.isoformat() if value else "-"
+
+
+def dashboard_cache_key(start_date: Optional[date], end_date: Optional[date]) -> str:
+    """Ключ сводки дашборда за период"""
+    return f"analytics:dashboard:{_date_part(start_date)}:{_date_part(end_date)}"
+
+
+def campaign_metrics_cache_key(
+    campaign_id: UUID,
+    start_date: Optional[date],
+    end_date: Optional[date]
+) -> str:
+    """Ключ метрик кампании за период"""
+    return f"analytics:campaign:{campaign_id}:{_date_part(start_date)}:{_date_part(end_date)}"
+
+
+def dashboard_cache_tags() -> List[str]:
+    return [ANALYTICS_TAG, DASHBOARD_TAG]
+
+
+def campaign_metrics_cache_tags(campaign_id: UUID) -> List[str]:
+    return [ANALYTICS_TAG, campaign_tag(campaign_id)]
+
+
+def invalidate_campaigns(campaign_ids: Iterable) -> None:
+    """Сбрасывает метрики кампаний и сводку дашборда"""
+    tags = {campaign_tag(campaign_id) for campaign_id in campaign_ids if campaign_id is not None}
+    if tags:
+        response_cache.invalidate(DASHBOARD_TAG, *sorted(tags))
+
+
+def invalidate_analytics() -> None:
+    """Сбрасывает всю аналитику"""
+    response_cache.invalidate(ANALYTICS_TAG)
+
+
+# ----------------------------------------------------------------------
+# Инвалидация по событиям Session
+# ----------------------------------------------------------------------
+def _pending(session: Session) -> dict:
+    return session.info.setdefault(_PENDING_KEY, {"campaigns": set(), "all": False})
+
+
+def _campaign_ids(obj) -> set:
+    """Текущий и прежний campaign_id объекта (при переносе между кампаниями)"""
+    if isinstance(obj, Campaign):
+        return {obj.id}
+    history = inspect(obj).attrs.campaign_id.history
+    return {obj.campaign_id, *history.deleted}
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    pending = None
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if not isinstance(obj, _TRACKED_MODELS):
+            continue
+        if isinstance(obj, Lead):
+            # Новый лид ещё без конверсий и на аналитику не влияет; изменение
+            # существующего меняет канал конверсий во всех его кампаниях
+            if obj in session.new:
+                continue
+            pending = pending or _pending(session)
+            pending["all"] = True
+        else:
+            pending = pending or _pending(session)
+            pending["campaigns"].update(_campaign_ids(obj))
+
+
+def _do_orm_execute(orm_execute_state) -> None:
+    # Массовые INSERT (в т.ч. ON CONFLICT DO UPDATE), UPDATE и DELETE не проходят через flush
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and issubclass(mapper.class_, _TRACKED_MODELS):
+        _pending(orm_execute_state.session)["all"] = True
+
+
+def _after_commit(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    if pending["all"]:
+        invalidate_analytics()
+    else:
+        invalidate_campaigns(pending["campaigns"])
+
+
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+def setup_cache_invalidation() -> None:
+    """Подписывает инвалидацию кэша аналитики на события всех Session"""
+    listeners = (
+        ("after_flush", _after_flush),
+        ("do_orm_execute", _do_orm_execute),
+        ("after_commit", _after_commit),
+        ("after_rollback", _after_rollback),
+    )
+    for identifier, listener in listeners:
+        if not event.contains(Session, identifier, listener):
+            event.listen(Session, identifier, listener)
+
+    logger.info("analytics_cache_invalidation_configured")
@@ -9,6 +9,7 @@ import structlog
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
+from app.core.dates import range_filters
 from app.models.campaign import Campaign
 from app.models.conversion import Conversion
 from app.models.lead import Lead
@@ -18,6 +19,9 @@ from app.schemas.analytics import (
     ChannelBreakdown,
     DashboardSummary,
 )
+from app.services.attribution import extract_channel_from_utm, utm_channel_expression
+from app.services.marts import MartsService
+from app.services.spend import SpendService
 
 logger = structlog.get_logger()
 
@@ -27,6 +31,11 @@ class AnalyticsService:
 
     def __init__(self, db: Session):
         self.db = db
+        self.marts = MartsService(db)
+
+    def _use_mart(self) -> bool:
+        """Читать ли агрегаты из mart_campaigns_daily (витрина актуальна)"""
+        return self.marts.is_campaigns_daily_fresh()
 
     def get_campaign_metrics(
         self,
@@ -52,10 +61,18 @@ class AnalyticsService:
             end_date=str(end_date) if end_date else None
         )
 
-        # Получаем кампанию
-        campaign = self.db.query(Campaign).filter(Campaign.id == campaign_id).first()
-        if not campaign:
+        # Кампания вместе с фактическим расходом из spend_daily (один запрос)
+        spend = SpendService.campaign_spend_subquery(start_date, end_date)
+        row = (
+            self.db.query(Campaign, spend.c.spend_rub, spend.c.clicks, spend.c.impressions)
+            .outerjoin(spend, spend.c.campaign_id == Campaign.id)
+            .filter(Campaign.id == campaign_id)
+            .first()
+        )
+        if not row:
             raise ValueError(f"Кампания {campaign_id} не найдена")
+        campaign, spent_rub, clicks, impressions = row
+        has_spend = spent_rub is not None
 
         # Базовые метрики кампании
         metrics = CampaignMetrics(
@@ -67,25 +84,15 @@ class AnalyticsService:
             target_roas=campaign.target_roas
         )
 
-        # Получаем конверсии кампании
-        conversions_query = self.db.query(Conversion).filter(Conversion.campaign_id == campaign_id)
-
-        if start_date:
-            conversions_query = conversions_query.filter(func.date(Conversion.created_at) >= start_date)
-
-        if end_date:
-            conversions_query = conversions_query.filter(func.date(Conversion.created_at) <= end_date)
-
-        conversions = conversions_query.all()
+        # Конверсии кампании одним запросом, сгруппированные по каналам.
+        # Тот же результат используется для разбивки по каналам ниже.
+        conversion_totals = self._get_conversion_channel_totals(campaign_id, start_date, end_date)
 
-        # Получаем лиды через конверсии
-        leads = [c.lead for c in conversions if c.lead]
-
-        metrics.leads_count = len(leads)
-        metrics.conversions_count = len(conversions)
+        metrics.leads_count = sum(row["leads_count"] for row in conversion_totals)
+        metrics.conversions_count = sum(row["conversions_count"] for row in conversion_totals)
 
         # Расчет выручки
-        metrics.revenue_rub = float(sum(c.revenue_rub for c in conversions))
+        metrics.revenue_rub = float(sum(row["revenue_rub"] for row in conversion_totals))
 
         # Conversion Rate
         if metrics.leads_count > 0:
@@ -94,21 +101,20 @@ class AnalyticsService:
                 2
             )
 
-        # Для MVP используем mock данные для показов/кликов
-        # В реальности эти данные будут приходить из Яндекс.Метрики
-        metrics.impressions = metrics.leads_count * 100  # mock: 1 лид = 100 показов
-        metrics.clicks = metrics.leads_count  # mock: 1 клик = 1 лид
+        if has_spend:
+            # Фактические расход, клики и показы из отчётов площадок
+            metrics.impressions = int(impressions)
+            metrics.clicks = int(clicks)
+            metrics.spent_rub = float(spent_rub)
+        else:
+            # Расход кампании ещё не загружался (sync_spend) — оценка
+            metrics.impressions = metrics.leads_count * 100  # mock: 1 лид = 100 показов
+            metrics.clicks = metrics.leads_count  # mock: 1 клик = 1 лид
+            metrics.spent_rub = self._estimate_spent_rub(metrics.budget_rub, metrics.leads_count)
 
         if metrics.impressions > 0:
             metrics.ctr = round((metrics.clicks / metrics.impressions) * 100, 2)
 
-        # Spent - mock (в реальности из API платформ)
-        # Для MVP считаем что потратили пропорционально лидам
-        if metrics.leads_count > 0:
-            metrics.spent_rub = round(metrics.budget_rub * 0.5, 2)  # mock: 50% бюджета
-        else:
-            metrics.spent_rub = 0.0
-
         # CAC
         if metrics.conversions_count > 0:
             metrics.actual_cac_rub = round(metrics.spent_rub / metrics.conversions_count, 2)
@@ -146,7 +152,13 @@ class AnalyticsService:
             metrics.roas_status = "unknown"
 
         # Разбивка по каналам
-        channels = self._get_channel_breakdown(campaign_id, start_date, end_date)
+        channels = self._get_channel_breakdown(
+            campaign_id,
+            start_date,
+            end_date,
+            conversion_totals=conversion_totals,
+            has_spend=has_spend
+        )
 
         logger.info(
             "campaign_metrics_calculated",
@@ -161,11 +173,74 @@ class AnalyticsService:
             "channels": channels
         }
 
-    def _get_channel_breakdown(
+    def _get_conversion_channel_totals(
         self,
         campaign_id: UUID,
         start_date: Optional[date] = None,
         end_date: Optional[date] = None
+    ) -> list[dict]:
+        """
+        Агрегаты конверсий кампании по каналам (один запрос)
+
+        Канал берётся из Conversion.channel_code, а если он пуст —
+        определяется по utm_source лида. Конверсии без канала попадают
+        в группу с channel_code=None (учитываются в итогах кампании).
+
+        Args:
+            campaign_id: ID кампании
+            start_date: Начальная дата
+            end_date: Конечная дата
+
+        Returns:
+            Список dict: channel_code, leads_count, conversions_count, revenue_rub
+        """
+        if self._use_mart():
+            # В витрине leads_count — лиды по utm_campaign, а здесь лиды
+            # считаются по конверсиям, поэтому берём conversions_count
+            return [
+                {
+                    "channel_code": row["channel_code"],
+                    "leads_count": row["conversions_count"],
+                    "conversions_count": row["conversions_count"],
+                    "revenue_rub": row["revenue_rub"],
+                }
+                for row in self.marts.campaign_channel_totals(campaign_id, start_date, end_date)
+                if row["conversions_count"] > 0
+            ]
+
+        channel_key = func.coalesce(Conversion.channel_code, utm_channel_expression(Lead.utm_source))
+
+        rows = (
+            self.db.query(
+                channel_key,
+                func.count(Lead.id),
+                func.count(Conversion.id),
+                func.coalesce(func.sum(Conversion.revenue_rub), 0),
+            )
+            .outerjoin(Lead, Lead.id == Conversion.lead_id)
+            .filter(Conversion.campaign_id == campaign_id)
+            .filter(*self._conversion_date_filters(start_date, end_date))
+            .group_by(channel_key)
+            .all()
+        )
+
+        return [
+            {
+                "channel_code": channel_code,
+                "leads_count": leads_count,
+                "conversions_count": conversions_count,
+                "revenue_rub": revenue_rub,
+            }
+            for channel_code, leads_count, conversions_count, revenue_rub in rows
+        ]
+
+    def _get_channel_breakdown(
+        self,
+        campaign_id: UUID,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        conversion_totals: Optional[list[dict]] = None,
+        has_spend: bool = False
     ) -> list[ChannelBreakdown]:
         """
         Рассчитывает метрики по каналам
@@ -174,71 +249,72 @@ class AnalyticsService:
             campaign_id: ID кампании
             start_date: Начальная дата
             end_date: Конечная дата
+            conversion_totals: Уже посчитанные агрегаты конверсий по каналам
+                (из get_campaign_metrics), чтобы не повторять запрос
+            has_spend: У кампании есть фактический расход в spend_daily
+                (иначе расход каналов оценивается по лидам)
 
         Returns:
             Список метрик по каналам
         """
-        # Получаем placements кампании
-        placements_query = (
-            self.db.query(Placement)
+        # Размещения кампании по каналам вместе с фактическим расходом канала
+        placements = (
+            self.db.query(
+                Placement.channel_code.label("channel_code"),
+                func.count(Placement.id).label("placements_count"),
+                func.count(Placement.id).filter(Placement.status == "active").label("active_placements"),
+            )
             .filter(Placement.campaign_id == campaign_id)
+            .filter(*range_filters(Placement.published_at, start_date, end_date))
+            .group_by(Placement.channel_code)
+            .subquery()
         )
-
-        if start_date:
-            placements_query = placements_query.filter(
-                func.date(Placement.published_at) >= start_date
-            )
-
-        if end_date:
-            placements_query = placements_query.filter(
-                func.date(Placement.published_at) <= end_date
+        spend = SpendService.channel_spend_subquery(campaign_id, start_date, end_date)
+
+        placement_rows = (
+            self.db.query(
+                placements.c.channel_code,
+                placements.c.placements_count,
+                placements.c.active_placements,
+                func.coalesce(spend.c.spend_rub, 0),
             )
+            .outerjoin(spend, spend.c.channel_code == placements.c.channel_code)
+            .order_by(placements.c.channel_code)
+            .all()
+        )
 
-        placements = placements_query.all()
-
-        # Группируем по каналам
         channels_data = {}
-        for placement in placements:
-            channel_code = placement.channel_code
-            if channel_code not in channels_data:
-                channels_data[channel_code] = {
-                    "channel_code": channel_code,
-                    "channel_name": self._get_channel_name(channel_code),
-                    "placements_count": 0,
-                    "active_placements": 0,
-                    "spent_rub": 0.0,
-                    "leads_count": 0,
-                    "conversions_count": 0,
-                    "revenue_rub": 0.0
-                }
-
-            channels_data[channel_code]["placements_count"] += 1
-            if placement.status == "active":
-                channels_data[channel_code]["active_placements"] += 1
-
-        # Получаем конверсии по каналам
-        conversions_query = self.db.query(Conversion).filter(Conversion.campaign_id == campaign_id)
-        if start_date:
-            conversions_query = conversions_query.filter(func.date(Conversion.created_at) >= start_date)
-        if end_date:
-            conversions_query = conversions_query.filter(func.date(Conversion.created_at) <= end_date)
-
-        conversions = conversions_query.all()
-
-        # Собираем статистику по конверсиям и лидам
-        for conversion in conversions:
-            # Находим канал через лид
-            if conversion.lead:
-                channel = self._extract_channel_from_utm(conversion.lead.utm_source)
-                if channel and channel in channels_data:
-                    channels_data[channel]["conversions_count"] += 1
-                    channels_data[channel]["revenue_rub"] += float(conversion.revenue_rub)
-                    channels_data[channel]["leads_count"] += 1  # каждый conversion имеет lead
-
-        # Mock spent (в реальности из API)
-        for channel_code, data in channels_data.items():
-            if data["leads_count"] > 0:
-                data["spent_rub"] = round(data["leads_count"] * 500.0, 2)  # mock: 500 руб на лид
+        for channel_code, placements_count, active_placements, spent_rub in placement_rows:
+            channels_data[channel_code] = {
+                "channel_code": channel_code,
+                "channel_name": self._get_channel_name(channel_code),
+                "placements_count": placements_count,
+                "active_placements": active_placements,
+                "spent_rub": float(spent_rub),
+                "leads_count": 0,
+                "conversions_count": 0,
+                "revenue_rub": 0.0
+            }
+
+        if not channels_data:
+            return []
+
+        if conversion_totals is None:
+            conversion_totals = self._get_conversion_channel_totals(campaign_id, start_date, end_date)
+
+        # Статистика по конверсиям и лидам (только для каналов с размещениями)
+        for row in conversion_totals:
+            data = channels_data.get(row["channel_code"])
+            if data is not None:
+                data["leads_count"] = row["leads_count"]
+                data["conversions_count"] = row["conversions_count"]
+                data["revenue_rub"] = float(row["revenue_rub"])
+
+        # Расход кампании не загружался — оценка по лидам
+        if not has_spend:
+            for channel_code, data in channels_data.items():
+                if data["leads_count"] > 0:
+                    data["spent_rub"] = round(data["leads_count"] * 500.0, 2)  # mock: 500 руб на лид
 
         # Формируем ChannelBreakdown
         result = []
@@ -277,6 +353,10 @@ class AnalyticsService:
         """
         Получает сводку для дашборда
 
+        Все кампании и их конверсии агрегируются одним GROUP BY запросом,
+        поэтому число запросов не зависит от количества кампаний. При
+        актуальной витрине агрегаты читаются из mart_campaigns_daily.
+
         Args:
             start_date: Начальная дата
             end_date: Конечная дата
@@ -286,13 +366,30 @@ class AnalyticsService:
         """
         logger.info("calculating_dashboard_summary")
 
-        campaigns = self.db.query(Campaign).all()
-
-        total_campaigns = len(campaigns)
-        active_campaigns = sum(1 for c in campaigns if c.status == "active")
-        paused_campaigns = sum(1 for c in campaigns if c.status == "paused")
+        conversion_totals = self._conversion_totals_subquery(start_date, end_date)
+        spend = SpendService.campaign_spend_subquery(start_date, end_date)
+
+        rows = (
+            self.db.query(
+                Campaign.id,
+                Campaign.title,
+                Campaign.status,
+                Campaign.budget_rub,
+                func.coalesce(conversion_totals.c.leads_count, 0),
+                func.coalesce(conversion_totals.c.conversions_count, 0),
+                func.coalesce(conversion_totals.c.revenue_rub, 0),
+                spend.c.spend_rub,
+            )
+            .outerjoin(conversion_totals, conversion_totals.c.campaign_id == Campaign.id)
+            .outerjoin(spend, spend.c.campaign_id == Campaign.id)
+            .order_by(Campaign.created_at, Campaign.id)
+            .all()
+        )
 
-        total_budget_rub = float(sum(c.budget_rub for c in campaigns))
+        total_campaigns = len(rows)
+        active_campaigns = 0
+        paused_campaigns = 0
+        total_budget_rub = 0.0
 
         # Расчет метрик по всем кампаниям
         total_spent_rub = 0.0
@@ -302,28 +399,34 @@ class AnalyticsService:
 
         campaign_roas_list = []
 
-        for campaign in campaigns:
-            try:
-                metrics_data = self.get_campaign_metrics(campaign.id, start_date, end_date)
-                metrics = metrics_data["metrics"]
+        for campaign_id, title, status, budget_rub, leads_count, conversions_count, revenue, spend_rub in rows:
+            if status == "active":
+                active_campaigns += 1
+            elif status == "paused":
+                paused_campaigns += 1
 
-                total_spent_rub += metrics.spent_rub
-                total_leads += metrics.leads_count
-                total_conversions += metrics.conversions_count
-                total_revenue_rub += metrics.revenue_rub
+            budget = float(budget_rub)
+            total_budget_rub += budget
 
-                if metrics.actual_roas:
+            if spend_rub is not None:
+                spent_rub = float(spend_rub)
+            else:
+                spent_rub = self._estimate_spent_rub(budget, leads_count)
+            revenue_rub = float(revenue)
+
+            total_spent_rub += spent_rub
+            total_leads += leads_count
+            total_conversions += conversions_count
+            total_revenue_rub += revenue_rub
+
+            if spent_rub > 0:
+                actual_roas = round(revenue_rub / spent_rub, 2)
+                if actual_roas:
                     campaign_roas_list.append({
-                        "campaign_id": str(campaign.id),
-                        "campaign_title": campaign.title,
-                        "roas": metrics.actual_roas
+                        "campaign_id": str(campaign_id),
+                        "campaign_title": title,
+                        "roas": actual_roas
                     })
-            except Exception as e:
-                logger.error(
-                    "dashboard_campaign_metrics_failed",
-                    campaign_id=str(campaign.id),
-                    error=str(e)
-                )
 
         # Budget utilization
         budget_utilization = 0.0
@@ -368,6 +471,70 @@ class AnalyticsService:
 
         return summary
 
+    def _conversion_totals_subquery(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ):
+        """
+        Подзапрос с агрегатами конверсий по кампаниям
+
+        Лид считается через LEFT JOIN, как и в get_campaign_metrics
+        (учитываются только конверсии с существующим лидом).
+        Если витрина mart_campaigns_daily актуальна, агрегаты берутся из неё.
+        """
+        if self._use_mart():
+            totals = self.marts.campaign_totals_subquery(start_date, end_date)
+            return (
+                self.db.query(
+                    totals.c.campaign_id.label("campaign_id"),
+                    totals.c.conversions_count.label("leads_count"),
+                    totals.c.conversions_count.label("conversions_count"),
+                    totals.c.revenue_rub.label("revenue_rub"),
+                )
+                .filter(totals.c.conversions_count > 0)
+                .subquery()
+            )
+
+        query = (
+            self.db.query(
+                Conversion.campaign_id.label("campaign_id"),
+                func.count(Lead.id).label("leads_count"),
+                func.count(Conversion.id).label("conversions_count"),
+                func.sum(Conversion.revenue_rub).label("revenue_rub"),
+            )
+            .outerjoin(Lead, Lead.id == Conversion.lead_id)
+            .filter(Conversion.campaign_id.isnot(None))
+            .filter(*self._conversion_date_filters(start_date, end_date))
+            .group_by(Conversion.campaign_id)
+        )
+        return query.subquery()
+
+    @staticmethod
+    def _conversion_date_filters(
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> list:
+        """
+        Условия фильтрации конверсий по датам (в бизнес-таймзоне)
+
+        Фильтруем по converted_at — по той же дате конверсии
+        раскладывается по дням витрина mart_campaigns_daily.
+        """
+        return range_filters(Conversion.converted_at, start_date, end_date)
+
+    @staticmethod
+    def _estimate_spent_rub(budget_rub: float, leads_count: int) -> float:
+        """
+        Оценка расхода кампании без загруженных данных площадок
+
+        Используется, пока sync_spend не загрузил расход кампании в
+        spend_daily: при наличии лидов считаем потраченными 50% бюджета.
+        """
+        if leads_count > 0:
+            return round(budget_rub * 0.5, 2)
+        return 0.0
+
     def _get_channel_name(self, channel_code: str) -> str:
         """Получает название канала по коду"""
         channel_names = {
@@ -379,15 +546,4 @@ class AnalyticsService:
 
     def _extract_channel_from_utm(self, utm_source: Optional[str]) -> Optional[str]:
         """Извлекает канал из utm_source"""
-        if not utm_source:
-            return None
-
-        utm_lower = utm_source.lower()
-        if "vk" in utm_lower:
-            return "vk"
-        elif "direct" in utm_lower or "yandex" in utm_lower:
-            return "direct"
-        elif "avito" in utm_lower:
-            return "avito"
-
-        return None
+        return extract_channel_from_utm(utm_source)
@@ -0,0 +1,66 @@
+"""
+DeepCalm — Channel Attribution
+
+Определение канала (vk/direct/avito) по utm_source лида и кампании
+по utm_campaign. Одна таблица правил для Python-кода и для SQL (CASE),
+чтобы аналитика и витрины атрибутировали конверсии одинаково.
+"""
+from typing import Optional
+
+from sqlalchemy import case, func, or_
+
+# Подстроки utm_source → код канала (fallback, если channel_code не заполнен)
+UTM_CHANNEL_PATTERNS = (
+    ("vk", ("vk",)),
+    ("direct", ("direct", "yandex")),
+    ("avito", ("avito",)),
+)
+
+
+def extract_channel_from_utm(utm_source: Optional[str]) -> Optional[str]:
+    """
+    Извлекает канал из utm_source.
+
+    Examples:
+        >>> extract_channel_from_utm("Yandex_Search")
+        'direct'
+    """
+    if not utm_source:
+        return None
+
+    utm_lower = utm_source.lower()
+    for channel_code, patterns in UTM_CHANNEL_PATTERNS:
+        if any(pattern in utm_lower for pattern in patterns):
+            return channel_code
+
+    return None
+
+
+def utm_channel_expression(utm_source_column):
+    """
+    SQL-аналог extract_channel_from_utm (CASE по lower(utm_source)).
+
+    Examples:
+        >>> channel = func.coalesce(Conversion.channel_code, utm_channel_expression(Lead.utm_source))
+    """
+    utm_lower = func.lower(utm_source_column)
+    return case(
+        *[
+            (or_(*[utm_lower.contains(pattern, autoescape=True) for pattern in patterns]), channel_code)
+            for channel_code, patterns in UTM_CHANNEL_PATTERNS
+        ],
+        else_=None
+    )
+
+
+def campaign_title_match(utm_campaign_column, title_column):
+    """
+    Условие: utm_campaign лида содержит название кампании (без учёта регистра).
+
+    strpos вместо LIKE: % и _ в названии — обычные символы (autoescape
+    SQLAlchemy применим только к литералам, а здесь колонка).
+
+    Examples:
+        >>> select(Lead).join(Campaign, campaign_title_match(Lead.utm_campaign, Campaign.title))
+    """
+    return func.strpos(func.lower(utm_campaign_column), func.lower(title_column)) > 0
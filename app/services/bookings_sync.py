@@ -0,0 +1,322 @@
+"""
+DeepCalm — Bookings Sync Service
+
+Инкрементальная синхронизация записей YCLIENTS (задача sync_bookings).
+
+Записи запрашиваются начиная с водяного знака (sync_watermarks) —
+времени последнего изменения, которое уже загружено. Каждая страница
+пишется одним INSERT ... ON CONFLICT по yclients_id; строки, которые
+не изменились, не обновляются. Затем брони связываются с лидами по
+телефону, а оплаченные брони превращаются в конверсии с ttp_days —
+всё set-based запросами по id затронутых броней.
+"""
+import asyncio
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import structlog
+from sqlalchemy import case, delete, func, literal_column, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core import events
+from app.core.config import settings
+from app.core.dates import business_day, get_business_tz
+from app.integrations.yclients import YClientsClient, YClientsRecord
+from app.models.booking import Booking
+from app.models.campaign import Campaign
+from app.models.conversion import Conversion
+from app.models.lead import Lead
+from app.models.sync_watermark import SyncWatermark
+from app.services.attribution import campaign_title_match, utm_channel_expression
+from app.services.marts import mark_days_dirty
+
+logger = structlog.get_logger(__name__)
+
+SYNC_BOOKINGS = "sync_bookings"
+
+# Запас назад от водяного знака: правки, попавшие в YCLIENTS с задержкой
+WATERMARK_OVERLAP = timedelta(minutes=10)
+
+# Брони, которые не дают конверсию (даже если были оплачены)
+NON_CONVERTING_STATUSES = ("cancelled", "no_show")
+
+
+class BookingsSyncService:
+    """Сервис синхронизации броней YCLIENTS → bookings → conversions"""
+
+    def __init__(self, db: Session, client: Optional[YClientsClient] = None):
+        self.db = db
+        self.client = client or YClientsClient.from_settings()
+
+    async def sync(self, full: bool = False) -> Dict:
+        """
+        Загружает изменённые записи YCLIENTS.
+
+        Запись в БД выполняется в потоке (asyncio.to_thread), пока
+        следующие страницы загружаются параллельно.
+
+        Args:
+            full: Полная пересинхронизация за settings.yclients_full_sync_days
+                (иначе — изменения после водяного знака)
+
+        Returns:
+            dict с режимом и счётчиками (страницы, записи, изменённые брони,
+            конверсии)
+        """
+        watermark_at = None if full else await asyncio.to_thread(self._watermark_at)
+        changed_after = watermark_at - WATERMARK_OVERLAP if watermark_at else None
+        start_date = None
+        if changed_after is None:
+            today = datetime.now(get_business_tz()).date()
+            start_date = today - timedelta(days=settings.yclients_full_sync_days)
+
+        mode = "incremental" if changed_after else "full"
+        logger.info("bookings_sync_started", mode=mode, changed_after=str(changed_after))
+
+        stats: Counter = Counter()
+        max_changed_at = watermark_at
+        async for records in self.client.iter_record_pages(changed_after=changed_after, start_date=start_date):
+            stats["pages"] += 1
+            stats["fetched"] += len(records)
+            stats.update(await asyncio.to_thread(self.apply_records, records))
+
+            page_changed_at = max((r.changed_at for r in records if r.changed_at), default=None)
+            if page_changed_at and (max_changed_at is None or page_changed_at > max_changed_at):
+                max_changed_at = page_changed_at
+
+        # Лиды, появившиеся после брони: связываем уже загруженные брони
+        stats.update(await asyncio.to_thread(self.link_new_leads, changed_after))
+
+        if max_changed_at is not None:
+            await asyncio.to_thread(self._save_watermark, max_changed_at)
+
+        result = {"status": "ok", "mode": mode, **stats}
+        logger.info("bookings_sync_completed", **result)
+        return result
+
+    def apply_records(self, records: List[YClientsRecord]) -> Dict[str, int]:
+        """
+        Upsert страницы записей, связь с лидами и конверсии (одна транзакция).
+
+        Returns:
+            dict: changed (вставлено или изменено броней), inserted,
+            conversions (вставлено/обновлено), conversions_deleted
+        """
+        # В одном INSERT ... ON CONFLICT строка не может меняться дважды
+        unique = {record.yclients_id: record for record in records}
+        if not unique:
+            return {}
+
+        now = datetime.now(timezone.utc)
+        values = [
+            {
+                "yclients_id": record.yclients_id,
+                "yclients_client_id": record.client_id,
+                "phone": record.phone,
+                "sku": record.sku,
+                "starts_at": record.starts_at,
+                "status": record.status,
+                "price_rub": record.price_rub,
+                "paid_at": (record.changed_at or now) if record.paid else None,
+                "changed_at": record.changed_at,
+                "updated_at": now,
+            }
+            for record in unique.values()
+        ]
+
+        stmt = insert(Booking).values(values)
+        excluded = stmt.excluded
+        tracked = ("yclients_client_id", "phone", "sku", "starts_at", "status", "price_rub", "changed_at")
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Booking.yclients_id],
+            set_={
+                **{name: excluded[name] for name in tracked},
+                # Время оплаты — первое, когда запись оказалась оплаченной
+                "paid_at": case(
+                    (excluded.paid_at.is_(None), None),
+                    else_=func.coalesce(Booking.paid_at, excluded.paid_at)
+                ),
+                "updated_at": excluded.updated_at,
+            },
+            # Неизменённые записи не трогаем (повторная выгрузка из-за перекрытия)
+            where=or_(
+                tuple_(*[Booking.__table__.c[name] for name in tracked]).is_distinct_from(
+                    tuple_(*[excluded[name] for name in tracked])
+                ),
+                Booking.paid_at.is_(None) != excluded.paid_at.is_(None),
+            )
+        ).returning(
+            Booking.id,
+            Booking.yclients_id,
+            Booking.phone,
+            Booking.sku,
+            Booking.starts_at,
+            literal_column("xmax = 0").label("inserted"),
+        )
+        changed = self.db.execute(stmt).all()
+        booking_ids = [row.id for row in changed]
+
+        stats = {"changed": len(changed), "inserted": sum(1 for row in changed if row.inserted)}
+        if booking_ids:
+            self._link_leads(booking_ids)
+            stats.update(self._sync_conversions(booking_ids))
+
+        self.db.commit()
+
+        for row in changed:
+            if row.inserted and row.phone:
+                events.emit(events.BOOKING_CREATED, {
+                    "id": str(row.yclients_id),
+                    "contact": {"phone": row.phone},
+                    "sku": row.sku or "",
+                    "starts_at": row.starts_at.isoformat(),
+                    "source": "yclients",
+                })
+
+        return stats
+
+    def link_new_leads(self, since: Optional[datetime]) -> Dict[str, int]:
+        """
+        Связывает брони без лида с лидами, созданными после since
+        (None — со всеми лидами), и досоздаёт их конверсии.
+        """
+        stmt = (
+            update(Booking)
+            .where(Booking.lead_id.is_(None), Booking.phone == Lead.phone)
+            .values(lead_id=Lead.id)
+            .returning(Booking.id)
+        )
+        if since is not None:
+            stmt = stmt.where(Lead.created_at >= since)
+
+        booking_ids = list(self.db.execute(stmt).scalars())
+        stats = {"linked_late": len(booking_ids)}
+        if booking_ids:
+            self._link_leads(booking_ids)
+            stats.update(self._sync_conversions(booking_ids))
+        self.db.commit()
+        return stats
+
+    def _link_leads(self, booking_ids: List[int]) -> None:
+        """lead_id брони по телефону и yclients_id лида по клиенту YCLIENTS"""
+        self.db.execute(
+            update(Booking)
+            .where(
+                Booking.id.in_(booking_ids),
+                Booking.phone == Lead.phone,
+                Booking.lead_id.is_distinct_from(Lead.id)
+            )
+            .values(lead_id=Lead.id)
+        )
+        self.db.execute(
+            update(Lead)
+            .where(
+                Booking.lead_id == Lead.id,
+                Booking.id.in_(booking_ids),
+                Booking.yclients_client_id.isnot(None),
+                Lead.yclients_id.is_(None)
+            )
+            .values(yclients_id=Booking.yclients_client_id)
+        )
+
+    def _sync_conversions(self, booking_ids: List[int]) -> Dict[str, int]:
+        """
+        Конверсии для оплаченных броней из booking_ids одним INSERT ... SELECT.
+
+        ttp_days — дни (в бизнес-таймзоне) от первого касания лида до оплаты.
+        Кампания — по вхождению названия в utm_campaign лида, канал — по
+        utm_source. Отменённые брони теряют конверсию.
+
+        Изменённые конверсии получают updated_at (витрина пересчитает их
+        новый день); прежние дни удалённых и переехавших конверсий
+        помечаются через mark_days_dirty.
+        """
+        first_touch = func.coalesce(Lead.first_touch_at, Lead.created_at)
+        campaign_id = (
+            select(Campaign.id)
+            .where(campaign_title_match(Lead.utm_campaign, Campaign.title))
+            .order_by(Campaign.created_at.desc())
+            .limit(1)
+            .correlate(Lead)
+            .scalar_subquery()
+        )
+        source = (
+            select(
+                Booking.lead_id,
+                Booking.id,
+                campaign_id,
+                utm_channel_expression(Lead.utm_source),
+                func.greatest(business_day(Booking.paid_at) - business_day(first_touch), 0),
+                func.coalesce(Booking.price_rub, 0),
+                Booking.paid_at,
+            )
+            .join(Lead, Lead.id == Booking.lead_id)
+            .where(
+                Booking.id.in_(booking_ids),
+                Booking.paid_at.isnot(None),
+                Booking.status.notin_(NON_CONVERTING_STATUSES)
+            )
+        )
+
+        # Прежний день конверсий, у которых меняется время оплаты
+        moved_from = self.db.execute(
+            select(Conversion.converted_at)
+            .join(Booking, Booking.id == Conversion.booking_id)
+            .where(
+                Booking.id.in_(booking_ids),
+                Booking.paid_at.isnot(None),
+                Booking.paid_at.is_distinct_from(Conversion.converted_at)
+            )
+        ).scalars().all()
+
+        stmt = insert(Conversion).from_select(
+            ["lead_id", "booking_id", "campaign_id", "channel_code", "ttp_days", "revenue_rub", "converted_at"],
+            source
+        )
+        excluded = stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Conversion.booking_id],
+            index_where=Conversion.booking_id.isnot(None),
+            set_={
+                "lead_id": excluded.lead_id,
+                "ttp_days": excluded.ttp_days,
+                "revenue_rub": excluded.revenue_rub,
+                "converted_at": excluded.converted_at,
+                "updated_at": datetime.now(timezone.utc),
+            },
+            where=tuple_(
+                Conversion.lead_id, Conversion.ttp_days, Conversion.revenue_rub, Conversion.converted_at
+            ).is_distinct_from(
+                tuple_(excluded.lead_id, excluded.ttp_days, excluded.revenue_rub, excluded.converted_at)
+            )
+        )
+        upserted = self.db.execute(stmt).rowcount
+
+        deleted = self.db.execute(
+            delete(Conversion)
+            .where(
+                Conversion.booking_id == Booking.id,
+                Booking.id.in_(booking_ids),
+                or_(Booking.paid_at.is_(None), Booking.status.in_(NON_CONVERTING_STATUSES))
+            )
+            .returning(Conversion.converted_at)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+
+        mark_days_dirty(self.db, [*moved_from, *deleted])
+
+        return {"conversions": upserted, "conversions_deleted": len(deleted)}
+
+    def _watermark_at(self) -> Optional[datetime]:
+        watermark = self.db.get(SyncWatermark, SYNC_BOOKINGS)
+        return watermark.watermark_at if watermark else None
+
+    def _save_watermark(self, watermark_at: datetime) -> None:
+        watermark = self.db.get(SyncWatermark, SYNC_BOOKINGS)
+        if watermark is None:
+            watermark = SyncWatermark(name=SYNC_BOOKINGS)
+            self.db.add(watermark)
+        watermark.watermark_at = watermark_at
+        self.db.commit()
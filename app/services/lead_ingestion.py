@@ -0,0 +1,171 @@
+"""
+DeepCalm — Lead Ingestion Service
+
+Пакетный приём лидов (формы сайта, вебхуки, импорт) в Identity Map.
+
+Ключ лида — телефон в формате +7XXXXXXXXXX. Пакет нормализуется и
+сворачивается по телефону в памяти, затем пишется executemany
+INSERT ... ON CONFLICT (phone) (insertmanyvalues — страницы по несколько
+сотен строк, без запроса на лид). Правила слияния:
+
+- first touch: побеждает более ранний first_touch_at вместе со всеми
+  UTM-метками (у существующего лида без first_touch_at — created_at);
+- web_id и client_id: заполняются, если у лида их ещё нет;
+- строки без изменений не перезаписываются; их ID дочитываются одним SELECT.
+
+Изменённые лиды получают updated_at — витрина пересчитает новый день
+first touch; прежний день перенесённых лидов помечается mark_days_dirty.
+Вставка идёт через ORM-модель, поэтому срабатывают события Session
+(сброс кэша аналитики).
+"""
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+import structlog
+from sqlalchemy import and_, case, func, literal_column, or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.phones import normalize_phone
+from app.models.lead import Lead
+from app.schemas.lead import LeadIn
+from app.services.marts import mark_days_dirty
+
+logger = structlog.get_logger(__name__)
+
+UTM_FIELDS = ("utm_source", "utm_campaign", "utm_content", "utm_medium", "utm_term")
+IDENTIFIER_FIELDS = ("web_id", "client_id")
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Время без часового пояса считается UTC"""
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class LeadIngestionService:
+    """Сервис пакетного upsert лидов по телефону"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def ingest(self, leads: Sequence[LeadIn]) -> Dict[str, Any]:
+        """
+        Upsert пакета лидов (одна транзакция).
+
+        Args:
+            leads: Лиды в порядке запроса; first_touch_at по умолчанию — время приёма
+
+        Returns:
+            dict: lead_ids (ID для каждого элемента, None — телефон не распознан),
+            received, unique_phones, inserted, updated, rejected
+        """
+        now = datetime.now(timezone.utc)
+        phones = [normalize_phone(lead.phone) for lead in leads]
+        rows = self._merge(leads, phones, now)
+
+        resolved: Dict[str, uuid.UUID] = {}
+        inserted = updated = 0
+        if rows:
+            # Прежний день лидов, чей first touch сдвигается на более ранний
+            mark_days_dirty(self.db, self._moved_touches(rows))
+            for row in self._upsert(rows, now):
+                resolved[row.phone] = row.id
+                if row.inserted:
+                    inserted += 1
+                else:
+                    updated += 1
+
+            unchanged = [phone for phone in rows if phone not in resolved]
+            if unchanged:
+                resolved.update(self.db.execute(
+                    select(Lead.phone, Lead.id).where(Lead.phone.in_(unchanged))
+                ).tuples().all())
+
+        self.db.commit()
+
+        result = {
+            "lead_ids": [resolved.get(phone) if phone else None for phone in phones],
+            "received": len(leads),
+            "unique_phones": len(rows),
+            "inserted": inserted,
+            "updated": updated,
+            "rejected": sum(1 for phone in phones if phone is None),
+        }
+        logger.info("leads_ingested", **{k: v for k, v in result.items() if k != "lead_ids"})
+        return result
+
+    @staticmethod
+    def _merge(leads: Sequence[LeadIn], phones: List[Optional[str]], now: datetime) -> Dict[str, Dict[str, Any]]:
+        """Сворачивает пакет по телефону: в одном ON CONFLICT строка не может меняться дважды"""
+        rows: Dict[str, Dict[str, Any]] = {}
+        for lead, phone in zip(leads, phones):
+            if phone is None:
+                continue
+            row = {
+                "phone": phone,
+                **{name: getattr(lead, name) for name in UTM_FIELDS + IDENTIFIER_FIELDS},
+                "first_touch_at": _as_utc(lead.first_touch_at) or now,
+            }
+            current = rows.get(phone)
+            if current is None:
+                rows[phone] = row
+                continue
+
+            first, other = (row, current) if row["first_touch_at"] < current["first_touch_at"] else (current, row)
+            for name in IDENTIFIER_FIELDS:
+                if first[name] is None:
+                    first[name] = other[name]
+            rows[phone] = first
+        return rows
+
+    def _moved_touches(self, rows: Dict[str, Dict[str, Any]]) -> List[datetime]:
+        """Текущий first touch существующих лидов, которые пакет перенесёт раньше"""
+        touch = func.coalesce(Lead.first_touch_at, Lead.created_at)
+        existing = self.db.execute(
+            select(Lead.phone, touch).where(Lead.phone.in_(list(rows)))
+        ).tuples().all()
+        return [current for phone, current in existing if rows[phone]["first_touch_at"] < current]
+
+    def _upsert(self, rows: Dict[str, Dict[str, Any]], now: datetime) -> List[Any]:
+        """
+        INSERT ... ON CONFLICT (phone) DO UPDATE по правилам слияния.
+
+        Returns:
+            Вставленные и изменённые строки (id, phone, inserted)
+        """
+        # Единый порядок блокировок для параллельных пакетов с общими телефонами
+        values = [
+            {"id": uuid.uuid4(), "created_at": now, "updated_at": now, **rows[phone]}
+            for phone in sorted(rows)
+        ]
+
+        table = Lead.__table__
+        stmt = insert(Lead)
+        excluded = stmt.excluded
+        earlier = excluded.first_touch_at < func.coalesce(table.c.first_touch_at, table.c.created_at)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.phone],
+            set_={
+                **{
+                    name: case((earlier, excluded[name]), else_=table.c[name])
+                    for name in ("first_touch_at",) + UTM_FIELDS
+                },
+                **{name: func.coalesce(table.c[name], excluded[name]) for name in IDENTIFIER_FIELDS},
+                "updated_at": excluded.updated_at,
+            },
+            where=or_(
+                earlier,
+                *[
+                    and_(table.c[name].is_(None), excluded[name].is_not(None))
+                    for name in IDENTIFIER_FIELDS
+                ]
+            )
+        ).returning(
+            table.c.id,
+            table.c.phone,
+            literal_column("xmax = 0").label("inserted"),
+        )
+        return self.db.execute(stmt, values).all()
@@ -0,0 +1,392 @@
+"""
+DeepCalm — Marts Service
+
+Инкрементальный пересчёт витрины mart_campaigns_daily.
+
+Пересчитываются только дни, затронутые строками, вставленными или
+изменёнными после последнего водяного знака (sync_watermarks), и дни из
+mart_dirty_days — прежние дни удалённых и переехавших строк
+(mark_days_dirty). Лиды привязываются к кампаниям по названию, поэтому
+созданная или изменённая кампания (campaigns.updated_at) и удалённая
+(mark_full_refresh) ведут к полному пересчёту. Задача compute_marts
+запускается планировщиком по settings.compute_marts_cron.
+"""
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+from uuid import UUID
+
+import structlog
+from sqlalchemy import Integer, delete, exists, func, insert, literal, select, union, union_all, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.dates import business_day, get_business_tz, start_of_day
+from app.models.campaign import Campaign
+from app.models.conversion import Conversion
+from app.models.lead import Lead
+from app.models.mart import MartCampaignDaily, MartDirtyDay
+from app.models.spend import SpendDaily
+from app.models.sync_watermark import SyncWatermark
+from app.services.attribution import campaign_title_match, utm_channel_expression
+
+logger = structlog.get_logger(__name__)
+
+MART_CAMPAIGNS_DAILY = "mart_campaigns_daily"
+UNKNOWN_CHANNEL = "unknown"
+
+# Ключ pg_advisory_xact_lock: пересчёт выполняет только один воркер
+MART_REFRESH_LOCK_KEY = 4_240_001
+
+# Запас назад от водяного знака: строки, вставленные транзакциями,
+# которые закоммитились уже после старта предыдущего пересчёта
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+
+def mark_days_dirty(db: Session, moments: Iterable[Optional[datetime]]) -> int:
+    """
+    Помечает дни для пересчёта витрины (в транзакции db, без commit).
+
+    Нужен, когда строка уходит из своего дня: удаление конверсии, сдвиг
+    converted_at или first touch лида. Новые значения витрина находит
+    сама по updated_at.
+
+    Args:
+        db: Сессия изменяющей транзакции
+        moments: Прежние значения timestamptz (None пропускаются)
+
+    Returns:
+        Количество помеченных дней
+    """
+    tz = get_business_tz()
+    days = sorted({moment.astimezone(tz).date() for moment in moments if moment is not None})
+    if not days:
+        return 0
+    # Дни сортированы — одинаковый порядок блокировок в параллельных транзакциях
+    now = datetime.now(timezone.utc)
+    db.execute(
+        pg_insert(MartDirtyDay)
+        .values([{"date": day, "marked_at": now} for day in days])
+        .on_conflict_do_nothing(index_elements=[MartDirtyDay.date])
+    )
+    return len(days)
+
+
+def mark_full_refresh(db: Session) -> None:
+    """
+    Требует полного пересчёта витрины (в транзакции db, без commit).
+
+    Нужен при удалении кампании: дни её лидов не восстановить по
+    updated_at. Сбрасывает водяной знак — витрина считается устаревшей
+    до следующего пересчёта.
+    """
+    db.execute(
+        update(SyncWatermark)
+        .where(SyncWatermark.name == MART_CAMPAIGNS_DAILY)
+        .values(watermark_at=None)
+    )
+
+
+class MartsService:
+    """Сервис витрин (пересчёт и чтение mart_campaigns_daily)"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    # ------------------------------------------------------------------
+    # Пересчёт
+    # ------------------------------------------------------------------
+    def refresh_campaigns_daily(self, full: bool = False) -> Dict:
+        """
+        Пересчитывает mart_campaigns_daily.
+
+        Args:
+            full: Полный пересчёт (иначе — только дни после водяного знака)
+
+        Returns:
+            dict со статусом, режимом и количеством пересчитанных дней/строк
+        """
+        locked = self.db.execute(
+            select(func.pg_try_advisory_xact_lock(MART_REFRESH_LOCK_KEY))
+        ).scalar()
+        if not locked:
+            logger.info("mart_refresh_skipped_locked", mart=MART_CAMPAIGNS_DAILY)
+            self.db.rollback()
+            return {"status": "skipped", "reason": "locked"}
+
+        # Часы приложения, как и у created_at (default=datetime.utcnow)
+        refresh_started_at = datetime.now(timezone.utc)
+        watermark = self.db.get(SyncWatermark, MART_CAMPAIGNS_DAILY)
+
+        # Помеченные дни забираются до чтения данных: пометка, закоммиченная
+        # позже, останется для следующего пересчёта
+        dirty_days = self.db.execute(delete(MartDirtyDay).returning(MartDirtyDay.date)).scalars().all()
+
+        if full or watermark is None or watermark.watermark_at is None or self._campaigns_changed(
+            watermark.watermark_at - WATERMARK_OVERLAP
+        ):
+            mode = "full"
+            days: Optional[List[date]] = None
+            self.db.execute(delete(MartCampaignDaily))
+        else:
+            mode = "incremental"
+            days = sorted(set(self._touched_days(watermark.watermark_at - WATERMARK_OVERLAP)) | set(dirty_days))
+            if days:
+                self.db.execute(
+                    delete(MartCampaignDaily).where(MartCampaignDaily.date.in_(days))
+                )
+
+        logger.info(
+            "mart_refresh_started",
+            mart=MART_CAMPAIGNS_DAILY,
+            mode=mode,
+            days=len(days) if days is not None else None
+        )
+
+        rows = 0
+        if days is None or days:
+            rows = self._insert_rows(days, refresh_started_at)
+
+        if watermark is None:
+            watermark = SyncWatermark(name=MART_CAMPAIGNS_DAILY)
+            self.db.add(watermark)
+        watermark.watermark_at = refresh_started_at
+
+        self.db.commit()
+
+        logger.info(
+            "mart_refresh_completed",
+            mart=MART_CAMPAIGNS_DAILY,
+            mode=mode,
+            days=len(days) if days is not None else None,
+            rows=rows
+        )
+
+        return {
+            "status": "ok",
+            "mode": mode,
+            "days": len(days) if days is not None else None,
+            "rows": rows
+        }
+
+    def _campaigns_changed(self, since: datetime) -> bool:
+        """Кампании созданы или изменены после since (меняется привязка лидов по названию)"""
+        return self.db.execute(select(exists().where(Campaign.updated_at >= since))).scalar()
+
+    def _touched_days(self, since: datetime) -> List[date]:
+        """Дни, в которые попали конверсии, лиды и расход, записанные или изменённые после since"""
+        conversion_days = (
+            select(business_day(Conversion.converted_at).label("day"))
+            .where(Conversion.updated_at >= since)
+        )
+        lead_days = (
+            select(business_day(func.coalesce(Lead.first_touch_at, Lead.created_at)).label("day"))
+            .where(Lead.updated_at >= since)
+        )
+        spend_days = select(SpendDaily.date.label("day")).where(SpendDaily.synced_at >= since)
+        return sorted(self.db.execute(union(conversion_days, lead_days, spend_days)).scalars().all())
+
+    def _insert_rows(self, days: Optional[List[date]], refreshed_at: datetime) -> int:
+        """INSERT ... SELECT агрегатов за дни days (None — за всё время)"""
+        conversion_day = business_day(Conversion.converted_at)
+        conversion_channel = func.coalesce(
+            Conversion.channel_code,
+            utm_channel_expression(Lead.utm_source),
+            UNKNOWN_CHANNEL
+        )
+        conversions_source = (
+            select(
+                Conversion.campaign_id.label("campaign_id"),
+                conversion_channel.label("channel_code"),
+                conversion_day.label("date"),
+                literal(0).label("leads_count"),
+                literal(1).label("conversions_count"),
+                Conversion.revenue_rub.label("revenue_rub"),
+                literal(0).label("spend_rub"),
+                literal(0).label("clicks"),
+                literal(0).label("impressions"),
+                Conversion.ttp_days.label("ttp_days"),
+            )
+            .select_from(Conversion)
+            .outerjoin(Lead, Lead.id == Conversion.lead_id)
+            .where(Conversion.campaign_id.isnot(None))
+        )
+
+        # Лиды атрибутируются кампании по utm_campaign (как в отчётах)
+        lead_touch = func.coalesce(Lead.first_touch_at, Lead.created_at)
+        lead_day = business_day(lead_touch)
+        leads_source = (
+            select(
+                Campaign.id.label("campaign_id"),
+                func.coalesce(utm_channel_expression(Lead.utm_source), UNKNOWN_CHANNEL).label("channel_code"),
+                lead_day.label("date"),
+                literal(1).label("leads_count"),
+                literal(0).label("conversions_count"),
+                literal(0).label("revenue_rub"),
+                literal(0).label("spend_rub"),
+                literal(0).label("clicks"),
+                literal(0).label("impressions"),
+                literal(None, Integer).label("ttp_days"),
+            )
+            .select_from(Lead)
+            .join(Campaign, campaign_title_match(Lead.utm_campaign, Campaign.title))
+        )
+
+        # Фактический расход площадок (день — в таймзоне аккаунта площадки)
+        spend_source = (
+            select(
+                SpendDaily.campaign_id.label("campaign_id"),
+                SpendDaily.channel_code.label("channel_code"),
+                SpendDaily.date.label("date"),
+                literal(0).label("leads_count"),
+                literal(0).label("conversions_count"),
+                literal(0).label("revenue_rub"),
+                SpendDaily.spend_rub.label("spend_rub"),
+                SpendDaily.clicks.label("clicks"),
+                SpendDaily.impressions.label("impressions"),
+                literal(None, Integer).label("ttp_days"),
+            )
+            .where(SpendDaily.campaign_id.isnot(None))
+        )
+
+        if days is not None:
+            lower, upper = start_of_day(days[0]), start_of_day(days[-1] + timedelta(days=1))
+            conversions_source = conversions_source.where(
+                Conversion.converted_at >= lower,
+                Conversion.converted_at < upper,
+                conversion_day.in_(days)
+            )
+            leads_source = leads_source.where(
+                lead_touch >= lower,
+                lead_touch < upper,
+                lead_day.in_(days)
+            )
+            spend_source = spend_source.where(SpendDaily.date.in_(days))
+
+        source = union_all(conversions_source, leads_source, spend_source).subquery()
+
+        aggregated = (
+            select(
+                source.c.campaign_id,
+                source.c.channel_code,
+                source.c.date,
+                func.sum(source.c.leads_count),
+                func.sum(source.c.conversions_count),
+                func.coalesce(func.sum(source.c.revenue_rub), 0),
+                func.coalesce(func.sum(source.c.spend_rub), 0),
+                func.coalesce(func.sum(source.c.clicks), 0),
+                func.coalesce(func.sum(source.c.impressions), 0),
+                func.coalesce(func.sum(source.c.ttp_days), 0),
+                func.count(source.c.ttp_days),
+                func.max(source.c.ttp_days),
+                literal(refreshed_at),
+            )
+            .group_by(source.c.campaign_id, source.c.channel_code, source.c.date)
+        )
+
+        result = self.db.execute(
+            insert(MartCampaignDaily).from_select(
+                [
+                    "campaign_id",
+                    "channel_code",
+                    "date",
+                    "leads_count",
+                    "conversions_count",
+                    "revenue_rub",
+                    "spend_rub",
+                    "clicks",
+                    "impressions",
+                    "ttp_days_sum",
+                    "ttp_days_count",
+                    "ttp_days_max",
+                    "refreshed_at",
+                ],
+                aggregated
+            )
+        )
+        return result.rowcount
+
+    # ------------------------------------------------------------------
+    # Чтение
+    # ------------------------------------------------------------------
+    def is_campaigns_daily_fresh(self) -> bool:
+        """
+        Витрина актуальна: пересчёт был, после него не появилось новых
+        или изменённых конверсий, лидов, расхода и кампаний и нет
+        помеченных дней (один запрос по индексам updated_at/synced_at).
+        """
+        watermark_at = SyncWatermark.watermark_at
+        row = self.db.execute(
+            select(
+                watermark_at,
+                exists().where(Conversion.updated_at > watermark_at),
+                exists().where(Lead.updated_at > watermark_at),
+                exists().where(SpendDaily.synced_at > watermark_at),
+                exists().where(Campaign.updated_at > watermark_at),
+                select(MartDirtyDay.date).exists(),
+            ).where(SyncWatermark.name == MART_CAMPAIGNS_DAILY)
+        ).first()
+
+        if row is None or row[0] is None:
+            return False
+
+        _, *changes = row
+        return not any(changes)
+
+    @staticmethod
+    def _date_filters(start_date: Optional[date], end_date: Optional[date]) -> list:
+        filters = []
+        if start_date:
+            filters.append(MartCampaignDaily.date >= start_date)
+        if end_date:
+            filters.append(MartCampaignDaily.date <= end_date)
+        return filters
+
+    def campaign_totals_subquery(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ):
+        """Агрегаты витрины по кампаниям за период (подзапрос)"""
+        return (
+            select(
+                MartCampaignDaily.campaign_id.label("campaign_id"),
+                func.sum(MartCampaignDaily.leads_count).label("leads_count"),
+                func.sum(MartCampaignDaily.conversions_count).label("conversions_count"),
+                func.sum(MartCampaignDaily.revenue_rub).label("revenue_rub"),
+                func.sum(MartCampaignDaily.spend_rub).label("spend_rub"),
+            )
+            .where(*self._date_filters(start_date, end_date))
+            .group_by(MartCampaignDaily.campaign_id)
+            .subquery()
+        )
+
+    def campaign_channel_totals(
+        self,
+        campaign_id: UUID,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> List[Dict]:
+        """Агрегаты витрины по каналам кампании за период"""
+        rows = self.db.execute(
+            select(
+                MartCampaignDaily.channel_code,
+                func.sum(MartCampaignDaily.leads_count),
+                func.sum(MartCampaignDaily.conversions_count),
+                func.sum(MartCampaignDaily.revenue_rub),
+                func.sum(MartCampaignDaily.spend_rub),
+            )
+            .where(MartCampaignDaily.campaign_id == campaign_id)
+            .where(*self._date_filters(start_date, end_date))
+            .group_by(MartCampaignDaily.channel_code)
+        ).all()
+
+        return [
+            {
+                "channel_code": None if channel_code == UNKNOWN_CHANNEL else channel_code,
+                "leads_count": int(leads_count),
+                "conversions_count": int(conversions_count),
+                "revenue_rub": revenue_rub,
+                "spend_rub": spend_rub,
+            }
+            for channel_code, leads_count, conversions_count, revenue_rub, spend_rub in rows
+        ]
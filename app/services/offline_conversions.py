@@ -0,0 +1,234 @@
+"""
+DeepCalm — Offline Conversions Service
+
+Выгрузка конверсий в Яндекс.Метрику (задача upload_conversions).
+
+Кандидаты — ещё не выгруженные конверсии за последние
+metrika_upload_lookback_days дней, у лида которых есть ClientId Метрики.
+Водяного знака по id нет: конверсия, чей лид получил ClientId позже, или
+конверсия с меньшим id, закоммиченная после уже выгруженных (параллельная
+синхронизация записей), попадёт в следующий запуск. Кандидаты читаются
+keyset-страницами по id и сразу превращаются в строки CSV. Файл
+отправляется, как только достигает metrika_upload_max_rows строк или
+metrika_upload_max_bytes байт, поэтому память не зависит от размера
+очереди.
+
+Дедупликация: перед отправкой конверсии файла записываются в
+metrika_uploaded_conversions (PK conversion_id, INSERT ... ON CONFLICT
+DO NOTHING) — отправляются только успешно «занятые» строки. Если процесс
+упал или Метрика не ответила, файл остаётся в статусе pending; при
+следующем запуске он ищется в списке загрузок счётчика по comment и либо
+отмечается загруженным, либо освобождается для повторной отправки.
+"""
+import csv
+import io
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import structlog
+from sqlalchemy import delete, exists, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.integrations.yandex_metrika import OFFLINE_CONVERSIONS_HEADER, YandexMetrikaClient, YandexMetrikaError
+from app.models.conversion import Conversion
+from app.models.lead import Lead
+from app.models.metrika_upload import MetrikaUpload, MetrikaUploadedConversion
+
+logger = structlog.get_logger(__name__)
+
+# Строк конверсий на один запрос к БД
+SCAN_PAGE_SIZE = 1000
+
+# Строка файла: (conversion_id, строка CSV)
+CsvRow = Tuple[int, str]
+
+
+def _csv_line(client_id: str, target: str, converted_at: datetime, revenue_rub) -> str:
+    """Строка CSV офлайн-конверсии (DateTime — unix timestamp)"""
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerow(
+        [client_id, target, int(converted_at.timestamp()), f"{revenue_rub:.2f}", "RUB"]
+    )
+    return buffer.getvalue()
+
+
+class OfflineConversionsService:
+    """Сервис выгрузки офлайн-конверсий в Метрику"""
+
+    def __init__(
+        self,
+        db: Session,
+        client: Optional[YandexMetrikaClient] = None,
+        max_rows: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        lookback_days: Optional[int] = None
+    ):
+        self.db = db
+        self.client = client or YandexMetrikaClient.from_settings()
+        self.max_rows = max_rows or settings.metrika_upload_max_rows
+        self.max_bytes = max_bytes or settings.metrika_upload_max_bytes
+        self.lookback_days = lookback_days or settings.metrika_upload_lookback_days
+        self.target = settings.metrika_conversion_target
+
+    def upload_conversions(self) -> Dict:
+        """
+        Выгружает новые конверсии файлами ограниченного размера.
+
+        Returns:
+            dict: status (ok | interrupted), files, rows и счётчики
+            сверки незавершённых загрузок
+        """
+        stats: Counter = Counter()
+        reconciled = self.reconcile_pending()
+        stats.update(reconciled)
+        if reconciled.get("pending"):
+            # Метрика недоступна — новые файлы не отправляем до сверки
+            return {"status": "interrupted", **stats}
+
+        since = datetime.now(timezone.utc) - timedelta(days=self.lookback_days)
+        status = "ok"
+
+        logger.info("offline_conversions_upload_started", since=since.isoformat())
+
+        for chunk in self._iter_chunks(since):
+            outcome, rows = self._upload_chunk(chunk)
+            if outcome == "uploaded":
+                stats["files"] += 1
+                stats["rows"] += rows
+                self.db.commit()
+            elif outcome != "skipped":
+                stats[outcome] += 1
+                status = "interrupted"
+                break
+
+        result = {"status": status, **stats}
+        logger.info("offline_conversions_upload_completed", **result)
+        return result
+
+    def reconcile_pending(self) -> Dict[str, int]:
+        """
+        Сверяет файлы, отправка которых не завершилась (pending).
+
+        Returns:
+            dict: confirmed (файл дошёл до Метрики), released (освобождены
+            для повторной отправки), pending (сверка не удалась)
+        """
+        stats: Counter = Counter()
+        uploads = self.db.query(MetrikaUpload).filter(MetrikaUpload.status == "pending").all()
+
+        for upload in uploads:
+            try:
+                metrika_upload_id = self.client.find_upload(upload.batch_key)
+            except YandexMetrikaError as e:
+                logger.warning("metrika_reconcile_failed", batch_key=upload.batch_key, error=str(e))
+                stats["pending"] += 1
+                continue
+
+            if metrika_upload_id:
+                self._mark_uploaded(upload, metrika_upload_id)
+                stats["confirmed"] += 1
+            else:
+                # Файл не дошёл: удаление освобождает его конверсии (CASCADE)
+                self.db.execute(delete(MetrikaUpload).where(MetrikaUpload.id == upload.id))
+                stats["released"] += 1
+            self.db.commit()
+
+        if uploads:
+            logger.info("metrika_pending_reconciled", **stats)
+        return stats
+
+    def _iter_candidates(self, since: datetime) -> Iterator[Tuple[int, str, datetime, object]]:
+        """Неотправленные конверсии с ClientId не раньше since (keyset-страницами по id)"""
+        last_id = 0
+        while True:
+            rows = self.db.execute(
+                select(Conversion.id, Lead.client_id, Conversion.converted_at, Conversion.revenue_rub)
+                .join(Lead, Lead.id == Conversion.lead_id)
+                .where(
+                    Conversion.id > last_id,
+                    Conversion.converted_at >= since,
+                    Lead.client_id.isnot(None),
+                    Lead.client_id != "",
+                    ~exists().where(MetrikaUploadedConversion.conversion_id == Conversion.id)
+                )
+                .order_by(Conversion.id)
+                .limit(SCAN_PAGE_SIZE)
+            ).all()
+            if not rows:
+                return
+            yield from rows
+            last_id = rows[-1][0]
+
+    def _iter_chunks(self, since: datetime) -> Iterator[List[CsvRow]]:
+        """Строки CSV, нарезанные по max_rows и max_bytes"""
+        header_size = len(OFFLINE_CONVERSIONS_HEADER.encode())
+        chunk: List[CsvRow] = []
+        size = header_size
+
+        for conversion_id, client_id, converted_at, revenue_rub in self._iter_candidates(since):
+            line = _csv_line(client_id, self.target, converted_at, revenue_rub)
+            line_size = len(line.encode())
+            if chunk and (len(chunk) >= self.max_rows or size + line_size > self.max_bytes):
+                yield chunk
+                chunk, size = [], header_size
+            chunk.append((conversion_id, line))
+            size += line_size
+
+        if chunk:
+            yield chunk
+
+    def _upload_chunk(self, chunk: List[CsvRow]) -> Tuple[str, int]:
+        """
+        Занимает конверсии файла и отправляет его.
+
+        Returns:
+            (uploaded | pending | failed | skipped, строк в файле)
+        """
+        upload = MetrikaUpload(batch_key=uuid.uuid4().hex, status="pending")
+        self.db.add(upload)
+        self.db.flush()
+
+        claimed = set(self.db.execute(
+            insert(MetrikaUploadedConversion)
+            .values([{"conversion_id": conversion_id, "upload_id": upload.id} for conversion_id, _ in chunk])
+            .on_conflict_do_nothing()
+            .returning(MetrikaUploadedConversion.conversion_id)
+        ).scalars())
+
+        lines = [line for conversion_id, line in chunk if conversion_id in claimed]
+        if not lines:
+            # Всё уже занято параллельным запуском
+            self.db.delete(upload)
+            self.db.commit()
+            return "skipped", 0
+
+        upload.rows = len(lines)
+        batch_key = upload.batch_key
+        self.db.commit()
+
+        csv_data = (OFFLINE_CONVERSIONS_HEADER + "".join(lines)).encode()
+        try:
+            metrika_upload_id = self.client.upload_offline_conversions(csv_data, comment=batch_key)
+        except YandexMetrikaError as e:
+            if e.retryable:
+                logger.warning("metrika_upload_pending", batch_key=batch_key, error=str(e))
+                return "pending", len(lines)
+
+            logger.error("metrika_upload_failed", batch_key=batch_key, error=str(e), payload=e.payload)
+            upload.status = "failed"
+            upload.error_message = f"{e}: {e.payload}"
+            self.db.commit()
+            return "failed", len(lines)
+
+        self._mark_uploaded(upload, metrika_upload_id)
+        return "uploaded", len(lines)
+
+    @staticmethod
+    def _mark_uploaded(upload: MetrikaUpload, metrika_upload_id: str) -> None:
+        upload.status = "uploaded"
+        upload.metrika_upload_id = metrika_upload_id
+        upload.uploaded_at = datetime.now(timezone.utc)
@@ -1,8 +1,11 @@
 """
 Сервис публикации креативов на рекламные платформы
 """
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 from uuid import UUID
 
 import structlog
@@ -10,8 +13,9 @@ from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.integrations.avito import AvitoClient
+from app.integrations.resilience import CircuitOpenError, channel_resilience
 from app.integrations.vk_ads import VKAdsClient
-from app.integrations.yandex_direct import YandexDirectClient
+from app.integrations.yandex_direct import CAMPAIGNS_ADD_LIMIT, YandexDirectClient, YandexDirectError
 from app.models.campaign import Campaign
 from app.models.creative import Creative
 from app.models.placement import Placement
@@ -19,18 +23,35 @@ from app.models.placement import Placement
 logger = structlog.get_logger()
 
 
+@dataclass(frozen=True)
+class _PublishTask:
+    """Публикация одного креатива в один канал"""
+    campaign_id: UUID
+    creative_id: UUID
+    creative_variant: str
+    channel: str
+    title: str
+    body: str
+    image_url: Optional[str]
+    budget_rub: float
+
+
 class PublishingService:
     """Сервис для публикации креативов на рекламные платформы"""
 
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, channel_concurrency: Optional[int] = None):
         self.db = db
-        self.vk_client = VKAdsClient()
+        self.channel_concurrency = channel_concurrency or settings.publish_channel_concurrency
+
+        mock_latency = settings.publish_mock_latency_ms / 1000
+        self.vk_client = VKAdsClient(latency_seconds=mock_latency)
         self.direct_client = YandexDirectClient(
             token=settings.yandex_direct_token or None,
             login=settings.yandex_direct_login or None,
             sandbox=not settings.is_prod,
+            mock_latency_seconds=mock_latency,
         )
-        self.avito_client = AvitoClient()
+        self.avito_client = AvitoClient(latency_seconds=mock_latency)
 
     def publish_campaign(
         self,
@@ -47,6 +68,49 @@ class PublishingService:
         Returns:
             dict с информацией о созданных размещениях
         """
+        placements = []
+        success_count = 0
+        failed_count = 0
+
+        for outcome in self.iter_publish_campaign(campaign_id, channels):
+            if outcome["status"] == "published":
+                placements.append(outcome["placement"])
+                success_count += 1
+            else:
+                failed_count += 1
+
+        return {
+            "placements": placements,
+            "success_count": success_count,
+            "failed_count": failed_count
+        }
+
+    def iter_publish_campaign(
+        self,
+        campaign_id: UUID,
+        channels: Optional[List[str]] = None
+    ) -> Iterator[dict]:
+        """
+        Публикует кампанию параллельно и отдаёт результаты по мере готовности
+
+        Проверки (кампания, каналы, креативы) выполняются сразу при вызове,
+        публикация — при итерации. Запросы к площадкам идут в пулах потоков
+        по одному на канал (не больше channel_concurrency одновременно),
+        поэтому время публикации близко к самому медленному вызову, а не к
+        их сумме. Каждое размещение сохраняется (commit) сразу после ответа
+        площадки.
+
+        Args:
+            campaign_id: ID кампании
+            channels: Список каналов для публикации. Если None - публикуем во все каналы кампании
+
+        Returns:
+            Итератор dict: status (published|failed), channel, creative_id,
+            creative_variant, placement (при успехе), error (при ошибке), elapsed_ms
+
+        Raises:
+            ValueError: Кампания не найдена, нет каналов или одобренных креативов
+        """
         logger.info("publishing_campaign_started", campaign_id=str(campaign_id), channels=channels)
 
         # Получаем кампанию
@@ -73,37 +137,90 @@ class PublishingService:
             logger.warning("no_approved_creatives", campaign_id=str(campaign_id))
             raise ValueError(f"Нет одобренных креативов для кампании {campaign_id}")
 
-        placements = []
+        # Потоки получают только значения: ORM-объекты привязаны к сессии
+        tasks = [
+            _PublishTask(
+                campaign_id=campaign.id,
+                creative_id=creative.id,
+                creative_variant=creative.variant,
+                channel=channel,
+                title=creative.title,
+                body=creative.body,
+                image_url=creative.image_url,
+                budget_rub=campaign.budget_rub
+            )
+            for channel in dict.fromkeys(target_channels)
+            for creative in creatives
+        ]
+
+        return self._publish_tasks(tasks)
+
+    def _publish_tasks(self, tasks: List["_PublishTask"]) -> Iterator[dict]:
+        """Запускает вызовы площадок и сохраняет размещения по мере ответов"""
+        campaign_id = tasks[0].campaign_id
+        executors: Dict[str, ThreadPoolExecutor] = {}
+        futures = {}
+        skipped: List[Tuple[List["_PublishTask"], Exception]] = []
         success_count = 0
         failed_count = 0
 
-        # Публикуем на каждый канал
-        for channel in target_channels:
-            for creative in creatives:
+        try:
+            for batch in self._batches(tasks):
+                channel = batch[0].channel
+                # Автомат канала открыт (aegis api_5xx_rate_5m) — публикация приостановлена
+                paused_until = channel_resilience.paused_until(channel)
+                if paused_until is not None:
+                    skipped.append((batch, CircuitOpenError(channel, paused_until)))
+                    continue
+
+                executor = executors.get(channel)
+                if executor is None:
+                    executor = executors[channel] = ThreadPoolExecutor(
+                        max_workers=self.channel_concurrency,
+                        thread_name_prefix=f"publish-{channel}"
+                    )
+                futures[executor.submit(self._create_external, batch)] = batch
+
+            for batch, error in skipped:
+                for task in batch:
+                    failed_count += 1
+                    yield self._failed_outcome(task, error)
+
+            for future in as_completed(futures):
+                batch = futures[future]
                 try:
-                    placement = self._publish_to_channel(campaign, creative, channel)
-                    placements.append(placement)
+                    outcomes, elapsed_ms = future.result()
+                except Exception as e:
+                    outcomes, elapsed_ms = [(None, e)] * len(batch), None
+
+                for task, (external_id, error) in zip(batch, outcomes):
+                    if error is not None:
+                        failed_count += 1
+                        yield self._failed_outcome(task, error)
+                        continue
+
+                    placement = self._save_placement(task, external_id)
                     success_count += 1
                     logger.info(
                         "placement_created",
                         campaign_id=str(campaign_id),
-                        creative_id=str(creative.id),
-                        channel=channel,
-                        placement_id=str(placement.id)
-                    )
-                except Exception as e:
-                    failed_count += 1
-                    logger.error(
-                        "placement_failed",
-                        campaign_id=str(campaign_id),
-                        creative_id=str(creative.id),
-                        channel=channel,
-                        error=str(e),
-                        error_type=type(e).__name__,
-                        exc_info=True
+                        creative_id=str(task.creative_id),
+                        channel=task.channel,
+                        placement_id=str(placement.id),
+                        elapsed_ms=elapsed_ms
                     )
-
-        self.db.commit()
+                    yield {
+                        "status": "published",
+                        "channel": task.channel,
+                        "creative_id": task.creative_id,
+                        "creative_variant": task.creative_variant,
+                        "placement": placement,
+                        "elapsed_ms": elapsed_ms,
+                    }
+        finally:
+            # Если потребитель прервал итерацию — не запускаем оставшиеся вызовы
+            for executor in executors.values():
+                executor.shutdown(wait=True, cancel_futures=True)
 
         logger.info(
             "publishing_campaign_completed",
@@ -112,82 +229,111 @@ class PublishingService:
             failed_count=failed_count
         )
 
+    @staticmethod
+    def _failed_outcome(task: "_PublishTask", error: Exception) -> dict:
+        logger.error(
+            "placement_failed",
+            campaign_id=str(task.campaign_id),
+            creative_id=str(task.creative_id),
+            channel=task.channel,
+            error=str(error),
+            error_type=type(error).__name__,
+            exc_info=error
+        )
         return {
-            "placements": placements,
-            "success_count": success_count,
-            "failed_count": failed_count
+            "status": "failed",
+            "channel": task.channel,
+            "creative_id": task.creative_id,
+            "creative_variant": task.creative_variant,
+            "error": str(error),
         }
 
-    def _publish_to_channel(
-        self,
-        campaign: Campaign,
-        creative: Creative,
-        channel: str
-    ) -> Placement:
+    @staticmethod
+    def _batches(tasks: List["_PublishTask"]) -> List[List["_PublishTask"]]:
         """
-        Публикует креатив на конкретный канал
+        Группирует задачи в вызовы площадок
 
-        Args:
-            campaign: Кампания
-            creative: Креатив
-            channel: Канал (vk/direct/avito)
+        Директ принимает до CAMPAIGNS_ADD_LIMIT кампаний в одном
+        `campaigns/add`, остальные площадки — по одному креативу за вызов.
+        """
+        direct = [task for task in tasks if task.channel == "direct"]
+        batches = [
+            direct[start:start + CAMPAIGNS_ADD_LIMIT]
+            for start in range(0, len(direct), CAMPAIGNS_ADD_LIMIT)
+        ]
+        batches.extend([task] for task in tasks if task.channel != "direct")
+        return batches
+
+    def _create_external(
+        self,
+        batch: List["_PublishTask"]
+    ) -> Tuple[List[Tuple[Optional[str], Optional[Exception]]], int]:
+        """
+        Создаёт кампании/объявления на площадке (выполняется в пуле потоков)
 
         Returns:
-            Созданный Placement
+            ([(external_id, ошибка) на каждую задачу], время вызова в мс)
         """
+        started = time.perf_counter()
+        channel = batch[0].channel
         logger.info(
             "publishing_to_channel_started",
-            campaign_id=str(campaign.id),
-            creative_id=str(creative.id),
+            campaign_id=str(batch[0].campaign_id),
+            creative_ids=[str(task.creative_id) for task in batch],
             channel=channel,
-            creative_title=creative.title,
-            budget=campaign.budget_rub
+            budget=batch[0].budget_rub
         )
 
         # Выбираем клиент в зависимости от канала
-        if channel == "vk":
-            logger.info("using_vk_client")
-            external_id = self.vk_client.create_campaign(
-                title=creative.title,
-                body=creative.body,
-                image_url=creative.image_url,
-                budget_rub=campaign.budget_rub
-            )
-        elif channel == "direct":
-            logger.info("using_yandex_direct_client", token_exists=bool(self.direct_client.token))
-            external_id = self.direct_client.create_campaign(
-                title=creative.title,
-                body=creative.body,
-                image_url=creative.image_url,
-                budget_rub=campaign.budget_rub
-            )
-        elif channel == "avito":
-            logger.info("using_avito_client")
-            external_id = self.avito_client.create_ad(
-                title=creative.title,
-                body=creative.body,
-                image_url=creative.image_url
-            )
+        if channel == "direct":
+            results = self.direct_client.create_campaigns([
+                {"title": task.title, "budget_rub": task.budget_rub}
+                for task in batch
+            ])
+            outcomes = [
+                (result.id, None) if result.ok else (None, YandexDirectError(result.error))
+                for result in results
+            ]
         else:
-            raise ValueError(f"Неизвестный канал: {channel}")
+            task = batch[0]
+            if channel == "vk":
+                external_id = self.vk_client.create_campaign(
+                    title=task.title,
+                    body=task.body,
+                    image_url=task.image_url,
+                    budget_rub=task.budget_rub
+                )
+            elif channel == "avito":
+                external_id = self.avito_client.create_ad(
+                    title=task.title,
+                    body=task.body,
+                    image_url=task.image_url
+                )
+            else:
+                raise ValueError(f"Неизвестный канал: {channel}")
+            outcomes = [(external_id, None)]
 
+        elapsed_ms = int((time.perf_counter() - started) * 1000)
         logger.info(
             "external_campaign_created",
             channel=channel,
-            external_id=external_id
+            external_ids=[external_id for external_id, _ in outcomes],
+            elapsed_ms=elapsed_ms
         )
+        return outcomes, elapsed_ms
 
-        # Создаем запись о размещении
+    def _save_placement(self, task: "_PublishTask", external_id: str) -> Placement:
+        """Сохраняет размещение сразу после ответа площадки"""
         placement = Placement(
-            campaign_id=campaign.id,
-            creative_id=creative.id,
-            channel_code=channel,
+            campaign_id=task.campaign_id,
+            creative_id=task.creative_id,
+            channel_code=task.channel,
             external_campaign_id=external_id,
             status="active",
             published_at=datetime.now(timezone.utc)
         )
         self.db.add(placement)
-
+        self.db.commit()
         return placement
 
     def get_campaign_status(self, campaign_id: UUID) -> dict:
@@ -253,34 +399,35 @@ class PublishingService:
         paused_count = 0
         failed_count = 0
 
+        # Директ: один `campaigns/suspend` на пачку до CAMPAIGN_IDS_LIMIT ID
+        direct_placements = [p for p in placements if p.channel_code == "direct"]
+        if direct_placements:
+            results = self.direct_client.suspend_campaigns(
+                [p.external_campaign_id for p in direct_placements]
+            )
+            for placement, result in zip(direct_placements, results):
+                if result.ok:
+                    self._mark_paused(placement)
+                    paused_count += 1
+                else:
+                    failed_count += 1
+                    self._log_pause_failed(placement, result.error)
+
         for placement in placements:
+            if placement.channel_code == "direct":
+                continue
             try:
                 # Приостанавливаем на платформе
                 if placement.channel_code == "vk":
                     self.vk_client.pause_campaign(placement.external_campaign_id)
-                elif placement.channel_code == "direct":
-                    self.direct_client.pause_campaign(placement.external_campaign_id)
                 elif placement.channel_code == "avito":
                     self.avito_client.pause_ad(placement.external_campaign_id)
 
-                # Обновляем статус
-                placement.status = "paused"
+                self._mark_paused(placement)
                 paused_count += 1
-
-                logger.info(
-                    "placement_paused",
-                    placement_id=str(placement.id),
-                    channel=placement.channel_code,
-                    external_id=placement.external_campaign_id
-                )
             except Exception as e:
                 failed_count += 1
-                logger.error(
-                    "placement_pause_failed",
-                    placement_id=str(placement.id),
-                    channel=placement.channel,
-                    error=str(e)
-                )
+                self._log_pause_failed(placement, str(e))
 
         self.db.commit()
 
@@ -295,3 +442,22 @@ class PublishingService:
             "paused_count": paused_count,
             "failed_count": failed_count
         }
+
+    @staticmethod
+    def _mark_paused(placement: Placement) -> None:
+        placement.status = "paused"
+        logger.info(
+            "placement_paused",
+            placement_id=str(placement.id),
+            channel=placement.channel_code,
+            external_id=placement.external_campaign_id
+        )
+
+    @staticmethod
+    def _log_pause_failed(placement: Placement, error: str) -> None:
+        logger.error(
+            "placement_pause_failed",
+            placement_id=str(placement.id),
+            channel=placement.channel_code,
+            error=error
+        )
@@ -9,7 +9,13 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 import structlog
 
+from app.core.config import settings
 from app.core.db import SessionLocal
+from app.core.metrics import track_job
+from app.services.bookings_sync import BookingsSyncService
+from app.services.marts import MartsService
+from app.services.offline_conversions import OfflineConversionsService
+from app.services.spend import SpendService
 from app.services.weekly_reports import WeeklyReportsService
 
 logger = structlog.get_logger(__name__)
@@ -43,82 +49,214 @@ class DeepCalmScheduler:
             replace_existing=True
         )
 
+        # Загрузка расхода площадок в spend_daily (settings.sync_spend_cron)
+        self.scheduler.add_job(
+            func=self._sync_spend,
+            trigger=CronTrigger.from_crontab(settings.sync_spend_cron),
+            id='sync_spend',
+            name='Загрузка расхода площадок',
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
+        )
+
+        # Инкрементальная синхронизация записей YCLIENTS (settings.sync_bookings_cron)
+        self.scheduler.add_job(
+            func=self._sync_bookings,
+            trigger=CronTrigger.from_crontab(settings.sync_bookings_cron),
+            id='sync_bookings',
+            name='Синхронизация записей YCLIENTS',
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
+        )
+
+        # Выгрузка офлайн-конверсий в Метрику (settings.upload_conversions_cron)
+        self.scheduler.add_job(
+            func=self._upload_conversions,
+            trigger=CronTrigger.from_crontab(settings.upload_conversions_cron),
+            id='upload_conversions',
+            name='Выгрузка офлайн-конверсий в Метрику',
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
+        )
+
+        # Инкрементальный пересчёт витрин (settings.compute_marts_cron)
+        self.scheduler.add_job(
+            func=self._compute_marts,
+            trigger=CronTrigger.from_crontab(settings.compute_marts_cron),
+            id='compute_marts',
+            name='Пересчёт витрин аналитики',
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
+        )
+
         logger.info("scheduler_jobs_configured", jobs_count=len(self.scheduler.get_jobs()))
 
     async def _generate_weekly_report(self):
         """Автоматическая генерация еженедельного отчета"""
         try:
-            logger.info("scheduled_weekly_report_started")
+            with track_job("weekly_report"):
+                logger.info("scheduled_weekly_report_started")
+
+                # Создаем сессию БД
+                db = SessionLocal()
+                try:
+                    reports_service = WeeklyReportsService(db)
+
+                    # Проверяем что отчеты включены
+                    if not reports_service.is_reports_enabled():
+                        logger.info("weekly_reports_disabled_skipping")
+                        return
+
+                    # Генерируем отчет
+                    report = reports_service.generate_weekly_report(weeks_back=1)
+
+                    if report.get("status") == "error":
+                        logger.error("scheduled_report_failed", error=report.get("message"))
+                        return
+
+                    # Форматируем для email
+                    email_content = reports_service.format_report_for_email(report)
+
+                    # TODO: Отправка email
+                    # await send_email(
+                    #     to=reports_service.get_reports_email(),
+                    #     subject=f"📊 Еженедельный отчет DeepCalm {report['period']['start_date'][:10]}",
+                    #     body=email_content
+                    # )
+
+                    logger.info(
+                        "scheduled_weekly_report_completed",
+                        report_id=report["id"],
+                        email=reports_service.get_reports_email()
+                    )
 
-            # Создаем сессию БД
-            db = SessionLocal()
-            try:
-                reports_service = WeeklyReportsService(db)
+                finally:
+                    db.close()
 
-                # Проверяем что отчеты включены
-                if not reports_service.is_reports_enabled():
-                    logger.info("weekly_reports_disabled_skipping")
-                    return
+        except Exception as e:
+            logger.error("scheduled_weekly_report_error", error=str(e))
 
-                # Генерируем отчет
-                report = reports_service.generate_weekly_report(weeks_back=1)
+    async def _sync_spend(self):
+        """Загрузка расхода Директа за последние дни"""
+        try:
+            with track_job("sync_spend"):
+                logger.info("scheduled_sync_spend_started")
 
-                if report.get("status") == "error":
-                    logger.error("scheduled_report_failed", error=report.get("message"))
-                    return
+                # Чтение отчёта и запись в БД синхронные — выполняем вне event loop
+                result = await asyncio.to_thread(self._sync_direct_spend)
 
-                # Форматируем для email
-                email_content = reports_service.format_report_for_email(report)
+                logger.info("scheduled_sync_spend_completed", **result)
 
-                # TODO: Отправка email
-                # await send_email(
-                #     to=reports_service.get_reports_email(),
-                #     subject=f"📊 Еженедельный отчет DeepCalm {report['period']['start_date'][:10]}",
-                #     body=email_content
-                # )
+        except Exception as e:
+            logger.error("scheduled_sync_spend_error", error=str(e))
 
-                logger.info(
-                    "scheduled_weekly_report_completed",
-                    report_id=report["id"],
-                    email=reports_service.get_reports_email()
-                )
+    @staticmethod
+    def _sync_direct_spend() -> dict:
+        """Загрузка расхода в отдельной сессии БД (выполняется в потоке)"""
+        db = SessionLocal()
+        try:
+            return SpendService(db).sync_direct_spend()
+        finally:
+            db.close()
 
-            finally:
-                db.close()
+    async def _sync_bookings(self):
+        """Загрузка изменённых записей YCLIENTS"""
+        try:
+            with track_job("sync_bookings"):
+                logger.info("scheduled_sync_bookings_started")
+
+                db = SessionLocal()
+                try:
+                    result = await BookingsSyncService(db).sync()
+                finally:
+                    db.close()
+
+                logger.info("scheduled_sync_bookings_completed", **result)
 
         except Exception as e:
-            logger.error("scheduled_weekly_report_error", error=str(e))
+            logger.error("scheduled_sync_bookings_error", error=str(e))
+
+    async def _upload_conversions(self):
+        """Выгрузка новых конверсий в Яндекс.Метрику"""
+        try:
+            with track_job("upload_conversions"):
+                logger.info("scheduled_upload_conversions_started")
+
+                # Формирование CSV и отправка синхронные — выполняем вне event loop
+                result = await asyncio.to_thread(self._upload_offline_conversions)
+
+                logger.info("scheduled_upload_conversions_completed", **result)
+
+        except Exception as e:
+            logger.error("scheduled_upload_conversions_error", error=str(e))
+
+    @staticmethod
+    def _upload_offline_conversions() -> dict:
+        """Выгрузка конверсий в отдельной сессии БД (выполняется в потоке)"""
+        db = SessionLocal()
+        try:
+            return OfflineConversionsService(db).upload_conversions()
+        finally:
+            db.close()
+
+    async def _compute_marts(self):
+        """Инкрементальный пересчёт mart_campaigns_daily"""
+        try:
+            with track_job("compute_marts"):
+                logger.info("scheduled_compute_marts_started")
+
+                # Пересчёт синхронный — выполняем вне event loop
+                result = await asyncio.to_thread(self._refresh_marts)
+
+                logger.info("scheduled_compute_marts_completed", **result)
+
+        except Exception as e:
+            logger.error("scheduled_compute_marts_error", error=str(e))
+
+    @staticmethod
+    def _refresh_marts() -> dict:
+        """Пересчёт витрин в отдельной сессии БД (выполняется в потоке)"""
+        db = SessionLocal()
+        try:
+            return MartsService(db).refresh_campaigns_daily()
+        finally:
+            db.close()
 
     async def _daily_campaign_check(self):
         """Ежедневная проверка кампаний на проблемы"""
         try:
-            logger.info("scheduled_daily_check_started")
+            with track_job("daily_check"):
+                logger.info("scheduled_daily_check_started")
 
-            db = SessionLocal()
-            try:
-                reports_service = WeeklyReportsService(db)
+                db = SessionLocal()
+                try:
+                    reports_service = WeeklyReportsService(db)
 
-                # Получаем данные за последние 7 дней
-                data = reports_service.get_weekly_data(weeks_back=1)
+                    # Получаем данные за последние 7 дней
+                    data = reports_service.get_weekly_data(weeks_back=1)
 
-                # Проверяем кампании, требующие внимания
-                needs_attention = data.get("needs_attention", [])
+                    # Проверяем кампании, требующие внимания
+                    needs_attention = data.get("needs_attention", [])
 
-                if needs_attention:
-                    logger.warning(
-                        "campaigns_need_attention",
-                        count=len(needs_attention),
-                        campaigns=[c["title"] for c in needs_attention[:3]]
-                    )
+                    if needs_attention:
+                        logger.warning(
+                            "campaigns_need_attention",
+                            count=len(needs_attention),
+                            campaigns=[c["title"] for c in needs_attention[:3]]
+                        )
 
-                    # TODO: Отправка уведомления в Slack/Telegram
-                    # await send_alert(f"⚠️ {len(needs_attention)} кампаний требуют внимания")
+                        # TODO: Отправка уведомления в Slack/Telegram
+                        # await send_alert(f"⚠️ {len(needs_attention)} кампаний требуют внимания")
 
-                else:
-                    logger.info("all_campaigns_performing_well")
+                    else:
+                        logger.info("all_campaigns_performing_well")
 
-            finally:
-                db.close()
+                finally:
+                    db.close()
 
         except Exception as e:
             logger.error("scheduled_daily_check_error", error=str(e))
@@ -0,0 +1,270 @@
+"""
+DeepCalm — Settings Registry
+
+Типизированные настройки (таблица settings) в памяти процесса.
+
+Все настройки читаются одним запросом при первом обращении и хранятся
+уже приведёнными к value_type, поэтому чтение в сервисах — поиск в dict.
+Загрузка идёт через сессию вызывающего кода (та же транзакция и БД).
+
+Инвалидация:
+- запись Setting через Session (ORM-объекты в flush, а также
+  insert/update/delete по модели через session.execute) выполняет
+  pg_notify('dc_settings', ключи) в той же транзакции — Postgres доставит
+  уведомление только после commit;
+- свой процесс сбрасывает реестр в after_commit;
+- остальные воркеры слушают канал в фоновом потоке (LISTEN) и сбрасывают
+  реестр при уведомлении; следующее чтение загрузит свежие значения.
+"""
+import threading
+from select import select as wait_readable
+from itertools import chain
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Tuple, Union
+
+import structlog
+from sqlalchemy import create_engine, event, select, text
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.models.setting import Setting
+
+logger = structlog.get_logger(__name__)
+
+SETTINGS_CHANNEL = "dc_settings"
+# Ожидание уведомления за итерацию (задержка остановки потока)
+LISTEN_POLL_SECONDS = 1.0
+# Пауза перед переподключением LISTEN после ошибки
+LISTEN_RETRY_SECONDS = 5.0
+# Лимит payload NOTIFY — 8000 байт; длинный список ключей заменяется на "*"
+MAX_NOTIFY_PAYLOAD = 4000
+
+_PENDING_KEY = "settings_registry_pending"
+
+TRUE_VALUES = ('true', '1', 'yes', 'on')
+
+
+def convert_value(value: str, value_type: str) -> Union[str, int, float, bool]:
+    """
+    Приводит строковое значение настройки к value_type.
+
+    Raises:
+        ValueError: Значение не приводится к типу
+    """
+    try:
+        if value_type == 'int':
+            return int(value)
+        elif value_type == 'float':
+            return float(value)
+        elif value_type == 'bool':
+            return value.lower() in TRUE_VALUES
+        else:  # string
+            return value
+    except (ValueError, AttributeError):
+        raise ValueError(f"Невозможно преобразовать '{value}' в тип {value_type}")
+
+
+class TypedSetting(NamedTuple):
+    value: Any
+    value_type: str
+    category: str
+
+
+class SettingsRegistry:
+    """
+    Реестр настроек процесса.
+
+    Examples:
+        >>> settings_registry.category(db, "ai").get("openai_model", "gpt-4")
+        >>> settings_registry.get(db, "reports_enabled", False)
+    """
+
+    def __init__(self, database_url: str, channel: str = SETTINGS_CHANNEL) -> None:
+        self.database_url = database_url
+        self.channel = channel
+        self._lock = threading.Lock()
+        # (все настройки, значения по категориям); None — реестр сброшен
+        self._snapshot: Optional[Tuple[Dict[str, TypedSetting], Dict[str, Dict[str, Any]]]] = None
+        # Растёт при каждом сбросе: загрузка, начатая до сброса, не сохраняется
+        self._version = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_settings(cls) -> "SettingsRegistry":
+        return cls(settings.database_url)
+
+    # ------------------------------------------------------------------
+    # Чтение
+    # ------------------------------------------------------------------
+    def values(self, db: Session) -> Dict[str, TypedSetting]:
+        """Все настройки (загружаются через db, если реестр пуст)"""
+        return self._current(db)[0]
+
+    def cached(self) -> Optional[Dict[str, TypedSetting]]:
+        """Настройки без загрузки (None — реестр сброшен)"""
+        snapshot = self._snapshot
+        return snapshot[0] if snapshot is not None else None
+
+    def get(self, db: Session, key: str, default: Any = None) -> Any:
+        entry = self.values(db).get(key)
+        return entry.value if entry is not None else default
+
+    def category(self, db: Session, category: str) -> Dict[str, Any]:
+        """Значения категории {key: value} (общий dict — только для чтения)"""
+        return self._current(db)[1].get(category, {})
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._version += 1
+            self._snapshot = None
+
+    def _current(self, db: Session) -> Tuple[Dict[str, TypedSetting], Dict[str, Dict[str, Any]]]:
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self._load(db)
+        return snapshot
+
+    def _load(self, db: Session) -> Tuple[Dict[str, TypedSetting], Dict[str, Dict[str, Any]]]:
+        version = self._version
+        rows = db.execute(
+            select(Setting.key, Setting.value, Setting.value_type, Setting.category)
+        ).all()
+
+        values: Dict[str, TypedSetting] = {}
+        categories: Dict[str, Dict[str, Any]] = {}
+        for key, raw, value_type, category in rows:
+            try:
+                value = convert_value(raw, value_type)
+            except ValueError:
+                logger.warning("setting_value_invalid", key=key, value_type=value_type)
+                value = raw
+            values[key] = TypedSetting(value, value_type, category)
+            categories.setdefault(category, {})[key] = value
+
+        snapshot = (values, categories)
+        with self._lock:
+            if version == self._version:
+                self._snapshot = snapshot
+        logger.info("settings_registry_loaded", count=len(values))
+        return snapshot
+
+    # ------------------------------------------------------------------
+    # LISTEN в фоновом потоке
+    # ------------------------------------------------------------------
+    def start(self) -> None:
+        """Запускает прослушивание канала (идемпотентно)"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._listen_forever, name="settings-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=LISTEN_POLL_SECONDS + 1)
+            self._thread = None
+
+    def _listen_forever(self) -> None:
+        engine = create_engine(self.database_url, poolclass=NullPool)
+        try:
+            while not self._stop.is_set():
+                try:
+                    self._listen(engine)
+                except Exception as e:
+                    logger.warning("settings_listen_failed", error=str(e), retry_in=LISTEN_RETRY_SECONDS)
+                    self._stop.wait(LISTEN_RETRY_SECONDS)
+        finally:
+            engine.dispose()
+
+    def _listen(self, engine) -> None:
+        raw = engine.raw_connection()
+        try:
+            conn = raw.driver_connection
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute(f"LISTEN {self.channel}")
+            # Пока не слушали, уведомления могли быть пропущены
+            self.invalidate()
+            logger.info("settings_listen_started", channel=self.channel)
+
+            while not self._stop.is_set():
+                if wait_readable([conn], [], [], LISTEN_POLL_SECONDS) == ([], [], []):
+                    continue
+                conn.poll()
+                if not conn.notifies:
+                    continue
+                keys = [notify.payload for notify in conn.notifies]
+                conn.notifies.clear()
+                self.invalidate()
+                logger.info("settings_registry_invalidated", keys=keys)
+        finally:
+            raw.close()
+
+
+# ----------------------------------------------------------------------
+# NOTIFY при записи через Session
+# ----------------------------------------------------------------------
+def notify_settings_changed(session: Session, keys: Iterable[str] = ("*",)) -> None:
+    """
+    pg_notify об изменении настроек в транзакции session.
+
+    Нужен для записи мимо ORM-событий; flush и session.execute по модели
+    Setting вызывают его сами.
+    """
+    payload = ",".join(sorted(set(keys)))
+    if len(payload) > MAX_NOTIFY_PAYLOAD:
+        payload = "*"
+    session.connection().execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": SETTINGS_CHANNEL, "payload": payload}
+    )
+    session.info[_PENDING_KEY] = True
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    keys = {
+        obj.key
+        for obj in chain(session.new, session.dirty, session.deleted)
+        if isinstance(obj, Setting)
+    }
+    if keys:
+        notify_settings_changed(session, keys)
+
+
+def _do_orm_execute(orm_execute_state):
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return None
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or not issubclass(mapper.class_, Setting):
+        return None
+    result = orm_execute_state.invoke_statement()
+    notify_settings_changed(orm_execute_state.session)
+    return result
+
+
+def _after_commit(session: Session) -> None:
+    if session.info.pop(_PENDING_KEY, None):
+        settings_registry.invalidate()
+
+
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+def setup_settings_invalidation() -> None:
+    """Подписывает NOTIFY и сброс реестра на события всех Session"""
+    listeners = (
+        ("after_flush", _after_flush),
+        ("do_orm_execute", _do_orm_execute),
+        ("after_commit", _after_commit),
+        ("after_rollback", _after_rollback),
+    )
+    for name, listener in listeners:
+        if not event.contains(Session, name, listener):
+            event.listen(Session, name, listener)
+
+
+# Singleton instance
+settings_registry = SettingsRegistry.from_settings()
@@ -0,0 +1,224 @@
+"""
+DeepCalm — Spend Service
+
+Загрузка фактического расхода площадок в spend_daily и чтение агрегатов.
+
+Задача sync_spend (settings.sync_spend_cron) потоково читает отчёт
+Reports API Директа за последние spend_sync_lookback_days дней и пишет
+его пачками через INSERT ... ON CONFLICT DO UPDATE: повторная загрузка
+того же периода перезаписывает строки, а не дублирует их. После каждой
+пачки публикуются события spend.reported.
+"""
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+from uuid import UUID
+
+import structlog
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core import events
+from app.core.config import settings
+from app.core.dates import get_business_tz
+from app.integrations.yandex_direct_reports import SpendReportRow, YandexDirectReportsClient
+from app.models.placement import Placement
+from app.models.spend import SpendDaily
+
+logger = structlog.get_logger(__name__)
+
+DIRECT_CHANNEL = "direct"
+
+
+def _spend_date_filters(start_date: Optional[date], end_date: Optional[date]) -> list:
+    filters = []
+    if start_date:
+        filters.append(SpendDaily.date >= start_date)
+    if end_date:
+        filters.append(SpendDaily.date <= end_date)
+    return filters
+
+
+class SpendService:
+    """Сервис фактического расхода (загрузка из площадок и агрегаты spend_daily)"""
+
+    def __init__(
+        self,
+        db: Session,
+        reports_client: Optional[YandexDirectReportsClient] = None,
+        batch_size: Optional[int] = None
+    ):
+        self.db = db
+        self.reports_client = reports_client or YandexDirectReportsClient.from_settings()
+        self.batch_size = batch_size or settings.spend_sync_batch_size
+
+    # ------------------------------------------------------------------
+    # Загрузка
+    # ------------------------------------------------------------------
+    def sync_direct_spend(
+        self,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None
+    ) -> Dict:
+        """
+        Загружает расход Директа за период в spend_daily.
+
+        Args:
+            date_from: Первый день (по умолчанию сегодня - spend_sync_lookback_days)
+            date_to: Последний день включительно (по умолчанию сегодня)
+
+        Returns:
+            dict с периодом, количеством строк, пачек и суммой расхода
+        """
+        today = datetime.now(get_business_tz()).date()
+        date_to = date_to or today
+        date_from = date_from or date_to - timedelta(days=settings.spend_sync_lookback_days)
+
+        logger.info(
+            "spend_sync_started",
+            channel=DIRECT_CHANNEL,
+            date_from=date_from.isoformat(),
+            date_to=date_to.isoformat()
+        )
+
+        rows = 0
+        batches = 0
+        total_spend = Decimal("0")
+        batch: List[SpendReportRow] = []
+
+        for row in self.reports_client.iter_campaign_spend(date_from, date_to):
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self._upsert_batch(DIRECT_CHANNEL, batch)
+                rows += len(batch)
+                batches += 1
+                total_spend += sum(item.spend_rub for item in batch)
+                batch = []
+
+        if batch:
+            self._upsert_batch(DIRECT_CHANNEL, batch)
+            rows += len(batch)
+            batches += 1
+            total_spend += sum(item.spend_rub for item in batch)
+
+        mapped = self.link_campaigns()
+
+        result = {
+            "status": "ok",
+            "channel": DIRECT_CHANNEL,
+            "date_from": date_from.isoformat(),
+            "date_to": date_to.isoformat(),
+            "rows": rows,
+            "batches": batches,
+            "mapped": mapped,
+            "spend_rub": float(total_spend),
+        }
+        logger.info("spend_sync_completed", **result)
+        return result
+
+    def _upsert_batch(self, channel_code: str, batch: Iterable[SpendReportRow]) -> None:
+        """Пачка строк одним INSERT ... ON CONFLICT DO UPDATE, затем события"""
+        synced_at = datetime.now(timezone.utc)
+        values = [
+            {
+                "channel_code": channel_code,
+                "external_campaign_id": row.external_campaign_id,
+                "date": row.date,
+                "campaign_name": row.campaign_name,
+                "impressions": row.impressions,
+                "clicks": row.clicks,
+                "spend_rub": row.spend_rub,
+                "synced_at": synced_at,
+            }
+            for row in batch
+        ]
+
+        stmt = insert(SpendDaily).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[SpendDaily.channel_code, SpendDaily.external_campaign_id, SpendDaily.date],
+            set_={
+                "campaign_name": stmt.excluded.campaign_name,
+                "impressions": stmt.excluded.impressions,
+                "clicks": stmt.excluded.clicks,
+                "spend_rub": stmt.excluded.spend_rub,
+                "synced_at": stmt.excluded.synced_at,
+            }
+        )
+        self.db.execute(stmt)
+        self.db.commit()
+
+        # События — только после commit: подписчики видят записанные данные
+        for value in values:
+            events.emit(events.SPEND_REPORTED, {
+                "channel": channel_code,
+                "campaign": value["external_campaign_id"],
+                "date": value["date"].isoformat(),
+                "spend": float(value["spend_rub"]),
+            })
+
+    def link_campaigns(self) -> int:
+        """
+        Проставляет campaign_id строкам расхода по размещениям
+        (placements.channel_code + external_campaign_id) одним UPDATE.
+
+        Returns:
+            Количество связанных строк
+        """
+        placement_campaign = (
+            select(Placement.campaign_id)
+            .where(
+                Placement.channel_code == SpendDaily.channel_code,
+                Placement.external_campaign_id == SpendDaily.external_campaign_id
+            )
+            .limit(1)
+            .scalar_subquery()
+        )
+        result = self.db.execute(
+            update(SpendDaily)
+            .where(SpendDaily.campaign_id.is_(None))
+            .where(placement_campaign.isnot(None))
+            .values(campaign_id=placement_campaign, synced_at=datetime.now(timezone.utc))
+            .execution_options(synchronize_session=False)
+        )
+        self.db.commit()
+        return result.rowcount
+
+    # ------------------------------------------------------------------
+    # Чтение
+    # ------------------------------------------------------------------
+    @staticmethod
+    def campaign_spend_subquery(start_date: Optional[date] = None, end_date: Optional[date] = None):
+        """Расход, клики и показы по кампаниям за период (подзапрос)"""
+        return (
+            select(
+                SpendDaily.campaign_id.label("campaign_id"),
+                func.sum(SpendDaily.spend_rub).label("spend_rub"),
+                func.sum(SpendDaily.clicks).label("clicks"),
+                func.sum(SpendDaily.impressions).label("impressions"),
+            )
+            .where(SpendDaily.campaign_id.isnot(None))
+            .where(*_spend_date_filters(start_date, end_date))
+            .group_by(SpendDaily.campaign_id)
+            .subquery()
+        )
+
+    @staticmethod
+    def channel_spend_subquery(
+        campaign_id: UUID,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ):
+        """Расход, клики и показы кампании по каналам за период (подзапрос)"""
+        return (
+            select(
+                SpendDaily.channel_code.label("channel_code"),
+                func.sum(SpendDaily.spend_rub).label("spend_rub"),
+                func.sum(SpendDaily.clicks).label("clicks"),
+                func.sum(SpendDaily.impressions).label("impressions"),
+            )
+            .where(SpendDaily.campaign_id == campaign_id)
+            .where(*_spend_date_filters(start_date, end_date))
+            .group_by(SpendDaily.channel_code)
+            .subquery()
+        )
@@ -4,19 +4,23 @@ DeepCalm — Weekly Reports Service
 Автоматическая генерация еженедельных отчетов через AI Analyst.
 """
 import json
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from typing import Dict, Any, List, Optional
 import structlog
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
 from app.core.db import get_db
-from app.models.setting import Setting
+from app.core.dates import day_range_bounds, get_business_tz
 from app.models.campaign import Campaign
 from app.models.creative import Creative
 from app.models.lead import Lead
 from app.models.conversion import Conversion
 from app.services.ai_analyst import AIAnalystService
+from app.services.attribution import campaign_title_match
+from app.services.marts import MartsService
+from app.services.settings_registry import settings_registry
+from app.services.spend import SpendService
 
 logger = structlog.get_logger(__name__)
 
@@ -31,24 +35,8 @@ class WeeklyReportsService:
         self._load_settings()
 
     def _load_settings(self):
-        """Загружает настройки отчетов"""
-        operational_settings = self.db.query(Setting).filter(
-            Setting.category == "operational"
-        ).all()
-
-        for setting in operational_settings:
-            if setting.value_type == "bool":
-                value = setting.value.lower() in ('true', '1', 'yes', 'on')
-            elif setting.value_type == "int":
-                value = int(setting.value)
-            elif setting.value_type == "float":
-                value = float(setting.value)
-            else:
-                value = setting.value
-
-            self._settings[setting.key] = value
-
-        logger.info("reports_settings_loaded", count=len(self._settings))
+        """Настройки отчетов из реестра настроек процесса (без запроса к БД)"""
+        self._settings = settings_registry.category(self.db, "operational")
 
     def is_reports_enabled(self) -> bool:
         """Проверяет включены ли отчеты"""
@@ -59,9 +47,18 @@ class WeeklyReportsService:
         return self._settings.get("reports_email", "admin@deepcalm.local")
 
     def get_weekly_data(self, weeks_back: int = 1) -> Dict[str, Any]:
-        """Собирает данные за последние N недель"""
-        end_date = datetime.now()
-        start_date = end_date - timedelta(weeks=weeks_back)
+        """
+        Собирает данные за последние N недель
+
+        Итоги считаются агрегатными запросами в БД. Метрики по кампаниям
+        берутся из витрины mart_campaigns_daily, если она актуальна.
+        Период — целые дни бизнес-таймзоны (как дни витрины), по сегодня
+        включительно, поэтому итоги и метрики кампаний считаются за одно
+        окно в обоих путях.
+        """
+        end_date = datetime.now(get_business_tz()).date()
+        start_date = end_date - timedelta(weeks=weeks_back) + timedelta(days=1)
+        lower, upper = day_range_bounds(start_date, end_date)
 
         logger.info("collecting_weekly_data", start_date=start_date, end_date=end_date)
 
@@ -70,42 +67,45 @@ class WeeklyReportsService:
             Campaign.status.in_(["active", "paused"])
         ).all()
 
-        # Лиды за период
-        leads = self.db.query(Lead).filter(
-            Lead.created_at >= start_date,
-            Lead.created_at <= end_date
-        ).all()
-
-        # Конверсии за период
-        conversions = self.db.query(Conversion).filter(
-            Conversion.converted_at >= start_date,
-            Conversion.converted_at <= end_date
-        ).all()
+        # Лиды и конверсии за период (агрегаты, без загрузки строк);
+        # лид — по first touch, как в витрине
+        lead_touch = func.coalesce(Lead.first_touch_at, Lead.created_at)
+        total_leads = self.db.query(func.count(Lead.id)).filter(
+            lead_touch >= lower,
+            lead_touch < upper
+        ).scalar()
+
+        total_conversions, total_revenue = self.db.query(
+            func.count(Conversion.id),
+            func.coalesce(func.sum(Conversion.revenue_rub), 0)
+        ).filter(
+            Conversion.converted_at >= lower,
+            Conversion.converted_at < upper
+        ).one()
 
-        # Агрегированные метрики
-        total_leads = len(leads)
-        total_conversions = len(conversions)
-        total_revenue = sum(c.revenue_rub for c in conversions)
         conversion_rate = (total_conversions / total_leads * 100) if total_leads > 0 else 0
 
+        campaign_totals = self._get_campaign_totals(start_date, end_date)
+
         # Метрики по кампаниям
         campaign_metrics = []
         for campaign in campaigns:
-            campaign_leads = [l for l in leads if campaign.title.lower() in (l.utm_campaign or "").lower()]
-            campaign_conversions = [c for c in conversions if c.campaign_id == campaign.id]
+            totals = campaign_totals.get(campaign.id, {})
+            campaign_leads = totals.get("leads", 0)
+            campaign_conversions = totals.get("conversions", 0)
+            campaign_revenue = totals.get("revenue", 0)
+            campaign_spend = totals.get("spend", 0)
 
-            campaign_revenue = sum(c.revenue_rub for c in campaign_conversions)
-            campaign_spend = campaign.spent_rub or 0
             campaign_roas = (campaign_revenue / campaign_spend) if campaign_spend > 0 else 0
-            campaign_cac = (campaign_spend / len(campaign_conversions)) if campaign_conversions else 0
+            campaign_cac = (campaign_spend / campaign_conversions) if campaign_conversions else 0
 
             campaign_metrics.append({
                 "id": campaign.id,
                 "title": campaign.title,
                 "sku": campaign.sku,
                 "status": campaign.status,
-                "leads": len(campaign_leads),
-                "conversions": len(campaign_conversions),
+                "leads": campaign_leads,
+                "conversions": campaign_conversions,
                 "revenue": campaign_revenue,
                 "spend": campaign_spend,
                 "roas": round(campaign_roas, 2),
@@ -132,9 +132,78 @@ class WeeklyReportsService:
             },
             "campaigns": campaign_metrics,
             "top_performers": campaign_metrics[:3] if campaign_metrics else [],
-            "needs_attention": [c for c in campaign_metrics if c["roas"] < c.get("target_roas", 2.0)]
+            "needs_attention": [c for c in campaign_metrics if c["roas"] < (c.get("target_roas") or 2.0)]
         }
 
+    def _get_campaign_totals(self, start_date: date, end_date: date) -> Dict[Any, Dict[str, Any]]:
+        """
+        Лиды, конверсии, выручка и расход по кампаниям за дни start_date..end_date
+
+        Лиды атрибутируются кампании по вхождению названия в utm_campaign.
+
+        Returns:
+            dict campaign_id -> {leads, conversions, revenue, spend}
+        """
+        marts = MartsService(self.db)
+        if marts.is_campaigns_daily_fresh():
+            totals = marts.campaign_totals_subquery(start_date, end_date)
+            rows = self.db.query(
+                totals.c.campaign_id,
+                totals.c.leads_count,
+                totals.c.conversions_count,
+                totals.c.revenue_rub,
+                totals.c.spend_rub
+            ).all()
+
+            return {
+                campaign_id: {
+                    "leads": int(leads),
+                    "conversions": int(conversions),
+                    "revenue": revenue,
+                    "spend": spend
+                }
+                for campaign_id, leads, conversions, revenue, spend in rows
+            }
+
+        result: Dict[Any, Dict[str, Any]] = {}
+        lower, upper = day_range_bounds(start_date, end_date)
+
+        conversion_rows = self.db.query(
+            Conversion.campaign_id,
+            func.count(Conversion.id),
+            func.sum(Conversion.revenue_rub)
+        ).filter(
+            Conversion.campaign_id.isnot(None),
+            Conversion.converted_at >= lower,
+            Conversion.converted_at < upper
+        ).group_by(Conversion.campaign_id).all()
+
+        for campaign_id, conversions, revenue in conversion_rows:
+            result.setdefault(campaign_id, {})
+            result[campaign_id].update({"conversions": conversions, "revenue": revenue})
+
+        # Как leads_count витрины: по first touch, кампания — по utm_campaign
+        lead_touch = func.coalesce(Lead.first_touch_at, Lead.created_at)
+        lead_rows = self.db.query(
+            Campaign.id,
+            func.count(Lead.id)
+        ).join(
+            Lead, campaign_title_match(Lead.utm_campaign, Campaign.title)
+        ).filter(
+            lead_touch >= lower,
+            lead_touch < upper
+        ).group_by(Campaign.id).all()
+
+        for campaign_id, leads in lead_rows:
+            result.setdefault(campaign_id, {})["leads"] = leads
+
+        # Фактический расход площадок (spend_daily)
+        spend = SpendService.campaign_spend_subquery(start_date, end_date)
+        for campaign_id, spend_rub in self.db.query(spend.c.campaign_id, spend.c.spend_rub).all():
+            result.setdefault(campaign_id, {})["spend"] = spend_rub
+
+        return result
+
     def generate_ai_summary(self, weekly_data: Dict[str, Any]) -> str:
         """Генерирует AI резюме недельных данных"""
         try:
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""Замер транспорта YandexDirectClient на локальном stub-сервере.
+
+Сравнивает вызов `httpx.post` на каждый запрос (новое соединение, как было)
+с общим keep-alive клиентом из app.integrations.http — sync и async.
+Stub отвечает как `campaigns/get` Директа; сервер без TLS, поэтому
+реальная экономия на api.direct.yandex.com больше (нет TLS-рукопожатия).
+
+Примеры:
+    python scripts/bench_http_transport.py --requests 500
+    python scripts/bench_http_transport.py --requests 2000 --concurrency 20
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+STUB_RESPONSE = json.dumps({"result": {"Campaigns": [{"Id": 1, "Name": "Stub"}]}}).encode()
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    # Заголовки и тело одним пакетом, без задержки Nagle/delayed ACK
+    disable_nagle_algorithm = True
+    wbufsize = 1 << 16
+
+    def do_POST(self) -> None:  # noqa: N802 — API http.server
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(STUB_RESPONSE)))
+        self.end_headers()
+        self.wfile.write(STUB_RESPONSE)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def _start_stub() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _summary(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    return {
+        "rps": len(latencies) / elapsed,
+        "avg_ms": statistics.mean(latencies) * 1000,
+        "p50_ms": statistics.median(latencies) * 1000,
+    }
+
+
+def _run_sync(call: Callable[[], object], total: int) -> Dict[str, float]:
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(total):
+        call_started = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - call_started)
+    return _summary(latencies, time.perf_counter() - started)
+
+
+async def _run_async(call, total: int, concurrency: int) -> Dict[str, float]:
+    latencies = []
+    remaining = total
+
+    async def worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            call_started = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - call_started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return _summary(latencies, time.perf_counter() - started)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10, help="Параллелизм async-прогона")
+    args = parser.parse_args(argv)
+
+    import logging
+
+    import httpx
+
+    from app.core.logging import setup_logging
+    from app.integrations.direct_units import AdaptiveRateLimiter, UnitsTracker
+    from app.integrations.http import http_clients
+    from app.integrations.yandex_direct import YandexDirectClient
+
+    # Логи ответов искажают замер — оставляем только предупреждения
+    setup_logging()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    server = _start_stub()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/json/v5/"
+
+    # Замеряем транспорт, а не ограничитель баллов API
+    unlimited = AdaptiveRateLimiter(
+        UnitsTracker(),
+        rate_per_second=1e9,
+        burst=args.requests,
+        slowdown_fraction=0,
+        background_reserve=0,
+    )
+
+    def make_client(**kwargs) -> YandexDirectClient:
+        client = YandexDirectClient(token="bench", limiter=unlimited, **kwargs)
+        client._base_url = base_url
+        return client
+
+    # Как было: модульный httpx.post — новое соединение на каждый вызов
+    per_call = make_client(http_client=SimpleNamespace(post=httpx.post))
+    shared = make_client()
+
+    results = {
+        "per-call httpx.post": _run_sync(per_call.get_campaigns, args.requests),
+        "shared Client": _run_sync(shared.get_campaigns, args.requests),
+    }
+
+    async def run_async() -> Dict[str, float]:
+        try:
+            await shared.aget_campaigns()  # прогрев пула
+            return await _run_async(shared.aget_campaigns, args.requests, args.concurrency)
+        finally:
+            await http_clients.aclose()
+
+    results[f"shared AsyncClient x{args.concurrency}"] = asyncio.run(run_async())
+    server.shutdown()
+
+    print(f"{'transport':<26} {'rps':>8} {'avg, ms':>8} {'p50, ms':>8}")
+    for name, result in results.items():
+        print(f"{name:<26} {result['rps']:>8.0f} {result['avg_ms']:>8.2f} {result['p50_ms']:>8.2f}")
+
+    saved = results["per-call httpx.post"]["avg_ms"] - results["shared Client"]["avg_ms"]
+    print(f"saved per call (sync): {saved:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Замер накладных расходов PII-маскирования на одно событие лога.
+
+Сравнивает прежний mask_pii (два re.sub по плоским строкам) с текущим
+(предкомпилированный шаблон, быстрая проверка, обход вложенных dict/list)
+на смеси событий, близкой к продовой: короткие служебные события, события
+с телефоном/email и ответы Директа с вложенным response_data.
+
+Примеры:
+    python scripts/bench_logging.py
+    python scripts/bench_logging.py --events 200000
+"""
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+
+def _legacy_mask_pii(logger: Any, method_name: str, event_dict: Dict) -> Dict:
+    """mask_pii до оптимизации (для сравнения)"""
+    for key, value in event_dict.items():
+        if isinstance(value, str):
+            value = re.sub(r'(\+7\d{3})\d{3}(\d{4})', r'\1***\2', value)
+            value = re.sub(r'(\w)\w+(\w)@', r'\1***\2@', value)
+            event_dict[key] = value
+    return event_dict
+
+
+def _events() -> List[Dict[str, Any]]:
+    """Смесь событий: 16 служебных, 3 с PII, 1 ответ Директа"""
+    plain = [
+        {"event": "list_campaigns_request", "logger": "app.api.v1.campaigns", "level": "info",
+         "skip": 0, "limit": 50, "status": "active", "timestamp": "2025-10-11T09:00:00Z"},
+        {"event": "publishing_to_channel_started", "logger": "app.services.publishing_service",
+         "level": "info", "campaign_id": "0b9f3c1e-5d1a-4b59-9b5e-1f1c2a3b4c5d", "channel": "vk",
+         "budget": 15000.0, "timestamp": "2025-10-11T09:00:00Z"},
+    ] * 8
+    pii = [
+        {"event": "lead_created", "level": "info", "phone": "+79991234567", "utm_source": "vk_ads"},
+        {"event": "lead_contact", "level": "info", "email": "vasya.pupkin@example.com"},
+        {"event": "booking_linked", "level": "info", "contact": {"phone": "+79997654321"}, "lead_id": 42},
+    ]
+    direct = [{
+        "event": "yandex_direct_response",
+        "level": "info",
+        "url": "https://api.direct.yandex.com/json/v5/campaigns",
+        "method": "get",
+        "status_code": 200,
+        "response_data": {"result": {"Campaigns": [
+            {"Id": 700000000 + i, "Name": f"DeepCalm релакс {i}", "Status": "ACCEPTED", "State": "ON",
+             "Type": "TEXT_CAMPAIGN"}
+            for i in range(30)
+        ]}},
+    }]
+    return plain + pii + direct
+
+
+def _measure(processor: Callable, events: List[Dict[str, Any]], total: int) -> float:
+    """Среднее время обработки одного события, мкс"""
+    rounds = max(total // len(events), 1)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for event in events:
+            processor(None, "info", dict(event))
+    return (time.perf_counter() - started) / (rounds * len(events)) * 1e6
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    from app.core.logging import mask_pii
+
+    events = _events()
+    results = {
+        "legacy (flat, re.sub x2)": _measure(_legacy_mask_pii, events, args.events),
+        "current (nested)": _measure(mask_pii, events, args.events),
+    }
+    plain_only = events[:16]
+    results["current, no PII events"] = _measure(mask_pii, plain_only, args.events)
+
+    print(f"{'processor':<26} {'us/event':>9}")
+    for name, micros in results.items():
+        print(f"{name:<26} {micros:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Замер сериализации JSON-ответов на списках из 1000 элементов.
+
+Три пути для CampaignListResponse (модель уже создана в хендлере):
+
+- default: повторная валидация и сериализация FastAPI + JSONResponse (json.dumps);
+- orjson: тот же путь FastAPI, рендер FastJSONResponse (default_response_class);
+- direct: json_response(model) — без повторной валидации, pydantic-core.
+
+И два для dict с UUID/Decimal/datetime (как превью недельного отчёта):
+jsonable_encoder + JSONResponse против json_response(dict).
+
+Примеры:
+    python scripts/bench_responses.py
+    python scripts/bench_responses.py --items 5000 --rounds 50
+"""
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+
+def _campaigns(count: int) -> List[SimpleNamespace]:
+    """Объекты с атрибутами Campaign (как строки ORM)"""
+    now = datetime.now(timezone.utc)
+    return [
+        SimpleNamespace(
+            id=uuid.uuid4(),
+            title=f"Запуск октябрь — Релакс {i}",
+            sku="RELAX-60",
+            budget_rub=15000.0 + i,
+            target_cac_rub=450.0,
+            target_roas=5.0,
+            channels=["vk", "direct"],
+            ab_test_enabled=bool(i % 2),
+            status="active",
+            created_at=now - timedelta(minutes=i),
+            updated_at=now,
+        )
+        for i in range(count)
+    ]
+
+
+def _preview(count: int) -> Dict[str, Any]:
+    """Данные превью отчёта: Decimal из Numeric колонок, UUID, datetime"""
+    now = datetime.now(timezone.utc)
+    return {
+        "period": {"start": now - timedelta(weeks=1), "end": now, "weeks": 1},
+        "summary": {"total_leads": count * 3, "total_revenue": Decimal("1234567.50")},
+        "campaigns": [
+            {
+                "id": uuid.uuid4(),
+                "title": f"Кампания {i}",
+                "sku": "DEEP-90",
+                "status": "active",
+                "leads": i,
+                "conversions": i // 3,
+                "revenue": Decimal(f"{i * 1000}.00"),
+                "spend": Decimal(f"{i * 250}.50"),
+                "roas": 4.0,
+                "cac": 312.5,
+            }
+            for i in range(count)
+        ],
+    }
+
+
+def _measure(render: Callable[[], bytes], rounds: int) -> float:
+    """Среднее время одного ответа, мс"""
+    render()  # прогрев
+    started = time.perf_counter()
+    for _ in range(rounds):
+        render()
+    return (time.perf_counter() - started) / rounds * 1000
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+
+    from app.core.responses import FastJSONResponse, json_response
+    from app.schemas.campaign import CampaignListResponse
+
+    model = CampaignListResponse(items=_campaigns(args.items), total=args.items, page=1, page_size=args.items)
+    field = create_response_field(name="response", type_=CampaignListResponse)
+    preview = _preview(args.items)
+
+    def fastapi_path(response_class: type) -> Callable[[], bytes]:
+        def render() -> bytes:
+            content = asyncio.run(serialize_response(field=field, response_content=model))
+            return response_class(content).body
+        return render
+
+    results = {
+        "list: default (json)": _measure(fastapi_path(JSONResponse), args.rounds),
+        "list: orjson": _measure(fastapi_path(FastJSONResponse), args.rounds),
+        "list: direct": _measure(lambda: json_response(model).body, args.rounds),
+        "preview: default (json)": _measure(lambda: JSONResponse(jsonable_encoder(preview)).body, args.rounds),
+        "preview: direct": _measure(lambda: json_response(preview).body, args.rounds),
+    }
+
+    print(f"{args.items} items")
+    print(f"{'path':<26} {'ms/response':>11}")
+    for name, millis in results.items():
+        print(f"{name:<26} {millis:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
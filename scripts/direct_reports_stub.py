@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""Локальный stub Reports API Яндекс.Директа для офлайн-проверки sync_spend.
+
+Отвечает на POST отчёта CAMPAIGN_PERFORMANCE_REPORT в формате TSV
+(chunked, как настоящий API) по периоду из SelectionCriteria. Первые
+`--pending` запросов каждого отчёта получают 202 с заголовком retryIn —
+так проверяется ожидание офлайн-отчёта.
+
+Примеры:
+    python scripts/direct_reports_stub.py --port 8088 --campaigns 500
+    DC_YANDEX_DIRECT_TOKEN=stub YANDEX_DIRECT_REPORTS_URL=http://127.0.0.1:8088/ \\
+        python -c "from app.core.db import SessionLocal; \\
+        from app.services.spend import SpendService; \\
+        print(SpendService(SessionLocal()).sync_direct_spend())"
+"""
+import argparse
+import json
+import threading
+from collections import Counter
+from datetime import date, timedelta
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, List, Optional, Sequence
+
+HEADER = "Date\tCampaignId\tCampaignName\tImpressions\tClicks\tCost"
+
+
+def campaign_rows(date_from: date, date_to: date, campaign_ids: Sequence[int]) -> Iterator[str]:
+    """Детерминированные строки TSV: кампания × день"""
+    day = date_from
+    while day <= date_to:
+        for campaign_id in campaign_ids:
+            clicks = (campaign_id + day.day) % 7
+            impressions = clicks * 40 + campaign_id % 13
+            cost = Decimal(clicks * 35) + Decimal(campaign_id % 100) / 100 if clicks else None
+            yield "\t".join([
+                day.isoformat(),
+                str(campaign_id),
+                f"Stub campaign {campaign_id}",
+                str(impressions),
+                str(clicks) if clicks else "--",
+                str(cost) if cost is not None else "--",
+            ])
+        day += timedelta(days=1)
+
+
+class ReportsStubServer(ThreadingHTTPServer):
+    """HTTP-сервер stub; параметры ответа — атрибуты экземпляра"""
+
+    daemon_threads = True
+
+    def __init__(self, address, campaign_ids: Sequence[int], pending: int = 0, retry_in: float = 0):
+        super().__init__(address, _ReportsHandler)
+        self.campaign_ids = list(campaign_ids)
+        self.pending = pending
+        self.retry_in = retry_in
+        self.requests: List[dict] = []
+        self._attempts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/json/v5/reports"
+
+    def next_attempt(self, report_name: str) -> int:
+        with self._lock:
+            self._attempts[report_name] += 1
+            return self._attempts[report_name]
+
+
+class _ReportsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: ReportsStubServer
+
+    def do_POST(self) -> None:  # noqa: N802 — API http.server
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        self.server.requests.append({"headers": dict(self.headers), "body": body})
+
+        params = body["params"]
+        if params.get("ReportType") != "CAMPAIGN_PERFORMANCE_REPORT" or params.get("Format") != "TSV":
+            self._send_error(400, 8000, "Неподдерживаемый отчёт")
+            return
+
+        if self.server.next_attempt(params["ReportName"]) <= self.server.pending:
+            self.send_response(202)
+            self.send_header("retryIn", str(self.server.retry_in))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        criteria = params["SelectionCriteria"]
+        rows = campaign_rows(
+            date.fromisoformat(criteria["DateFrom"]),
+            date.fromisoformat(criteria["DateTo"]),
+            self.server.campaign_ids,
+        )
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/tab-separated-values; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        self._send_chunk(HEADER + "\n")
+        block: List[str] = []
+        for row in rows:
+            block.append(row)
+            if len(block) == 500:
+                self._send_chunk("\n".join(block) + "\n")
+                block = []
+        if block:
+            self._send_chunk("\n".join(block) + "\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _send_chunk(self, text: str) -> None:
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+
+    def _send_error(self, status: int, code: int, message: str) -> None:
+        data = json.dumps({"error": {"error_code": code, "error_string": message}}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def start_stub(
+    campaign_ids: Sequence[int],
+    pending: int = 0,
+    retry_in: float = 0,
+    port: int = 0
+) -> ReportsStubServer:
+    """Запускает stub в фоновом потоке (port=0 — свободный порт)"""
+    server = ReportsStubServer(("127.0.0.1", port), campaign_ids, pending=pending, retry_in=retry_in)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8088)
+    parser.add_argument("--campaigns", type=int, default=100, help="Кампаний в отчёте")
+    parser.add_argument("--pending", type=int, default=1, help="Ответов 202 до готового отчёта")
+    parser.add_argument("--retry-in", type=float, default=1)
+    args = parser.parse_args(argv)
+
+    server = ReportsStubServer(
+        ("127.0.0.1", args.port),
+        range(1, args.campaigns + 1),
+        pending=args.pending,
+        retry_in=args.retry_in,
+    )
+    print(f"Reports API stub: {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -9,7 +9,7 @@ from typing import Generator
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.engine import url as sa_url
 from sqlalchemy.exc import OperationalError, ProgrammingError
 from sqlalchemy.orm import sessionmaker
@@ -17,8 +17,17 @@ from sqlalchemy.orm import sessionmaker
 if os.getenv("PYTEST_SKIP_DB_FIXTURES") == "1":
     pytest.skip("Skipping DB fixtures for lightweight unit tests", allow_module_level=True)
 
-from app.main import app
-from app.core.db import Base, get_db
+# Тесты работают с откатываемыми транзакциями: общий Redis-кэш между
+# запусками дал бы устаревшие ответы, поэтому только локальный LRU
+# (до импорта приложения: настройки читаются при импорте)
+os.environ.setdefault("REDIS_URL", "")
+
+from app.main import app  # noqa: E402
+from app.core.cache import response_cache  # noqa: E402
+from app.core.db import Base, get_async_db, get_db  # noqa: E402
+from app.integrations.direct_units import direct_limiter, direct_units  # noqa: E402
+from app.integrations.resilience import channel_resilience  # noqa: E402
+from app.services.settings_registry import settings_registry  # noqa: E402
 
 
 TEST_DATABASE_URL = os.getenv(
@@ -80,6 +89,27 @@ def setup_test_db():
     Base.metadata.drop_all(bind=test_engine)
 
 
+@pytest.fixture(autouse=True)
+def clear_response_cache():
+    """Каждый тест начинается с пустого кэша ответов и реестра настроек"""
+    response_cache.clear()
+    settings_registry.invalidate()
+    yield
+    response_cache.clear()
+    settings_registry.invalidate()
+
+
+@pytest.fixture(autouse=True)
+def reset_channel_state(monkeypatch):
+    """Автоматы каналов и баллы Директа не переходят между тестами, повторы без задержки"""
+    channel_resilience.reset()
+    direct_units.reset()
+    direct_limiter.reset()
+    monkeypatch.setattr(channel_resilience.retry, "base_delay", 0.0)
+    yield
+    channel_resilience.reset()
+
+
 @pytest.fixture(scope="function")
 def db_session() -> Generator:
     """
@@ -109,12 +139,39 @@ def db_session() -> Generator:
     connection.close()
 
 
+class AsyncSessionAdapter:
+    """
+    Интерфейс AsyncSession поверх тестовой sync-сессии.
+
+    Данные теста не закоммичены и видны только в соединении db_session,
+    поэтому async-эндпоинты в тестах работают через него же.
+    """
+
+    def __init__(self, session):
+        self.sync_session = session
+
+    async def execute(self, statement, *args, **kwargs):
+        return self.sync_session.execute(statement, *args, **kwargs)
+
+    async def scalar(self, statement, *args, **kwargs):
+        return self.sync_session.scalar(statement, *args, **kwargs)
+
+    async def scalars(self, statement, *args, **kwargs):
+        return self.sync_session.scalars(statement, *args, **kwargs)
+
+    async def get(self, entity, ident, **kwargs):
+        return self.sync_session.get(entity, ident, **kwargs)
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return fn(self.sync_session, *args, **kwargs)
+
+
 @pytest.fixture(scope="function")
 def client(db_session) -> TestClient:
     """
     FastAPI TestClient с тестовой БД.
 
-    Переопределяет get_db dependency на тестовую сессию.
+    Переопределяет get_db и get_async_db dependency на тестовую сессию.
 
     Args:
         db_session: Тестовая сессия БД
@@ -130,9 +187,48 @@ def client(db_session) -> TestClient:
     def override_get_db():
         yield db_session
 
+    async def override_get_async_db():
+        yield AsyncSessionAdapter(db_session)
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
 
     with TestClient(app) as test_client:
         yield test_client
 
     app.dependency_overrides.clear()
+
+
+class QueryCounter:
+    """Считает SQL-запросы, отправленные в тестовую БД."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.statements: list = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        self.count += 1
+        self.statements.append(statement)
+
+    def reset(self) -> None:
+        self.count = 0
+        self.statements = []
+
+
+@pytest.fixture(scope="function")
+def query_counter() -> Generator:
+    """
+    Счётчик SQL-запросов (для регрессионных тестов на N+1).
+
+    Examples:
+        >>> def test_dashboard_queries(db_session, query_counter):
+        >>>     query_counter.reset()
+        >>>     AnalyticsService(db_session).get_dashboard_summary()
+        >>>     assert query_counter.count <= 2
+    """
+    counter = QueryCounter()
+    event.listen(test_engine, "before_cursor_execute", counter)
+
+    yield counter
+
+    event.remove(test_engine, "before_cursor_execute", counter)
@@ -1,10 +1,12 @@
 """
 Интеграционные тесты для Analytics API
 """
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.orm import Session
 
 from app.models.campaign import Campaign
@@ -12,6 +14,9 @@ from app.models.conversion import Conversion
 from app.models.creative import Creative
 from app.models.lead import Lead
 from app.models.placement import Placement
+from app.models.spend import SpendDaily
+from app.core.dates import range_filters
+from app.services.analytics_service import AnalyticsService
 
 
 def test_get_campaign_analytics_success(client: TestClient, db_session: Session):
@@ -374,3 +379,344 @@ def test_campaign_metrics_roas_status(client: TestClient, db_session: Session):
     assert metrics["actual_roas"] is not None
     # Статус должен быть определен
     assert metrics["roas_status"] in ["on_track", "over_target", "under_target", "unknown"]
+
+
+def _create_campaign_with_conversions(db_session: Session, index: int, conversions: int) -> Campaign:
+    """Создаёт кампанию с заданным количеством конверсий"""
+    campaign = Campaign(
+        title=f"Кампания дашборда {index}",
+        sku="RELAX-60",
+        budget_rub=10000 + index * 1000,
+        target_cac_rub=800,
+        target_roas=3.0,
+        channels=["vk"],
+        status="active" if index % 2 == 0 else "paused",
+        ab_test_enabled=False
+    )
+    db_session.add(campaign)
+    db_session.flush()
+
+    for n in range(conversions):
+        lead = Lead(
+            phone=f"+7900{index:03d}{n:04d}",
+            utm_source="vk_ads",
+            utm_campaign=campaign.title
+        )
+        db_session.add(lead)
+        db_session.flush()
+        db_session.add(Conversion(
+            campaign_id=campaign.id,
+            lead_id=lead.id,
+            booking_id=index * 1000 + n,
+            revenue_rub=3500.0 + index * 100 + n,
+            converted_at=datetime.now(timezone.utc)
+        ))
+
+    db_session.flush()
+    return campaign
+
+
+def test_dashboard_summary_query_count_is_constant(db_session: Session, query_counter):
+    """Количество SQL-запросов дашборда не растёт с числом кампаний"""
+    db_session.query(Campaign).delete()
+    for index in range(2):
+        _create_campaign_with_conversions(db_session, index, conversions=2)
+    db_session.commit()
+
+    service = AnalyticsService(db_session)
+
+    query_counter.reset()
+    small = service.get_dashboard_summary()
+    small_count = query_counter.count
+
+    for index in range(2, 22):
+        _create_campaign_with_conversions(db_session, index, conversions=index % 3)
+    db_session.commit()
+
+    query_counter.reset()
+    large = service.get_dashboard_summary()
+
+    assert small.total_campaigns == 2
+    assert large.total_campaigns == 22
+    assert query_counter.count == small_count
+    # проверка актуальности витрины + агрегирующий запрос
+    assert small_count <= 2
+
+
+def test_dashboard_summary_matches_campaign_metrics(db_session: Session):
+    """Сводка дашборда совпадает с агрегатом метрик по каждой кампании"""
+    db_session.query(Campaign).delete()
+    campaigns = [
+        _create_campaign_with_conversions(db_session, index, conversions=index % 4)
+        for index in range(6)
+    ]
+    db_session.commit()
+
+    service = AnalyticsService(db_session)
+    summary = service.get_dashboard_summary()
+
+    per_campaign = [service.get_campaign_metrics(c.id)["metrics"] for c in campaigns]
+    total_spent = sum(m.spent_rub for m in per_campaign)
+    total_revenue = sum(m.revenue_rub for m in per_campaign)
+    best = max(
+        (m for m in per_campaign if m.actual_roas),
+        key=lambda m: m.actual_roas
+    )
+
+    assert summary.total_campaigns == len(campaigns)
+    assert summary.active_campaigns == sum(1 for c in campaigns if c.status == "active")
+    assert summary.paused_campaigns == sum(1 for c in campaigns if c.status == "paused")
+    assert summary.total_budget_rub == sum(m.budget_rub for m in per_campaign)
+    assert summary.total_spent_rub == total_spent
+    assert summary.total_leads == sum(m.leads_count for m in per_campaign)
+    assert summary.total_conversions == sum(m.conversions_count for m in per_campaign)
+    assert summary.total_revenue_rub == total_revenue
+    assert summary.avg_roas == round(total_revenue / total_spent, 2)
+    assert summary.top_performing_campaign == {
+        "campaign_id": str(best.campaign_id),
+        "campaign_title": best.campaign_title,
+        "roas": best.actual_roas
+    }
+
+
+def test_channel_breakdown_prefers_conversion_channel_code(db_session: Session):
+    """Канал берётся из Conversion.channel_code, utm_source — только fallback"""
+    campaign = Campaign(
+        title="Кампания для разбивки",
+        sku="RELAX-60",
+        budget_rub=10000,
+        target_cac_rub=800,
+        target_roas=3.0,
+        channels=["vk", "direct", "avito"],
+        status="active",
+        ab_test_enabled=False
+    )
+    db_session.add(campaign)
+    db_session.flush()
+
+    for channel_code in ("vk", "direct", "avito"):
+        db_session.add(Placement(
+            campaign_id=campaign.id,
+            channel_code=channel_code,
+            status="active",
+            published_at=datetime.now(timezone.utc)
+        ))
+
+    # channel_code задан — utm_source игнорируется
+    lead_avito = Lead(phone="+79995550001", utm_source="vk_ads")
+    # channel_code пуст — канал из utm_source
+    lead_direct = Lead(phone="+79995550002", utm_source="Yandex_Search")
+    db_session.add_all([lead_avito, lead_direct])
+    db_session.flush()
+
+    db_session.add_all([
+        Conversion(
+            campaign_id=campaign.id,
+            lead_id=lead_avito.id,
+            channel_code="avito",
+            revenue_rub=4000.0,
+            converted_at=datetime.now(timezone.utc)
+        ),
+        Conversion(
+            campaign_id=campaign.id,
+            lead_id=lead_direct.id,
+            revenue_rub=3000.0,
+            converted_at=datetime.now(timezone.utc)
+        ),
+    ])
+    db_session.commit()
+
+    result = AnalyticsService(db_session).get_campaign_metrics(campaign.id)
+    channels = {c.channel_code: c for c in result["channels"]}
+
+    assert result["metrics"].conversions_count == 2
+    assert result["metrics"].revenue_rub == 7000.0
+    assert channels["avito"].conversions_count == 1
+    assert channels["avito"].revenue_rub == 4000.0
+    assert channels["direct"].conversions_count == 1
+    assert channels["vk"].conversions_count == 0
+
+
+def test_campaign_metrics_query_count_is_constant(db_session: Session, query_counter):
+    """Количество запросов аналитики кампании не зависит от числа конверсий"""
+    campaign = _create_campaign_with_conversions(db_session, 1, conversions=1)
+    db_session.add(Placement(
+        campaign_id=campaign.id,
+        channel_code="vk",
+        status="active",
+        published_at=datetime.now(timezone.utc)
+    ))
+    db_session.commit()
+    campaign_id = campaign.id
+
+    service = AnalyticsService(db_session)
+
+    query_counter.reset()
+    service.get_campaign_metrics(campaign_id)
+    single_count = query_counter.count
+
+    for n in range(1, 15):
+        lead = Lead(phone=f"+7911000{n:04d}", utm_source="vk_ads")
+        db_session.add(lead)
+        db_session.flush()
+        db_session.add(Conversion(
+            campaign_id=campaign.id,
+            lead_id=lead.id,
+            revenue_rub=1000.0,
+            converted_at=datetime.now(timezone.utc)
+        ))
+    db_session.commit()
+
+    query_counter.reset()
+    result = service.get_campaign_metrics(campaign_id)
+
+    assert result["metrics"].conversions_count == 15
+    assert query_counter.count == single_count
+    # витрина, кампания, конверсии по каналам, размещения
+    assert single_count <= 4
+
+
+def _explain(db_session: Session, query) -> str:
+    """EXPLAIN для запроса (seqscan отключён: в тестовой БД таблицы крошечные)"""
+    sql = query.statement.compile(
+        dialect=postgresql.dialect(),
+        compile_kwargs={"literal_binds": True}
+    )
+    db_session.execute(text("SET LOCAL enable_seqscan = off"))
+    plan = db_session.execute(text(f"EXPLAIN {sql}")).scalars().all()
+    return "\n".join(plan)
+
+
+def test_date_filters_use_composite_indexes(db_session: Session):
+    """Фильтры по датам sargable и используют составные индексы"""
+    campaign = _create_campaign_with_conversions(db_session, 7, conversions=28)
+    for day, conversion in enumerate(
+        db_session.query(Conversion).filter(Conversion.campaign_id == campaign.id), start=1
+    ):
+        conversion.converted_at = datetime(2025, 9, day, tzinfo=timezone.utc)
+    for day in range(1, 29):
+        db_session.add(Placement(
+            campaign_id=campaign.id,
+            channel_code="vk",
+            status="active",
+            published_at=datetime(2025, 9, day, tzinfo=timezone.utc)
+        ))
+    # Конверсии других кампаний внутри периода: индекс только по дате хуже
+    other = _create_campaign_with_conversions(db_session, 9, conversions=30)
+    db_session.query(Conversion).filter(Conversion.campaign_id == other.id).update(
+        {"converted_at": datetime(2025, 10, 15, tzinfo=timezone.utc)}
+    )
+    db_session.flush()
+    db_session.execute(text("ANALYZE conversions"))
+    db_session.execute(text("ANALYZE placements"))
+    start, end = date(2025, 10, 1), date(2025, 10, 31)
+
+    conversions_plan = _explain(
+        db_session,
+        db_session.query(Conversion.id)
+        .filter(Conversion.campaign_id == campaign.id)
+        .filter(*AnalyticsService._conversion_date_filters(start, end))
+    )
+    placements_plan = _explain(
+        db_session,
+        db_session.query(Placement.id)
+        .filter(Placement.campaign_id == campaign.id)
+        .filter(*range_filters(Placement.published_at, start, end))
+    )
+
+    assert "ix_conversions_campaign_id_converted_at" in conversions_plan
+    assert "Index" in conversions_plan
+    assert "ix_placements_campaign_id_published_at" in placements_plan
+
+
+def test_date_filter_uses_business_timezone(db_session: Session):
+    """Границы дней считаются в бизнес-таймзоне (Europe/Moscow), а не в UTC"""
+    campaign = _create_campaign_with_conversions(db_session, 8, conversions=1)
+    conversion = db_session.query(Conversion).filter(Conversion.campaign_id == campaign.id).one()
+    # 22:30 UTC 1 октября = 01:30 МСК 2 октября
+    conversion.converted_at = datetime(2025, 10, 1, 22, 30, tzinfo=timezone.utc)
+    db_session.commit()
+
+    service = AnalyticsService(db_session)
+    oct_1 = service.get_campaign_metrics(campaign.id, date(2025, 10, 1), date(2025, 10, 1))
+    oct_2 = service.get_campaign_metrics(campaign.id, date(2025, 10, 2), date(2025, 10, 2))
+
+    assert oct_1["metrics"].conversions_count == 0
+    assert oct_2["metrics"].conversions_count == 1
+
+
+def test_dashboard_response_is_cached_until_write(client: TestClient, db_session: Session, query_counter):
+    """Сводка дашборда кэшируется и сбрасывается при записи кампании"""
+    db_session.query(Campaign).delete()
+    _create_campaign_with_conversions(db_session, 30, conversions=1)
+    db_session.commit()
+
+    first = client.get("/api/v1/analytics/dashboard")
+    query_counter.reset()
+    second = client.get("/api/v1/analytics/dashboard")
+
+    assert second.json() == first.json()
+    assert query_counter.count == 0
+
+    _create_campaign_with_conversions(db_session, 31, conversions=2)
+    db_session.commit()
+
+    third = client.get("/api/v1/analytics/dashboard")
+
+    assert first.json()["total_campaigns"] == 1
+    assert third.json()["total_campaigns"] == 2
+    assert third.json()["total_conversions"] == 3
+
+
+def test_campaign_analytics_cache_invalidated_by_conversion(client: TestClient, db_session: Session):
+    """Новая конверсия сбрасывает кэш метрик своей кампании"""
+    campaign = _create_campaign_with_conversions(db_session, 32, conversions=1)
+    other = _create_campaign_with_conversions(db_session, 33, conversions=1)
+    db_session.commit()
+    url = f"/api/v1/analytics/campaigns/{campaign.id}"
+    other_url = f"/api/v1/analytics/campaigns/{other.id}"
+
+    assert client.get(url).json()["metrics"]["conversions_count"] == 1
+    client.get(other_url)
+
+    lead = Lead(phone="+79003200099", utm_source="vk_ads")
+    db_session.add(lead)
+    db_session.flush()
+    db_session.add(Conversion(
+        campaign_id=campaign.id,
+        lead_id=lead.id,
+        revenue_rub=1000.0,
+        converted_at=datetime.now(timezone.utc)
+    ))
+    db_session.commit()
+
+    assert client.get(url).json()["metrics"]["conversions_count"] == 2
+    assert client.get(other_url).json()["metrics"]["conversions_count"] == 1
+
+
+def test_bulk_spend_upsert_invalidates_cached_campaign_metrics(client: TestClient, db_session: Session):
+    """INSERT ... ON CONFLICT в spend_daily через session.execute сбрасывает кэш"""
+    campaign = _create_campaign_with_conversions(db_session, 34, conversions=1)
+    db_session.commit()
+    url = f"/api/v1/analytics/campaigns/{campaign.id}"
+    before = client.get(url).json()["metrics"]["spent_rub"]
+
+    stmt = postgresql.insert(SpendDaily).values([{
+        "channel_code": "vk",
+        "external_campaign_id": "vk-34",
+        "date": date.today(),
+        "campaign_id": campaign.id,
+        "impressions": 100,
+        "clicks": 10,
+        "spend_rub": 4321,
+        "synced_at": datetime.now(timezone.utc),
+    }])
+    db_session.execute(stmt.on_conflict_do_update(
+        index_elements=[SpendDaily.channel_code, SpendDaily.external_campaign_id, SpendDaily.date],
+        set_={"spend_rub": stmt.excluded.spend_rub}
+    ))
+    db_session.commit()
+
+    after = client.get(url).json()["metrics"]["spent_rub"]
+    assert after != before
+    assert after == 4321.0
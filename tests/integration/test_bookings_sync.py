@@ -0,0 +1,253 @@
+"""
+Интеграционные тесты синхронизации броней YCLIENTS (sync_bookings)
+"""
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+import httpx
+import pytest
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core import events
+from app.integrations.yclients import YClientsClient
+from app.models.booking import Booking
+from app.models.campaign import Campaign
+from app.models.conversion import Conversion
+from app.models.lead import Lead
+from app.models.mart import MartCampaignDaily
+from app.models.sync_watermark import SyncWatermark
+from app.services.bookings_sync import SYNC_BOOKINGS, BookingsSyncService
+from app.services.marts import MartsService
+from app.services.scheduler import DeepCalmScheduler
+
+
+class _FakeYClients:
+    """Записи YCLIENTS с фильтром changed_after и постраничной выдачей"""
+
+    def __init__(self) -> None:
+        self.records = {}
+        self.requests = []
+
+    def put(self, record_id: int, phone: str, changed: str, **overrides) -> None:
+        record = {
+            "id": record_id,
+            "datetime": "2025-10-05T10:00:00+03:00",
+            "last_change_date": changed,
+            "attendance": 2,
+            "deleted": False,
+            "paid_full": 0,
+            "client": {"id": 80000 + record_id, "phone": phone},
+            "services": [{"title": "Релакс-массаж 60 мин", "cost": 3500}],
+        }
+        record.update(overrides)
+        self.records[record_id] = record
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        params = request.url.params
+        self.requests.append(dict(params))
+        items = sorted(self.records.values(), key=lambda r: r["id"])
+        if "changed_after" in params:
+            since = datetime.fromisoformat(params["changed_after"])
+            items = [r for r in items if datetime.fromisoformat(r["last_change_date"]) > since]
+        page, count = int(params["page"]), int(params["count"])
+        return httpx.Response(200, json={
+            "success": True,
+            "data": items[(page - 1) * count:page * count],
+            "meta": {"total_count": len(items)},
+        })
+
+
+@pytest.fixture
+def yclients():
+    return _FakeYClients()
+
+
+def _sync(db_session: Session, fake: _FakeYClients, full: bool = False) -> dict:
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(fake.handler))
+    client = YClientsClient(token="partner", company_id=42, page_size=2, concurrency=2, http_client=http_client)
+    return asyncio.run(BookingsSyncService(db_session, client=client).sync(full=full))
+
+
+def _lead(db_session: Session, phone: str, utm_campaign: str = None, first_touch_at: datetime = None) -> Lead:
+    lead = Lead(phone=phone, utm_source="vk_ads", utm_campaign=utm_campaign, first_touch_at=first_touch_at)
+    db_session.add(lead)
+    db_session.commit()
+    return lead
+
+
+def test_full_sync_upserts_bookings_and_sets_watermark(db_session: Session, yclients):
+    for record_id in range(1, 6):
+        yclients.put(record_id, f"8 999 000-00-0{record_id}", f"2025-10-01T1{record_id}:00:00+03:00")
+
+    result = _sync(db_session, yclients)
+
+    assert result["mode"] == "full"
+    assert (result["pages"], result["fetched"], result["inserted"]) == (3, 5, 5)
+    assert "start_date" in yclients.requests[0]
+    assert db_session.query(func.count(Booking.id)).scalar() == 5
+    assert db_session.query(Booking).filter(Booking.yclients_id == 3).one().phone == "+79990000003"
+
+    watermark = db_session.get(SyncWatermark, SYNC_BOOKINGS)
+    assert watermark.watermark_at == datetime(2025, 10, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def test_incremental_sync_touches_only_changed_rows(db_session: Session, yclients):
+    for record_id in range(1, 4):
+        yclients.put(record_id, f"+7999000000{record_id}", f"2025-10-01T{7 + record_id:02d}:00:00+03:00")
+    _sync(db_session, yclients)
+
+    # Повтор без изменений: запись из перекрытия водяного знака не обновляется
+    unchanged = _sync(db_session, yclients)
+    assert unchanged["mode"] == "incremental"
+    assert unchanged["fetched"] == 1
+    assert unchanged.get("changed", 0) == 0
+
+    yclients.put(2, "+79990000002", "2025-10-01T15:00:00+03:00", attendance=1)
+    delta = _sync(db_session, yclients)
+
+    assert "changed_after" in yclients.requests[-1]
+    assert delta["fetched"] == 2
+    assert (delta["changed"], delta["inserted"]) == (1, 0)
+    db_session.expire_all()
+    assert db_session.query(Booking).filter(Booking.yclients_id == 2).one().status == "completed"
+
+
+def test_paid_booking_becomes_conversion_with_ttp(db_session: Session, yclients):
+    campaign = Campaign(
+        title="Осенний релакс",
+        sku="RELAX-60",
+        budget_rub=20000,
+        target_cac_rub=800,
+        target_roas=3.0,
+        channels=["vk"],
+        status="active",
+        ab_test_enabled=False
+    )
+    db_session.add(campaign)
+    db_session.commit()
+    campaign_id = campaign.id
+    lead = _lead(
+        db_session,
+        "+79991110001",
+        utm_campaign="осенний релакс / vk",
+        first_touch_at=datetime(2025, 9, 28, 12, tzinfo=timezone.utc)
+    )
+    lead_id = lead.id
+
+    yclients.put(11, "89991110001", "2025-10-01T18:00:00+03:00", paid_full=1)
+    result = _sync(db_session, yclients)
+
+    assert result["conversions"] == 1
+    booking = db_session.query(Booking).filter(Booking.yclients_id == 11).one()
+    conversion = db_session.query(Conversion).filter(Conversion.booking_id == booking.id).one()
+    assert booking.lead_id == lead_id
+    assert conversion.lead_id == lead_id
+    assert conversion.campaign_id == campaign_id
+    assert conversion.channel_code == "vk"
+    assert conversion.ttp_days == 3
+    assert conversion.revenue_rub == Decimal("3500.00")
+    assert db_session.get(Lead, lead_id).yclients_id == 80011
+
+    # Отмена брони снимает конверсию
+    yclients.put(11, "89991110001", "2025-10-02T09:00:00+03:00", paid_full=1, deleted=True)
+    cancelled = _sync(db_session, yclients)
+
+    assert cancelled["conversions_deleted"] == 1
+    assert db_session.query(Conversion).filter(Conversion.booking_id == booking.id).count() == 0
+
+
+def test_changed_and_cancelled_conversions_refresh_mart(db_session: Session, yclients):
+    campaign = Campaign(
+        title="Витринный релакс",
+        sku="RELAX-60",
+        budget_rub=20000,
+        target_cac_rub=800,
+        target_roas=3.0,
+        channels=["vk"],
+        status="active",
+        ab_test_enabled=False,
+        # Создана давно: новая кампания сама по себе вызвала бы полный пересчёт
+        updated_at=datetime.now(timezone.utc) - timedelta(days=1)
+    )
+    db_session.add(campaign)
+    db_session.commit()
+    campaign_id = campaign.id
+    _lead(db_session, "+79991110002", utm_campaign="витринный релакс", first_touch_at=datetime(2025, 9, 28, tzinfo=timezone.utc))
+    marts = MartsService(db_session)
+
+    def conversion_revenue() -> dict:
+        db_session.expire_all()
+        rows = db_session.query(MartCampaignDaily).filter(
+            MartCampaignDaily.campaign_id == campaign_id,
+            MartCampaignDaily.conversions_count > 0
+        ).all()
+        return {row.date: row.revenue_rub for row in rows}
+
+    yclients.put(12, "89991110002", "2025-10-01T18:00:00+03:00", paid_full=1)
+    _sync(db_session, yclients)
+    marts.refresh_campaigns_daily()
+    assert conversion_revenue() == {date(2025, 10, 1): Decimal("3500.00")}
+
+    # Изменилась сумма: upsert обновляет updated_at — витрина устарела
+    yclients.put(
+        12, "89991110002", "2025-10-02T09:00:00+03:00", paid_full=1,
+        services=[{"title": "Релакс-массаж 90 мин", "cost": 5000}]
+    )
+    _sync(db_session, yclients)
+    assert marts.is_campaigns_daily_fresh() is False
+    assert marts.refresh_campaigns_daily()["mode"] == "incremental"
+    assert conversion_revenue() == {date(2025, 10, 1): Decimal("5000.00")}
+
+    # Отмена удаляет конверсию: её день помечен для пересчёта
+    yclients.put(12, "89991110002", "2025-10-02T10:00:00+03:00", paid_full=1, deleted=True)
+    _sync(db_session, yclients)
+    assert marts.is_campaigns_daily_fresh() is False
+    marts.refresh_campaigns_daily()
+    assert conversion_revenue() == {}
+    assert marts.is_campaigns_daily_fresh() is True
+
+
+def test_lead_created_after_booking_is_linked_on_next_run(db_session: Session, yclients):
+    yclients.put(21, "+79992220001", "2025-10-01T10:00:00+03:00", paid_full=1)
+    _sync(db_session, yclients)
+    assert db_session.query(Booking).filter(Booking.yclients_id == 21).one().lead_id is None
+
+    lead = _lead(db_session, "+79992220001")
+    lead_id = lead.id
+    result = _sync(db_session, yclients)
+
+    assert result["linked_late"] == 1
+    assert result["conversions"] == 1
+    assert db_session.query(Conversion).filter(Conversion.lead_id == lead_id).count() == 1
+
+
+def test_new_bookings_emit_booking_created(db_session: Session, yclients):
+    received = []
+
+    def handler(event_name, payload):
+        received.append(payload)
+
+    yclients.put(31, "+79993330001", "2025-10-01T10:00:00+03:00")
+    events.subscribe(events.BOOKING_CREATED, handler)
+    try:
+        _sync(db_session, yclients)
+        _sync(db_session, yclients)
+    finally:
+        events.unsubscribe(events.BOOKING_CREATED, handler)
+
+    assert received == [{
+        "id": "31",
+        "contact": {"phone": "+79993330001"},
+        "sku": "Релакс-массаж 60 мин",
+        "starts_at": "2025-10-05T07:00:00+00:00",
+        "source": "yclients",
+    }]
+
+
+def test_scheduler_registers_sync_bookings_job():
+    job = DeepCalmScheduler().scheduler.get_job("sync_bookings")
+
+    assert job is not None
+    assert job.max_instances == 1
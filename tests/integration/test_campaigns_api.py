@@ -4,9 +4,12 @@ DeepCalm — Campaigns API Integration Tests
 Тесты для CRUD операций campaigns API.
 Следует TESTPLAN.md и DEEP-CALM-INFRASTRUCTURE.md
 """
+from datetime import datetime, timedelta
+
 import pytest
 from fastapi.testclient import TestClient
 
+from app.core.pagination import encode_cursor
 from app.models.campaign import Campaign
 
 
@@ -261,3 +264,86 @@ def test_get_campaigns_filter_by_status(client: TestClient, db_session):
     data = response.json()
     assert data["total"] == 2
     assert all(item["status"] == "active" for item in data["items"])
+
+
+def _seed_campaigns(db_session, count: int) -> list:
+    """Кампании с убывающим created_at; две последние — с одинаковым"""
+    base = datetime(2025, 10, 1, 12, 0)
+    campaigns = []
+    for i in range(count):
+        campaign = Campaign(
+            title=f"Campaign {i+1}",
+            sku="RELAX-60",
+            budget_rub=10000,
+            channels=["vk"],
+            created_at=base - timedelta(minutes=min(i, count - 2))
+        )
+        db_session.add(campaign)
+        campaigns.append(campaign)
+    db_session.commit()
+    return campaigns
+
+
+def test_get_campaigns_cursor_walk(client: TestClient, db_session):
+    """
+    GET /api/v1/campaigns?cursor=... — keyset пагинация.
+
+    Given: 5 кампаний, у двух одинаковый created_at
+    When: Проходим страницы по next_cursor
+    Then: Все кампании возвращаются ровно один раз в порядке (created_at, id) DESC
+    """
+    campaigns = _seed_campaigns(db_session, 5)
+    expected = [
+        str(c.id) for c in sorted(campaigns, key=lambda c: (c.created_at, str(c.id)), reverse=True)
+    ]
+
+    seen = []
+    response = client.get("/api/v1/campaigns?page_size=2")
+    data = response.json()
+    assert data["total"] == 5
+    assert data["has_more"] is True
+    seen += [item["id"] for item in data["items"]]
+
+    while data["next_cursor"]:
+        response = client.get(f"/api/v1/campaigns?page_size=2&cursor={data['next_cursor']}")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] is None  # по умолчанию с курсором COUNT не считается
+        assert data["page"] is None
+        seen += [item["id"] for item in data["items"]]
+
+    assert seen == expected
+    assert data["has_more"] is False
+
+
+def test_get_campaigns_invalid_cursor(client: TestClient):
+    """
+    GET /api/v1/campaigns?cursor=мусор — 400.
+    """
+    response = client.get("/api/v1/campaigns?cursor=not-a-cursor")
+
+    assert response.status_code == 400
+
+    # Значения курсора не того типа (UUID(123) — AttributeError, а не ValueError)
+    wrong_types = encode_cursor(["2025-01-01T00:00:00", 123])
+    response = client.get(f"/api/v1/campaigns?cursor={wrong_types}")
+
+    assert response.status_code == 400
+
+
+def test_get_campaigns_total_modes(client: TestClient, db_session):
+    """
+    GET /api/v1/campaigns?total_mode=approx|none — total по статистике или без него.
+    """
+    _seed_campaigns(db_session, 3)
+
+    data = client.get("/api/v1/campaigns?total_mode=approx").json()
+    assert data["total_approximate"] is True
+    assert isinstance(data["total"], int)
+
+    data = client.get("/api/v1/campaigns?total_mode=none").json()
+    assert data["total"] is None
+    assert len(data["items"]) == 3
+
+    response = client.get("/api/v1/campaigns?total_mode=bogus")
+    assert response.status_code == 422
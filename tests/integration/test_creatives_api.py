@@ -0,0 +1,70 @@
+"""
+DeepCalm — Creatives API Integration Tests
+
+Тесты списка креативов: ограничение размера страницы и курсор.
+"""
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from app.models.campaign import Campaign
+from app.models.creative import Creative
+
+
+def _seed_creatives(db_session, count: int) -> Campaign:
+    campaign = Campaign(
+        title="Creatives campaign",
+        sku="RELAX-60",
+        budget_rub=10000,
+        channels=["vk"]
+    )
+    db_session.add(campaign)
+    db_session.flush()
+
+    base = datetime(2025, 10, 1, 12, 0)
+    for i in range(count):
+        db_session.add(Creative(
+            campaign_id=campaign.id,
+            variant="A",
+            title=f"Creative {i}",
+            body="Body",
+            created_at=base - timedelta(minutes=i)
+        ))
+    db_session.commit()
+    return campaign
+
+
+def test_get_creatives_page_size_is_capped(client: TestClient):
+    """
+    GET /api/v1/creatives?page_size=500 — размер страницы ограничен 100.
+    """
+    response = client.get("/api/v1/creatives?page_size=500")
+
+    assert response.status_code == 422
+
+
+def test_get_creatives_cursor_walk(client: TestClient, db_session):
+    """
+    GET /api/v1/creatives — страницы по next_cursor и по page.
+
+    Given: 5 креативов кампании
+    When: Проходим страницы по 2 курсором и через page=2
+    Then: Креативы идут от новых к старым, page и cursor совпадают
+    """
+    campaign = _seed_creatives(db_session, 5)
+    url = f"/api/v1/creatives?campaign_id={campaign.id}&page_size=2"
+
+    first = client.get(url).json()
+    assert first["total"] == 5
+    assert [item["title"] for item in first["items"]] == ["Creative 0", "Creative 1"]
+
+    by_cursor = client.get(f"{url}&cursor={first['next_cursor']}").json()
+    by_page = client.get(f"{url}&page=2").json()
+    assert [item["title"] for item in by_cursor["items"]] == ["Creative 2", "Creative 3"]
+    assert by_cursor["items"] == by_page["items"]
+    assert by_page["page"] == 2
+
+    last = client.get(f"{url}&cursor={by_cursor['next_cursor']}").json()
+    assert [item["title"] for item in last["items"]] == ["Creative 4"]
+    assert last["has_more"] is False
+    assert last["next_cursor"] is None
@@ -0,0 +1,71 @@
+"""
+Интеграционные тесты read-only режима (DC_FREEZE)
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.freeze import FREEZE_ENV, freeze_mode_gauge, freeze_state
+
+
+@pytest.fixture
+def toggle_file(tmp_path, monkeypatch):
+    monkeypatch.delenv(FREEZE_ENV, raising=False)
+    monkeypatch.setattr(freeze_state, "toggle_file", tmp_path / "freeze.enabled")
+    freeze_state.refresh()
+    yield freeze_state.toggle_file
+    monkeypatch.delenv(FREEZE_ENV, raising=False)
+    freeze_state.toggle_file.unlink(missing_ok=True)
+    freeze_state.refresh()
+
+
+def _create_campaign(client: TestClient):
+    return client.post("/api/v1/campaigns", json={
+        "title": "Freeze",
+        "sku": "RELAX-60",
+        "budget_rub": 10000,
+        "target_cac_rub": 500,
+        "target_roas": 3.0,
+        "channels": ["vk"],
+    })
+
+
+def test_admin_toggle_blocks_and_unblocks_mutations(client: TestClient, toggle_file):
+    response = client.put("/api/v1/admin/freeze", json={"enabled": True})
+
+    assert response.status_code == 200
+    assert response.json()["enabled"] is True
+    assert response.json()["persisted"] is True
+    assert toggle_file.exists()
+    assert freeze_mode_gauge._value.get() == 1
+
+    blocked = _create_campaign(client)
+    assert blocked.status_code == 503
+    assert blocked.json()["error"] == "read_only_mode"
+    assert client.get("/api/v1/admin/freeze").json()["source"] == "file"
+
+    # Переключатель доступен в read-only режиме
+    response = client.put("/api/v1/admin/freeze", json={"enabled": False})
+    assert response.json()["enabled"] is False
+    assert not toggle_file.exists()
+    assert _create_campaign(client).status_code == 201
+
+
+def test_middleware_reads_memory_not_filesystem(client: TestClient, toggle_file):
+    # Файл появился, но опрос ещё не прошёл — запрос не блокируется
+    toggle_file.touch()
+    assert _create_campaign(client).status_code == 201
+
+    freeze_state.refresh()
+    assert _create_campaign(client).status_code == 503
+
+
+def test_env_flag_wins_over_admin_toggle(client: TestClient, toggle_file, monkeypatch):
+    monkeypatch.setenv(FREEZE_ENV, "1")
+    freeze_state.refresh()
+
+    response = client.put("/api/v1/admin/freeze", json={"enabled": False})
+
+    assert response.status_code == 409
+    assert client.get("/api/v1/admin/freeze").json() | {"changed_at": None} == {
+        "enabled": True, "source": "env", "changed_at": None, "persisted": None
+    }
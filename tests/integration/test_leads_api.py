@@ -0,0 +1,154 @@
+"""
+Интеграционные тесты пакетного приёма лидов (POST /api/v1/leads/batch)
+"""
+from datetime import date, datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.models.campaign import Campaign
+from app.models.lead import Lead
+from app.models.mart import MartCampaignDaily
+from app.services.marts import MartsService
+
+
+def _post(client: TestClient, leads: list) -> dict:
+    response = client.post("/api/v1/leads/batch", json={"leads": leads})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_batch_normalizes_and_deduplicates_phones(client: TestClient, db_session):
+    """
+    Given: Один номер в трёх форматах, нераспознанный номер и второй номер
+    When: POST /api/v1/leads/batch
+    Then: Два лида; дубли получают один ID, самый ранний touch побеждает
+    """
+    data = _post(client, [
+        {"phone": "8 (999) 123-45-67", "utm_source": "vk", "first_touch_at": "2025-10-02T10:00:00+00:00"},
+        {"phone": "+7 999 123 45 67", "utm_source": "direct", "first_touch_at": "2025-10-01T10:00:00+00:00"},
+        {"phone": "123", "utm_source": "vk"},
+        {"phone": "9991234567", "web_id": "web-1"},
+        {"phone": "+79990000001", "utm_source": "avito"},
+    ])
+
+    assert data["received"] == 5
+    assert data["unique_phones"] == 2
+    assert data["inserted"] == 2
+    assert data["rejected"] == 1
+    ids = data["lead_ids"]
+    assert ids[0] == ids[1] == ids[3]
+    assert ids[2] is None
+    assert ids[4] not in (None, ids[0])
+
+    lead = db_session.scalars(select(Lead).where(Lead.phone == "+79991234567")).one()
+    assert str(lead.id) == ids[0]
+    assert lead.utm_source == "direct"
+    assert lead.first_touch_at == datetime(2025, 10, 1, 10, tzinfo=timezone.utc)
+    assert lead.web_id == "web-1"
+
+
+def test_existing_lead_keeps_earliest_first_touch(client: TestClient, db_session):
+    """
+    Given: Лид с first touch 5 октября из vk
+    When: Пакеты с более поздним и более ранним касанием
+    Then: Позднее касание только дополняет web_id, раннее заменяет UTM-метки
+    """
+    first = _post(client, [
+        {"phone": "+79991112233", "utm_source": "vk", "utm_campaign": "oct", "first_touch_at": "2025-10-05T00:00:00Z"}
+    ])
+    lead_id = first["lead_ids"][0]
+
+    later = _post(client, [
+        {"phone": "89991112233", "utm_source": "avito", "web_id": "web-2", "first_touch_at": "2025-10-07T00:00:00Z"}
+    ])
+    assert later["lead_ids"] == [lead_id]
+    assert (later["inserted"], later["updated"]) == (0, 1)
+
+    unchanged = _post(client, [
+        {"phone": "89991112233", "utm_source": "avito", "first_touch_at": "2025-10-08T00:00:00Z"}
+    ])
+    assert unchanged["lead_ids"] == [lead_id]
+    assert (unchanged["inserted"], unchanged["updated"]) == (0, 0)
+
+    lead = db_session.scalars(select(Lead).where(Lead.phone == "+79991112233")).one()
+    db_session.refresh(lead)
+    assert (lead.utm_source, lead.utm_campaign, lead.web_id) == ("vk", "oct", "web-2")
+
+    earlier = _post(client, [
+        {"phone": "9991112233", "utm_source": "direct", "first_touch_at": "2025-10-01T00:00:00Z"}
+    ])
+    assert earlier["lead_ids"] == [lead_id]
+
+    db_session.refresh(lead)
+    assert (lead.utm_source, lead.utm_campaign, lead.web_id) == ("direct", None, "web-2")
+    assert lead.first_touch_at == datetime(2025, 10, 1, tzinfo=timezone.utc)
+
+
+def test_earlier_first_touch_moves_lead_between_mart_days(client: TestClient, db_session):
+    """
+    Given: Витрина пересчитана, лид кампании с first touch 5 октября
+    When: Пакет приносит касание 1 октября
+    Then: Витрина устарела; после пересчёта лид учтён 1 октября, а не 5-го
+    """
+    campaign = Campaign(
+        title="Лидовый релакс",
+        sku="RELAX-60",
+        budget_rub=20000,
+        target_cac_rub=800,
+        target_roas=3.0,
+        channels=["vk"],
+        status="active",
+        ab_test_enabled=False,
+        # Создана давно: новая кампания сама по себе вызвала бы полный пересчёт
+        updated_at=datetime.now(timezone.utc) - timedelta(days=1)
+    )
+    db_session.add(campaign)
+    db_session.commit()
+    campaign_id = campaign.id
+    marts = MartsService(db_session)
+
+    def lead_days() -> dict:
+        db_session.expire_all()
+        rows = db_session.query(MartCampaignDaily).filter(
+            MartCampaignDaily.campaign_id == campaign_id,
+            MartCampaignDaily.leads_count > 0
+        ).all()
+        return {row.date: row.leads_count for row in rows}
+
+    _post(client, [{
+        "phone": "+79993334455", "utm_source": "vk", "utm_campaign": "лидовый релакс",
+        "first_touch_at": "2025-10-05T09:00:00Z"
+    }])
+    marts.refresh_campaigns_daily()
+    assert lead_days() == {date(2025, 10, 5): 1}
+
+    _post(client, [{
+        "phone": "+79993334455", "utm_source": "vk", "utm_campaign": "лидовый релакс",
+        "first_touch_at": "2025-10-01T09:00:00Z"
+    }])
+    assert marts.is_campaigns_daily_fresh() is False
+
+    assert marts.refresh_campaigns_daily()["mode"] == "incremental"
+    assert lead_days() == {date(2025, 10, 1): 1}
+
+
+def test_batch_query_count_is_constant(client: TestClient, query_counter):
+    """
+    Given: Пакеты из 10 и 500 лидов
+    When: POST /api/v1/leads/batch
+    Then: Одинаковое число SQL-запросов (без запроса на лид)
+    """
+    def ingest(start: int, count: int) -> int:
+        query_counter.reset()
+        data = _post(client, [{"phone": f"+7999{start + i:07d}"} for i in range(count)])
+        assert data["inserted"] == count
+        return query_counter.count
+
+    assert ingest(0, 10) == ingest(1000, 500)
+
+
+def test_batch_rejects_empty_request(client: TestClient):
+    response = client.post("/api/v1/leads/batch", json={"leads": []})
+
+    assert response.status_code == 422
@@ -0,0 +1,302 @@
+"""
+Интеграционные тесты витрины mart_campaigns_daily
+"""
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy.orm import Session
+
+from app.core.dates import get_business_tz, start_of_day
+from app.models.campaign import Campaign
+from app.models.conversion import Conversion
+from app.models.lead import Lead
+from app.models.mart import MartCampaignDaily
+from app.services.analytics_service import AnalyticsService
+from app.services.marts import MartsService
+from app.services.scheduler import DeepCalmScheduler
+from app.services.weekly_reports import WeeklyReportsService
+
+
+def _create_campaign(db_session: Session, title: str = "Осенний релакс") -> Campaign:
+    campaign = Campaign(
+        title=title,
+        sku="RELAX-60",
+        budget_rub=20000,
+        target_cac_rub=800,
+        target_roas=3.0,
+        channels=["vk", "direct"],
+        status="active",
+        ab_test_enabled=False
+    )
+    db_session.add(campaign)
+    db_session.flush()
+    return campaign
+
+
+def _add_conversion(
+    db_session: Session,
+    campaign: Campaign,
+    phone: str,
+    converted_at: datetime,
+    revenue_rub: float = 3500.0,
+    utm_source: str = "vk_ads",
+    channel_code: str = None,
+    ttp_days: int = None
+) -> Conversion:
+    lead = Lead(
+        phone=phone,
+        utm_source=utm_source,
+        utm_campaign=f"{campaign.title} / осень",
+        first_touch_at=converted_at
+    )
+    db_session.add(lead)
+    db_session.flush()
+
+    conversion = Conversion(
+        campaign_id=campaign.id,
+        lead_id=lead.id,
+        channel_code=channel_code,
+        revenue_rub=revenue_rub,
+        ttp_days=ttp_days,
+        converted_at=converted_at
+    )
+    db_session.add(conversion)
+    db_session.flush()
+    return conversion
+
+
+def _mart_rows(db_session: Session, campaign: Campaign) -> dict:
+    rows = db_session.query(MartCampaignDaily).filter(
+        MartCampaignDaily.campaign_id == campaign.id
+    ).all()
+    return {(row.channel_code, row.date): row for row in rows}
+
+
+def test_full_refresh_builds_daily_channel_rows(db_session: Session):
+    """Полный пересчёт раскладывает лиды и конверсии по дням и каналам"""
+    campaign = _create_campaign(db_session)
+    day_1 = datetime(2025, 10, 1, 9, 0, tzinfo=timezone.utc)
+    day_2 = datetime(2025, 10, 2, 9, 0, tzinfo=timezone.utc)
+
+    _add_conversion(db_session, campaign, "+79990000001", day_1, 3000.0, ttp_days=2)
+    _add_conversion(db_session, campaign, "+79990000002", day_1, 4000.0, ttp_days=6)
+    _add_conversion(db_session, campaign, "+79990000003", day_2, 5000.0, utm_source="yandex", ttp_days=1)
+    # 22:30 UTC 1 октября = 2 октября по Москве
+    _add_conversion(
+        db_session, campaign, "+79990000004",
+        datetime(2025, 10, 1, 22, 30, tzinfo=timezone.utc), 1000.0, channel_code="avito"
+    )
+    db_session.commit()
+
+    result = MartsService(db_session).refresh_campaigns_daily()
+
+    assert result["mode"] == "full"
+    rows = _mart_rows(db_session, campaign)
+    assert set(rows) == {
+        ("vk", date(2025, 10, 1)),
+        ("direct", date(2025, 10, 2)),
+        ("avito", date(2025, 10, 2)),
+        ("vk", date(2025, 10, 2)),
+    }
+
+    vk = rows[("vk", date(2025, 10, 1))]
+    assert vk.leads_count == 2
+    assert vk.conversions_count == 2
+    assert vk.revenue_rub == Decimal("7000.00")
+    assert (vk.ttp_days_sum, vk.ttp_days_count, vk.ttp_days_max) == (8, 2, 6)
+
+    # лид пришёл из VK (utm), конверсия явно записана на Avito
+    avito = rows[("avito", date(2025, 10, 2))]
+    assert (avito.leads_count, avito.conversions_count) == (0, 1)
+    assert avito.ttp_days_count == 0
+    assert avito.ttp_days_max is None
+    vk_lead = rows[("vk", date(2025, 10, 2))]
+    assert (vk_lead.leads_count, vk_lead.conversions_count) == (1, 0)
+
+
+def test_incremental_refresh_recomputes_only_touched_days(db_session: Session):
+    """Инкрементальный пересчёт не трогает дни без новых строк"""
+    campaign = _create_campaign(db_session)
+    old_day = datetime(2025, 9, 1, 9, 0, tzinfo=timezone.utc)
+    conversion = _add_conversion(db_session, campaign, "+79990000011", old_day)
+    old_created_at = datetime.now(timezone.utc) - timedelta(days=1)
+    conversion.created_at = old_created_at
+    conversion.updated_at = old_created_at
+    # Новая кампания сама по себе вызвала бы полный пересчёт
+    campaign.updated_at = old_created_at
+    db_session.query(Lead).filter(Lead.id == conversion.lead_id).update(
+        {"created_at": old_created_at, "updated_at": old_created_at}
+    )
+    db_session.commit()
+
+    service = MartsService(db_session)
+    service.refresh_campaigns_daily()
+
+    # Портим строку старого дня: инкрементальный пересчёт её не перезапишет
+    old_row = _mart_rows(db_session, campaign)[("vk", date(2025, 9, 1))]
+    old_row.revenue_rub = Decimal("1.00")
+    db_session.commit()
+
+    new_day = datetime(2025, 10, 5, 9, 0, tzinfo=timezone.utc)
+    _add_conversion(db_session, campaign, "+79990000012", new_day, 2500.0)
+    db_session.commit()
+    assert service.is_campaigns_daily_fresh() is False
+
+    result = service.refresh_campaigns_daily()
+
+    assert result["mode"] == "incremental"
+    assert result["days"] == 1
+    assert service.is_campaigns_daily_fresh() is True
+
+    rows = _mart_rows(db_session, campaign)
+    assert rows[("vk", date(2025, 9, 1))].revenue_rub == Decimal("1.00")
+    assert rows[("vk", date(2025, 10, 5))].revenue_rub == Decimal("2500.00")
+
+    # Полный пересчёт восстанавливает всё
+    service.refresh_campaigns_daily(full=True)
+    rows = _mart_rows(db_session, campaign)
+    assert rows[("vk", date(2025, 9, 1))].revenue_rub == Decimal("3500.00")
+
+
+
+def test_campaign_changes_make_mart_stale(client, db_session: Session):
+    """
+    Given: Витрина пересчитана; лид с меткой «Весенний релакс»
+    When: Кампанию переименовывают под метку, затем удаляют через API
+    Then: Оба раза витрина устарела; после переименования лид учтён кампании
+    """
+    campaign = _create_campaign(db_session, title="Осенний релакс")
+    campaign.updated_at = datetime.now(timezone.utc) - timedelta(days=1)
+    db_session.add(Lead(phone="+79990000051", utm_source="vk", utm_campaign="Весенний релакс"))
+    db_session.commit()
+
+    service = MartsService(db_session)
+    service.refresh_campaigns_daily()
+    assert _mart_rows(db_session, campaign) == {}
+    assert service.is_campaigns_daily_fresh() is True
+
+    campaign.title = "Весенний релакс"
+    db_session.commit()
+    assert service.is_campaigns_daily_fresh() is False
+
+    assert service.refresh_campaigns_daily()["mode"] == "full"
+    assert sum(row.leads_count for row in _mart_rows(db_session, campaign).values()) == 1
+
+    assert client.delete(f"/api/v1/campaigns/{campaign.id}").status_code == 204
+    assert service.is_campaigns_daily_fresh() is False
+    assert service.refresh_campaigns_daily()["mode"] == "full"
+
+
+def test_analytics_reads_mart_only_when_fresh(db_session: Session):
+    """AnalyticsService читает витрину, пока она актуальна"""
+    db_session.query(Campaign).delete()
+    campaign = _create_campaign(db_session)
+    now = datetime.now(timezone.utc)
+    _add_conversion(db_session, campaign, "+79990000021", now, 3000.0)
+    db_session.commit()
+
+    analytics = AnalyticsService(db_session)
+    raw_summary = analytics.get_dashboard_summary()
+    raw_metrics = analytics.get_campaign_metrics(campaign.id)["metrics"]
+
+    MartsService(db_session).refresh_campaigns_daily()
+    mart_summary = analytics.get_dashboard_summary()
+    mart_metrics = analytics.get_campaign_metrics(campaign.id)["metrics"]
+
+    assert mart_summary.total_revenue_rub == raw_summary.total_revenue_rub == 3000.0
+    assert mart_summary.total_conversions == raw_summary.total_conversions == 1
+    assert mart_metrics.revenue_rub == raw_metrics.revenue_rub
+    assert mart_metrics.leads_count == raw_metrics.leads_count
+
+    # Значение из витрины действительно используется
+    db_session.query(MartCampaignDaily).update({"revenue_rub": 100})
+    db_session.commit()
+    assert analytics.get_dashboard_summary().total_revenue_rub == 100.0
+
+    # Новая конверсия делает витрину неактуальной — читаем сырые данные
+    _add_conversion(db_session, campaign, "+79990000022", now, 2000.0)
+    db_session.commit()
+    assert analytics.get_dashboard_summary().total_revenue_rub == 5000.0
+
+
+def test_weekly_data_uses_mart(db_session: Session):
+    """Недельный отчёт считает метрики кампаний агрегатами (витрина или сырые)"""
+    campaign = _create_campaign(db_session, title="Недельная кампания")
+    now = datetime.now(timezone.utc)
+    _add_conversion(db_session, campaign, "+79990000031", now, 3000.0)
+    _add_conversion(db_session, campaign, "+79990000032", now, 2000.0)
+    db_session.commit()
+
+    reports = WeeklyReportsService(db_session)
+    raw = reports.get_weekly_data()
+    raw_campaign = next(c for c in raw["campaigns"] if c["id"] == campaign.id)
+
+    MartsService(db_session).refresh_campaigns_daily()
+    mart = reports.get_weekly_data()
+    mart_campaign = next(c for c in mart["campaigns"] if c["id"] == campaign.id)
+
+    assert raw_campaign["leads"] == mart_campaign["leads"] == 2
+    assert raw_campaign["conversions"] == mart_campaign["conversions"] == 2
+    assert raw_campaign["revenue"] == mart_campaign["revenue"] == Decimal("5000.00")
+    assert mart["summary"]["total_conversions"] >= 2
+
+
+
+def test_weekly_leads_match_mart_by_first_touch_and_literal_title(db_session: Session):
+    """
+    Given: Кампания «50%_off»; лид с её меткой, лид со старым first touch
+           и лид, которого название поймало бы только как LIKE-шаблон
+    When: Недельный отчёт по сырым данным и по витрине
+    Then: В обоих путях учтён только первый лид
+    """
+    campaign = _create_campaign(db_session, title="50%_off")
+    now = datetime.now(timezone.utc)
+    db_session.add_all([
+        Lead(phone="+79990000041", utm_source="vk", utm_campaign="Акция 50%_OFF", first_touch_at=now),
+        Lead(phone="+79990000042", utm_source="vk", utm_campaign="50%_off", first_touch_at=now - timedelta(days=30)),
+        Lead(phone="+79990000043", utm_source="vk", utm_campaign="500 xoff", first_touch_at=now),
+    ])
+    db_session.commit()
+
+    reports = WeeklyReportsService(db_session)
+    raw_campaign = next(c for c in reports.get_weekly_data()["campaigns"] if c["id"] == campaign.id)
+
+    MartsService(db_session).refresh_campaigns_daily()
+    mart_campaign = next(c for c in reports.get_weekly_data()["campaigns"] if c["id"] == campaign.id)
+
+    assert raw_campaign["leads"] == mart_campaign["leads"] == 1
+
+
+
+def test_weekly_window_is_whole_days_in_both_paths(db_session: Session):
+    """
+    Given: Конверсии сегодня и в первые минуты дня неделю назад
+    When: Недельный отчёт по сырым данным и по витрине
+    Then: Период — 7 целых дней по сегодня; вторая конверсия вне его в обоих путях
+    """
+    campaign = _create_campaign(db_session, title="Оконная кампания")
+    today = datetime.now(get_business_tz()).date()
+    _add_conversion(db_session, campaign, "+79990000061", datetime.now(timezone.utc), 3000.0)
+    _add_conversion(db_session, campaign, "+79990000062", start_of_day(today - timedelta(days=7)) + timedelta(minutes=5))
+    db_session.commit()
+
+    reports = WeeklyReportsService(db_session)
+    raw = reports.get_weekly_data()
+    MartsService(db_session).refresh_campaigns_daily()
+    mart = reports.get_weekly_data()
+
+    assert raw["period"]["start_date"] == (today - timedelta(days=6)).isoformat()
+    assert raw["period"]["end_date"] == today.isoformat()
+    for report in (raw, mart):
+        totals = next(c for c in report["campaigns"] if c["id"] == campaign.id)
+        assert (totals["leads"], totals["conversions"]) == (1, 1)
+        assert report["summary"]["total_conversions"] == sum(c["conversions"] for c in report["campaigns"])
+
+
+def test_scheduler_registers_compute_marts_job():
+    """Пересчёт витрин зарегистрирован в планировщике"""
+    scheduler = DeepCalmScheduler()
+
+    job = scheduler.scheduler.get_job("compute_marts")
+
+    assert job is not None
@@ -0,0 +1,41 @@
+"""
+Интеграционные тесты эндпоинта /metrics
+"""
+import uuid
+
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+
+def _sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_request_metrics_use_route_template(client: TestClient):
+    route = "/api/v1/campaigns/{campaign_id}"
+    before = _sample("dc_http_requests_total", method="GET", route=route, status="404")
+
+    client.get(f"/api/v1/campaigns/{uuid.uuid4()}")
+    client.get(f"/api/v1/campaigns/{uuid.uuid4()}")
+
+    assert _sample("dc_http_requests_total", method="GET", route=route, status="404") == before + 2
+    assert _sample("dc_http_request_duration_seconds_count", method="GET", route=route) >= 2
+    assert _sample("dc_http_requests_in_flight") == 0
+
+
+def test_metrics_endpoint_exposes_all_groups(client: TestClient):
+    client.get("/api/v1/campaigns")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    for name in (
+        "dc_http_request_duration_seconds_bucket",
+        "dc_db_pool_checked_out",
+        "dc_db_pool_checkout_seconds",
+        "dc_freeze_mode",
+    ):
+        assert name in body
+    assert 'route="/api/v1/campaigns"' in body
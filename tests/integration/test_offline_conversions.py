@@ -0,0 +1,215 @@
+"""
+Интеграционные тесты выгрузки офлайн-конверсий в Метрику (upload_conversions)
+"""
+import csv
+import io
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.integrations.yandex_metrika import YandexMetrikaClient
+from app.models.conversion import Conversion
+from app.models.lead import Lead
+from app.models.metrika_upload import MetrikaUpload, MetrikaUploadedConversion
+from app.services.offline_conversions import OfflineConversionsService
+from app.services.scheduler import DeepCalmScheduler
+
+
+class _FakeMetrika:
+    """Management API Метрики: принимает файлы и отдаёт список загрузок"""
+
+    def __init__(self) -> None:
+        self.uploadings = []
+        self.fail_next = []  # "error" — HTTP 500, "timeout" — файл принят, ответ потерян
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        if request.method == "GET":
+            return httpx.Response(200, json={"uploadings": self.uploadings})
+
+        mode = self.fail_next.pop(0) if self.fail_next else None
+        if mode == "error":
+            return httpx.Response(500, json={"errors": [{"message": "internal"}]})
+
+        body = request.content.decode()
+        lines = body[body.index("ClientId,"):].split("\r\n")[0]
+        uploading = {
+            "id": len(self.uploadings) + 1,
+            "comment": request.url.params["comment"],
+            "rows": list(csv.reader(io.StringIO(lines)))[1:],
+        }
+        self.uploadings.append(uploading)
+        if mode == "timeout":
+            raise httpx.ReadTimeout("timed out", request=request)
+        return httpx.Response(200, json={"uploading": {"id": uploading["id"], "status": "UPLOADED"}})
+
+    @property
+    def client_ids(self):
+        return [row[0] for uploading in self.uploadings for row in uploading["rows"]]
+
+
+@pytest.fixture
+def metrika():
+    return _FakeMetrika()
+
+
+def _service(db_session: Session, fake: _FakeMetrika, **limits) -> OfflineConversionsService:
+    client = YandexMetrikaClient(
+        token="token",
+        counter_id=100500,
+        http_client=httpx.Client(transport=httpx.MockTransport(fake.handler))
+    )
+    return OfflineConversionsService(db_session, client=client, **limits)
+
+
+# Полдень два дня назад — внутри окна metrika_upload_lookback_days
+RECENT = datetime.now(timezone.utc).replace(hour=12, minute=0, second=0, microsecond=0) - timedelta(days=2)
+
+
+def _conversions(
+    db_session: Session,
+    count: int,
+    client_id: str = "ym{}",
+    converted_at: datetime = RECENT
+) -> None:
+    offset = db_session.query(Lead).count()
+    for i in range(count):
+        lead = Lead(phone=f"+7999555{offset + i:04d}", client_id=client_id.format(i) if client_id else None)
+        db_session.add(lead)
+        db_session.flush()
+        db_session.add(Conversion(
+            lead_id=lead.id,
+            revenue_rub=3500,
+            converted_at=converted_at + timedelta(minutes=i)
+        ))
+    db_session.commit()
+
+
+def test_uploads_in_row_capped_chunks(db_session: Session, metrika):
+    _conversions(db_session, 7)
+
+    result = _service(db_session, metrika, max_rows=3).upload_conversions()
+
+    assert result["status"] == "ok"
+    assert (result["files"], result["rows"]) == (3, 7)
+    assert [len(u["rows"]) for u in metrika.uploadings] == [3, 3, 1]
+    assert metrika.uploadings[0]["rows"][0] == ["ym0", "booking", str(int(RECENT.timestamp())), "3500.00", "RUB"]
+    assert db_session.query(MetrikaUpload).filter(MetrikaUpload.status == "uploaded").count() == 3
+
+
+def test_chunks_respect_byte_limit(db_session: Session, metrika):
+    _conversions(db_session, 5)
+    header = len(b"ClientId,Target,DateTime,Price,Currency\n")
+    line = len(b"ym0,booking,1759320000,3500.00,RUB\n")
+
+    _service(db_session, metrika, max_bytes=header + 2 * line).upload_conversions()
+
+    assert [len(u["rows"]) for u in metrika.uploadings] == [2, 2, 1]
+
+
+def test_repeated_run_sends_nothing_twice(db_session: Session, metrika):
+    _conversions(db_session, 4)
+    service = _service(db_session, metrika, max_rows=10)
+    service.upload_conversions()
+
+    again = service.upload_conversions()
+    assert again.get("files", 0) == 0
+
+    _conversions(db_session, 1, client_id="ym_new{}")
+    service.upload_conversions()
+
+    assert sorted(metrika.client_ids) == ["ym0", "ym1", "ym2", "ym3", "ym_new0"]
+
+
+def test_resumes_after_server_error(db_session: Session, metrika):
+    _conversions(db_session, 6)
+    metrika.fail_next = [None, "error"]
+    service = _service(db_session, metrika, max_rows=2)
+
+    interrupted = service.upload_conversions()
+    assert interrupted["status"] == "interrupted"
+    assert (interrupted["files"], interrupted["pending"]) == (1, 1)
+
+    resumed = service.upload_conversions()
+
+    assert resumed["status"] == "ok"
+    assert resumed["released"] == 1
+    assert sorted(metrika.client_ids) == [f"ym{i}" for i in range(6)]
+    assert db_session.query(MetrikaUpload).filter(MetrikaUpload.status != "uploaded").count() == 0
+
+
+def test_lost_response_is_reconciled_without_resend(db_session: Session, metrika):
+    _conversions(db_session, 3)
+    metrika.fail_next = ["timeout"]
+    service = _service(db_session, metrika, max_rows=10)
+
+    assert service.upload_conversions()["pending"] == 1
+
+    resumed = service.upload_conversions()
+
+    assert resumed["confirmed"] == 1
+    assert resumed.get("files", 0) == 0
+    assert len(metrika.uploadings) == 1
+    upload = db_session.query(MetrikaUpload).one()
+    assert (upload.status, upload.metrika_upload_id) == ("uploaded", "1")
+
+
+def test_leads_without_client_id_are_skipped(db_session: Session, metrika):
+    _conversions(db_session, 2, client_id=None)
+    _conversions(db_session, 1, client_id="ym_known{}")
+
+    result = _service(db_session, metrika).upload_conversions()
+
+    assert result["rows"] == 1
+    assert metrika.client_ids == ["ym_known0"]
+    assert db_session.query(MetrikaUploadedConversion).count() == 1
+
+
+def test_client_id_filled_later_is_uploaded_next_run(db_session: Session, metrika):
+    _conversions(db_session, 1, client_id=None)
+    _conversions(db_session, 1, client_id="ym_first{}")
+    service = _service(db_session, metrika)
+    service.upload_conversions()
+
+    late = db_session.query(Lead).filter(Lead.client_id.is_(None)).one()
+    late.client_id = "ym_late"
+    db_session.commit()
+    service.upload_conversions()
+
+    assert metrika.client_ids == ["ym_first0", "ym_late"]
+
+
+def test_lower_id_committed_after_upload_is_not_skipped(db_session: Session, metrika):
+    # id взят из последовательности раньше, а строка закоммичена позже выгрузки
+    reserved_id = db_session.execute(text("SELECT nextval('conversions_id_seq')")).scalar()
+    _conversions(db_session, 2)
+    service = _service(db_session, metrika)
+    service.upload_conversions()
+
+    lead = Lead(phone="+79995559999", client_id="ym_slow")
+    db_session.add(lead)
+    db_session.flush()
+    db_session.add(Conversion(id=reserved_id, lead_id=lead.id, revenue_rub=3500, converted_at=RECENT))
+    db_session.commit()
+    service.upload_conversions()
+
+    assert sorted(metrika.client_ids) == ["ym0", "ym1", "ym_slow"]
+
+
+def test_conversions_outside_lookback_are_skipped(db_session: Session, metrika):
+    _conversions(db_session, 1, client_id="ym_old{}", converted_at=RECENT - timedelta(days=30))
+    _conversions(db_session, 1, client_id="ym_recent{}")
+
+    result = _service(db_session, metrika, lookback_days=21).upload_conversions()
+
+    assert result["rows"] == 1
+    assert metrika.client_ids == ["ym_recent0"]
+
+
+def test_scheduler_registers_upload_conversions_job():
+    job = DeepCalmScheduler().scheduler.get_job("upload_conversions")
+
+    assert job is not None
+    assert job.max_instances == 1
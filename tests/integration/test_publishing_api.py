@@ -1,14 +1,21 @@
 """
 Интеграционные тесты для Publishing API
 """
+import json
+import time
 from datetime import datetime, timezone
 
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+from app.integrations.yandex_direct import YandexDirectClient
 from app.models.campaign import Campaign
 from app.models.creative import Creative
+from app.models.placement import Placement
+from app.services.publishing_service import PublishingService
 
 
 def test_publish_campaign_success(client: TestClient, db_session: Session):
@@ -341,3 +348,202 @@ def test_pause_campaign_no_active_placements(client: TestClient, db_session: Ses
 
     assert data["paused_count"] == 0
     assert data["failed_count"] == 0
+
+
+def _campaign_with_creatives(db_session: Session, channels: list, count: int) -> Campaign:
+    campaign = Campaign(
+        title="Кампания для параллельной публикации",
+        sku="RELAX-60",
+        budget_rub=10000,
+        target_cac_rub=800,
+        target_roas=3.0,
+        channels=channels,
+        status="active",
+        ab_test_enabled=False
+    )
+    db_session.add(campaign)
+    db_session.flush()
+    for i in range(count):
+        db_session.add(Creative(
+            campaign_id=campaign.id,
+            variant=chr(ord("A") + i),
+            title=f"Креатив {i}",
+            body="Текст",
+            moderation_status="approved"
+        ))
+    db_session.commit()
+    return campaign
+
+
+def test_publish_campaign_runs_channel_calls_concurrently(db_session: Session, monkeypatch):
+    """Время публикации близко к самому медленному вызову, а не к сумме"""
+    monkeypatch.setattr(settings, "publish_mock_latency_ms", 200)
+    campaign = _campaign_with_creatives(db_session, ["vk", "direct", "avito"], 3)
+
+    started = time.perf_counter()
+    result = PublishingService(db_session, channel_concurrency=3).publish_campaign(campaign.id)
+    elapsed = time.perf_counter() - started
+
+    assert result["success_count"] == 9
+    assert result["failed_count"] == 0
+    assert elapsed < 9 * 0.2 / 2  # последовательно было бы 1.8 с
+    assert db_session.query(Placement).filter(Placement.campaign_id == campaign.id).count() == 9
+
+
+def test_publish_campaign_limits_per_channel_concurrency(db_session: Session):
+    """Одновременных вызовов одной площадки не больше channel_concurrency"""
+    campaign = _campaign_with_creatives(db_session, ["vk"], 4)
+    service = PublishingService(db_session, channel_concurrency=2)
+
+    active = []
+    peak = []
+    original = service.vk_client.create_campaign
+
+    def create_campaign(**kwargs):
+        active.append(1)
+        peak.append(len(active))
+        time.sleep(0.05)
+        active.pop()
+        return original(**kwargs)
+
+    service.vk_client.create_campaign = create_campaign
+    result = service.publish_campaign(campaign.id)
+
+    assert result["success_count"] == 4
+    assert max(peak) == 2
+
+
+def test_publish_campaign_stream(client: TestClient, db_session: Session):
+    """NDJSON-стрим: строка на размещение (включая ошибки) и итог"""
+    # Стрим закрывает сессию по завершении — id запоминаем заранее
+    campaign_id = str(_campaign_with_creatives(db_session, ["vk"], 2).id)
+
+    response = client.post(
+        "/api/v1/publishing/publish/stream",
+        json={"campaign_id": campaign_id, "channels": ["vk", "unknown"]}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in response.text.splitlines()]
+
+    placements = [e for e in events if e["event"] == "placement"]
+    assert len(placements) == 4
+    assert sum(e["status"] == "published" for e in placements) == 2
+    failed = [e for e in placements if e["status"] == "failed"]
+    assert all(e["channel"] == "unknown" and e["error"] for e in failed)
+    assert events[-1] == {
+        "event": "completed",
+        "campaign_id": campaign_id,
+        "success_count": 2,
+        "failed_count": 2,
+    }
+
+
+def test_publish_campaign_stream_validation_error(client: TestClient):
+    """Ошибка проверки возвращается до начала стрима"""
+    response = client.post(
+        "/api/v1/publishing/publish/stream",
+        json={"campaign_id": "00000000-0000-0000-0000-000000000000"}
+    )
+
+    assert response.status_code == 400
+
+
+def test_pause_campaign_batches_direct_suspend(db_session: Session):
+    """50 размещений в Директе приостанавливаются одним вызовом campaigns/suspend"""
+    campaign = _campaign_with_creatives(db_session, ["direct"], 1)
+    creative_id = db_session.query(Creative.id).filter(Creative.campaign_id == campaign.id).scalar()
+    for i in range(50):
+        db_session.add(Placement(
+            campaign_id=campaign.id,
+            creative_id=creative_id,
+            channel_code="direct",
+            external_campaign_id=str(1000 + i),
+            status="active"
+        ))
+    db_session.commit()
+
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        ids = json.loads(request.content)["params"]["CampaignIds"]
+        calls.append(ids)
+        results = [
+            {"Id": i, "Errors": [{"Code": 8800, "Message": "Объект не найден"}]} if i == 1049 else {"Id": i}
+            for i in ids
+        ]
+        return httpx.Response(200, json={"result": {"SuspendResults": results}})
+
+    service = PublishingService(db_session)
+    service.direct_client = YandexDirectClient(
+        token="token",
+        http_client=httpx.Client(transport=httpx.MockTransport(handler))
+    )
+
+    result = service.pause_campaign(campaign.id)
+
+    assert len(calls) == 1 and len(calls[0]) == 50
+    assert result == {"paused_count": 49, "failed_count": 1}
+    still_active = db_session.query(Placement.external_campaign_id).filter(
+        Placement.campaign_id == campaign.id, Placement.status == "active"
+    ).all()
+    assert still_active == [("1049",)]
+
+
+def test_publish_campaign_batches_direct_add(db_session: Session):
+    """Креативы для Директа создаются пачкой campaigns/add, ошибки — по элементам"""
+    campaign = _campaign_with_creatives(db_session, ["direct"], 3)
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        campaigns = json.loads(request.content)["params"]["Campaigns"]
+        calls.append(len(campaigns))
+        results = [{"Id": 500 + i} for i in range(len(campaigns))]
+        results[1] = {"Errors": [{"Code": 5005, "Message": "Поле задано неверно"}]}
+        return httpx.Response(200, json={"result": {"AddResults": results}})
+
+    service = PublishingService(db_session)
+    service.direct_client = YandexDirectClient(
+        token="token",
+        http_client=httpx.Client(transport=httpx.MockTransport(handler))
+    )
+
+    result = service.publish_campaign(campaign.id)
+
+    assert calls == [3]
+    assert result["success_count"] == 2
+    assert result["failed_count"] == 1
+    assert sorted(p.external_campaign_id for p in result["placements"]) == ["500", "502"]
+
+
+def test_open_circuit_pauses_publishing_to_channel(client: TestClient, db_session: Session):
+    """После серии 5xx Директа автомат открывается и публикация в канал не выполняется"""
+    campaign = _campaign_with_creatives(db_session, ["direct", "vk"], 1)
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(503, json={})
+
+    service = PublishingService(db_session)
+    service.direct_client = YandexDirectClient(
+        token="token",
+        http_client=httpx.Client(transport=httpx.MockTransport(handler))
+    )
+    breaker = service.direct_client.resilience.breaker("direct")
+    for _ in range(settings.circuit_min_calls):
+        breaker.record(failed=False)
+
+    first = service.publish_campaign(campaign.id)
+    attempts = len(calls)
+    second = service.publish_campaign(campaign.id)
+
+    assert attempts == 1  # первая же 503 превысила порог 2% — без повторов
+    assert len(calls) == attempts
+    assert (first["success_count"], first["failed_count"]) == (1, 1)
+    assert (second["success_count"], second["failed_count"]) == (1, 1)
+
+    health = client.get("/api/v1/publishing/health/channels").json()
+    assert health["channels"]["direct"]["state"] == "open"
+    assert health["channels"]["direct"]["paused_until"] is not None
@@ -0,0 +1,80 @@
+"""
+Интеграционные тесты учёта SQL-запросов на HTTP-запрос
+"""
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import select, text
+
+from app.core import query_stats
+from app.core.config import settings
+from app.core.db import get_db
+from app.core.middleware import RequestContextMiddleware
+from app.models.setting import Setting
+
+
+class _RecordingLogger:
+    def __init__(self) -> None:
+        self.events = []
+
+    def warning(self, event, **kwargs) -> None:
+        self.events.append((event, kwargs))
+
+
+def test_repeated_statement_is_flagged_as_n_plus_one(db_session, monkeypatch):
+    for category in ("financial", "pricing", "alerts", "ai"):
+        db_session.add(Setting(key=f"{category}_key", value="1", value_type="int", category=category))
+    db_session.commit()
+    recorder = _RecordingLogger()
+    monkeypatch.setattr(query_stats, "logger", recorder)
+    monkeypatch.setattr(settings, "sql_n_plus_one_threshold", 3)
+
+    app = FastAPI()
+    app.add_middleware(RequestContextMiddleware)
+
+    @app.get("/per-category")
+    def per_category(db=Depends(get_db)):
+        categories = db.scalars(select(Setting.category).distinct()).all()
+        return {
+            category: db.scalars(select(Setting.key).where(Setting.category == category)).all()
+            for category in categories
+        }
+
+    app.dependency_overrides[get_db] = lambda: db_session
+
+    response = TestClient(app).get("/per-category")
+
+    assert response.status_code == 200
+    flagged = [kwargs for event, kwargs in recorder.events if event == "sql_n_plus_one_suspected"]
+    assert len(flagged) == 1
+    assert flagged[0]["executions"] == 4
+    assert "WHERE settings.category" in flagged[0]["statement"]
+
+
+def test_slow_query_is_logged_with_parameters(db_session, monkeypatch):
+    recorder = _RecordingLogger()
+    monkeypatch.setattr(query_stats, "logger", recorder)
+    monkeypatch.setattr(settings, "sql_slow_query_ms", 0)
+
+    db_session.execute(text("SELECT :phone"), {"phone": "+79991234567"})
+
+    event, kwargs = recorder.events[-1]
+    assert event == "sql_slow_query"
+    assert kwargs["parameters"] == {"phone": "+79991234567"}  # маскирует mask_pii при записи
+
+
+def test_server_timing_header_counts_queries(db_session):
+    app = FastAPI()
+    app.add_middleware(RequestContextMiddleware, server_timing=True)
+
+    @app.get("/queries")
+    def queries(db=Depends(get_db)):
+        db.execute(text("SELECT 1"))
+        db.execute(text("SELECT 2"))
+        return {}
+
+    app.dependency_overrides[get_db] = lambda: db_session
+
+    response = TestClient(app).get("/queries")
+
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+    assert 'desc="2 queries"' in response.headers["Server-Timing"]
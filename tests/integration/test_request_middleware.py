@@ -0,0 +1,22 @@
+"""
+Интеграционные тесты RequestContextMiddleware (correlation ID, тайминг)
+"""
+import uuid
+
+from fastapi.testclient import TestClient
+
+
+def test_correlation_id_is_echoed(client: TestClient):
+    response = client.get("/health", headers={"X-Correlation-ID": "req-123"})
+
+    assert response.status_code == 200
+    assert response.headers["X-Correlation-ID"] == "req-123"
+    assert float(response.headers["X-Response-Time-Ms"]) >= 0
+
+
+def test_correlation_id_is_generated(client: TestClient):
+    first = client.get("/health").headers["X-Correlation-ID"]
+    second = client.get("/api/v1/campaigns").headers["X-Correlation-ID"]
+
+    assert uuid.UUID(first) and uuid.UUID(second)
+    assert first != second
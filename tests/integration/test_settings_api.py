@@ -7,6 +7,7 @@ DeepCalm — Settings API Integration Tests
 import pytest
 from fastapi.testclient import TestClient
 
+from app.core.pagination import encode_cursor
 from app.models.setting import Setting
 
 
@@ -283,6 +284,82 @@ def test_bulk_update_settings(client: TestClient):
     assert response1.json()["updated_by"] == "bulk_admin"
 
 
+def test_bulk_update_uses_single_statement(client: TestClient, query_counter):
+    """
+    POST /api/v1/settings/bulk — число запросов не зависит от размера пакета.
+
+    Given: Пакеты из 2 и 20 настроек (часть ключей уже существует)
+    When: POST /api/v1/settings/bulk
+    Then: Одинаковое число SQL-запросов, значения обновлены
+    """
+    def bulk(count: int, value: str) -> int:
+        query_counter.reset()
+        response = client.post("/api/v1/settings/bulk", json={
+            "settings": [
+                {"key": f"bulk_{i}", "value": value, "value_type": "int", "category": "ai"}
+                for i in range(count)
+            ],
+            "updated_by": "bulk_admin"
+        })
+        assert response.status_code == 200
+        assert [item["key"] for item in response.json()] == [f"bulk_{i}" for i in range(count)]
+        return query_counter.count
+
+    assert bulk(2, "1") == bulk(20, "2")
+
+    response = client.get("/api/v1/settings/bulk_1")
+    assert response.json()["value"] == "2"
+
+
+def test_bulk_update_invalid_value_writes_nothing(client: TestClient):
+    """
+    POST /api/v1/settings/bulk — ошибка валидации до записи.
+
+    Given: Пакет, где второе значение не приводится к типу
+    When: POST /api/v1/settings/bulk
+    Then: 422, первая настройка не создана
+    """
+    response = client.post("/api/v1/settings/bulk", json={
+        "settings": [
+            {"key": "bulk_ok", "value": "1", "value_type": "int", "category": "ai"},
+            {"key": "bulk_bad", "value": "abc", "value_type": "int", "category": "ai"}
+        ]
+    })
+
+    assert response.status_code == 422
+    assert client.get("/api/v1/settings/bulk_ok").status_code == 404
+
+
+def test_settings_by_categories_query_count_is_constant(client: TestClient, db_session, query_counter):
+    """
+    GET /api/v1/settings/categories — один проход независимо от числа категорий.
+
+    Given: 1 категория, затем 4 категории
+    When: GET /api/v1/settings/categories
+    Then: Одинаковое число SQL-запросов, группы упорядочены по ключу
+    """
+    def categories() -> int:
+        query_counter.reset()
+        response = client.get("/api/v1/settings/categories")
+        assert response.status_code == 200
+        return query_counter.count
+
+    db_session.add(Setting(key="ai_b", value="1", value_type="int", category="ai"))
+    db_session.add(Setting(key="ai_a", value="1", value_type="int", category="ai"))
+    db_session.commit()
+    single = categories()
+
+    for category in ("financial", "pricing", "alerts"):
+        db_session.add(Setting(key=f"{category}_key", value="1", value_type="int", category=category))
+    db_session.commit()
+    assert categories() == single
+
+    groups = {group["category"]: group for group in client.get("/api/v1/settings/categories").json()}
+    assert set(groups) == {"ai", "financial", "pricing", "alerts"}
+    assert [item["key"] for item in groups["ai"]["settings"]] == ["ai_a", "ai_b"]
+    assert groups["ai"]["count"] == 2
+
+
 def test_settings_validation_errors(client: TestClient):
     """
     Тестирование валидации настроек.
@@ -346,4 +423,36 @@ def test_get_settings_with_filters(client: TestClient):
     response = client.get("/api/v1/settings?page=1&page_size=2")
     data = response.json()
     assert len(data["settings"]) == 2
-    assert data["page_size"] == 2
\ No newline at end of file
+    assert data["page_size"] == 2
+
+
+def test_get_settings_cursor_walk(client: TestClient):
+    """
+    GET /api/v1/settings?cursor=... — keyset пагинация по (category, key).
+
+    Given: 3 настройки в двух категориях
+    When: Проходим страницы по next_cursor
+    Then: Порядок совпадает с page/page_size, pages без total не считается
+    """
+    settings = [
+        {"key": "b_key", "value": "1", "value_type": "int", "category": "ai"},
+        {"key": "a_key", "value": "2", "value_type": "int", "category": "ai"},
+        {"key": "budget", "value": "3", "value_type": "int", "category": "financial"},
+    ]
+    for setting in settings:
+        client.post("/api/v1/settings", json=setting)
+
+    first = client.get("/api/v1/settings?page_size=2").json()
+    assert [s["key"] for s in first["settings"]] == ["a_key", "b_key"]
+    assert first["pages"] == 2
+
+    second = client.get(f"/api/v1/settings?page_size=2&cursor={first['next_cursor']}").json()
+    assert [s["key"] for s in second["settings"]] == ["budget"]
+    assert second["has_more"] is False
+    assert second["pages"] is None
+
+    response = client.get("/api/v1/settings?cursor=%%%")
+    assert response.status_code == 400
+
+    response = client.get(f"/api/v1/settings?cursor={encode_cursor(['ai', 123])}")
+    assert response.status_code == 400
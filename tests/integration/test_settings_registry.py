@@ -0,0 +1,71 @@
+"""
+Интеграционные тесты реестра настроек (кэш в процессе, LISTEN/NOTIFY)
+"""
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import delete
+
+from app.models.setting import Setting
+from app.services.ai_analyst import AIAnalystService
+from app.services.settings_registry import SettingsRegistry, settings_registry
+from app.services.weekly_reports import WeeklyReportsService
+from tests.conftest import TEST_DATABASE_URL, TestingSessionLocal
+
+
+def _add_settings(db_session) -> None:
+    db_session.add_all([
+        Setting(key="reports_enabled", value="true", value_type="bool", category="operational"),
+        Setting(key="reports_email", value="owner@deepcalm.local", value_type="string", category="operational"),
+        Setting(key="min_roas_threshold", value="2.5", value_type="float", category="financial"),
+    ])
+    db_session.commit()
+
+
+def test_services_share_typed_registry(db_session, query_counter):
+    _add_settings(db_session)
+
+    query_counter.reset()
+    reports = WeeklyReportsService(db_session)
+    WeeklyReportsService(db_session)
+    AIAnalystService(db_session)
+
+    assert query_counter.count == 1
+    assert reports.is_reports_enabled() is True
+    assert reports.get_reports_email() == "owner@deepcalm.local"
+    assert reports.ai_analyst._get_financial_setting("min_roas_threshold", 2.0) == 2.5
+
+
+def test_update_through_api_invalidates_registry(client: TestClient, db_session):
+    _add_settings(db_session)
+    assert client.get("/api/v1/settings/min_roas_threshold/value").json()["value"] == 2.5
+
+    response = client.put("/api/v1/settings/min_roas_threshold", json={"value": "3.0"})
+
+    assert response.status_code == 200
+    assert settings_registry.cached() is None
+    assert client.get("/api/v1/settings/min_roas_threshold/value").json()["value"] == 3.0
+
+
+def test_notify_invalidates_other_process_registry():
+    registry = SettingsRegistry(TEST_DATABASE_URL)
+    registry.start()
+    session = TestingSessionLocal()
+    try:
+        time.sleep(0.5)  # LISTEN установлен
+        registry.values(session)
+        session.rollback()
+        assert registry.cached() is not None
+
+        session.add(Setting(key="notify_probe", value="1", value_type="int", category="alerts"))
+        session.commit()
+
+        deadline = time.monotonic() + 1.0
+        while registry.cached() is not None and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert registry.cached() is None
+    finally:
+        session.execute(delete(Setting).where(Setting.key == "notify_probe"))
+        session.commit()
+        session.close()
+        registry.stop()
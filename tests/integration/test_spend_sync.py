@@ -0,0 +1,143 @@
+"""
+Интеграционные тесты загрузки расхода (sync_spend → spend_daily)
+"""
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core import events
+from app.integrations.yandex_direct_reports import YandexDirectReportsClient
+from app.models.campaign import Campaign
+from app.models.mart import MartCampaignDaily
+from app.models.placement import Placement
+from app.models.spend import SpendDaily
+from app.services.analytics_service import AnalyticsService
+from app.services.marts import MartsService
+from app.services.scheduler import DeepCalmScheduler
+from app.services.spend import SpendService
+from scripts.direct_reports_stub import start_stub
+
+DATE_FROM = date(2025, 10, 1)
+DATE_TO = date(2025, 10, 3)
+
+
+@pytest.fixture
+def reports_stub():
+    server = start_stub([501, 502, 503])
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def spend_events():
+    received = []
+
+    def handler(event_name, payload):
+        received.append(payload)
+
+    events.subscribe(events.SPEND_REPORTED, handler)
+    yield received
+    events.unsubscribe(events.SPEND_REPORTED, handler)
+
+
+def _service(db_session: Session, server, batch_size: int = 4) -> SpendService:
+    client = YandexDirectReportsClient(token="stub", url=server.url)
+    return SpendService(db_session, reports_client=client, batch_size=batch_size)
+
+
+def _campaign_with_placement(db_session: Session, external_campaign_id: str) -> Campaign:
+    campaign = Campaign(
+        title="Расход из Директа",
+        sku="RELAX-60",
+        budget_rub=20000,
+        target_cac_rub=800,
+        target_roas=3.0,
+        channels=["direct"],
+        status="active",
+        ab_test_enabled=False
+    )
+    db_session.add(campaign)
+    db_session.flush()
+    db_session.add(Placement(
+        campaign_id=campaign.id,
+        channel_code="direct",
+        external_campaign_id=external_campaign_id,
+        status="active",
+        published_at=datetime(2025, 10, 1, 9, tzinfo=timezone.utc)
+    ))
+    db_session.commit()
+    return campaign
+
+
+def test_sync_upserts_report_in_batches(db_session: Session, reports_stub, spend_events):
+    result = _service(db_session, reports_stub).sync_direct_spend(DATE_FROM, DATE_TO)
+
+    assert result["rows"] == 9
+    assert result["batches"] == 3
+    assert db_session.query(func.count()).select_from(SpendDaily).scalar() == 9
+
+    total = db_session.query(func.sum(SpendDaily.spend_rub)).scalar()
+    assert Decimal(str(result["spend_rub"])) == total
+
+    assert len(spend_events) == 9
+    assert {event["campaign"] for event in spend_events} == {"501", "502", "503"}
+    assert all(event["channel"] == "direct" and event["spend"] >= 0 for event in spend_events)
+    assert spend_events[0]["date"] == "2025-10-01"
+
+
+def test_sync_is_idempotent(db_session: Session, reports_stub):
+    service = _service(db_session, reports_stub)
+    service.sync_direct_spend(DATE_FROM, DATE_TO)
+
+    row = db_session.get(SpendDaily, ("direct", "501", DATE_FROM))
+    row.spend_rub = Decimal("0.01")
+    db_session.commit()
+
+    service.sync_direct_spend(DATE_FROM, DATE_TO)
+    db_session.expire_all()
+
+    assert db_session.query(func.count()).select_from(SpendDaily).scalar() == 9
+    assert db_session.get(SpendDaily, ("direct", "501", DATE_FROM)).spend_rub != Decimal("0.01")
+
+
+def test_sync_links_spend_to_campaign_by_placement(db_session: Session, reports_stub):
+    campaign = _campaign_with_placement(db_session, "502")
+    campaign_id = campaign.id
+
+    result = _service(db_session, reports_stub).sync_direct_spend(DATE_FROM, DATE_TO)
+
+    assert result["mapped"] == 3
+    linked = db_session.query(SpendDaily).filter(SpendDaily.campaign_id == campaign_id).all()
+    assert {row.external_campaign_id for row in linked} == {"502"}
+
+
+def test_analytics_and_mart_use_synced_spend(db_session: Session, reports_stub):
+    campaign = _campaign_with_placement(db_session, "503")
+    campaign_id = campaign.id
+
+    _service(db_session, reports_stub).sync_direct_spend(DATE_FROM, DATE_TO)
+
+    spend, clicks = db_session.query(
+        func.sum(SpendDaily.spend_rub), func.sum(SpendDaily.clicks)
+    ).filter(SpendDaily.campaign_id == campaign_id).one()
+
+    result = AnalyticsService(db_session).get_campaign_metrics(campaign_id)
+    assert result["metrics"].spent_rub == float(spend)
+    assert result["metrics"].clicks == clicks
+    assert result["channels"][0].spent_rub == float(spend)
+
+    MartsService(db_session).refresh_campaigns_daily(full=True)
+    mart_spend = db_session.query(func.sum(MartCampaignDaily.spend_rub)).filter(
+        MartCampaignDaily.campaign_id == campaign_id
+    ).scalar()
+    assert mart_spend == spend
+
+
+def test_scheduler_registers_sync_spend_job():
+    job = DeepCalmScheduler().scheduler.get_job("sync_spend")
+
+    assert job is not None
+    assert job.max_instances == 1
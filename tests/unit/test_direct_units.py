@@ -0,0 +1,146 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+from app.integrations.direct_units import (
+    BACKGROUND,
+    INTERACTIVE,
+    AdaptiveRateLimiter,
+    DirectUnits,
+    DirectUnitsExhausted,
+    UnitsTracker,
+    background_calls,
+    current_priority,
+    parse_units_header,
+)
+from app.integrations.yandex_direct import YandexDirectClient, YandexDirectError
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _limiter(tracker: UnitsTracker = None, clock=time.monotonic, **overrides) -> AdaptiveRateLimiter:
+    params = dict(rate_per_second=10.0, burst=2, slowdown_fraction=0.2, background_reserve=0.1)
+    params.update(overrides)
+    return AdaptiveRateLimiter(tracker or UnitsTracker(), clock=clock, **params)
+
+
+def test_parse_units_header():
+    assert parse_units_header("10/20828/64000") == DirectUnits(spent=10, remaining=20828, daily_limit=64000)
+    assert parse_units_header(None) is None
+    assert parse_units_header("garbage") is None
+
+
+def test_bucket_spends_burst_then_waits_for_refill():
+    clock = _Clock()
+    limiter = _limiter(clock=clock)
+
+    assert limiter._reserve("client", INTERACTIVE) == 0
+    assert limiter._reserve("client", INTERACTIVE) == 0
+    assert limiter._reserve("client", INTERACTIVE) == pytest.approx(0.1)
+
+    clock.now = 0.1
+    assert limiter._reserve("client", INTERACTIVE) == 0
+    # Корзины независимы по логину
+    assert limiter._reserve("other", INTERACTIVE) == 0
+
+
+def test_rate_slows_down_with_remaining_budget():
+    tracker = UnitsTracker()
+    limiter = _limiter(tracker)
+
+    tracker.record("client", DirectUnits(spent=10, remaining=50000, daily_limit=64000))
+    assert limiter.rate("client") == 10.0
+
+    tracker.record("client", DirectUnits(spent=10, remaining=6400, daily_limit=64000))
+    assert limiter.rate("client") == pytest.approx(5.0)
+
+    tracker.record("client", DirectUnits(spent=10, remaining=0, daily_limit=64000))
+    with pytest.raises(DirectUnitsExhausted):
+        limiter.acquire("client")
+
+
+def test_background_calls_keep_interactive_reserve():
+    tracker = UnitsTracker()
+    limiter = _limiter(tracker)
+    tracker.record("client", DirectUnits(spent=10, remaining=3000, daily_limit=64000))
+
+    assert limiter.acquire("client", INTERACTIVE) == 0
+    with background_calls():
+        assert current_priority() == BACKGROUND
+        with pytest.raises(DirectUnitsExhausted):
+            limiter.acquire("client")
+    assert current_priority() == INTERACTIVE
+
+
+def test_background_waits_behind_interactive():
+    limiter = _limiter(rate_per_second=20.0, burst=1)
+    order = []
+    limiter.acquire("client")  # корзина пуста
+
+    def call(priority: str) -> None:
+        limiter.acquire("client", priority)
+        order.append(priority)
+
+    interactive = threading.Thread(target=call, args=(INTERACTIVE,))
+    interactive.start()
+    time.sleep(0.01)
+    background = threading.Thread(target=call, args=(BACKGROUND,))
+    background.start()
+    interactive.join(2)
+    background.join(2)
+
+    assert order == [INTERACTIVE, BACKGROUND]
+
+
+def test_client_records_units_and_stops_when_exhausted():
+    tracker = UnitsTracker()
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(
+            200,
+            json={"result": {"Campaigns": []}},
+            headers={"Units": "10/0/64000", "Units-Used-Login": "client"}
+        )
+
+    client = YandexDirectClient(
+        token="token",
+        login="client",
+        http_client=httpx.Client(transport=httpx.MockTransport(handler)),
+        limiter=_limiter(tracker)
+    )
+
+    client.get_campaigns()
+    assert client.units_snapshot()["client"]["remaining"] == 0
+
+    with pytest.raises(YandexDirectError):
+        client.get_campaigns()
+    assert len(calls) == 1
+
+
+def test_exhausted_units_expire_and_let_a_probe_through():
+    now = [datetime(2025, 10, 1, 12, tzinfo=timezone.utc)]
+    tracker = UnitsTracker(ttl_seconds=900, clock=lambda: now[0])
+    limiter = _limiter(tracker)
+
+    tracker.record("client", DirectUnits(spent=10, remaining=0, daily_limit=64000))
+    with pytest.raises(DirectUnitsExhausted):
+        limiter._reserve("client", INTERACTIVE)
+    with pytest.raises(DirectUnitsExhausted):
+        limiter._reserve("client", BACKGROUND)
+
+    now[0] += timedelta(seconds=901)
+    assert tracker.get("client") is None
+    assert tracker.snapshot()["client"]["stale"] is True
+    assert limiter._reserve("client", BACKGROUND) == 0
+    assert limiter.rate("client") == 10.0
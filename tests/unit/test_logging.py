@@ -0,0 +1,99 @@
+import logging
+import queue
+
+import structlog
+
+from app.core.logging import (
+    MAX_DEPTH,
+    MAX_ITEMS,
+    MAX_STRING_LENGTH,
+    DroppingQueueHandler,
+    EventSampler,
+    mask_pii,
+)
+
+
+def _mask(**event):
+    return mask_pii(None, "info", event)
+
+
+def test_masks_phone_and_email_in_strings():
+    result = _mask(event="lead_created", phone="+79991234567", email="vasya@example.com", text="тел. +79991234567")
+
+    assert result["phone"] == "+7999***4567"
+    assert result["email"] == "v***a@example.com"
+    assert result["text"] == "тел. +7999***4567"
+
+
+def test_masks_nested_values_without_mutating_caller_objects():
+    payload = {"params": {"contacts": [{"phone": "+79991234567"}, {"email": "anna@example.com"}]}, "method": "add"}
+
+    result = _mask(event="yandex_direct_request", payload=payload)
+
+    assert result["payload"]["params"]["contacts"] == [{"phone": "+7999***4567"}, {"email": "a***a@example.com"}]
+    assert payload["params"]["contacts"][0]["phone"] == "+79991234567"
+
+
+def test_unchanged_structures_are_not_copied():
+    response_data = {"result": {"Campaigns": [{"Id": 1, "Name": "Релакс"}]}}
+
+    assert _mask(event="yandex_direct_response", response_data=response_data)["response_data"] is response_data
+
+
+def test_caps_depth_size_and_string_length():
+    deep = current = {}
+    for _ in range(MAX_DEPTH + 2):
+        current["child"] = {}
+        current = current["child"]
+
+    result = _mask(
+        event="big",
+        deep=deep,
+        items=list(range(MAX_ITEMS + 5)),
+        body="x" * (MAX_STRING_LENGTH + 10),
+    )
+
+    level = result["deep"]
+    for _ in range(MAX_DEPTH - 1):
+        level = level["child"]
+    assert isinstance(level["child"], str)
+    assert len(result["items"]) == MAX_ITEMS + 1
+    assert result["items"][-1] == "…+5 items"
+    assert result["body"].endswith("…(+10)")
+
+
+def test_sampler_limits_rate_of_hot_info_events():
+    now = [0.0]
+    sampler = EventSampler(sample_rates={"debug_noise": 0.0}, rate_limits={"hot": 2}, clock=lambda: now[0])
+
+    def passes(method: str, event: str) -> bool:
+        try:
+            sampler(None, method, {"event": event})
+        except structlog.DropEvent:
+            return False
+        return True
+
+    assert [passes("info", "hot") for _ in range(3)] == [True, True, False]
+    assert passes("warning", "hot")  # предупреждения не ограничиваются
+    now[0] = 0.5
+    assert passes("info", "hot")
+    assert not passes("debug", "debug_noise")
+    assert passes("info", "other")
+    assert sampler.dropped == {"hot": 1, "debug_noise": 1}
+
+
+def test_queue_handler_drops_instead_of_blocking():
+    log_queue = queue.Queue(maxsize=2)
+    handler = DroppingQueueHandler(log_queue)
+    record = logging.LogRecord("x", logging.INFO, __file__, 0, "{}", None, None)
+
+    for _ in range(5):
+        handler.emit(record)
+    assert handler.dropped == 3
+
+    log_queue.get_nowait()
+    log_queue.get_nowait()
+    handler.emit(record)
+
+    assert "log_records_dropped" in log_queue.get_nowait().getMessage()
+    assert log_queue.qsize() == 1
@@ -0,0 +1,62 @@
+import pytest
+from prometheus_client import REGISTRY
+
+from app.core.cache import ResponseCache
+from app.core.metrics import track_job
+from app.integrations.resilience import ChannelResilience, RetryPolicy
+
+
+def _sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+class _Flaky(Exception):
+    retryable = True
+
+
+def test_track_job_records_success_and_failure():
+    failures = _sample("dc_scheduler_job_failures_total", job="test_job")
+
+    with track_job("test_job"):
+        pass
+    assert _sample("dc_scheduler_job_last_success_timestamp_seconds", job="test_job") > 0
+
+    with pytest.raises(RuntimeError):
+        with track_job("test_job"):
+            raise RuntimeError("boom")
+    assert _sample("dc_scheduler_job_failures_total", job="test_job") == failures + 1
+    assert _sample("dc_scheduler_job_duration_seconds_count", job="test_job") == 2
+
+
+def test_channel_calls_record_latency_and_errors():
+    resilience = ChannelResilience(
+        RetryPolicy(attempts=2, base_delay=0.0, max_delay=0.0),
+        window_seconds=300,
+        error_rate_threshold=0.5,
+        min_calls=100,
+        open_seconds=60
+    )
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) == 1:
+            raise _Flaky("503")
+        return "ok"
+
+    errors = _sample("dc_integration_errors_total", channel="metrics_test", kind="retryable")
+    count = _sample("dc_integration_call_duration_seconds_count", channel="metrics_test")
+
+    assert resilience.call("metrics_test", flaky) == "ok"
+    assert _sample("dc_integration_errors_total", channel="metrics_test", kind="retryable") == errors + 1
+    assert _sample("dc_integration_call_duration_seconds_count", channel="metrics_test") == count + 2
+
+
+def test_cache_counts_hits_and_misses():
+    cache = ResponseCache(redis_url=None, name="metrics_test")
+
+    cache.get_or_set("key", ["tag"], lambda: 1)
+    cache.get_or_set("key", ["tag"], lambda: 1)
+
+    assert _sample("dc_cache_requests_total", cache="metrics_test", result="miss") == 1
+    assert _sample("dc_cache_requests_total", cache="metrics_test", result="local_hit") == 1
@@ -0,0 +1,170 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.integrations.resilience import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    ChannelResilience,
+    CircuitOpenError,
+    RetryPolicy,
+)
+from app.integrations.yandex_direct import YandexDirectClient, YandexDirectError
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class _Flaky(Exception):
+    retryable = True
+
+
+def _resilience(clock=None, attempts: int = 3) -> ChannelResilience:
+    return ChannelResilience(
+        RetryPolicy(attempts=attempts, base_delay=0.0, max_delay=0.0),
+        window_seconds=300,
+        error_rate_threshold=0.2,
+        min_calls=5,
+        open_seconds=1800,
+        clock=clock or _Clock()
+    )
+
+
+def test_retries_retryable_errors_until_success():
+    resilience = _resilience()
+    calls = []
+
+    def flaky() -> str:
+        calls.append(1)
+        if len(calls) < 3:
+            raise _Flaky("503")
+        return "ok"
+
+    assert resilience.call("vk", flaky) == "ok"
+    assert len(calls) == 3
+
+
+def test_non_retryable_error_is_raised_at_once():
+    resilience = _resilience()
+    calls = []
+
+    def invalid() -> None:
+        calls.append(1)
+        raise ValueError("400")
+
+    with pytest.raises(ValueError):
+        resilience.call("vk", invalid)
+    assert len(calls) == 1
+    assert resilience.breaker("vk").snapshot()["error_rate"] == 0
+
+
+def test_breaker_opens_on_error_rate_and_recovers_after_probe():
+    clock = _Clock()
+    resilience = _resilience(clock, attempts=1)
+    breaker = resilience.breaker("avito")
+
+    for _ in range(4):
+        resilience.call("avito", lambda: "ok")
+    with pytest.raises(_Flaky):
+        resilience.call("avito", _raise_flaky)
+    assert breaker.state == CLOSED  # 1 из 5 — ровно порог
+
+    with pytest.raises(_Flaky):
+        resilience.call("avito", _raise_flaky)
+    assert breaker.state == OPEN
+    assert resilience.paused_until("avito") is not None
+
+    calls = []
+    with pytest.raises(CircuitOpenError):
+        resilience.call("avito", lambda: calls.append(1))
+    assert calls == []
+
+    clock.now = 1800
+    assert breaker.state == HALF_OPEN
+    assert resilience.call("avito", lambda: "probe") == "probe"
+    assert breaker.state == CLOSED
+    assert resilience.paused_until("avito") is None
+
+
+def test_failed_probe_reopens_breaker():
+    clock = _Clock()
+    resilience = _resilience(clock, attempts=1)
+    breaker = resilience.breaker("vk")
+    for _ in range(5):
+        breaker.record(failed=True)
+    assert breaker.state == OPEN
+
+    clock.now = 1800
+    with pytest.raises(_Flaky):
+        resilience.call("vk", _raise_flaky)
+    assert breaker.state == OPEN
+
+
+def test_direct_client_retries_5xx_and_api_server_errors():
+    responses = [
+        httpx.Response(502, json={}),
+        httpx.Response(200, json={"error": {"error_code": 1000, "error_string": "Internal server error"}}),
+        httpx.Response(200, json={"result": {"Campaigns": [{"Id": 1}]}}),
+    ]
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return responses.pop(0)
+
+    client = YandexDirectClient(
+        token="token",
+        async_http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        resilience=_resilience()
+    )
+
+    assert asyncio.run(client.aget_campaigns()) == [{"Id": 1}]
+    assert responses == []
+
+
+def test_direct_add_is_not_retried_after_request_was_sent():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        raise httpx.ReadTimeout("timeout", request=request)
+
+    client = YandexDirectClient(
+        token="token",
+        http_client=httpx.Client(transport=httpx.MockTransport(handler)),
+        resilience=_resilience()
+    )
+
+    with pytest.raises(YandexDirectError):
+        client.create_campaign(title="Релакс", body="", image_url="", budget_rub=1000)
+    assert len(requests) == 1
+    # Таймаут всё равно учитывается автоматом канала
+    assert client.resilience.breaker("direct").snapshot()["error_rate"] == 1
+
+
+def test_direct_add_is_retried_when_connection_failed():
+    attempts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        attempts.append(request)
+        if len(attempts) == 1:
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.Response(200, json={"result": {"AddResults": [{"Id": 42}]}})
+
+    client = YandexDirectClient(
+        token="token",
+        http_client=httpx.Client(transport=httpx.MockTransport(handler)),
+        resilience=_resilience()
+    )
+
+    assert client.create_campaign(title="Релакс", body="", image_url="", budget_rub=1000) == "42"
+    assert len(attempts) == 2
+
+
+def _raise_flaky() -> None:
+    raise _Flaky("503")
@@ -0,0 +1,127 @@
+import asyncio
+import threading
+import time
+
+from app.core.cache import ResponseCache
+
+
+def _local_cache(**kwargs) -> ResponseCache:
+    return ResponseCache(redis_url=None, **kwargs)
+
+
+def test_get_or_set_caches_value():
+    cache = _local_cache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"value": len(calls)}
+
+    assert cache.get_or_set("key", ["tag"], compute) == {"value": 1}
+    assert cache.get_or_set("key", ["tag"], compute) == {"value": 1}
+    assert len(calls) == 1
+
+
+def test_invalidate_by_tag_drops_only_tagged_keys():
+    cache = _local_cache()
+    cache.get_or_set("a", ["campaign:1"], lambda: "a1")
+    cache.get_or_set("b", ["campaign:2"], lambda: "b1")
+
+    cache.invalidate("campaign:1")
+
+    assert cache.get_or_set("a", ["campaign:1"], lambda: "a2") == "a2"
+    assert cache.get_or_set("b", ["campaign:2"], lambda: "b2") == "b1"
+
+
+def test_local_lru_evicts_oldest_and_expires():
+    cache = _local_cache(local_maxsize=2, local_ttl_seconds=1)
+    cache.get_or_set("a", [], lambda: 1)
+    cache.get_or_set("b", [], lambda: 2)
+    cache.get_or_set("a", [], lambda: 0)  # a — самый свежий
+    cache.get_or_set("c", [], lambda: 3)  # вытесняет b
+
+    assert cache.get_or_set("a", [], lambda: "new") == 1
+    assert cache.get_or_set("b", [], lambda: "new") == "new"
+
+    cache._local["a"] = (time.monotonic() - 1, (), 1)
+    assert cache.get_or_set("a", [], lambda: "expired") == "expired"
+
+
+def test_single_flight_computes_once_under_concurrency():
+    cache = _local_cache()
+    calls = []
+    started = threading.Event()
+
+    def compute():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        return "value"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_set("key", [], compute)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["value"] * 8
+    assert len(calls) == 1
+    assert cache._flights == {}
+
+
+def test_invalidation_during_compute_is_not_cached():
+    cache = _local_cache()
+
+    def compute():
+        cache.invalidate("tag")
+        return "stale"
+
+    assert cache.get_or_set("key", ["tag"], compute) == "stale"
+    assert cache.get_or_set("key", ["tag"], lambda: "fresh") == "fresh"
+
+
+def test_unavailable_redis_falls_back_to_local_cache():
+    cache = ResponseCache(redis_url="redis://127.0.0.1:1/0", redis_timeout_seconds=0.05)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return "value"
+
+    assert cache.get_or_set("key", ["tag"], compute) == "value"
+    assert cache.get_or_set("key", ["tag"], compute) == "value"
+    cache.invalidate("tag")
+
+    assert len(calls) == 1
+    assert cache._client() is None  # ждём REDIS_RETRY_SECONDS до новой попытки
+
+
+def test_disabled_cache_always_computes():
+    cache = _local_cache(enabled=False)
+    calls = []
+
+    cache.get_or_set("key", [], lambda: calls.append(1))
+    cache.get_or_set("key", [], lambda: calls.append(1))
+
+    assert len(calls) == 2
+
+
+def test_async_single_flight_computes_once():
+    cache = _local_cache()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "value"
+
+    async def run():
+        return await asyncio.gather(*(cache.aget_or_set("key", ["tag"], compute) for _ in range(20)))
+
+    assert asyncio.run(run()) == ["value"] * 20
+    assert len(calls) == 1
+    assert cache._async_flights == {}
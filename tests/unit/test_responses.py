@@ -0,0 +1,49 @@
+import json
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.responses import FastJSONResponse, json_response
+from app.schemas.campaign import CampaignListResponse
+
+
+def _campaign() -> dict:
+    now = datetime(2025, 10, 11, 9, 30, tzinfo=timezone.utc)
+    return {
+        "id": uuid.uuid4(),
+        "title": "Запуск сентябрь — Релакс",
+        "sku": "RELAX-60",
+        "budget_rub": 15000,
+        "channels": ["vk", "direct"],
+        "status": "active",
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def test_dict_payload_matches_jsonable_encoder():
+    payload = {
+        "id": uuid.uuid4(),
+        "at": datetime(2025, 10, 11, 9, 30, tzinfo=timezone.utc),
+        "revenue": Decimal("12500"),
+        "spend": Decimal("3120.50"),
+        "items": [{"roas": 4.0, "title": "Релакс"}],
+    }
+
+    body = json.loads(FastJSONResponse(payload).body)
+
+    assert body == jsonable_encoder(payload)
+    assert body["revenue"] == 12500 and body["spend"] == 3120.5
+
+
+def test_model_payload_matches_response_model_output():
+    model = CampaignListResponse(items=[_campaign()], total=1, page=1, page_size=20)
+
+    response = json_response(model, status_code=200)
+
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == model.model_dump(mode="json")
+    # Модели внутри dict/list — через тот же сериализатор
+    assert json.loads(FastJSONResponse([model]).body) == [model.model_dump(mode="json")]
@@ -1,10 +1,13 @@
+import asyncio
 import json
 from datetime import date
+from types import SimpleNamespace
 from typing import Any, Dict
 
 import httpx
 import pytest
 
+from app.integrations.http import HttpClients, http_clients
 from app.integrations.yandex_direct import YandexDirectClient, YandexDirectError
 
 
@@ -14,6 +17,11 @@ class _FakeResponse(httpx.Response):
         super().__init__(status_code, json=payload, request=request)
 
 
+def _patch_post(monkeypatch, fake_post) -> None:
+    """Подменяет общий sync-клиент процесса"""
+    monkeypatch.setattr(http_clients, "sync_client", lambda: SimpleNamespace(post=fake_post))
+
+
 def test_create_campaign_mock_mode(monkeypatch):
     client = YandexDirectClient(token=None, login=None)
     result = client.create_campaign(title="Test", body="", image_url="", budget_rub=100)
@@ -29,7 +37,7 @@ def test_create_campaign_real(monkeypatch):
         captured["json"] = json
         return _FakeResponse(200, {"result": {"AddResults": [{"Id": 987654321}]}} , url)
 
-    monkeypatch.setattr("app.integrations.yandex_direct.httpx.post", fake_post)
+    _patch_post(monkeypatch, fake_post)
 
     client = YandexDirectClient(token="token", login="client", sandbox=True)
     campaign_id = client.create_campaign(title="Demo", body="", image_url="", budget_rub=50)
@@ -51,7 +59,7 @@ def test_create_campaign_error(monkeypatch):
     def fake_post(url: str, headers: Dict[str, Any], json: Dict[str, Any], timeout: float):
         return _FakeResponse(400, {"error": {"error_code": 91, "error_detail": "Bad Request"}}, url)
 
-    monkeypatch.setattr("app.integrations.yandex_direct.httpx.post", fake_post)
+    _patch_post(monkeypatch, fake_post)
 
     client = YandexDirectClient(token="token", login="client")
 
@@ -75,7 +83,7 @@ def test_budget_calculation_limits(monkeypatch):
         captured["json"] = json
         return _FakeResponse(200, {"result": {"AddResults": [{"Id": 123}]}}, url)
 
-    monkeypatch.setattr("app.integrations.yandex_direct.httpx.post", fake_post)
+    _patch_post(monkeypatch, fake_post)
     client = YandexDirectClient(token="token", sandbox=True)
 
     # Маленький бюджет: 50 руб -> daily = max(50/30, 300) = 300
@@ -92,3 +100,142 @@ def test_budget_calculation_limits(monkeypatch):
     client.create_campaign(title="Medium", body="", image_url="", budget_rub=15000)
     campaign = captured["json"]["params"]["Campaigns"][0]
     assert campaign["DailyBudget"]["Amount"] == 500000000  # 500 * 1000000
+
+
+def test_async_methods_use_async_transport():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(json.loads(request.content))
+        if requests[-1]["method"] == "get":
+            return httpx.Response(200, json={"result": {"Campaigns": [{"Id": 1}]}})
+        return httpx.Response(200, json={"result": {"AddResults": [{"Id": 42}]}})
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as transport:
+            client = YandexDirectClient(token="token", async_http_client=transport)
+            campaign_id = await client.acreate_campaign(title="Demo", body="", image_url="", budget_rub=50)
+            health = await client.ahealth_check()
+        return campaign_id, health
+
+    campaign_id, health = asyncio.run(run())
+
+    assert campaign_id == "42"
+    assert health["status"] == "ok"
+    assert health["campaigns_count"] == 1
+    assert [r["method"] for r in requests] == ["add", "get"]
+
+
+def test_async_mock_mode():
+    client = YandexDirectClient(token=None, login=None)
+
+    async def run():
+        return (
+            await client.acreate_campaign(title="T", body="", image_url="", budget_rub=1),
+            await client.apause_campaign("1"),
+            await client.ahealth_check(),
+        )
+
+    campaign_id, paused, health = asyncio.run(run())
+
+    assert campaign_id.startswith("direct_camp_")
+    assert paused == {"status": "paused"}
+    assert health["status"] == "mock_mode"
+
+
+def test_shared_http_clients_are_reused_and_closed():
+    clients = HttpClients()
+
+    sync_client = clients.sync_client()
+    assert clients.sync_client() is sync_client
+
+    async def run():
+        async_client = clients.async_client()
+        assert clients.async_client() is async_client
+        await clients.aclose()
+        return async_client
+
+    async_client = asyncio.run(run())
+
+    assert sync_client.is_closed
+    assert async_client.is_closed
+    assert clients.sync_client() is not sync_client
+
+
+def _batch_transport(handler) -> httpx.Client:
+    return httpx.Client(transport=httpx.MockTransport(handler))
+
+
+def test_create_campaigns_chunks_and_maps_item_errors():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        campaigns = json.loads(request.content)["params"]["Campaigns"]
+        calls.append(len(campaigns))
+        results = []
+        for campaign in campaigns:
+            if campaign["Name"] == "bad":
+                results.append({"Errors": [{"Code": 5005, "Message": "Поле задано неверно", "Details": "Name"}]})
+            else:
+                results.append({"Id": int(campaign["Name"].split("-")[1])})
+        return httpx.Response(200, json={"result": {"AddResults": results}})
+
+    client = YandexDirectClient(token="token", http_client=_batch_transport(handler))
+    items = [{"title": f"c-{i}", "budget_rub": 1000} for i in range(23)]
+    items[12] = {"title": "bad", "budget_rub": 1000}
+
+    results = client.create_campaigns(items)
+
+    assert calls == [10, 10, 3]
+    assert len(results) == 23
+    assert results[0].id == "0" and results[22].id == "22"
+    assert not results[12].ok
+    assert results[12].error == "5005: Поле задано неверно (Name)"
+
+
+def test_suspend_campaigns_chunks_ids_and_keeps_order():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        ids = payload["params"]["CampaignIds"]
+        calls.append((payload["method"], len(ids)))
+        results = [
+            {"Id": i} if i != 7 else {"Id": 7, "Errors": [{"Code": 8800, "Message": "Объект не найден"}]}
+            for i in ids
+        ]
+        return httpx.Response(200, json={"result": {"SuspendResults": results}})
+
+    client = YandexDirectClient(token="token", http_client=_batch_transport(handler))
+    ids = [str(i) for i in range(1500)]
+    ids.insert(3, "direct_camp_abc")
+
+    results = client.suspend_campaigns(ids)
+
+    assert calls == [("suspend", 1000), ("suspend", 500)]
+    assert len(results) == 1501
+    assert results[3].error.startswith("Некорректный Id")
+    assert results[8].id == "7" and results[8].error == "8800: Объект не найден"
+    assert all(r.ok for i, r in enumerate(results) if i not in (3, 8))
+
+
+def test_batch_http_error_fails_every_item_of_chunk():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(503, json={})
+
+    client = YandexDirectClient(token="token", http_client=_batch_transport(handler))
+
+    results = client.resume_campaigns(["1", "2"])
+
+    assert [r.id for r in results] == ["1", "2"]
+    assert all("Ошибка HTTP" in r.error for r in results)
+
+
+def test_batch_methods_mock_mode():
+    client = YandexDirectClient(token=None)
+
+    created = client.create_campaigns([{"title": "a", "budget_rub": 1}] * 3)
+    suspended = asyncio.run(client.asuspend_campaigns(["x", "y"]))
+
+    assert all(r.id.startswith("direct_camp_") for r in created)
+    assert [r.id for r in suspended] == ["x", "y"]
@@ -0,0 +1,99 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.core import events
+from app.integrations.yandex_direct import YandexDirectError
+from app.integrations.yandex_direct_reports import YandexDirectReportsClient, parse_spend_report
+from scripts.direct_reports_stub import start_stub
+
+
+def test_parse_spend_report_uses_header_order_and_empty_values():
+    lines = iter([
+        "CampaignId\tDate\tCost\tClicks\tImpressions\tCampaignName",
+        "101\t2025-10-01\t1520.50\t12\t400\tОсень / массаж",
+        "102\t2025-10-01\t--\t--\t0\tБез показов",
+        "",
+        "Total\t\t1520.50\t12\t400\t",
+    ])
+
+    rows = list(parse_spend_report(lines))
+
+    assert [row.external_campaign_id for row in rows] == ["101", "102"]
+    assert rows[0].date == date(2025, 10, 1)
+    assert rows[0].campaign_name == "Осень / массаж"
+    assert rows[0].spend_rub == Decimal("1520.50")
+    assert (rows[0].clicks, rows[0].impressions) == (12, 400)
+    assert (rows[1].spend_rub, rows[1].clicks) == (Decimal("0"), 0)
+
+
+def test_parse_spend_report_is_lazy():
+    def lines():
+        yield "Date\tCampaignId\tCampaignName\tImpressions\tClicks\tCost"
+        yield "2025-10-01\t1\tA\t10\t1\t5.00"
+        raise AssertionError("прочитана лишняя строка")
+
+    rows = parse_spend_report(lines())
+
+    assert next(rows).external_campaign_id == "1"
+
+
+def test_parse_spend_report_requires_columns():
+    with pytest.raises(YandexDirectError):
+        list(parse_spend_report(["Date\tCampaignId\tCost", "2025-10-01\t1\t5"]))
+
+
+def test_reports_client_mock_mode_returns_nothing():
+    client = YandexDirectReportsClient(token=None)
+
+    assert list(client.iter_campaign_spend(date(2025, 10, 1), date(2025, 10, 2))) == []
+
+
+def test_reports_client_waits_for_offline_report():
+    server = start_stub([11, 12], pending=2, retry_in=0)
+    try:
+        client = YandexDirectReportsClient(token="stub", login="agency-client", url=server.url)
+        rows = list(client.iter_campaign_spend(date(2025, 10, 1), date(2025, 10, 3)))
+    finally:
+        server.shutdown()
+
+    assert len(rows) == 6
+    assert {row.external_campaign_id for row in rows} == {"11", "12"}
+    assert len(server.requests) == 3
+
+    headers = server.requests[-1]["headers"]
+    assert headers["processingMode"] == "auto"
+    assert headers["returnMoneyInMicros"] == "false"
+    assert headers["Client-Login"] == "agency-client"
+    criteria = server.requests[-1]["body"]["params"]["SelectionCriteria"]
+    assert criteria == {"DateFrom": "2025-10-01", "DateTo": "2025-10-03"}
+
+
+def test_reports_client_gives_up_after_max_wait():
+    server = start_stub([1], pending=10, retry_in=5)
+    try:
+        client = YandexDirectReportsClient(token="stub", url=server.url, max_wait_seconds=1)
+        with pytest.raises(YandexDirectError):
+            list(client.iter_campaign_spend(date(2025, 10, 1), date(2025, 10, 1)))
+    finally:
+        server.shutdown()
+
+
+def test_emit_validates_required_fields_and_calls_subscribers():
+    received = []
+
+    def handler(event_name, payload):
+        received.append(payload)
+
+    events.subscribe(events.SPEND_REPORTED, handler)
+    try:
+        with pytest.raises(events.EventValidationError):
+            events.emit(events.SPEND_REPORTED, {"channel": "direct", "campaign": "1"})
+
+        payload = {"channel": "direct", "campaign": "1", "date": "2025-10-01", "spend": 10.5}
+        events.emit(events.SPEND_REPORTED, payload)
+    finally:
+        events.unsubscribe(events.SPEND_REPORTED, handler)
+
+    assert received == [payload]
@@ -0,0 +1,126 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import httpx
+import pytest
+
+from app.core.phones import normalize_phone
+from app.integrations.yclients import YClientsClient, YClientsError, parse_record
+
+
+def _record(record_id: int, **overrides):
+    record = {
+        "id": record_id,
+        "datetime": "2025-10-02T10:00:00+03:00",
+        "last_change_date": "2025-10-01T12:00:00+0300",
+        "attendance": 2,
+        "deleted": False,
+        "paid_full": 0,
+        "client": {"id": 70000 + record_id, "phone": f"7999{record_id:07d}"},
+        "services": [{"title": "Релакс-массаж 60 мин", "cost": 3500}],
+    }
+    record.update(overrides)
+    return record
+
+
+class _FakeYClients:
+    """Отвечает как GET /records/{company_id} и считает параллельные запросы"""
+
+    def __init__(self, total: int) -> None:
+        self.records = [_record(index) for index in range(1, total + 1)]
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.pages = []
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+
+        page, count = int(request.url.params["page"]), int(request.url.params["count"])
+        self.pages.append(page)
+        data = self.records[(page - 1) * count:page * count]
+        return httpx.Response(200, json={"success": True, "data": data, "meta": {"total_count": len(self.records)}})
+
+
+def _client(handler, **kwargs) -> YClientsClient:
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return YClientsClient(token="partner", user_token="user", company_id=42, http_client=http_client, **kwargs)
+
+
+async def _collect(client: YClientsClient, **kwargs):
+    return [page async for page in client.iter_record_pages(**kwargs)]
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("+7 (999) 123-45-67", "+79991234567"),
+    ("89991234567", "+79991234567"),
+    ("9991234567", "+79991234567"),
+    ("12345", None),
+    (None, None),
+])
+def test_normalize_phone(raw, expected):
+    assert normalize_phone(raw) == expected
+
+
+def test_parse_record_maps_status_price_and_phone():
+    record = parse_record(_record(
+        5,
+        paid_full=1,
+        attendance=1,
+        services=[{"title": "Массаж", "cost": 3000}, {"title": "Чай", "cost": 250.5}],
+    ))
+
+    assert record.yclients_id == 5
+    assert record.phone == "+79990000005"
+    assert record.status == "completed"
+    assert record.price_rub == Decimal("3250.5")
+    assert record.paid is True
+    assert record.sku == "Массаж"
+    assert record.changed_at == datetime(2025, 10, 1, 12, tzinfo=timezone(timedelta(hours=3)))
+
+    assert parse_record(_record(6, deleted=True)).status == "cancelled"
+
+
+def test_pages_are_fetched_concurrently_with_bound_and_in_order():
+    fake = _FakeYClients(total=95)
+    client = _client(fake.handler, page_size=10, concurrency=3)
+
+    pages = asyncio.run(_collect(client))
+
+    assert [record.yclients_id for page in pages for record in page] == list(range(1, 96))
+    assert len(pages) == 10
+    assert sorted(fake.pages) == list(range(1, 11))
+    assert fake.max_in_flight == 3
+
+
+def test_changed_after_and_auth_headers_are_sent():
+    captured = {}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        captured["params"] = dict(request.url.params)
+        captured["headers"] = request.headers
+        return httpx.Response(200, json={"success": True, "data": [], "meta": {"total_count": 0}})
+
+    changed_after = datetime(2025, 10, 1, 9, tzinfo=timezone.utc)
+    asyncio.run(_collect(_client(handler), changed_after=changed_after))
+
+    assert captured["params"]["changed_after"] == changed_after.isoformat()
+    assert captured["headers"]["Authorization"] == "Bearer partner, User user"
+    assert captured["headers"]["Accept"] == "application/vnd.yclients.v2+json"
+
+
+def test_error_response_raises():
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(401, json={"success": False, "meta": {"message": "Unauthorized"}})
+
+    with pytest.raises(YClientsError) as exc_info:
+        asyncio.run(_collect(_client(handler)))
+
+    assert exc_info.value.payload == {"message": "Unauthorized"}
+
+
+def test_mock_mode_without_token():
+    assert asyncio.run(_collect(YClientsClient(token=None, company_id=42))) == []